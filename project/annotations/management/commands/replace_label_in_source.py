@@ -5,7 +5,7 @@ from tqdm import tqdm
 
 from annotations.models import Annotation
 from jobs.utils import schedule_job
-from labels.models import Label
+from labels.models import Label, label_stats_batch
 from sources.models import Source
 
 User = get_user_model()
@@ -84,7 +84,9 @@ class Command(BaseCommand):
         # Replace the annotations.
         # Must explicitly turn on history creation when RevisionMiddleware is
         # not in effect. (It's only in effect within views.)
-        with revisions.create_revision():
+        # Label stats are updated once at the end, instead of once per
+        # annotation.
+        with revisions.create_revision(), label_stats_batch():
             for annotation in tqdm(annotations, file=self.stderr):
                 annotation.label = new_label
                 annotation.user = user
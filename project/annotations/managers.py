@@ -3,10 +3,15 @@ from typing import Union
 
 from django.conf import settings
 from django.db import models
+from django.db.models import Count, Q
 
 from accounts.utils import get_robot_user, is_robot_user
-from images.models import Image
-from .model_utils import scrambled_sort_hash
+from images.model_utils import bump_image_set_version, ImageSetVersionKinds
+from images.models import Point
+from labels.models import LabelStatsChanges
+from vision_backend.utils import schedule_source_check_on_commit
+from .model_utils import (
+    image_annotation_status_from_counts, scrambled_sort_hash)
 
 
 class AnnotationQuerySet(models.QuerySet):
@@ -38,22 +43,42 @@ class AnnotationQuerySet(models.QuerySet):
             else:
                 break
 
+    def label_stats_removal_changes(self) -> LabelStatsChanges:
+        """
+        LabelStats changes from removing these annotations. This must be
+        called before they're removed, and recorded after.
+        """
+        changes = LabelStatsChanges()
+        label_counts = (
+            self.confirmed().order_by().values('label_id')
+            .annotate(count=Count('pk'))
+            .values_list('label_id', 'count')
+        )
+        for label_id, count in label_counts:
+            changes.remove(label_id, count)
+        return changes
+
     def delete(self):
         """
         Batch-delete Annotations. Note that when this is used,
         Annotation.delete() will not be called for each individual Annotation,
         so we make sure to do the equivalent actions here.
         """
+        from .models import ImageAnnotationInfo
+
         # Get all the images corresponding to these annotations.
-        images = Image.objects.filter(annotation__in=self).distinct()
         # Evaluate the queryset before deleting the annotations.
-        images = list(images)
+        image_ids = list(
+            self.order_by().values_list('image_id', flat=True).distinct())
+        label_stats_changes = self.label_stats_removal_changes()
         # Delete the annotations.
         return_values = super().delete()
 
+        label_stats_changes.record()
+
         # The images' annotation progress info may need updating.
-        for image in images:
-            image.annoinfo.update_annotation_progress_fields()
+        ImageAnnotationInfo.objects.filter(
+            image_id__in=image_ids).update_annotation_progress_fields()
 
         return return_values
 
@@ -62,6 +87,8 @@ class AnnotationQuerySet(models.QuerySet):
         Only use this for annotation creation cases where
         django-reversion isn't needed, since this skips save() signals.
         """
+        from .models import ImageAnnotationInfo
+
         for obj in objs:
             # confirmed field is generally expected to be set here instead of
             # by the caller.
@@ -75,14 +102,106 @@ class AnnotationQuerySet(models.QuerySet):
             anno.scrambled_sort_key = scrambled_sort_hash(anno)
         self.bulk_update(new_annotations, ['scrambled_sort_key'])
 
-        images = Image.objects.filter(
-            annotation__in=new_annotations).distinct()
-        for image in images:
-            image.annoinfo.update_annotation_progress_fields()
+        label_stats_changes = LabelStatsChanges()
+        for anno in new_annotations:
+            anno._saved_label_state = (anno.label_id, anno.confirmed)
+            if anno.confirmed:
+                label_stats_changes.add(
+                    anno.label_id, anno.scrambled_sort_key, anno.pk)
+        label_stats_changes.record()
+
+        ImageAnnotationInfo.objects.filter(
+            image_id__in={anno.image_id for anno in new_annotations},
+        ).update_annotation_progress_fields()
 
         return new_annotations
 
 
+# Each bulk_update() batch is one UPDATE with a CASE per field, which
+# gets slow to plan if it's too long.
+ANNOINFO_BULK_UPDATE_BATCH_SIZE = 1000
+
+
+class ImageAnnotationInfoQuerySet(models.QuerySet):
+
+    def update_annotation_progress_fields(self):
+        """
+        Bulk equivalent of
+        ImageAnnotationInfo.update_annotation_progress_fields(), for when
+        many images' annotations or points have changed at once.
+
+        The number of queries doesn't depend on the number of images, and
+        each affected source's image-set version bump and source check
+        happen once, rather than once per image.
+        """
+        from .models import Annotation
+
+        annoinfos = list(self.only('pk', 'image_id', 'source_id', 'status'))
+        if not annoinfos:
+            return
+        image_ids = [annoinfo.image_id for annoinfo in annoinfos]
+
+        annotation_counts = {
+            values['image_id']: values
+            for values in (
+                Annotation.objects.filter(image_id__in=image_ids)
+                .order_by().values('image_id')
+                .annotate(
+                    total=Count('pk'),
+                    unconfirmed=Count('pk', filter=Q(confirmed=False)),
+                )
+            )
+        }
+        point_counts = dict(
+            Point.objects.filter(image_id__in=image_ids)
+            .order_by().values('image_id')
+            .annotate(count=Count('pk'))
+            .values_list('image_id', 'count')
+        )
+        # Each image's latest annotation, by way of Postgres DISTINCT ON.
+        last_annotation_ids = dict(
+            Annotation.objects.filter(image_id__in=image_ids)
+            .order_by('image_id', '-annotation_date', '-pk')
+            .distinct('image_id')
+            .values_list('image_id', 'pk')
+        )
+
+        sources_to_check = set()
+        for annoinfo in annoinfos:
+            counts = annotation_counts.get(
+                annoinfo.image_id, dict(total=0, unconfirmed=0))
+            previously_confirmed = annoinfo.confirmed
+
+            annoinfo.last_annotation_id = last_annotation_ids.get(
+                annoinfo.image_id)
+            annoinfo.status = image_annotation_status_from_counts(
+                counts['total'],
+                point_counts.get(annoinfo.image_id, 0),
+                counts['unconfirmed'],
+            )
+
+            if annoinfo.confirmed and not previously_confirmed:
+                # With a new image confirmed, let's see if a new robot can
+                # be trained.
+                sources_to_check.add(annoinfo.source_id)
+            elif annoinfo.last_annotation_id is None:
+                # Image has no annotations now. Let's see if machine
+                # annotations can be added.
+                sources_to_check.add(annoinfo.source_id)
+
+        # Avoid touching the classifier field here, to avoid conflicts with
+        # any reset classifiers job that might be running.
+        self.model.objects.bulk_update(
+            annoinfos, ['last_annotation', 'status'],
+            batch_size=ANNOINFO_BULK_UPDATE_BATCH_SIZE)
+
+        for source_id in {annoinfo.source_id for annoinfo in annoinfos}:
+            bump_image_set_version(
+                source_id, ImageSetVersionKinds.ANNOTATIONS)
+        for source_id in sources_to_check:
+            schedule_source_check_on_commit(source_id)
+
+
 class AnnotationManager(models.Manager):
 
     # TODO: CoralNet 1.15 changed 'updated' to 'changed', and 'no change' to
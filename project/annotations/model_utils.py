@@ -9,6 +9,8 @@ import math
 import random
 
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Mod
 
 from lib.utils import CacheableValue, ONE_DAY_IN_SECONDS
 
@@ -204,6 +206,20 @@ def image_annotation_status(image):
     return ImageAnnoStatuses.CONFIRMED.value
 
 
+def image_annotation_status_from_counts(
+    annotation_count: int, point_count: int, unconfirmed_count: int,
+) -> str:
+    """
+    Same logic as image_annotation_status(), for when the counts have
+    already been fetched (such as for many images at once).
+    """
+    if annotation_count == 0 or annotation_count < point_count:
+        return ImageAnnoStatuses.UNCLASSIFIED.value
+    if unconfirmed_count > 0:
+        return ImageAnnoStatuses.UNCONFIRMED.value
+    return ImageAnnoStatuses.CONFIRMED.value
+
+
 def image_annotation_verbose_status(image):
     """
     Unclassified pts | Unconfirmed pts | Confirmed pts | Status
@@ -295,3 +311,27 @@ def scrambled_sort_hash(model_instance) -> int:
     instance_hash = hash_2byte_int(salted_pk)
     # Map from range 0~65535 to -32768~32767.
     return instance_hash + MIN_16BIT_SIGNED_INT
+
+
+def scrambled_sort_hash_expression(salt: int):
+    """
+    Database expression equivalent of scrambled_sort_hash(), so that
+    sort keys can be recomputed with an UPDATE instead of loading each
+    annotation into Python.
+    """
+    def truncate(expression):
+        return Mod(
+            expression, POSSIBLE_VALS_16BIT,
+            output_field=models.BigIntegerField())
+
+    def xor_shift(expression, shift):
+        return expression.bitxor(expression.bitrightshift(shift))
+
+    # pk is a bigint, so the multiplications below can't overflow.
+    n = truncate(F('pk') + salt)
+    n = xor_shift(n, 8)
+    n = truncate(n * 0x88b5)
+    n = xor_shift(n, 7)
+    n = truncate(n * 0xdb2d)
+    n = xor_shift(n, 9)
+    return n + MIN_16BIT_SIGNED_INT
@@ -5,12 +5,14 @@ from django.db import models
 
 from accounts.utils import get_robot_user
 from events.models import Event
+from images.model_utils import bump_image_set_version, ImageSetVersionKinds
 from images.models import Image, Point
-from labels.models import Label, LocalLabel
+from labels.models import Label, LabelStatsChanges, LocalLabel
 from sources.models import Source
 from vision_backend.models import Classifier
 from vision_backend.utils import schedule_source_check_on_commit
-from .managers import AnnotationManager, AnnotationQuerySet
+from .managers import (
+    AnnotationManager, AnnotationQuerySet, ImageAnnotationInfoQuerySet)
 from .model_utils import (
     ImageAnnoStatuses, image_annotation_status, scrambled_sort_hash)
 
@@ -113,6 +115,31 @@ class Annotation(models.Model):
                 name='annotation_to_src_hsh_i'),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if 'label_id' in field_names and 'confirmed' in field_names:
+            # Remember the saved state, so that save() and delete() can
+            # tell how label stats change.
+            instance._saved_label_state = (
+                instance.label_id, instance.confirmed)
+        return instance
+
+    def get_saved_label_state(self) -> tuple[int, bool] | None:
+        """
+        (label ID, confirmed) of this annotation as saved in the DB,
+        or None if it's not saved.
+        """
+        if self.pk is None:
+            return None
+        try:
+            return self._saved_label_state
+        except AttributeError:
+            # Not loaded from the DB, or loaded without these fields.
+            return (
+                Annotation.objects.filter(pk=self.pk)
+                .values_list('label_id', 'confirmed').first())
+
     @property
     def label_code(self):
         local_label = LocalLabel.objects.get(
@@ -134,6 +161,7 @@ class Annotation(models.Model):
                     {'confirmed'}.union(update_fields))
 
         is_new = self.pk is None
+        saved_label_state = self.get_saved_label_state()
 
         super().save(*args, **kwargs)
 
@@ -144,10 +172,28 @@ class Annotation(models.Model):
             self.scrambled_sort_key = scrambled_sort_hash(self)
             super().save(update_fields=['scrambled_sort_key'])
 
+        self._saved_label_state = (self.label_id, self.confirmed)
+        if saved_label_state != self._saved_label_state:
+            label_stats_changes = LabelStatsChanges()
+            if saved_label_state is not None and saved_label_state[1]:
+                label_stats_changes.remove(saved_label_state[0])
+            if self.confirmed:
+                label_stats_changes.add(
+                    self.label_id, self.scrambled_sort_key, self.pk)
+            label_stats_changes.record()
+
         self.image.annoinfo.update_annotation_progress_fields()
 
     def delete(self, *args, **kwargs):
+        saved_label_state = self.get_saved_label_state()
+
         return_values = super().delete(*args, **kwargs)
+
+        if saved_label_state is not None and saved_label_state[1]:
+            label_stats_changes = LabelStatsChanges()
+            label_stats_changes.remove(saved_label_state[0])
+            label_stats_changes.record()
+
         self.image.annoinfo.update_annotation_progress_fields()
         return return_values
 
@@ -160,6 +206,8 @@ class ImageAnnotationInfo(models.Model):
     """
     Annotation-related info for a single image.
     """
+    objects = ImageAnnotationInfoQuerySet.as_manager()
+
     image = models.OneToOneField(
         Image, on_delete=models.CASCADE, editable=False,
         # Name of reverse relation
@@ -229,6 +277,8 @@ class ImageAnnotationInfo(models.Model):
         # Avoid touching the classifier field here, to avoid conflicts with
         # any reset classifiers job that might be running.
         self.save(update_fields={'last_annotation', 'status'})
+        bump_image_set_version(
+            self.source_id, ImageSetVersionKinds.ANNOTATIONS)
 
         if self.confirmed and not previously_confirmed:
 
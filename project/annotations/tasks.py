@@ -1,5 +1,10 @@
+from django.core.cache import cache
+from django.db.models import Max
+
 from jobs.utils import job_runner
-from .model_utils import cacheable_annotation_hash_salt, scrambled_sort_hash
+from labels.models import LabelStats
+from .model_utils import (
+    cacheable_annotation_hash_salt, scrambled_sort_hash_expression)
 from .models import Annotation
 from .utils import cacheable_annotation_count
 
@@ -12,38 +17,51 @@ def update_sitewide_annotation_count():
     return f"Updated count to {count}"
 
 
-# Django default for QuerySet.iterator() chunk size.
-ANNOTATION_CHUNK_SIZE = 2000
+# Annotations are re-keyed in pk ranges of this size, each range being
+# a separate UPDATE (and transaction), so that progress can be saved
+# between ranges.
+SORT_KEY_PK_RANGE_SIZE = 100000
+SORT_KEY_PROGRESS_CACHE_KEY = 'annotation_sort_key_update_progress'
 
 
 @job_runner(
     interval=cacheable_annotation_hash_salt.cache_update_interval,
 )
 def update_annotation_scrambled_sort_keys():
-    salt = cacheable_annotation_hash_salt.update()
+    # If a previous run got interrupted partway through, pick up where it
+    # left off, as long as its salt is still the current one.
+    progress = cache.get(SORT_KEY_PROGRESS_CACHE_KEY)
+    if progress and progress['salt'] == cacheable_annotation_hash_salt.get():
+        salt = progress['salt']
+        last_pk = progress['last_pk']
+    else:
+        salt = cacheable_annotation_hash_salt.update()
+        last_pk = 0
 
-    # Update scrambled_sort_key of all Annotations.
-    # We retrieve Annotations in chunks (not all at once) to avoid OOM,
-    # and update them in chunks (not individually) for speed.
-    anno_chunk = []
+    # The hash is computed by the DB, so no annotations have to be
+    # loaded into Python.
+    sort_key = scrambled_sort_hash_expression(salt)
+    max_pk = Annotation.objects.aggregate(Max('pk'))['pk__max'] or 0
     count = 0
 
-    for anno in Annotation.objects.all().iterator(
-        chunk_size=ANNOTATION_CHUNK_SIZE
-    ):
-        anno.scrambled_sort_key = scrambled_sort_hash(anno)
-        anno_chunk.append(anno)
-        if len(anno_chunk) >= ANNOTATION_CHUNK_SIZE:
-            num_updated = Annotation.objects.bulk_update(
-                anno_chunk, ['scrambled_sort_key'])
-            count += num_updated
-            anno_chunk = []
-
-    if len(anno_chunk) > 0:
-        # Last chunk
-        num_updated = Annotation.objects.bulk_update(
-            anno_chunk, ['scrambled_sort_key'])
-        count += num_updated
+    while last_pk < max_pk:
+        range_end = last_pk + SORT_KEY_PK_RANGE_SIZE
+        count += (
+            Annotation.objects
+            .filter(pk__gt=last_pk, pk__lte=range_end)
+            .update(scrambled_sort_key=sort_key)
+        )
+        last_pk = range_end
+        cache.set(
+            SORT_KEY_PROGRESS_CACHE_KEY,
+            dict(salt=salt, last_pk=last_pk),
+            timeout=cacheable_annotation_hash_salt.cache_timeout_interval,
+        )
+
+    cache.delete(SORT_KEY_PROGRESS_CACHE_KEY)
+
+    # Labels' example annotations are picked by sort key.
+    LabelStats.objects.resample_examples()
 
     return (
         f"Updated annotation scrambled-sort salt to {salt},"
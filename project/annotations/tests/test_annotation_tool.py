@@ -10,6 +10,8 @@ from django.utils import timezone
 from django.utils.html import escape as html_escape
 
 from accounts.utils import is_alleviate_user, is_robot_user
+from images.models import Image
+from images.utils import delete_images
 from annotations.tests.utils import (
     controlled_sort_hashes, EXPECTED_HASHES)
 from lib.tests.utils import BasePermissionTest, ClientTest, IndexesMixin
@@ -749,6 +751,73 @@ class LoadAnnotationFormTest(ClientTest):
         self.assert_annotation_form_values_equal(
             response, [('A', 'false'), ('B', 'false'), ('A', 'false')])
 
+    # Image set snapshots.
+
+    def test_snapshot_reused(self):
+        self.enter_annotation_tool(dict(), self.img2)
+
+        with self.capture_queries() as cm:
+            self.assert_navigation_details(
+                dict(), self.img3,
+                expected_prev=self.img2, expected_next=self.img4,
+                expected_x_of_y_display="Image 3 of 5")
+        self.assertFalse(
+            any('ORDER BY LOWER("images_metadata"."name")' in query['sql']
+                for query in cm.captured_queries),
+            msg="Should get the ordering from the snapshot, not the DB")
+
+    def test_snapshot_invalidated_by_upload(self):
+        self.assert_navigation_details(
+            dict(), self.img5,
+            expected_next=self.img1, expected_x_of_y_display="Image 5 of 5")
+
+        img6 = self.upload_image(
+            self.user, self.source, image_options=dict(filename='6.png'))
+        self.assert_navigation_details(
+            dict(), self.img5,
+            expected_next=img6, expected_x_of_y_display="Image 5 of 6")
+
+    def test_snapshot_invalidated_by_metadata_edit(self):
+        self.assert_navigation_details(
+            dict(), self.img5,
+            expected_next=self.img1, expected_x_of_y_display="Image 5 of 5")
+
+        self.update_multiple_metadatas('name', [(self.img1, '6.png')])
+        self.assert_navigation_details(
+            dict(), self.img5,
+            expected_next=self.img1, expected_x_of_y_display="Image 4 of 5")
+
+    def test_snapshot_invalidated_by_delete(self):
+        self.assert_navigation_details(
+            dict(), self.img2,
+            expected_next=self.img3, expected_x_of_y_display="Image 2 of 5")
+
+        delete_images(Image.objects.filter(pk=self.img3.pk))
+        self.assert_navigation_details(
+            dict(), self.img2,
+            expected_next=self.img4, expected_x_of_y_display="Image 2 of 4")
+
+    def test_annotation_dependent_snapshot_invalidated_by_annotating(self):
+        search_kwargs = dict(annotation_status='unclassified')
+        self.assert_navigation_details(
+            search_kwargs, self.img1,
+            expected_next=self.img2, expected_x_of_y_display="Image 1 of 5")
+
+        self.add_annotations(self.user, self.img2)
+        self.assert_navigation_details(
+            search_kwargs, self.img1,
+            expected_next=self.img3, expected_x_of_y_display="Image 1 of 4")
+
+    def test_image_not_in_snapshot(self):
+        self.add_annotations(self.user, self.img2)
+
+        # img2 is no longer unclassified, but navigation should still work
+        # relative to where it would be in the ordering.
+        self.assert_navigation_details(
+            dict(annotation_status='unclassified'), self.img2,
+            expected_prev=self.img1, expected_next=self.img3,
+            expected_x_of_y_display="Image 2 of 4")
+
 
 class AnnotationToolQueriesTest(BaseBrowseActionTest):
 
@@ -790,31 +859,18 @@ class AnnotationToolIndexesTest(BaseBrowseActionTest, IndexesMixin):
         self.client.post(
             reverse('annotation_tool', args=[image.pk]), search_kwargs)
 
+    # Prev, next, and number in order all come from the image set snapshot,
+    # so the query that builds the snapshot is the one to check.
+
     def test_prev_next_sort_by_name_by_default(self):
         with self.capture_queries() as cm:
             self.load_annotation_tool(self.images[2], dict())
 
-        # Next
-        self.assert_in_raw_query_explain(
-            queries=cm.captured_queries,
-            query_substrings='LOWER("images_metadata"."name") >',
-            expected_explain_substring='unique_metadata_names_in_source',
-        )
-        # Prev
-        self.assert_in_raw_query_explain(
-            queries=cm.captured_queries,
-            query_substrings=[
-                'LOWER("images_metadata"."name") <',
-                'SELECT "images_metadata"',
-            ],
-            expected_explain_substring='unique_metadata_names_in_source',
-        )
-        # Number in order
         self.assert_in_raw_query_explain(
             queries=cm.captured_queries,
             query_substrings=[
-                'LOWER("images_metadata"."name") <',
-                'SELECT COUNT(*)',
+                'SELECT "images_metadata"."image_id" FROM',
+                'ORDER BY LOWER("images_metadata"."name") ASC',
             ],
             expected_explain_substring='unique_metadata_names_in_source',
         )
@@ -830,27 +886,11 @@ class AnnotationToolIndexesTest(BaseBrowseActionTest, IndexesMixin):
                 dict(sort_direction='desc'),
             )
 
-        # Next
         self.assert_in_raw_query_explain(
             queries=cm.captured_queries,
             query_substrings=[
-                'LOWER("images_metadata"."name") >',
-                'SELECT "images_metadata"',
-            ],
-            expected_explain_substring='unique_metadata_names_in_source',
-        )
-        # Prev
-        self.assert_in_raw_query_explain(
-            queries=cm.captured_queries,
-            query_substrings='LOWER("images_metadata"."name") <',
-            expected_explain_substring='unique_metadata_names_in_source',
-        )
-        # Number in order
-        self.assert_in_raw_query_explain(
-            queries=cm.captured_queries,
-            query_substrings=[
-                'LOWER("images_metadata"."name") >',
-                'SELECT COUNT(*)',
+                'SELECT "images_metadata"."image_id" FROM',
+                'ORDER BY LOWER("images_metadata"."name") DESC',
             ],
             expected_explain_substring='unique_metadata_names_in_source',
         )
@@ -862,7 +902,7 @@ class AnnotationToolIndexesTest(BaseBrowseActionTest, IndexesMixin):
 
         with self.capture_queries() as cm:
             self.load_annotation_tool(
-                self.images[2],
+                self.images[1],
                 dict(
                     aux3='1-1',
                     # Sort by something other than a metadata field, so that
@@ -874,27 +914,11 @@ class AnnotationToolIndexesTest(BaseBrowseActionTest, IndexesMixin):
                 ),
             )
 
-        # Next
-        self.assert_in_raw_query_explain(
-            queries=cm.captured_queries,
-            query_substrings='"images_image"."id" >',
-            expected_explain_substring='metadata_to_src_aux3_i',
-        )
-        # Prev
         self.assert_in_raw_query_explain(
             queries=cm.captured_queries,
             query_substrings=[
-                '"images_image"."id" <',
-                'SELECT "images_image"',
-            ],
-            expected_explain_substring='metadata_to_src_aux3_i',
-        )
-        # Number in order
-        self.assert_in_raw_query_explain(
-            queries=cm.captured_queries,
-            query_substrings=[
-                '"images_image"."id" <',
-                'SELECT COUNT(*)',
+                'SELECT "images_image"."id" FROM',
+                'ORDER BY "images_image"."id"',
             ],
             expected_explain_substring='metadata_to_src_aux3_i',
         )
@@ -912,7 +936,7 @@ class AnnotationToolIndexesTest(BaseBrowseActionTest, IndexesMixin):
 
         with self.capture_queries() as cm:
             self.load_annotation_tool(
-                self.images[2],
+                self.images[1],
                 dict(
                     aux1='SiteB', aux2='5m', aux3='1-1',
                     # Sort by something other than a metadata field.
@@ -920,27 +944,11 @@ class AnnotationToolIndexesTest(BaseBrowseActionTest, IndexesMixin):
                 ),
             )
 
-        # Next
-        self.assert_in_raw_query_explain(
-            queries=cm.captured_queries,
-            query_substrings='"images_image"."id" >',
-            expected_explain_substring='metadata_to_src_auxes_i',
-        )
-        # Prev
         self.assert_in_raw_query_explain(
             queries=cm.captured_queries,
             query_substrings=[
-                '"images_image"."id" <',
-                'SELECT "images_image"',
-            ],
-            expected_explain_substring='metadata_to_src_auxes_i',
-        )
-        # Number in order
-        self.assert_in_raw_query_explain(
-            queries=cm.captured_queries,
-            query_substrings=[
-                '"images_image"."id" <',
-                'SELECT COUNT(*)',
+                'SELECT "images_image"."id" FROM',
+                'ORDER BY "images_image"."id"',
             ],
             expected_explain_substring='metadata_to_src_auxes_i',
         )
@@ -952,7 +960,7 @@ class AnnotationToolIndexesTest(BaseBrowseActionTest, IndexesMixin):
 
         with self.capture_queries() as cm:
             self.load_annotation_tool(
-                self.images[2],
+                self.images[0],
                 dict(
                     image_name='abc xyz',
                     # Sort by something other than a metadata field.
@@ -960,27 +968,11 @@ class AnnotationToolIndexesTest(BaseBrowseActionTest, IndexesMixin):
                 ),
             )
 
-        # Next
-        self.assert_in_raw_query_explain(
-            queries=cm.captured_queries,
-            query_substrings='"images_image"."id" >',
-            expected_explain_substring='metadata_to_src_name_textops_i',
-        )
-        # Prev
-        self.assert_in_raw_query_explain(
-            queries=cm.captured_queries,
-            query_substrings=[
-                '"images_image"."id" <',
-                'SELECT "images_image"',
-            ],
-            expected_explain_substring='metadata_to_src_name_textops_i',
-        )
-        # Number in order
         self.assert_in_raw_query_explain(
             queries=cm.captured_queries,
             query_substrings=[
-                '"images_image"."id" <',
-                'SELECT COUNT(*)',
+                'SELECT "images_image"."id" FROM',
+                'ORDER BY "images_image"."id"',
             ],
             expected_explain_substring='metadata_to_src_name_textops_i',
         )
@@ -2,11 +2,14 @@ import datetime
 from typing import Any
 
 from django.core.files.base import ContentFile
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from export.tests.utils import BaseExportTest
 from lib.tests.utils import BasePermissionTest
+from sources.models import Source
 from visualization.tests.utils import BrowseActionsFormTest
 from ..models import Annotation
 from .utils import UploadAnnotationsCsvTestMixin
@@ -134,7 +137,7 @@ class ImageSetTest(BaseAnnotationExportTest):
             '1.jpg,149,99,A',
             '1.jpg,149,299,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_all_images_multiple(self):
         """Export for 3 out of 3 images."""
@@ -162,7 +165,7 @@ class ImageSetTest(BaseAnnotationExportTest):
             '3.jpg,99,99,B',
             '3.jpg,99,299,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_image_subset_by_metadata(self):
         """Export for some, but not all, images."""
@@ -196,7 +199,7 @@ class ImageSetTest(BaseAnnotationExportTest):
             '3.jpg,99,99,B',
             '3.jpg,99,299,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_image_subset_by_annotation_status(self):
         """Export for some, but not all, images. Different search criteria.
@@ -230,7 +233,7 @@ class ImageSetTest(BaseAnnotationExportTest):
             '3.jpg,99,99,B',
             '3.jpg,99,299,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_image_empty_set(self):
         """Export for 0 images."""
@@ -246,7 +249,7 @@ class ImageSetTest(BaseAnnotationExportTest):
         expected_lines = [
             'Name,Row,Column,Label code',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_invalid_image_set_params(self):
         self.upload_image(self.user, self.source)
@@ -283,7 +286,7 @@ class ImageSetTest(BaseAnnotationExportTest):
             '1.jpg,149,99,A',
             '1.jpg,149,299,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class AnnotationStatusTest(BaseAnnotationExportTest):
@@ -313,7 +316,7 @@ class AnnotationStatusTest(BaseAnnotationExportTest):
         expected_lines = [
             'Name,Row,Column,Label code',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_partially_annotated(self):
         self.add_annotations(self.user, self.img1, {1: 'B'})
@@ -323,7 +326,7 @@ class AnnotationStatusTest(BaseAnnotationExportTest):
             'Name,Row,Column,Label code',
             '1.jpg,149,99,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_fully_annotated(self):
         self.add_annotations(self.user, self.img1, {1: 'B', 2: 'A'})
@@ -334,7 +337,7 @@ class AnnotationStatusTest(BaseAnnotationExportTest):
             '1.jpg,149,99,B',
             '1.jpg,149,299,A',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_machine_annotated(self):
         robot = self.create_robot(self.source)
@@ -346,7 +349,7 @@ class AnnotationStatusTest(BaseAnnotationExportTest):
             '1.jpg,149,99,B',
             '1.jpg,149,299,A',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_part_machine_part_manual(self):
         robot = self.create_robot(self.source)
@@ -359,7 +362,7 @@ class AnnotationStatusTest(BaseAnnotationExportTest):
             '1.jpg,149,99,B',
             '1.jpg,149,299,A',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class LabelFormatTest(BaseAnnotationExportTest):
@@ -393,7 +396,7 @@ class LabelFormatTest(BaseAnnotationExportTest):
             '1.jpg,149,99,B',
             '1.jpg,149,299,A',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_ids(self):
         self.add_annotations(self.user, self.img1, {1: 'B', 2: 'A'})
@@ -406,7 +409,7 @@ class LabelFormatTest(BaseAnnotationExportTest):
             f'1.jpg,149,99,{self.labels.get(name="B").pk}',
             f'1.jpg,149,299,{self.labels.get(name="A").pk}',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_both(self):
         self.add_annotations(self.user, self.img1, {1: 'B', 2: 'A'})
@@ -419,7 +422,7 @@ class LabelFormatTest(BaseAnnotationExportTest):
             f'1.jpg,149,99,B,{self.labels.get(name="B").pk}',
             f'1.jpg,149,299,A,{self.labels.get(name="A").pk}',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class AnnotatorInfoColumnsTest(
@@ -458,7 +461,34 @@ class AnnotatorInfoColumnsTest(
             '1.jpg,149,199,B,{username},{date}'.format(
                 username=self.user.username, date=date_str),
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
+
+    def test_former_member_annotation(self):
+        """
+        Annotator who isn't an editor of the source anymore, and thus
+        isn't among the pre-fetched usernames.
+        """
+        former_member = self.create_user()
+        self.add_source_member(
+            self.user, self.source, former_member,
+            Source.PermTypes.EDIT.code)
+        self.add_annotations(former_member, self.img1, {1: 'B'})
+        self.source.remove_role(former_member)
+
+        post_data = self.default_post_params.copy()
+        post_data['optional_columns'] = ['annotator_info']
+        response = self.export_annotations(post_data)
+
+        annotation_date = \
+            Annotation.objects.get(image=self.img1).annotation_date
+        date_str = annotation_date.strftime('%Y-%m-%d %H:%M:%S+00:00')
+
+        expected_lines = [
+            'Name,Row,Column,Label code,Annotator,Date annotated',
+            '1.jpg,149,199,B,{username},{date}'.format(
+                username=former_member.username, date=date_str),
+        ]
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_imported_annotation(self):
         # Import an annotation
@@ -483,7 +513,7 @@ class AnnotatorInfoColumnsTest(
             'Name,Row,Column,Label code,Annotator,Date annotated',
             '1.jpg,50,70,B,Imported,{date}'.format(date=date_str),
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_machine_annotation(self):
         robot = self.create_robot(self.source)
@@ -500,7 +530,7 @@ class AnnotatorInfoColumnsTest(
             'Name,Row,Column,Label code,Annotator,Date annotated',
             '1.jpg,149,199,B,robot,{date}'.format(date=date_str),
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class MachineSuggestionColumnsTest(BaseAnnotationExportTest):
@@ -536,7 +566,7 @@ class MachineSuggestionColumnsTest(BaseAnnotationExportTest):
             ',Machine suggestion 2,Machine confidence 2',
             '1.jpg,149,199,B,,,,',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     @override_settings(NBR_SCORES_PER_ANNOTATION=2)
     def test_all_suggestions_filled(self):
@@ -557,7 +587,7 @@ class MachineSuggestionColumnsTest(BaseAnnotationExportTest):
             ',Machine suggestion 2,Machine confidence 2',
             '1.jpg,149,199,B,B,60,A,40',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     @override_settings(NBR_SCORES_PER_ANNOTATION=3)
     def test_some_suggestions_filled(self):
@@ -576,7 +606,7 @@ class MachineSuggestionColumnsTest(BaseAnnotationExportTest):
             ',Machine suggestion 3,Machine confidence 3',
             '1.jpg,149,199,B,B,60,A,40,,',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class MetadataAuxColumnsTest(BaseAnnotationExportTest):
@@ -609,7 +639,7 @@ class MetadataAuxColumnsTest(BaseAnnotationExportTest):
             'Name,Date,Aux1,Aux2,Aux3,Aux4,Aux5,Row,Column,Label code',
             '1.jpg,,,,,,,149,199,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_filled(self):
         self.img1.metadata.photo_date = datetime.date(2001, 2, 3)
@@ -627,7 +657,7 @@ class MetadataAuxColumnsTest(BaseAnnotationExportTest):
             'Name,Date,Aux1,Aux2,Aux3,Aux4,Aux5,Row,Column,Label code',
             '1.jpg,2001-02-03,Site A,Transect 1-2,Quadrant 5,,,149,199,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_named_aux_fields(self):
         self.source.key1 = "Site"
@@ -649,7 +679,7 @@ class MetadataAuxColumnsTest(BaseAnnotationExportTest):
             'Name,Date,Site,Transect,Quadrant,Aux4,Aux5,Row,Column,Label code',
             '1.jpg,2001-02-03,Site A,Transect 1-2,Quadrant 5,,,149,199,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class MetadataOtherColumnsTest(BaseAnnotationExportTest):
@@ -684,7 +714,7 @@ class MetadataOtherColumnsTest(BaseAnnotationExportTest):
             ',Comments,Row,Column,Label code',
             '1.jpg,,,,,,,,,,,,149,199,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_filled(self):
         self.img1.metadata.height_in_cm = 40
@@ -713,7 +743,7 @@ class MetadataOtherColumnsTest(BaseAnnotationExportTest):
             ',Clear,White A,Framing set C,Card B'
             ',"Here are\nsome comments.",149,199,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class MoreOptionalColumnsCasesTest(BaseAnnotationExportTest):
@@ -773,7 +803,7 @@ class MoreOptionalColumnsCasesTest(BaseAnnotationExportTest):
             ',Clear,White A,Framing set C,Card B'
             ',"Here are\nsome comments.",149,199,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_another_combination_of_two_sets(self):
         self.source.key1 = "Site"
@@ -802,7 +832,7 @@ class MoreOptionalColumnsCasesTest(BaseAnnotationExportTest):
             ',149,199,B,{username},{date}'.format(
                 username=self.user.username, date=date_str),
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     @override_settings(NBR_SCORES_PER_ANNOTATION=2)
     def test_all_sets(self):
@@ -856,7 +886,7 @@ class MoreOptionalColumnsCasesTest(BaseAnnotationExportTest):
             ',{username},{date},B,60,A,40'.format(
                 username=self.user.username, date=date_str),
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_invalid_column_name(self):
         self.add_annotations(self.user, self.img1, {1: 'B'})
@@ -907,7 +937,7 @@ class UnicodeTest(BaseAnnotationExportTest):
             'あ.jpg,149,199,い',
         ]
         self.assert_csv_content_equal(
-            response.content, expected_lines)
+            response.getvalue(), expected_lines)
 
 
 class UploadAndExportSameDataTest(BaseAnnotationExportTest):
@@ -953,7 +983,7 @@ class UploadAndExportSameDataTest(BaseAnnotationExportTest):
         # Export annotations
         response = self.export_annotations(self.default_post_params)
 
-        self.assert_csv_content_equal(response.content, csv_lines)
+        self.assert_csv_content_equal(response.getvalue(), csv_lines)
 
 
 class QueriesPerPointTest(BaseAnnotationExportTest):
@@ -992,7 +1022,7 @@ class QueriesPerPointTest(BaseAnnotationExportTest):
         with self.assert_queries_less_than(3*100):
             response = self.export_annotations(self.default_post_params)
 
-        csv_content = response.content.decode()
+        csv_content = response.getvalue().decode()
         self.assertEqual(
             csv_content.count('\n'), 301,
             msg="Sanity check: CSV should have one line per point plus"
@@ -1030,7 +1060,7 @@ class QueriesPerPointTest(BaseAnnotationExportTest):
         with self.assert_queries_less_than(3*100):
             response = self.export_annotations(post_data)
 
-        csv_content = response.content.decode()
+        csv_content = response.getvalue().decode()
         self.assertEqual(
             csv_content.count('\n'), 301,
             msg="Sanity check: CSV should have one line per point plus"
@@ -1080,7 +1110,7 @@ class QueriesPerImageTest(BaseAnnotationExportTest):
         with self.assert_queries_less_than(40*5):
             response = self.export_annotations(self.default_post_params)
 
-        csv_content = response.content.decode()
+        csv_content = response.getvalue().decode()
         self.assertEqual(
             csv_content.count('\n'), 41,
             msg="Sanity check: CSV should have one line per point plus"
@@ -1106,7 +1136,7 @@ class QueriesPerImageTest(BaseAnnotationExportTest):
         with self.assert_queries_less_than(40*5):
             response = self.export_annotations(post_data)
 
-        csv_content = response.content.decode()
+        csv_content = response.getvalue().decode()
         self.assertEqual(
             csv_content.count('\n'), 41,
             msg="Sanity check: CSV should have one line per point plus"
@@ -1117,3 +1147,35 @@ class QueriesPerImageTest(BaseAnnotationExportTest):
         self.assertIn(
             "Canon", csv_content,
             msg="Sanity check: CSV should have some expected metadata")
+
+    def test_queries_dont_grow_with_image_count(self):
+        robot = self.create_robot(self.source)
+        for image in self.images:
+            self.add_robot_annotations(robot, image)
+            self.add_annotations(self.user, image)
+
+        post_data = self.default_post_params.copy()
+        post_data['optional_columns'] = [
+            'annotator_info', 'machine_suggestions',
+            'metadata_date_aux', 'metadata_other']
+
+        def export_images(images):
+            data = post_data | dict(
+                image_id_list='_'.join(str(image.pk) for image in images))
+            with CaptureQueriesContext(connection) as context:
+                response = self.export_annotations(data)
+            return response, len(context.captured_queries)
+
+        response, queries_for_10 = export_images(self.images[:10])
+        self.assertEqual(
+            response.getvalue().decode().count('\n'), 11,
+            msg="Sanity check: one line per point plus header")
+
+        response, queries_for_40 = export_images(self.images)
+        self.assertEqual(
+            response.getvalue().decode().count('\n'), 41,
+            msg="Sanity check: one line per point plus header")
+
+        # Points, annotations, scores, and metadata are fetched per
+        # chunk of images, not per image.
+        self.assertLessEqual(queries_for_40, queries_for_10)
@@ -1,7 +1,8 @@
 import math
-from unittest import skip
+from unittest import mock, skip
 
 from bs4 import BeautifulSoup
+from django.core.cache import cache
 from django.urls import reverse
 
 from annotations.tests.utils import (
@@ -9,7 +10,10 @@ from annotations.tests.utils import (
 from jobs.tests.utils import do_job
 from lib.tests.utils import BasePermissionTest, ClientTest
 from ..model_utils import (
-    AnnotationArea, cacheable_annotation_hash_salt)
+    AnnotationArea, cacheable_annotation_hash_salt, POSSIBLE_VALS_16BIT,
+    scrambled_sort_hash, scrambled_sort_hash_expression)
+from ..models import Annotation
+from ..tasks import SORT_KEY_PROGRESS_CACHE_KEY
 from ..utils import cacheable_annotation_count
 
 
@@ -92,10 +96,7 @@ class PatchOrderingUpdateTaskTest(ClientTest):
             for point_number in [1, 2, 3]
         ]
 
-        with controlled_sort_hashes(
-            seed=10, pk_sequence=[6,7,8],
-            mock_target_module='annotations.tasks',
-        ):
+        with controlled_sort_hashes(seed=10, pk_sequence=[]):
             job = do_job('update_annotation_scrambled_sort_keys')
 
         self.assertEqual(
@@ -111,17 +112,15 @@ class PatchOrderingUpdateTaskTest(ClientTest):
             " result of the task"
         )
 
-        for point_number, sum, previous_date in zip(
-            [1, 2, 3], [16, 17, 18], annotation_dates
-        ):
-            expected_hash = EXPECTED_HASHES[sum]
+        for point_number, previous_date in zip([1, 2, 3], annotation_dates):
             anno = self.image.annotation_set.get(
                 point__point_number=point_number)
 
             self.assertEqual(
                 anno.scrambled_sort_key,
-                expected_hash,
-                f"Sort hash for point {point_number} should be as expected",
+                scrambled_sort_hash(anno),
+                f"Sort hash for point {point_number} should match the"
+                f" Python computation",
             )
 
             self.assertEqual(
@@ -131,6 +130,84 @@ class PatchOrderingUpdateTaskTest(ClientTest):
                 f" changed during the sort hash update",
             )
 
+    def test_expected_hashes(self):
+        anno = self.image.annotation_set.first()
+        for salted_pk, expected_hash in EXPECTED_HASHES.items():
+            # Pick a salt that makes the pk + salt sum come out to
+            # salted_pk, after wrapping to 16 bits.
+            salt = (salted_pk - anno.pk) % POSSIBLE_VALS_16BIT
+            key = (
+                Annotation.objects.filter(pk=anno.pk)
+                .annotate(key=scrambled_sort_hash_expression(salt))
+                .values_list('key', flat=True).get()
+            )
+            self.assertEqual(
+                key, expected_hash,
+                f"DB hash of {salted_pk} should be as expected")
+
+    def test_multiple_pk_ranges(self):
+        with (
+            controlled_sort_hashes(seed=10, pk_sequence=[]),
+            mock.patch('annotations.tasks.SORT_KEY_PK_RANGE_SIZE', 1),
+        ):
+            job = do_job('update_annotation_scrambled_sort_keys')
+
+        self.assertEqual(
+            job.result_message,
+            "Updated annotation scrambled-sort salt to 10,"
+            " and updated 3 scrambled_sort_key values"
+        )
+        for anno in self.image.annotation_set.all():
+            self.assertEqual(
+                anno.scrambled_sort_key, scrambled_sort_hash(anno))
+        self.assertIsNone(cache.get(SORT_KEY_PROGRESS_CACHE_KEY))
+
+    def test_resume(self):
+        annotations = list(self.image.annotation_set.order_by('pk'))
+        Annotation.objects.filter(
+            pk__in=[anno.pk for anno in annotations]
+        ).update(scrambled_sort_key=0)
+
+        with controlled_sort_hashes(seed=20, pk_sequence=[]):
+            # Simulate a run with salt 10 being interrupted after updating
+            # the first 2 annotations.
+            cache.set(cacheable_annotation_hash_salt.cache_key, 10)
+            cache.set(
+                SORT_KEY_PROGRESS_CACHE_KEY,
+                dict(salt=10, last_pk=annotations[1].pk))
+            job = do_job('update_annotation_scrambled_sort_keys')
+
+        self.assertEqual(
+            job.result_message,
+            "Updated annotation scrambled-sort salt to 10,"
+            " and updated 1 scrambled_sort_key values",
+            "Should resume with the same salt, from after the last"
+            " completed pk"
+        )
+        for anno in annotations[:2]:
+            anno.refresh_from_db()
+            self.assertEqual(anno.scrambled_sort_key, 0)
+        annotations[2].refresh_from_db()
+        self.assertEqual(
+            annotations[2].scrambled_sort_key,
+            scrambled_sort_hash(annotations[2]))
+        self.assertIsNone(cache.get(SORT_KEY_PROGRESS_CACHE_KEY))
+
+    def test_progress_with_outdated_salt(self):
+        cache.set(
+            SORT_KEY_PROGRESS_CACHE_KEY,
+            dict(salt=20, last_pk=10**9))
+
+        with controlled_sort_hashes(seed=10, pk_sequence=[]):
+            job = do_job('update_annotation_scrambled_sort_keys')
+
+        self.assertEqual(
+            job.result_message,
+            "Updated annotation scrambled-sort salt to 10,"
+            " and updated 3 scrambled_sort_key values",
+            "Progress from a different salt should be ignored"
+        )
+
 
 class AnnotationAreaEditTest(ClientTest):
     """
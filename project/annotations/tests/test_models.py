@@ -1,3 +1,5 @@
+from unittest import mock
+
 from django.conf import settings
 from django_migration_testcase import MigrationTest
 
@@ -9,7 +11,7 @@ from ..model_utils import (
     image_annotation_status,
     image_annotation_verbose_status,
 )
-from ..models import Annotation
+from ..models import Annotation, ImageAnnotationInfo
 from .utils import (
     controlled_sort_hashes, EXPECTED_HASHES)
 
@@ -178,6 +180,9 @@ class AnnoInfoUpdateTest(ClientTest):
         self.image.annotation_set.delete()
         self.assertStatusEqual('unclassified')
 
+        self.image.annoinfo.refresh_from_db()
+        self.assertIsNone(self.image.annoinfo.last_annotation)
+
         # Whenever django-reversion is replaced and bulk creation of
         # Annotations is viable again, the below code can be used to test
         # bulk creation.
@@ -209,6 +214,90 @@ class AnnoInfoUpdateTest(ClientTest):
         # self.assertStatusEqual('unconfirmed')
 
 
+class AnnoInfoBulkUpdateTest(ClientTest):
+    """
+    Updating the annotation progress of many images at once.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = cls.create_user()
+        cls.source = cls.create_source(
+            cls.user,
+            default_point_generation_method=dict(type='simple', points=3),
+        )
+        cls.labels = cls.create_labels(cls.user, ['A', 'B'], 'GroupA')
+        cls.create_labelset(cls.user, cls.source, cls.labels)
+
+        cls.image_1 = cls.upload_image(cls.user, cls.source)
+        cls.image_2 = cls.upload_image(cls.user, cls.source)
+        cls.image_3 = cls.upload_image(cls.user, cls.source)
+        cls.add_annotations(cls.user, cls.image_1)
+        cls.add_annotations(cls.user, cls.image_2)
+        cls.add_annotations(cls.user, cls.image_3, {1: 'A'})
+
+    def assertProgressEqual(self, image, expected_status):
+        annoinfo = ImageAnnotationInfo.objects.get(image=image)
+        self.assertEqual(annoinfo.status, expected_status)
+        self.assertEqual(
+            annoinfo.last_annotation,
+            image.annotation_set.order_by('-annotation_date').first())
+
+    def test_statuses(self):
+        Annotation.objects.filter(
+            image=self.image_1, point__point_number=1).delete()
+        robot_user = get_robot_user()
+        Annotation.objects.filter(
+            image=self.image_2, point__point_number=1,
+        ).update(user=robot_user, confirmed=False)
+
+        ImageAnnotationInfo.objects.filter(
+            source=self.source).update_annotation_progress_fields()
+
+        self.assertProgressEqual(self.image_1, 'unclassified')
+        self.assertProgressEqual(self.image_2, 'unconfirmed')
+        self.assertProgressEqual(self.image_3, 'unclassified')
+
+    def test_no_points(self):
+        self.image_1.point_set.delete()
+        self.assertProgressEqual(self.image_1, 'unclassified')
+
+    def test_source_check_scheduled_once(self):
+        with mock.patch(
+            'annotations.managers.schedule_source_check_on_commit'
+        ) as mock_schedule:
+            Annotation.objects.filter(source=self.source).delete()
+
+        self.assertProgressEqual(self.image_1, 'unclassified')
+        self.assertProgressEqual(self.image_2, 'unclassified')
+        self.assertProgressEqual(self.image_3, 'unclassified')
+        mock_schedule.assert_called_once_with(self.source.pk)
+
+    def test_no_source_check_needed(self):
+        # Still has annotations, and wasn't just confirmed.
+        with mock.patch(
+            'annotations.managers.schedule_source_check_on_commit'
+        ) as mock_schedule:
+            Annotation.objects.filter(
+                image=self.image_1, point__point_number=1).delete()
+
+        self.assertProgressEqual(self.image_1, 'unclassified')
+        mock_schedule.assert_not_called()
+
+    def test_query_count_independent_of_image_count(self):
+        def update():
+            ImageAnnotationInfo.objects.filter(
+                source=self.source).update_annotation_progress_fields()
+
+        with self.assertNumQueries(5):
+            update()
+
+        self.upload_image(self.user, self.source)
+        with self.assertNumQueries(5):
+            update()
+
+
 class ScrambledSortKeyTest(ClientTest):
 
     @classmethod
@@ -11,6 +11,7 @@ from accounts.utils import (
 from events.models import Event
 from images.model_utils import PointGen
 from images.models import Image, Point
+from labels.models import label_stats_batch
 from lib.exceptions import FileProcessError
 from lib.utils import CacheableValue
 from sources.models import Source
@@ -115,20 +116,26 @@ def apply_alleviate(img, label_scores_all_points):
 
     alleviate_was_applied = False
 
-    for anno in img.annotation_set.unconfirmed():
-        pt_number = anno.point.point_number
-        label_scores = label_scores_all_points[pt_number]
-        descending_scores = sorted(
-            label_scores, key=operator.itemgetter('score'), reverse=True)
-        top_score = descending_scores[0]['score']
-        top_confidence = top_score
-
-        if top_confidence >= source.classifier_options.confidence_threshold:
-            # Save the annotation under the username Alleviate, so that it's no
-            # longer a robot annotation.
-            anno.user = get_alleviate_user()
-            anno.save()
-            alleviate_was_applied = True
+    # The newly confirmed annotations' label stats are updated together at
+    # the end, rather than row-locking labels in point order.
+    with label_stats_batch():
+        for anno in img.annotation_set.unconfirmed():
+            pt_number = anno.point.point_number
+            label_scores = label_scores_all_points[pt_number]
+            descending_scores = sorted(
+                label_scores, key=operator.itemgetter('score'), reverse=True)
+            top_score = descending_scores[0]['score']
+            top_confidence = top_score
+
+            if (
+                top_confidence
+                >= source.classifier_options.confidence_threshold
+            ):
+                # Save the annotation under the username Alleviate, so
+                # that it's no longer a robot annotation.
+                anno.user = get_alleviate_user()
+                anno.save()
+                alleviate_was_applied = True
 
     if alleviate_was_applied:
         # Ensure that the last-annotation display on the page is up to date.
@@ -31,7 +31,9 @@ from images.utils import (
     get_prev_object,
     get_queryset_order_placement,
     image_level_instance_swap,
+    ImageSetSnapshot,
 )
+from labels.models import label_stats_batch
 from lib.decorators import (
     image_annotation_area_must_be_editable,
     image_labelset_required,
@@ -230,6 +232,8 @@ def annotation_tool(request, image_id):
     # The set of images we're annotating.
     # Ensure it has an unambiguous ordering.
     queryset = source.metadata_set.order_by(Lower('name'))
+    search_key = 'default'
+    results_depend_on_annotations = False
     hidden_image_set_form = None
     applied_search_display = None
 
@@ -238,6 +242,9 @@ def annotation_tool(request, image_id):
 
     if image_form.searched_or_filtered() and image_form.is_valid():
         queryset = image_form.get_ordered_image_level_queryset()
+        search_key = image_form.get_search_key()
+        results_depend_on_annotations = (
+            image_form.results_depend_on_annotations())
         hidden_image_set_form = image_form.get_hidden_version()
         applied_search_display = image_form.get_applied_search_display()
         browse_query_args = {
@@ -245,17 +252,39 @@ def annotation_tool(request, image_id):
             if k in image_form.cleaned_data
         }
 
-    # Get the next and previous images in the image set.
-    image_as_queryset_model = image_level_instance_swap(image, queryset.model)
-    prev_metadata = image_level_instance_swap(
-        get_prev_object(image_as_queryset_model, queryset, wrap=True),
-        Metadata)
-    next_metadata = image_level_instance_swap(
-        get_next_object(image_as_queryset_model, queryset, wrap=True),
-        Metadata)
-    # Get the image's ordered placement in the image set, e.g. 5th.
-    image_set_order_placement = get_queryset_order_placement(
-       image_as_queryset_model, queryset)
+    # Get the next and previous images in the image set, and the image's
+    # ordered placement in the image set, e.g. 5th.
+    image_set_snapshot = ImageSetSnapshot.get(
+        source.pk, queryset, search_key, results_depend_on_annotations)
+    image_position = image_set_snapshot.position(image.pk)
+
+    if image_position is not None:
+        prev_image_id = image_set_snapshot.prev_image_id(
+            image_position, wrap=True)
+        next_image_id = image_set_snapshot.next_image_id(
+            image_position, wrap=True)
+        neighbor_metadatas = Metadata.objects.in_bulk(
+            [image_id for image_id in [prev_image_id, next_image_id]
+             if image_id is not None],
+            field_name='image_id',
+        )
+        prev_metadata = neighbor_metadatas.get(prev_image_id)
+        next_metadata = neighbor_metadatas.get(next_image_id)
+        image_set_order_placement = image_position + 1
+    else:
+        # The image isn't in the image set; for example, it's no longer
+        # unconfirmed, when browsing unconfirmed images. Navigate relative
+        # to where it would be in the ordering.
+        image_as_queryset_model = image_level_instance_swap(
+            image, queryset.model)
+        prev_metadata = image_level_instance_swap(
+            get_prev_object(image_as_queryset_model, queryset, wrap=True),
+            Metadata)
+        next_metadata = image_level_instance_swap(
+            get_next_object(image_as_queryset_model, queryset, wrap=True),
+            Metadata)
+        image_set_order_placement = get_queryset_order_placement(
+           image_as_queryset_model, queryset)
 
     return_to_browse_link = reverse('browse_images', args=[source.pk])
     if browse_query_args:
@@ -348,7 +377,7 @@ def annotation_tool(request, image_id):
         'hidden_image_set_form': hidden_image_set_form,
         'next_metadata': next_metadata,
         'prev_metadata': prev_metadata,
-        'image_set_size': queryset.count(),
+        'image_set_size': len(image_set_snapshot),
         'image_set_order_placement': image_set_order_placement,
         'applied_search_display': applied_search_display,
         'return_to_browse_link': return_to_browse_link,
@@ -446,7 +475,7 @@ def save_annotations_ajax(request, image_id):
         # If anything in this block gets an exception, we'll roll back
         # the DB changes. This way we don't have partial saves, which can be
         # confusing.
-        with transaction.atomic():
+        with transaction.atomic(), label_stats_batch():
             for annotation_kwargs in annotations_to_try_updating:
                 Annotation.objects.update_point_annotation_if_applicable(
                     **annotation_kwargs)
@@ -719,24 +748,26 @@ class AnnotationsUploadConfirmView(View):
 
         self.extra_source_level_actions(request, source)
 
-        for image_id, annotations_for_image in uploaded_annotations.items():
+        # Label stats are updated once for the whole upload.
+        with label_stats_batch():
+            for image_id, annotations_for_image in uploaded_annotations.items():
 
-            image = Image.objects.get(pk=image_id, source=source)
+                image = Image.objects.get(pk=image_id, source=source)
 
-            # Delete previous annotations and points for this image.
-            # Calling delete() on these querysets is more efficient
-            # than calling delete() on each of the individual objects.
-            Annotation.objects.filter(image=image).delete()
-            Point.objects.filter(image=image).delete()
+                # Delete previous annotations and points for this image.
+                # Calling delete() on these querysets is more efficient
+                # than calling delete() on each of the individual objects.
+                Annotation.objects.filter(image=image).delete()
+                Point.objects.filter(image=image).delete()
 
-            # Create new points and annotations.
-            import_annotations(
-                image=image,
-                event_creator_id=request.user.pk,
-                annotation_dicts=annotations_for_image,
-            )
+                # Create new points and annotations.
+                import_annotations(
+                    image=image,
+                    event_creator_id=request.user.pk,
+                    annotation_dicts=annotations_for_image,
+                )
 
-            self.extra_image_level_actions(image)
+                self.extra_image_level_actions(image)
 
         return JsonResponse(dict(
             success=True,
@@ -766,12 +797,20 @@ class ExportPrepView(SourceCsvExportPrepView):
     def get_export_form(self, source, data):
         return ExportAnnotationsForm(data)
 
-    def point_score_values_for_image(self, image):
+    def point_score_values_for_images(self, images):
         """
-        Database values this view needs regarding an image's points.
+        Database values this view needs regarding a chunk of images'
+        annotated points. This is a fixed number of queries regardless of
+        how many images and points are in the chunk.
+
+        Returns point values per image ID (in point-number order), and
+        score values per point ID (in descending score order).
         """
+        image_ids = [image.pk for image in images]
+
         point_fields = [
             'id',
+            'image_id',
             'point_number',
             'column',
             'row',
@@ -784,28 +823,41 @@ class ExportPrepView(SourceCsvExportPrepView):
                 'annotation__annotation_date',
             ])
         point_set_values = (
-            image.point_set
-            .order_by('point_number')
+            Point.objects
+            .filter(image_id__in=image_ids, annotation__isnull=False)
+            .order_by('image_id', 'point_number')
             .values(*point_fields)
         )
+        point_set_values_per_image = defaultdict(list)
+        for point_values in point_set_values:
+            image_id = point_values['image_id']
+            point_set_values_per_image[image_id].append(point_values)
 
-        score_set_values = (
-            Score.objects.filter(image=image)
-            .order_by('point', '-score')
-            .values('point', 'score', 'label')
-        )
         score_set_values_per_point = defaultdict(list)
-        for score_values in score_set_values:
-            point_id = score_values['point']
-            score_set_values_per_point[point_id].append(score_values)
+        if 'machine_suggestions' in self.optional_columns:
+            score_set_values = (
+                Score.objects.filter(image_id__in=image_ids)
+                .order_by('point', '-score')
+                .values('point', 'score', 'label')
+            )
+            for score_values in score_set_values:
+                point_id = score_values['point']
+                score_set_values_per_point[point_id].append(score_values)
 
-        return point_set_values, score_set_values_per_point
+        if 'annotator_info' in self.optional_columns:
+            # Look up any annotators we don't know yet with one query,
+            # instead of one query each.
+            unknown_user_ids = set(
+                point_values['annotation__user']
+                for point_values in point_set_values
+                if point_values['annotation__user'] not in self.username_dict
+            )
+            self.username_dict.update(
+                (v['pk'], v['username'])
+                for v in User.objects.filter(pk__in=unknown_user_ids)
+                .values('pk', 'username'))
 
-    def user_id_to_username(self, user_id):
-        if user_id not in self.username_dict:
-            user = User.objects.get(pk=user_id)
-            self.username_dict[user_id] = user.username
-        return self.username_dict[user_id]
+        return point_set_values_per_image, score_set_values_per_point
 
     def write_csv(self, stream, source, queryset_builder, export_form_data):
         # List of string keys indicating optional column sets to add.
@@ -833,10 +885,9 @@ class ExportPrepView(SourceCsvExportPrepView):
 
         # username_dict keeps us from having to do one username lookup per
         # Annotation.
-        # However, we only pre-populate the dict with the current admin/edit
-        # members of the source. If there are any former admins/editors,
-        # they will need extra queries later (should be one per user, so not
-        # too bad).
+        # We pre-populate the dict with the current admin/edit members of
+        # the source. Any other annotators, such as former admins/editors,
+        # are looked up with one query per image chunk.
         likely_annotators = []
         for member in source.get_members():
             if member.has_perm(Source.PermTypes.EDIT.code, source):
@@ -884,19 +935,21 @@ class ExportPrepView(SourceCsvExportPrepView):
         self.writer = csv.DictWriter(stream, fieldnames)
         self.writer.writeheader()
 
-        # One image at a time.
-        for image in queryset_builder.iterator_of_model(Image):
+        # One chunk of images at a time. Rows are written as we go, so
+        # memory use depends on the chunk size, not the export size.
+        for images in self.iterate_image_chunks(queryset_builder):
 
-            # point_set_values should be in point-number order (as ensured
+            # Point values should be in point-number order (as ensured
             # by the method we call here).
-            point_set_values, score_set_values_per_point = (
-                self.point_score_values_for_image(image))
+            point_set_values_per_image, score_set_values_per_point = (
+                self.point_score_values_for_images(images))
 
-            for point_values in point_set_values:
-                score_set_values = score_set_values_per_point[
-                    point_values['id']]
-                self.write_csv_one_point(
-                    image, point_values, score_set_values)
+            for image in images:
+                for point_values in point_set_values_per_image[image.pk]:
+                    score_set_values = score_set_values_per_point[
+                        point_values['id']]
+                    self.write_csv_one_point(
+                        image, point_values, score_set_values)
 
     def write_csv_one_point(self, image, point_values, score_set_values):
 
@@ -923,8 +976,9 @@ class ExportPrepView(SourceCsvExportPrepView):
                 'annotation__annotation_date']
             date_annotated = annotation_date.replace(
                 microsecond=0)
-            annotator = self.user_id_to_username(
-                point_values['annotation__user'])
+            # Filled in by point_score_values_for_images().
+            annotator = self.username_dict[
+                point_values['annotation__user']]
             row.update({
                 "Annotator": annotator,
                 "Date annotated": date_annotated,
@@ -6,6 +6,13 @@ class AsyncMedia {
 
     INITIAL_POLL_INTERVAL = 2*1000;
 
+    /* rootElement: only img elements under this element are considered.
+       Pages which add async media after the initial page load (such as
+       with ajax) can pass the newly added content here. */
+    constructor(rootElement = document) {
+        this.rootElement = rootElement;
+    }
+
     /* Generate any page media that weren't available before the page was
        requested. */
     async startGeneratingAsyncMedia() {
@@ -15,7 +22,7 @@ class AsyncMedia {
 
         // The media-async class denotes that an img is eligible for
         // async generation.
-        document.querySelectorAll('img.media-async').forEach((img) => {
+        this.rootElement.querySelectorAll('img.media-async').forEach((img) => {
             let mediaBatchKey = img.dataset.mediaBatchKey;
             let mediaKey = img.dataset.mediaKey;
             if (mediaKey !== '') {
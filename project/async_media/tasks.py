@@ -3,8 +3,9 @@ from easy_thumbnails.files import get_thumbnailer
 
 from images.models import Point
 from jobs.exceptions import JobError
-from jobs.utils import job_runner
-from visualization.utils import generate_patch_if_doesnt_exist, get_patch_url
+from jobs.models import Job
+from jobs.utils import claim_pending_jobs, finish_jobs, job_runner
+from visualization.utils import generate_patches_if_dont_exist, get_patch_url
 
 
 @job_runner(task_queue_name='realtime')
@@ -28,11 +29,65 @@ def generate_thumbnail(original_filepath: str, width: int, height: int):
 def generate_patch(point_id: int):
     """
     Generate an image patch centered around an annotation point.
+
+    Patches of the same image's other points whose generate_patch jobs
+    haven't started yet are generated here too, so that the original
+    image only gets decoded once. Those jobs are claimed before
+    generating, and finished here, so that no other task generates the
+    same patches at the same time.
     """
     try:
-        point = Point.objects.get(pk=point_id)
+        point = Point.objects.select_related('image').get(pk=point_id)
     except Point.DoesNotExist:
         raise JobError(f"Point {point_id} doesn't exist anymore.")
 
-    generate_patch_if_doesnt_exist(point)
+    image_point_ids = point.image.point_set.exclude(
+        pk=point.pk).values_list('pk', flat=True)
+    waiting_job_ids = Job.objects.filter(
+        job_name='generate_patch',
+        status=Job.Status.PENDING,
+        arg_identifier__in=[
+            Job.args_to_identifier([pk]) for pk in image_point_ids],
+    ).values_list('pk', flat=True)
+    claimed_jobs = list(
+        Job.objects.filter(pk__in=claim_pending_jobs(waiting_job_ids)))
+    claimed_points_by_id = Point.objects.select_related('image').in_bulk(
+        [int(job.arg_identifier) for job in claimed_jobs])
+
+    try:
+        generate_patches_if_dont_exist(
+            [point, *claimed_points_by_id.values()])
+    except Exception as e:
+        # Don't leave the claimed jobs in progress. This job's own
+        # failure is handled by the job runner.
+        finish_jobs([
+            dict(
+                job=job,
+                success=False,
+                result_message=f'{type(e).__name__}: {e}',
+            )
+            for job in claimed_jobs
+        ])
+        raise
+
+    jobs_details = []
+    for job in claimed_jobs:
+        claimed_point = claimed_points_by_id.get(int(job.arg_identifier))
+        if claimed_point is None:
+            jobs_details.append(dict(
+                job=job,
+                success=False,
+                result_message=(
+                    f"Point {job.arg_identifier} doesn't exist anymore."),
+            ))
+        else:
+            jobs_details.append(dict(
+                job=job,
+                success=True,
+                # The URL of the generated media, as with this job's
+                # own return value.
+                result_message=get_patch_url(claimed_point),
+            ))
+    finish_jobs(jobs_details)
+
     return get_patch_url(point)
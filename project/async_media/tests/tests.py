@@ -1,6 +1,6 @@
 from collections import defaultdict
 import os
-from unittest import skipIf
+from unittest import mock, skipIf
 import warnings
 
 from bs4 import BeautifulSoup
@@ -12,9 +12,12 @@ from easy_thumbnails.files import get_thumbnailer
 
 from images.models import Point
 from jobs.models import Job
+from jobs.tests.utils import do_job, fabricate_job
+from jobs.utils import claim_pending_jobs, JobRunnerDecorator
 from lib.tests.utils import (
     BasePermissionTest, ClientTest, make_media_url_comparable)
-from visualization.utils import generate_patch_if_doesnt_exist, get_patch_url
+from visualization.utils import (
+    generate_patch_if_doesnt_exist, get_patch_path, get_patch_url)
 
 
 class PermissionTest(BasePermissionTest):
@@ -568,6 +571,55 @@ class PatchesTest(AsyncMediaTest):
             zip(media_keys, [1, 2]),
         )
 
+    def test_claim_other_points_jobs(self):
+        img = self.upload_image(self.user, self.source)
+        points = list(img.point_set.order_by('point_number'))
+        other_jobs = [
+            fabricate_job('generate_patch', point.pk)
+            for point in points[1:]
+        ]
+
+        job = do_job('generate_patch', points[0].pk)
+        self.assertEqual(job.status, Job.Status.SUCCESS)
+        self.assertEqual(job.result_message, get_patch_url(points[0]))
+
+        for point, other_job in zip(points[1:], other_jobs):
+            other_job.refresh_from_db()
+            self.assertEqual(
+                other_job.status, Job.Status.SUCCESS,
+                msg="Other points' jobs should be finished")
+            self.assertEqual(other_job.result_message, get_patch_url(point))
+            self.assertTrue(default_storage.exists(get_patch_path(point)))
+
+    def test_other_points_job_started_during_claim(self):
+        img = self.upload_image(self.user, self.source)
+        points = list(img.point_set.order_by('point_number'))
+        for point in points[1:]:
+            fabricate_job('generate_patch', point.pk)
+        started_jobs = []
+
+        def claim_after_job_start(job_ids):
+            # Point 2's own task starts its job before we can claim it.
+            started_jobs.append(
+                JobRunnerDecorator.update_pending_job_to_in_progress(
+                    'generate_patch', points[1].pk))
+            return claim_pending_jobs(job_ids)
+
+        with mock.patch(
+            'async_media.tasks.claim_pending_jobs', claim_after_job_start
+        ):
+            do_job('generate_patch', points[0].pk)
+
+        self.assertIsNotNone(started_jobs[0])
+        started_jobs[0].refresh_from_db()
+        self.assertEqual(
+            started_jobs[0].status, Job.Status.IN_PROGRESS,
+            msg="Point 2's job should be left to its own task")
+        self.assertFalse(
+            default_storage.exists(get_patch_path(points[1])),
+            msg="Point 2's patch should be left to its own task")
+        self.assertTrue(default_storage.exists(get_patch_path(points[2])))
+
     def test_generate_over_multiple_polls(self):
         img = self.upload_image(self.user, self.source)
         self.add_annotations(self.user, img, {1: 'A', 2: 'B', 3: 'B', 4: 'A'})
@@ -11,7 +11,7 @@ from spacer.messages import JobMsg, JobReturnMsg
 from config.constants import SpacerJobSpec
 from jobs.models import Job
 from jobs.utils import finish_jobs
-from vision_backend.queues import BaseQueue
+from vision_backend.queues import BaseQueue, map_concurrently
 from .models import BatchJob
 
 
@@ -62,21 +62,46 @@ class BatchQueue(BaseQueue):
         batch_job.save()
 
     @staticmethod
-    def handle_job_failures(failures):
+    def get_task_job_ids(batch_job: BatchJob) -> list[int]:
+        """
+        IDs of the internal Jobs whose tasks were submitted in this
+        BatchJob. Usually that's just the BatchJob's own internal Job,
+        but feature extractions may be packed several to a BatchJob.
+        """
+        if batch_job.internal_job.job_name != 'extract_features':
+            return [batch_job.internal_job_id]
+
+        job_msg_loc = default_storage.spacer_data_loc(batch_job.job_key)
+        try:
+            job_msg = JobMsg.load(job_msg_loc)
+        except (ClientError, IOError):
+            return [batch_job.internal_job_id]
+        return [int(task.job_token) for task in job_msg.tasks]
+
+    @classmethod
+    def handle_job_failures(cls, failures):
         if not failures:
             return
 
+        job_ids_per_failure = [
+            cls.get_task_job_ids(batch_job) for batch_job, _ in failures]
         internal_jobs_by_id = Job.objects.in_bulk(
-            [batch_job.internal_job_id for batch_job, _ in failures])
+            [job_id for job_ids in job_ids_per_failure for job_id in job_ids])
 
         finish_jobs_args = []
-        for batch_job, error_message in failures:
+        for (batch_job, error_message), job_ids in zip(
+            failures, job_ids_per_failure
+        ):
             batch_job.status = 'FAILED'
-            finish_jobs_args.append(dict(
-                job=internal_jobs_by_id[batch_job.internal_job_id],
-                success=False,
-                result_message=error_message,
-            ))
+            for job_id in job_ids:
+                if job_id not in internal_jobs_by_id:
+                    # Job doesn't exist anymore.
+                    continue
+                finish_jobs_args.append(dict(
+                    job=internal_jobs_by_id[job_id],
+                    success=False,
+                    result_message=error_message,
+                ))
 
         finish_jobs(finish_jobs_args)
 
@@ -89,7 +114,47 @@ class BatchQueue(BaseQueue):
         )
 
     @staticmethod
-    def process_response_for_job(job, response_for_job):
+    def load_result(job: BatchJob) -> JobReturnMsg | Exception:
+        job_res_loc = default_storage.spacer_data_loc(job.res_key)
+        try:
+            return JobReturnMsg.load(job_res_loc)
+        except (ClientError, IOError) as e:
+            # IOError for local storage, ClientError for S3 storage
+            return e
+
+    def fetch_results(self, jobs: list[BatchJob]) -> dict:
+        batch_tokens = [job.batch_token for job in jobs if job.batch_token]
+
+        if batch_tokens:
+            # https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/batch/client/describe_jobs.html
+            # jobs is "A list of up to 100 job IDs."
+            boto_response = self.batch_client.describe_jobs(jobs=batch_tokens)
+
+            batch_tokens_to_responses = dict(
+                (response_job['jobId'], response_job)
+                for response_job in boto_response['jobs']
+            )
+        else:
+            batch_tokens_to_responses = dict()
+
+        # Download the result messages of the jobs that succeeded.
+        succeeded_jobs = [
+            job for job in jobs
+            if batch_tokens_to_responses.get(
+                job.batch_token, {}).get('status') == 'SUCCEEDED'
+        ]
+        loaded_results = map_concurrently(self.load_result, succeeded_jobs)
+
+        return dict(
+            responses=batch_tokens_to_responses,
+            loaded_results=dict(
+                (job.pk, loaded_result) for job, loaded_result
+                in zip(succeeded_jobs, loaded_results)
+            ),
+        )
+
+    @staticmethod
+    def process_response_for_job(job, response_for_job, loaded_result):
 
         job.status = response_for_job['status']
 
@@ -106,15 +171,10 @@ class BatchQueue(BaseQueue):
             )
 
         # Else: 'SUCCEEDED'
-        job_res_loc = default_storage.spacer_data_loc(job.res_key)
-
-        try:
-            return_msg = JobReturnMsg.load(job_res_loc)
-        except (ClientError, IOError) as e:
-            # IOError for local storage, ClientError for S3 storage
+        if isinstance(loaded_result, Exception):
             message = (
                 f"Batch job [{job}] succeeded, but couldn't get"
-                f" output at the expected location. ({e})"
+                f" output at the expected location. ({loaded_result})"
             )
             return dict(
                 failure=(job, message),
@@ -123,25 +183,22 @@ class BatchQueue(BaseQueue):
 
         # All went well.
         return dict(
-            result=return_msg,
+            result=loaded_result,
             status=job.status,
         )
 
-    def collect_jobs(
-        self, jobs: list[BatchJob]
+    def process_fetched_results(
+        self, jobs: list[BatchJob], fetched: dict
     ) -> tuple[list[JobReturnMsg], list[str]]:
 
         now = timezone.now()
         failures = []
         results = []
         statuses = []
-        batch_tokens = []
         job_ids_without_tokens = []
 
         for job in jobs:
-            if job.batch_token:
-                batch_tokens.append(job.batch_token)
-            else:
+            if not job.batch_token:
                 # Didn't get a batch token from AWS Batch. May indicate AWS
                 # service problems (see coralnet issue 458) or it may just be
                 # unlucky timing between submit and collect. Check the
@@ -156,17 +213,7 @@ class BatchQueue(BaseQueue):
                     statuses.append('NOT SUBMITTED')
                 job_ids_without_tokens.append(job.pk)
 
-        if batch_tokens:
-            # https://boto3.amazonaws.com/v1/documentation/api/latest/reference/services/batch/client/describe_jobs.html
-            # jobs is "A list of up to 100 job IDs."
-            boto_response = self.batch_client.describe_jobs(jobs=batch_tokens)
-
-            batch_tokens_to_responses = dict(
-                (response_job['jobId'], response_job)
-                for response_job in boto_response['jobs']
-            )
-        else:
-            batch_tokens_to_responses = dict()
+        batch_tokens_to_responses = fetched['responses']
 
         for job in jobs:
 
@@ -182,7 +229,9 @@ class BatchQueue(BaseQueue):
 
             response_for_job = batch_tokens_to_responses[job.batch_token]
 
-            d = self.process_response_for_job(job, response_for_job)
+            d = self.process_response_for_job(
+                job, response_for_job,
+                fetched['loaded_results'].get(job.pk))
             if 'failure' in d:
                 failures.append(d['failure'])
             if 'status' in d:
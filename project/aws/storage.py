@@ -11,7 +11,7 @@ from django.test import override_settings
 from spacer.data_classes import DataLocation
 from storages.backends.s3 import S3Storage
 
-from lib.storage_backends import StorageManager
+from lib.storage_backends import InstrumentedStorageMixin, StorageManager
 
 
 class StorageManagerS3(StorageManager):
@@ -99,7 +99,7 @@ class StorageManagerS3(StorageManager):
                 s3_root_storage.path_join(dir_to_remove, subdir))
 
 
-class MediaStorageS3(S3Storage):
+class MediaStorageS3(InstrumentedStorageMixin, S3Storage):
     """
     S3-bucket storage backend.
     Storage root defaults to the AWS_LOCATION directory.
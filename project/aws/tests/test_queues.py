@@ -307,3 +307,17 @@ class BatchQueueSpecificsTest(BaseTaskTest):
         with mock_boto_client('mixed_status'):
             self.extract_and_assert_collect_count(
                 "2 FAILED, 1 RUNNING, 3 SUCCEEDED")
+
+    @override_settings(SPACER_COLLECT_WORKERS=4)
+    def test_concurrent_collection(self):
+        images = [self.upload_image(self.user, self.source) for _ in range(6)]
+
+        with mock_boto_client('mixed_status'):
+            self.extract_and_assert_collect_count(
+                "2 FAILED, 1 RUNNING, 3 SUCCEEDED")
+
+        for image in images:
+            image.features.refresh_from_db()
+        self.assertEqual(
+            sum(image.features.extracted for image in images), 3,
+            msg="Succeeded jobs' results should have been handled")
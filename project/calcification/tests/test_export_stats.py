@@ -193,7 +193,7 @@ class FileTypeTest(BaseCalcifyStatsExportTest):
             response['content-disposition'].endswith('.xlsx"'))
 
         book = pyexcel.get_book(
-            file_type='xlsx', file_content=response.content)
+            file_type='xlsx', file_content=response.getvalue())
 
         # Check data sheet contents
         expected_lines = [
@@ -275,7 +275,7 @@ class ExportTest(BaseCalcifyStatsExportTest):
             # 4.8*0.6 + 1.3*0.4
             f'{img1.pk},1.jpg,Confirmed,5,2.800,2.240,3.400',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_zero_for_undefined_rate(self):
         """If a label has no rate defined for it, should assume a 0 rate."""
@@ -305,7 +305,7 @@ class ExportTest(BaseCalcifyStatsExportTest):
             # 4.8*0.6
             f'{img1.pk},1.jpg,Confirmed,5,2.400,1.920,2.880',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_different_tables(self):
         """Rate table choice should be respected in the export."""
@@ -345,7 +345,7 @@ class ExportTest(BaseCalcifyStatsExportTest):
             # 4.8*0.2 + 1.3*0.4
             f'{img1.pk},1.jpg,Confirmed,5,1.200,0.960,1.480',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
         # Table 2
         response = self.export_calcify_stats(
@@ -359,7 +359,7 @@ class ExportTest(BaseCalcifyStatsExportTest):
             # 2.0*0.4 + -2.2*0.4
             f'{img1.pk},1.jpg,Confirmed,5,-0.600,-1.280,-0.080',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_optional_columns_contributions(self):
         """Test the optional mean and bounds contributions columns."""
@@ -397,7 +397,7 @@ class ExportTest(BaseCalcifyStatsExportTest):
             # 0
             '2.400,0.400,0.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
         # Bounds only
         response = self.export_calcify_stats(
@@ -418,7 +418,7 @@ class ExportTest(BaseCalcifyStatsExportTest):
             # 0
             '1.920,0.320,0.000,2.880,0.520,0.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
         # Mean and bounds
         response = self.export_calcify_stats(
@@ -433,7 +433,7 @@ class ExportTest(BaseCalcifyStatsExportTest):
             f'{img1.pk},1.jpg,Confirmed,5,2.800,2.240,3.400,'
             '2.400,0.400,0.000,1.920,0.320,0.000,2.880,0.520,0.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_multiple_images(self):
         """
@@ -484,7 +484,7 @@ class ExportTest(BaseCalcifyStatsExportTest):
             'ALL IMAGES,,,,3.400,2.720,4.100,'
             '3.200,0.200,0.000,2.560,0.160,0.000,3.840,0.260,0.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_no_negative_zero(self):
         """
@@ -520,7 +520,7 @@ class ExportTest(BaseCalcifyStatsExportTest):
             # Contributions from C in particular should be 0.000, not -0.000
             '4.000,0.000,0.000,3.200,0.000,0.000,4.800,0.000,0.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_nonexistent_table_id(self):
         """
@@ -618,7 +618,7 @@ class ImageSetTest(BaseCalcifyStatsExportTest):
 
         response = self.export_calcify_stats(
             dict(rate_table_id=self.calcify_table.pk))
-        self.assert_csv_image_set(response.content, [img1])
+        self.assert_csv_image_set(response.getvalue(), [img1])
 
     def test_all_images_multiple(self):
         """Export for n out of n images."""
@@ -637,7 +637,7 @@ class ImageSetTest(BaseCalcifyStatsExportTest):
 
         response = self.export_calcify_stats(
             dict(rate_table_id=self.calcify_table.pk))
-        self.assert_csv_image_set(response.content, [img1, img2, img3])
+        self.assert_csv_image_set(response.getvalue(), [img1, img2, img3])
 
     def test_image_subset_by_metadata(self):
         """Export for some, but not all, images."""
@@ -665,7 +665,7 @@ class ImageSetTest(BaseCalcifyStatsExportTest):
             rate_table_id=self.calcify_table.pk,
         )
         response = self.export_calcify_stats(data)
-        self.assert_csv_image_set(response.content, [img1, img3])
+        self.assert_csv_image_set(response.getvalue(), [img1, img3])
 
     def test_image_empty_set(self):
         """Export for 0 images."""
@@ -679,7 +679,7 @@ class ImageSetTest(BaseCalcifyStatsExportTest):
             rate_table_id=self.calcify_table.pk,
         )
         response = self.export_calcify_stats(data)
-        self.assert_csv_image_set(response.content, [])
+        self.assert_csv_image_set(response.getvalue(), [])
 
     def test_exclude_unannotated_images(self):
         """
@@ -703,7 +703,7 @@ class ImageSetTest(BaseCalcifyStatsExportTest):
 
         response = self.export_calcify_stats(
             dict(rate_table_id=self.calcify_table.pk))
-        self.assert_csv_image_set(response.content, [img1, img2])
+        self.assert_csv_image_set(response.getvalue(), [img1, img2])
 
     def test_invalid_image_set_params(self):
         self.upload_image(self.user, self.source)
@@ -737,7 +737,7 @@ class ImageSetTest(BaseCalcifyStatsExportTest):
         response = self.export_calcify_stats(
             dict(rate_table_id=self.calcify_table.pk))
         # Should have image 1, but not 2
-        self.assert_csv_image_set(response.content, [img1])
+        self.assert_csv_image_set(response.getvalue(), [img1])
 
 
 class LabelColumnsTest(BaseCalcifyStatsExportTest):
@@ -807,7 +807,7 @@ class LabelColumnsTest(BaseCalcifyStatsExportTest):
             '0.000,0.000,0.000,0.000,0.000,'
             '0.000,0.000,0.000,0.000,0.000,0.000,0.000,0.000,0.000,0.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_order_by_group_and_name(self):
         img1 = self.upload_image(
@@ -833,7 +833,7 @@ class LabelColumnsTest(BaseCalcifyStatsExportTest):
             '0.000,0.000,0.000,0.000,0.000,'
             '0.000,0.000,0.000,0.000,0.000,0.000,0.000,0.000,0.000,0.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class UnicodeTest(BaseCalcifyStatsExportTest):
@@ -874,7 +874,7 @@ class UnicodeTest(BaseCalcifyStatsExportTest):
 
             f'{img1.pk},あ.jpg,Confirmed,5,0.000,0.000,0.000,0.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class BrowseFormsTest(ClientTest):
@@ -907,7 +907,7 @@ class BrowseFormsTest(ClientTest):
         self.client.force_login(self.user)
         response = self.client.get(url)
 
-        response_soup = BeautifulSoup(response.content, 'html.parser')
+        response_soup = BeautifulSoup(response.getvalue(), 'html.parser')
         export_form = response_soup.find(
             'form', id='export-calcify-rates-prep-form')
 
@@ -943,7 +943,7 @@ class BrowseFormsTest(ClientTest):
         self.client.force_login(self.user)
         response = self.client.get(url)
 
-        response_soup = BeautifulSoup(response.content, 'html.parser')
+        response_soup = BeautifulSoup(response.getvalue(), 'html.parser')
         tables_dropdown = response_soup.find('select', id='id_rate_table_id')
 
         self.assertHTMLEqual(
@@ -985,7 +985,7 @@ class BrowseFormsTest(ClientTest):
         self.client.force_login(self.user)
         response = self.client.get(url)
 
-        response_soup = BeautifulSoup(response.content, 'html.parser')
+        response_soup = BeautifulSoup(response.getvalue(), 'html.parser')
         grid_of_tables_soup = response_soup.find(
             'table', id='table-of-calcify-tables')
 
@@ -1,4 +1,3 @@
-import collections
 import datetime
 from io import StringIO
 import re
@@ -7,6 +6,7 @@ from django.http import JsonResponse
 from django.shortcuts import render
 from django.template.loader import render_to_string
 from django.views.decorators.http import require_GET, require_POST
+import numpy as np
 import pyexcel
 
 from export.utils import create_csv_stream_response
@@ -120,68 +120,39 @@ class CalcifyStatsExportPrepView(ImageStatsExportPrepView):
 
         self.calcify_rate_table = CalcifyRateTable.objects.get(
             pk=export_form_data['rate_table_id'])
-        self.calcify_rates = self.calcify_rate_table.rates_json
-
-        self.mean_rate_sum = 0
-        self.lower_bound_sum = 0
-        self.upper_bound_sum = 0
-        self.mean_contribution_sums = collections.defaultdict(float)
-        self.lower_bound_contribution_sums = collections.defaultdict(float)
-        self.upper_bound_contribution_sums = collections.defaultdict(float)
+        calcify_rates = self.calcify_rate_table.rates_json
+
+        # Per-label rates as a 3 x num-labels array, with rows for the
+        # mean, lower bound, and upper bound; columns are indexed like
+        # label_ids_to_displays.
+        # Labels not in the rate table default to 0 (meaning, the label is
+        # assumed to have no net effect on calcification).
+        self.label_rates = np.zeros((3, len(self.label_ids_to_displays)))
+        for label_index, label_id in enumerate(self.label_ids_to_displays):
+            label_id_str = str(label_id)
+            if label_id_str in calcify_rates:
+                label_rates = calcify_rates[label_id_str]
+                self.label_rates[:, label_index] = [
+                    float(label_rates['mean']),
+                    float(label_rates['lower_bound']),
+                    float(label_rates['upper_bound']),
+                ]
+
+        # Summary stats computation, laid out the same way.
+        self.image_rate_sums = np.zeros(3)
+        self.contribution_sums = np.zeros(self.label_rates.shape)
 
         return fieldnames
 
     def image_loop_main_body(
-            self, row, label_counter, num_annotations_in_image):
-
-        image_mean_rate = 0
-        image_lower_bound = 0
-        image_upper_bound = 0
-
-        for label_id, count in label_counter.items():
-
-            label_id_str = str(label_id)
-            if label_id_str in self.calcify_rates:
-                label_mean = float(self.calcify_rates[label_id_str]['mean'])
-                label_lower_bound = float(
-                    self.calcify_rates[label_id_str]['lower_bound'])
-                label_upper_bound = float(
-                    self.calcify_rates[label_id_str]['upper_bound'])
-            else:
-                # Default to 0 (meaning, this label is assumed to have
-                # no net effect on calcification)
-                label_mean = 0
-                label_lower_bound = 0
-                label_upper_bound = 0
-
-            coverage = count / num_annotations_in_image
-
-            mean_contribution = coverage * label_mean
-            lower_bound_contribution = coverage * label_lower_bound
-            upper_bound_contribution = coverage * label_upper_bound
-
-            image_mean_rate += mean_contribution
-            image_lower_bound += lower_bound_contribution
-            image_upper_bound += upper_bound_contribution
-
-            label_display = self.label_ids_to_displays[label_id]
-
-            if 'per_label_mean' in self.optional_columns:
-
-                row[f"{label_display} M"] = self.float_format(
-                    mean_contribution)
-                self.mean_contribution_sums[label_display] += mean_contribution
+            self, row, label_counts, num_annotations_in_image):
 
-            if 'per_label_bounds' in self.optional_columns:
+        coverages = label_counts / num_annotations_in_image
+        contributions = self.label_rates * coverages
+        image_mean_rate, image_lower_bound, image_upper_bound = (
+            contributions.sum(axis=1))
 
-                row[f"{label_display} LB"] = self.float_format(
-                    lower_bound_contribution)
-                row[f"{label_display} UB"] = self.float_format(
-                    upper_bound_contribution)
-                self.lower_bound_contribution_sums[label_display] += \
-                    lower_bound_contribution
-                self.upper_bound_contribution_sums[label_display] += \
-                    upper_bound_contribution
+        self.add_label_columns(row, contributions)
 
         # Add image stats to CSV as fixed-places strings
         row["Mean"] = self.float_format(image_mean_rate)
@@ -189,53 +160,61 @@ class CalcifyStatsExportPrepView(ImageStatsExportPrepView):
         row["Upper bound"] = self.float_format(image_upper_bound)
 
         # Add to summary stats computation
-        self.mean_rate_sum += image_mean_rate
-        self.lower_bound_sum += image_lower_bound
-        self.upper_bound_sum += image_upper_bound
+        self.image_rate_sums += (
+            image_mean_rate, image_lower_bound, image_upper_bound)
+        self.contribution_sums += contributions
 
         return row
 
     def finish_summary_row(self, summary_row, num_annotated_images):
 
+        mean_rate, lower_bound, upper_bound = (
+            self.image_rate_sums / num_annotated_images)
         summary_row.update({
-            "Mean": self.float_format(
-                self.mean_rate_sum / num_annotated_images),
-            "Lower bound": self.float_format(
-                self.lower_bound_sum / num_annotated_images),
-            "Upper bound": self.float_format(
-                self.upper_bound_sum / num_annotated_images),
+            "Mean": self.float_format(mean_rate),
+            "Lower bound": self.float_format(lower_bound),
+            "Upper bound": self.float_format(upper_bound),
         })
 
-        for label_display in self.label_ids_to_displays.values():
+        self.add_label_columns(
+            summary_row, self.contribution_sums / num_annotated_images)
+
+        return summary_row
 
+    def add_label_columns(self, row, contributions):
+        """
+        Fill in the optional per-label columns from a 3 x num-labels
+        array of mean, lower bound, and upper bound contributions.
+        """
+        mean_contributions, lower_bound_contributions, \
+            upper_bound_contributions = contributions
+
+        for label_index, label_display in enumerate(
+            self.label_ids_to_displays.values()
+        ):
             if 'per_label_mean' in self.optional_columns:
-                summary_row[f"{label_display} M"] = self.float_format(
-                    self.mean_contribution_sums[label_display]
-                    / num_annotated_images)
+                row[f"{label_display} M"] = self.float_format(
+                    mean_contributions[label_index])
 
             if 'per_label_bounds' in self.optional_columns:
-                summary_row[f"{label_display} LB"] = self.float_format(
-                    self.lower_bound_contribution_sums[label_display]
-                    / num_annotated_images)
-                summary_row[f"{label_display} UB"] = self.float_format(
-                    self.upper_bound_contribution_sums[label_display]
-                    / num_annotated_images)
-
-        return summary_row
+                row[f"{label_display} LB"] = self.float_format(
+                    lower_bound_contributions[label_index])
+                row[f"{label_display} UB"] = self.float_format(
+                    upper_bound_contributions[label_index])
 
-    def finish_workbook(self, book, source):
-        book["Meta"].extend_rows(
-            [["Calcification table", self.calcify_rate_table.name]])
+    def finish_workbook(self, book_dict, source):
+        book_dict["Meta"].append(
+            ["Calcification table", self.calcify_rate_table.name])
 
+        # The rate table is only as big as the labelset, so it's fine to
+        # have in memory.
         csv_stream = StringIO()
         rate_table_json_to_csv(
             csv_stream, self.calcify_rate_table, source=source)
-        label_rates_sheet = pyexcel.get_sheet(
+        book_dict["Label rates"] = pyexcel.get_array(
             file_type='csv', file_content=csv_stream.getvalue())
-        label_rates_sheet.name = "Label rates"
-        book += label_rates_sheet
 
-        return book
+        return book_dict
 
 
 def response_after_table_upload_or_delete(request, source):
@@ -96,7 +96,11 @@ except ValueError:
         f"Unsupported SETTINGS_BASE value: {env('SETTINGS_BASE')}"
         f" (supported values are: {', '.join([b.value for b in Bases])})")
 
-_TESTING = 'test' in sys.argv or 'selenium_test' in sys.argv
+# The benchmark command runs on a test DB and test storage, with the same
+# settings as the unit tests.
+_TESTING = (
+    'test' in sys.argv or 'selenium_test' in sys.argv
+    or 'benchmark' in sys.argv)
 _SELENIUM = 'selenium_test' in sys.argv
 
 
@@ -368,6 +372,8 @@ FILE_UPLOAD_PERMISSIONS = 0o664
 # [CoralNet settings]
 IMAGE_UPLOAD_MAX_FILE_SIZE = 30*1024*1024  # 30 MB
 IMAGE_UPLOAD_MAX_DIMENSIONS = (8000, 8000)
+# Max number of images in a single multi-image upload request.
+IMAGE_UPLOAD_MAX_BATCH_SIZE = 50
 IMAGE_UPLOAD_ACCEPTED_CONTENT_TYPES = [
     # https://www.sitepoint.com/web-foundations/mime-types-complete-list/
     'image/jpeg',
@@ -413,11 +419,19 @@ ROBOT_MODEL_FILE_PATTERN = 'classifiers/{pk}.model'
 ROBOT_MODEL_TRAINDATA_PATTERN = 'classifiers/{pk}.traindata'
 ROBOT_MODEL_VALDATA_PATTERN = 'classifiers/{pk}.valdata'
 ROBOT_MODEL_VALRESULT_PATTERN = 'classifiers/{pk}.valresult'
+ROBOT_MODEL_EVALUATION_PATTERN = 'classifiers/{pk}.evaluation.npz'
+# Per-source manifest of training labels
+# (see vision_backend.label_manifest)
+TRAINING_LABELS_MANIFEST_PATTERN = \
+    'classifiers/source_{source_id}_labels.npz'
 
 # Naming for aws.models.BatchJob
 BATCH_JOB_PATTERN = 'batch_jobs/{pk}_job_msg.json'
 BATCH_RES_PATTERN = 'batch_jobs/{pk}_job_res.json'
 
+# Naming for source data exports (see export.utils.SourceExport)
+SOURCE_EXPORT_FILE_PATTERN = 'exports/{key}{extension}'
+
 # Method of selecting images for the validation set vs. the training set.
 # See Image.valset() definition for the possible choices and how they're
 # implemented.
@@ -458,6 +472,25 @@ FEATURE_CACHING_ANNOTATION_LIMIT = env(
 # processes allocated for background jobs) if there is no limit here.
 SOURCE_CLASSIFICATIONS_MAX_WORK = 100000
 
+# If nonzero, source checks schedule classifications as batch jobs covering
+# up to this many images each, instead of one job per image. A batch job
+# loads the classifier once, scores all of the batch's features together,
+# and saves the results with bulk queries.
+SOURCE_CLASSIFICATIONS_BATCH_SIZE = env.int(
+    'SOURCE_CLASSIFICATIONS_BATCH_SIZE', default=0)
+
+# Upper bound on the total size (going by model file sizes) of classifier
+# models kept in each process's in-memory model cache.
+# See vision_backend.classifier_cache.
+CLASSIFIER_MODEL_CACHE_MAX_BYTES = env.int(
+    'CLASSIFIER_MODEL_CACHE_MAX_BYTES', default=500*1024*1024)
+
+# How long (in seconds) an invalidation of a cached classifier model is
+# remembered, so that other processes can drop their copies of that model.
+# Classifier model files don't change once trained, so invalidations mainly
+# serve to free up memory; this doesn't need to be very long.
+CLASSIFIER_MODEL_CACHE_INVALIDATION_TIMEOUT = 60*60*24*7
+
 # Spacer job hash to identify this server instance's jobs in the AWS Batch
 # dashboard.
 SPACER_JOB_HASH = env('SPACER_JOB_HASH', default='default_hash')
@@ -504,6 +537,19 @@ else:
         'SPACER_QUEUE_CHOICE', default='vision_backend.queues.LocalQueue')
 
 
+# Number of threads used to download spacer job results when collecting
+# spacer jobs. With more than 1, collection also fetches each batch of
+# results while the previous batch is being handled.
+# 1 collects serially.
+SPACER_COLLECT_WORKERS = env.int('SPACER_COLLECT_WORKERS', default=1)
+
+# Checking feature vectors against DB point rows/columns (see
+# vision_backend.utils.reset_invalid_features_bulk()) is done in batches of
+# this many images. Within a batch, feature files without a saved rowcols
+# fingerprint are loaded with up to FEATURE_SCAN_WORKERS threads.
+FEATURE_SCAN_BATCH_SIZE = env.int('FEATURE_SCAN_BATCH_SIZE', default=500)
+FEATURE_SCAN_WORKERS = env.int('FEATURE_SCAN_WORKERS', default=1)
+
 # If AWS Batch is being used, these job queue and job definition names are
 # used depending on the specs of the requested job.
 if SETTINGS_BASE == Bases.PRODUCTION:
@@ -531,6 +577,15 @@ FEATURE_EXTRACT_SPEC_PIXELS = [
     (SpacerJobSpec.HIGH, 6000*6000),
     (SpacerJobSpec.MEDIUM, 0),
 ]
+# Feature extractions from the same source and spec level can be packed
+# into one spacer job, so that they share the per-job overhead of
+# container startup, extractor loading, etc.
+# Max number of images per spacer job. 1 means no packing.
+FEATURE_EXTRACT_PACK_MAX_IMAGES = env.int(
+    'FEATURE_EXTRACT_PACK_MAX_IMAGES', default=1)
+# Max total pixels of the images in a packed spacer job.
+FEATURE_EXTRACT_PACK_MAX_PIXELS = env.int(
+    'FEATURE_EXTRACT_PACK_MAX_PIXELS', default=20*4000*3000)
 TRAIN_SPEC_ANNOTATIONS = [
     (SpacerJobSpec.HIGH, 10000*20),
     (SpacerJobSpec.MEDIUM, 0),
@@ -990,6 +1045,9 @@ DJANGO_HUEY = {
 ENABLE_PERIODIC_JOBS = not _TESTING
 # Days until we purge old async jobs.
 JOB_MAX_DAYS = 30
+# Hours until we purge generated source data export files. Users are
+# expected to download an export right after it's generated.
+SOURCE_EXPORT_MAX_HOURS = 24
 # Page size when listing async jobs.
 JOBS_PER_PAGE = 100
 # Potentially long-running jobs should try to finish up once this
@@ -999,6 +1057,27 @@ JOBS_PER_PAGE = 100
 # For example, the supervisor `stopwaitsecs` parameter for the huey
 # process can be twice this duration.
 JOB_MAX_MINUTES = 10
+# Number of scheduled jobs that run_scheduled_jobs fetches per query.
+# A run keeps fetching batches until there are no more jobs to start, or
+# until JOB_MAX_MINUTES passes.
+JOB_DISPATCH_BATCH_SIZE = env.int('JOB_DISPATCH_BATCH_SIZE', default=1000)
+# Relative dispatch shares of job names, for jobs that should get
+# more (>1) or less (<1) than their equal share of each dispatch batch.
+# Job names not listed here have a weight of 1.
+JOB_DISPATCH_WEIGHTS = {}
+
+# [CoralNet settings]
+# Per-view and per-job performance metrics (see lib.instrumentation).
+INSTRUMENTATION_ENABLED = env.bool('INSTRUMENTATION_ENABLED', default=True)
+# Metrics are aggregated over the latest WINDOW_COUNT windows of
+# WINDOW_SECONDS each; so by default, the latest 24 hours.
+INSTRUMENTATION_WINDOW_SECONDS = 60*60
+INSTRUMENTATION_WINDOW_COUNT = 24
+# If set, the Prometheus metrics endpoint also accepts requests with an
+# 'Authorization: Bearer <token>' header with this token, so a scraper
+# doesn't have to log in as a superuser.
+INSTRUMENTATION_METRICS_TOKEN = env(
+    'INSTRUMENTATION_METRICS_TOKEN', default='')
 
 
 #
@@ -1116,6 +1195,8 @@ MIDDLEWARE = [
     # each request to understand usage patterns. (ID, not username, to keep
     # things relatively anonymous)
     'lib.middleware.ViewLoggingMiddleware',
+    # Record per-view performance metrics.
+    'lib.middleware.InstrumentationMiddleware',
     # Provide a cache which persists for the duration of the view.
     'lib.middleware.ViewScopedCacheMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
@@ -1441,8 +1522,21 @@ ROBOT_USERNAME = 'robot'
 ALLEVIATE_USERNAME = 'Alleviate'
 
 BROWSE_DEFAULT_THUMBNAILS_PER_PAGE = 20
+# How long (in seconds) a snapshot of an image set's ordering, used for
+# annotation tool navigation, stays in the cache. Snapshots are also
+# invalidated whenever the images, metadata, or (if relevant) annotations
+# change, so this mainly limits how long unused snapshots take up space.
+IMAGE_SET_SNAPSHOT_TIMEOUT = 60*60
 LABEL_EXAMPLE_PATCHES_PER_PAGE = 50
 LABEL_EXAMPLE_PATCHES_PER_PAGE_GUEST = 5
+# Labels with at least this popularity (0-100) get their first page of
+# example patches generated in the background, whenever label details
+# are updated.
+LABEL_EXAMPLE_PATCHES_PREGENERATE_MIN_POPULARITY = 20
+# Max number of labels whose annotation stats get recomputed from scratch
+# on each run of the label details job. Label stats are otherwise kept up
+# to date as annotations change, so this just corrects drift over time.
+LABEL_STATS_RECONCILE_BATCH_SIZE = 2000
 
 # If a source has more than this many unique values for a given
 # aux. metadata model field, the corresponding search form field
@@ -0,0 +1,2 @@
+class ExportRequestDenied(Exception):
+    pass
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from jobs.exceptions import JobError
+from jobs.utils import job_runner
+from sources.models import Source
+from .exceptions import ExportRequestDenied
+from .utils import SourceExport
+
+
+# Exports of large sources can take minutes, so they go in the background
+# queue rather than holding up the realtime queue's short tasks.
+@job_runner()
+def generate_source_export(export_key: str):
+    """
+    Write a source data export to storage, so that it can be served
+    as a file download.
+    """
+    export = SourceExport(export_key)
+    try:
+        view_class = export.view_class
+        source = Source.objects.get(pk=export.source_id)
+    except ExportRequestDenied as e:
+        raise JobError(str(e))
+    except Source.DoesNotExist:
+        raise JobError("Source doesn't exist anymore.")
+
+    num_images = view_class().generate_export(source, export)
+    return f"Exported {num_images} image(s)"
+
+
+@job_runner(interval=timedelta(hours=1))
+def clean_up_old_source_exports():
+    """
+    Delete generated export files which are old enough that they
+    shouldn't be downloaded anymore.
+    """
+    x_hours_ago = (
+        timezone.now() - timedelta(hours=settings.SOURCE_EXPORT_MAX_HOURS))
+
+    try:
+        _, filenames = default_storage.listdir('exports')
+    except FileNotFoundError:
+        # No exports have been generated yet.
+        filenames = []
+
+    count = 0
+    for filename in filenames:
+        filepath = default_storage.path_join('exports', filename)
+        if default_storage.get_modified_time(filepath) < x_hours_ago:
+            default_storage.delete(filepath)
+            count += 1
+
+    if count > 0:
+        return f"Cleaned up {count} old export(s)"
+    else:
+        return "No old exports to clean up"
@@ -1,3 +1,5 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 import pyexcel
 
@@ -164,7 +166,7 @@ class FileTypeTest(BaseImageCoversExportTest):
             msg="Content type should correspond to xlsx")
 
         book = pyexcel.get_book(
-            file_type='xlsx', file_content=response.content)
+            file_type='xlsx', file_content=response.getvalue())
 
         # Check data sheet contents
         expected_lines = [
@@ -221,7 +223,7 @@ class ImageSetTest(BaseImageCoversExportTest):
             'Image ID,Image name,Annotation status,Points,A,B',
             f'{img1.pk},1.jpg,Confirmed,5,60.000,40.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_all_images_multiple(self):
         """Export for n out of n images."""
@@ -247,7 +249,7 @@ class ImageSetTest(BaseImageCoversExportTest):
             f'{img3.pk},3.jpg,Confirmed,5,100.000,0.000',
             'ALL IMAGES,,,,60.000,40.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_image_subset_by_metadata(self):
         """Export for some, but not all, images."""
@@ -279,7 +281,7 @@ class ImageSetTest(BaseImageCoversExportTest):
             f'{img3.pk},3.jpg,Confirmed,5,100.000,0.000',
             'ALL IMAGES,,,,80.000,20.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_image_empty_set(self):
         """Export for 0 images."""
@@ -294,7 +296,7 @@ class ImageSetTest(BaseImageCoversExportTest):
         expected_lines = [
             'Image ID,Image name,Annotation status,Points,A,B',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_exclude_unannotated_images(self):
         """
@@ -324,7 +326,7 @@ class ImageSetTest(BaseImageCoversExportTest):
             f'{img2.pk},2.jpg,Unconfirmed,5,20.000,80.000',
             'ALL IMAGES,,,,40.000,60.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_invalid_image_set_params(self):
         self.upload_image(self.user, self.source)
@@ -359,7 +361,7 @@ class ImageSetTest(BaseImageCoversExportTest):
             'Image ID,Image name,Annotation status,Points,A,B',
             f'{img1.pk},1.jpg,Confirmed,5,60.000,40.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class LabelColumnsTest(BaseImageCoversExportTest):
@@ -417,7 +419,7 @@ class LabelColumnsTest(BaseImageCoversExportTest):
             'Image ID,Image name,Annotation status,Points,11,21,31,12,22',
             f'{img1.pk},1.jpg,Confirmed,5,0.000,20.000,40.000,20.000,20.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
     def test_order_by_group_and_name(self):
         img1 = self.upload_image(
@@ -432,7 +434,7 @@ class LabelColumnsTest(BaseImageCoversExportTest):
             'Image ID,Image name,Annotation status,Points,A1,B1,C1,A2,B2',
             f'{img1.pk},1.jpg,Confirmed,5,20.000,40.000,0.000,20.000,20.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class UnicodeTest(BaseImageCoversExportTest):
@@ -466,7 +468,7 @@ class UnicodeTest(BaseImageCoversExportTest):
             'Image ID,Image name,Annotation status,Points,い',
             f'{img1.pk},あ.jpg,Confirmed,5,100.000',
         ]
-        self.assert_csv_content_equal(response.content, expected_lines)
+        self.assert_csv_content_equal(response.getvalue(), expected_lines)
 
 
 class PerformanceTest(BaseImageCoversExportTest):
@@ -504,3 +506,33 @@ class PerformanceTest(BaseImageCoversExportTest):
             response = self.export_image_covers(dict())
         self.assertStatusOK(response)
         self.assertEqual(response['content-type'], 'text/csv')
+
+    def test_queries_dont_grow_with_image_count(self):
+        images = []
+        for i in range(20):
+            img = self.upload_image(
+                self.user, self.source, dict(filename=f'{i}.png'))
+            self.add_annotations(
+                self.user, img, {p: 'A' for p in range(1, 20+1)})
+            images.append(img)
+
+        def export_images(images_to_export):
+            data = dict(image_id_list='_'.join(
+                str(image.pk) for image in images_to_export))
+            with CaptureQueriesContext(connection) as context:
+                response = self.export_image_covers(data)
+            return response, len(context.captured_queries)
+
+        response, queries_for_5 = export_images(images[:5])
+        self.assertEqual(
+            response.getvalue().decode().count('\n'), 1+5+1,
+            msg="Sanity check: header, one row per image, and summary")
+
+        response, queries_for_20 = export_images(images)
+        self.assertEqual(
+            response.getvalue().decode().count('\n'), 1+20+1,
+            msg="Sanity check: header, one row per image, and summary")
+
+        # Annotation counts are aggregated per chunk of images, not
+        # queried per image.
+        self.assertLessEqual(queries_for_20, queries_for_5)
@@ -1,11 +1,17 @@
 from io import BytesIO
+from unittest import mock
 from zipfile import ZipFile
 
+from django.test.utils import override_settings
 from django.urls import reverse
 from django.utils.html import escape as html_escape
 
+from jobs.tests.utils import fabricate_job, JobUtilsMixin
 from lib.tests.utils import BasePermissionTest, ClientTest
+from sources.models import Source
+from ..tasks import clean_up_old_source_exports
 from ..utils import write_zip
+from .test_covers import BaseImageCoversExportTest
 
 
 class PermissionTest(BasePermissionTest):
@@ -102,6 +108,132 @@ class SessionErrorTest(ClientTest):
         )
 
 
+class BackgroundExportTest(BaseImageCoversExportTest, JobUtilsMixin):
+    """
+    Exports which are generated by a job and then served from storage.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = cls.create_user()
+        cls.source = cls.create_source(
+            cls.user,
+            default_point_generation_method=dict(type='simple', points=2))
+        labels = cls.create_labels(cls.user, ['A', 'B'], 'GroupA')
+        cls.create_labelset(cls.user, cls.source, labels)
+
+        cls.img1 = cls.upload_image(cls.user, cls.source)
+        cls.add_annotations(cls.user, cls.img1, {1: 'A', 2: 'B'})
+
+    def poll(self, timestamp):
+        return self.client.get(
+            reverse('source_export_poll_ajax', args=[self.source.pk]),
+            dict(session_data_timestamp=timestamp),
+        )
+
+    def serve(self, timestamp):
+        return self.client.get(
+            reverse('source_export_serve', args=[self.source.pk]),
+            dict(session_data_timestamp=timestamp),
+            follow=True,
+        )
+
+    def test_session_only_holds_key(self):
+        self.export_image_covers_prep(dict())
+
+        session_data = self.client.session['export']['data']
+        self.assertListEqual(list(session_data.keys()), ['export_key'])
+
+    def test_poll_done(self):
+        prep_response = self.export_image_covers_prep(dict())
+        timestamp = prep_response.json()['session_data_timestamp']
+
+        self.assertDictEqual(self.poll(timestamp).json(), dict(status='done'))
+        self.assert_job_result_message(
+            'generate_source_export', "Exported 1 image(s)")
+
+        # Polling shouldn't consume the session data, so the export can
+        # still be served afterward.
+        response = self.serve(timestamp)
+        self.assertEqual(response['content-type'], 'text/csv')
+        self.assert_csv_content_equal(
+            response.getvalue(),
+            [
+                'Image ID,Image name,Annotation status,Points,A,B',
+                f'{self.img1.pk},{self.img1.metadata.name},Confirmed,2,'
+                '50.000,50.000',
+            ],
+        )
+
+    def test_poll_in_progress(self):
+        # Don't actually run the job.
+        with mock.patch('export.views.start_job'):
+            prep_response = self.export_image_covers_prep(dict())
+        timestamp = prep_response.json()['session_data_timestamp']
+
+        self.assertDictEqual(
+            self.poll(timestamp).json(),
+            dict(status='in_progress', images_done=0, images_total=None))
+
+    def test_poll_no_session_data(self):
+        self.client.force_login(self.user)
+        self.assertDictEqual(
+            self.poll('123').json(),
+            dict(error=(
+                "Export failed: We couldn't find the expected data"
+                " in your session. Please try again."
+                " If the problem persists, let us know on the forum.")),
+        )
+
+    def test_serve_before_done(self):
+        with mock.patch('export.views.start_job'):
+            prep_response = self.export_image_covers_prep(dict())
+        timestamp = prep_response.json()['session_data_timestamp']
+
+        response = self.serve(timestamp)
+        self.assertRedirects(
+            response, reverse('browse_images', args=[self.source.pk]))
+        self.assertContains(
+            response,
+            html_escape("Export failed: The export isn't finished yet."))
+
+    def test_serve_other_users_export(self):
+        prep_response = self.export_image_covers_prep(dict())
+        timestamp = prep_response.json()['session_data_timestamp']
+        session_data = self.client.session['export']
+
+        # Another user somehow gets the same session data.
+        other_user = self.create_user()
+        self.add_source_member(
+            self.user, self.source, other_user, Source.PermTypes.VIEW.code)
+        self.client.force_login(other_user)
+        session = self.client.session
+        session['export'] = session_data
+        session.save()
+
+        response = self.serve(timestamp)
+        self.assertContains(
+            response, html_escape("Export failed: Wrong user."))
+
+    def run_cleanup_and_get_result(self):
+        job = fabricate_job('clean_up_old_source_exports')
+        clean_up_old_source_exports()
+        job.refresh_from_db()
+        return job.result_message
+
+    def test_cleanup_new_export(self):
+        self.export_image_covers_prep(dict())
+        self.assertEqual(
+            self.run_cleanup_and_get_result(), "No old exports to clean up")
+
+    @override_settings(SOURCE_EXPORT_MAX_HOURS=0)
+    def test_cleanup_old_export(self):
+        self.export_image_covers_prep(dict())
+        self.assertEqual(
+            self.run_cleanup_and_get_result(), "Cleaned up 1 old export(s)")
+
+
 class ZipTest(ClientTest):
 
     def test_write_zip(self):
@@ -8,6 +8,8 @@ urlpatterns = [
          views.ImageCoversExportPrepView.as_view(), name="export_image_covers_prep"),
     path('labelset/',
          views.export_labelset, name="export_labelset"),
+    path('poll_ajax/',
+         views.source_export_poll_ajax, name="source_export_poll_ajax"),
     path('serve/',
-         views.SourceExportServeView.as_view(), name="source_export_serve")
+         views.SourceExportServeView.as_view(), name="source_export_serve"),
 ]
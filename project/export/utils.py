@@ -1,14 +1,25 @@
 import base64
+import uuid
 from zipfile import ZipFile
 
+from django.conf import settings
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.http import HttpResponse
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.http import FileResponse, HttpResponse, QueryDict
+from django.utils.module_loading import import_string
 
 from visualization.forms import ImageSearchForm
+from .exceptions import ExportRequestDenied
 
 
 def get_request_images(request, source):
-    image_form = ImageSearchForm(request.POST or request.GET, source=source)
+    return get_images_from_data(request.POST or request.GET, source)
+
+
+def get_images_from_data(data, source):
+    image_form = ImageSearchForm(data, source=source)
 
     if image_form.is_valid():
         queryset_builder = image_form.get_image_level_queryset_builder()
@@ -37,6 +48,30 @@ def create_stream_response(content_type, filename):
     return response
 
 
+def create_file_stream_response(file, content_type, filename):
+    """
+    Create a downloadable-file HTTP response which streams an existing
+    file in chunks, instead of holding the whole content in memory.
+    """
+    response = FileResponse(file, content_type=content_type)
+    response['Content-Disposition'] = \
+        'attachment;filename="{filename}"'.format(filename=filename)
+    return response
+
+
+def export_content_type(filename):
+    if filename.endswith('.csv'):
+        return 'text/csv'
+    elif filename.endswith('.xlsx'):
+        return (
+            'application/'
+            'vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+    elif filename.endswith('.zip'):
+        return 'application/zip'
+    else:
+        raise ValueError(f"Unsupported filetype: {filename}")
+
+
 def create_csv_stream_response(filename):
     return create_stream_response('text/csv', filename)
 
@@ -104,3 +139,138 @@ def session_data_to_file(session_data):
     else:
         content = session_data['content']
     return session_data['filename'], content
+
+
+class SourceExport:
+    """
+    A data export for a source's images, which is generated by a
+    background job and written to storage. This way, neither the session
+    nor the web server process has to hold the whole export file.
+
+    We use the cache to track the export's request details, job, and
+    progress. The session only has to hold the export's key.
+    """
+
+    # Should be long enough for the export to be generated and then
+    # downloaded. After this, the export file is also due for cleanup.
+    CACHE_EXPIRATION_SECONDS = settings.SOURCE_EXPORT_MAX_HOURS*60*60
+
+    def __init__(self, key):
+        """
+        Instead of calling this constructor directly, use create()
+        or get_existing().
+        """
+        self.key = key
+
+    @property
+    def cache_key(self):
+        return f'source_export_{self.key}'
+
+    @property
+    def cache_entry(self):
+        entry = cache.get(self.cache_key)
+        if entry is None:
+            # Expired, or a randomly guessed key
+            raise ExportRequestDenied(
+                "Couldn't find the export details. Please try again.")
+        return entry
+
+    def update_cache_entry(self, **entry_kwargs):
+        cache.set(
+            self.cache_key,
+            self.cache_entry | entry_kwargs,
+            self.CACHE_EXPIRATION_SECONDS,
+        )
+
+    @property
+    def source_id(self):
+        return self.cache_entry['source_id']
+
+    @property
+    def job_id(self):
+        return self.cache_entry['job_id']
+
+    @property
+    def view_class(self):
+        """The export-prep view class which writes this export."""
+        return import_string(self.cache_entry['view_class'])
+
+    @property
+    def request_data(self) -> QueryDict:
+        """The POST data that the export was requested with."""
+        data = QueryDict(mutable=True)
+        for field_name, values in self.cache_entry['request_data']:
+            data.setlist(field_name, values)
+        return data
+
+    @property
+    def progress(self) -> tuple[int, int | None]:
+        entry = self.cache_entry
+        return entry['images_done'], entry['images_total']
+
+    def set_progress(self, images_done, images_total):
+        self.update_cache_entry(
+            images_done=images_done, images_total=images_total)
+
+    @property
+    def filename(self):
+        """
+        Filename to serve the export as. None if the export file hasn't
+        been saved yet.
+        """
+        return self.cache_entry['filename']
+
+    def save_file(self, local_filepath, filename):
+        """
+        Save a finished export file from the local filesystem to storage.
+        """
+        # The serve filename may contain a source name, so we don't use
+        # it in the storage path.
+        extension = filename[filename.rindex('.'):]
+        storage_filepath = settings.SOURCE_EXPORT_FILE_PATTERN.format(
+            key=self.key, extension=extension)
+
+        with open(local_filepath, 'rb') as local_file:
+            # Storage backends read from the File in chunks, so this
+            # doesn't load the whole export into memory.
+            storage_filepath = default_storage.save(
+                storage_filepath, File(local_file))
+
+        self.update_cache_entry(
+            storage_filepath=storage_filepath, filename=filename)
+
+    def open_file(self):
+        return default_storage.open(self.cache_entry['storage_filepath'])
+
+    @classmethod
+    def create(cls, request, source, view_class):
+        instance = cls(uuid.uuid4().hex)
+        request_data = [
+            (field_name, values)
+            for field_name, values in request.POST.lists()
+            if field_name != 'csrfmiddlewaretoken'
+        ]
+        cache.set(
+            instance.cache_key,
+            dict(
+                user_id=request.user.pk,
+                source_id=source.pk,
+                view_class=(
+                    f'{view_class.__module__}.{view_class.__qualname__}'),
+                request_data=request_data,
+                job_id=None,
+                images_done=0,
+                images_total=None,
+                storage_filepath=None,
+                filename=None,
+            ),
+            cls.CACHE_EXPIRATION_SECONDS,
+        )
+        return instance
+
+    @classmethod
+    def get_existing(cls, key, request):
+        instance = cls(key)
+        if request.user.pk != instance.cache_entry['user_id']:
+            raise ExportRequestDenied("Wrong user.")
+        return instance
@@ -1,23 +1,30 @@
 from abc import ABC
 import collections
 import csv
-from io import BytesIO, StringIO
+from pathlib import Path
+import tempfile
 
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.db import transaction
-from django.db.models import Q
+from django.db.models import Count, Q
 from django.http import HttpResponseRedirect, JsonResponse
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.decorators import method_decorator
 from django.views import View
+from django.views.decorators.http import require_GET
+import numpy as np
 import pyexcel
 
 from annotations.model_utils import ImageAnnoStatuses
+from annotations.models import Annotation
 from images.model_utils import PointGen
+from jobs.exceptions import JobError
+from jobs.models import Job
+from jobs.utils import get_or_create_job, start_job
 from lib.decorators import (
     login_required_ajax,
     source_labelset_required,
@@ -28,14 +35,17 @@ from lib.sessions import (
     get_session_data, save_session_data, session_error_response, SessionError)
 from sources.models import Source
 from sources.utils import metadata_field_names_to_labels
+from .exceptions import ExportRequestDenied
 from .forms import ExportImageCoversForm
 from .utils import (
     create_csv_stream_response,
+    create_file_stream_response,
     create_stream_response,
-    create_zip_stream_response,
-    file_to_session_data,
+    export_content_type,
+    get_images_from_data,
     get_request_images,
     session_data_to_file,
+    SourceExport,
     write_labelset_csv,
 )
 
@@ -60,7 +70,18 @@ decorators = [
 class SourceCsvExportPrepView(View, ABC):
     """
     Data export on a subset of an source's images.
+
+    The POST request only validates the export parameters and starts a
+    background job. The job calls generate_export(), which writes the
+    export to a file in storage. The browser polls for the job's progress
+    and then downloads the file through the serve view.
     """
+    # Images are fetched, and progress is reported to the SourceExport,
+    # this many images at a time.
+    image_chunk_size = 500
+
+    export: SourceExport | None = None
+
     def get_export_filename(self, source, suffix='.csv'):
         raise NotImplementedError
 
@@ -76,13 +97,44 @@ class SourceCsvExportPrepView(View, ABC):
         """
         raise NotImplementedError
 
-    def finish_workbook(self, book, source):
+    def finish_workbook(self, book_dict, source):
         """
-        Finish the contents of the pyexcel.Book, and return the book.
+        Finish the contents of the workbook, and return the workbook.
+        The workbook is an OrderedDict of sheet names to sheet rows, as
+        accepted by pyexcel's bookdict parameter.
         If an export subclass has nothing specific to add, then just
-        return the book and do nothing else.
+        return the workbook and do nothing else.
         """
-        return book
+        return book_dict
+
+    def iterate_image_chunks(self, queryset_builder):
+        """
+        Iterate over the queryset's images in chunks (lists of Images),
+        reporting progress to the SourceExport (if any) after each chunk.
+        Exports can then fetch related data for a whole chunk per query.
+        """
+        if self.export:
+            images_total = (
+                queryset_builder.get_unordered_image_queryset().count())
+            self.export.set_progress(0, images_total)
+
+        images_done = 0
+        for images in queryset_builder.iterator_of_image_chunks(
+            self.image_chunk_size
+        ):
+            yield images
+
+            images_done += len(images)
+            if self.export:
+                self.export.set_progress(images_done, images_total)
+
+    def iterate_images(self, queryset_builder):
+        """
+        Iterate over the queryset's images one at a time, with the same
+        chunked fetching and progress reporting as iterate_image_chunks().
+        """
+        for images in self.iterate_image_chunks(queryset_builder):
+            yield from images
 
     def post(self, request, source_id):
         """
@@ -95,9 +147,10 @@ class SourceCsvExportPrepView(View, ABC):
         """
         source = get_object_or_404(Source, id=source_id)
 
+        # Validate here so that the user gets immediate feedback about
+        # errors. The export job validates again before writing.
         try:
-            queryset_builder, applied_search_display = get_request_images(
-                request, source)
+            get_request_images(request, source)
         except ValidationError as e:
             return JsonResponse(dict(
                 error=e.message,
@@ -109,62 +162,128 @@ class SourceCsvExportPrepView(View, ABC):
                 error=get_one_form_error(export_form),
             ))
 
-        if export_form.cleaned_data.get('export_format') == 'excel':
-
-            # Excel with meta information in additional sheet(s)
-            book = pyexcel.Book()
-
-            csv_stream = StringIO()
-            num_images_in_export = self.write_csv(
-                csv_stream, source, queryset_builder, export_form.cleaned_data)
-            data_sheet = pyexcel.get_sheet(
-                file_type='csv', file_content=csv_stream.getvalue())
-            data_sheet.name = "Data"
-            book += data_sheet
-
-            meta_contents = [
-                ["Source name", source.name],
-                ["Image search method", applied_search_display],
-                ["Images in export", num_images_in_export],
-                ["Images in source", source.image_set.count()],
-                ["Export date", timezone.now().isoformat()],
-            ]
-            meta_sheet = pyexcel.get_sheet(array=meta_contents)
-            meta_sheet.name = "Meta"
-            book += meta_sheet
-
-            book = self.finish_workbook(book, source)
-
-            # For some reason, pyexcel can't seem to accept HttpResponse as
-            # a stream, so we give it a BytesIO instead.
-            excel_stream = BytesIO()
-            book.save_to_memory('xlsx', stream=excel_stream)
-            session_data = file_to_session_data(
-                filename=self.get_export_filename(source, '.xlsx'),
-                io_stream=excel_stream,
-                is_binary=True,
-            )
-
-        else:
-
-            # CSV
-            csv_stream = StringIO()
-            self.write_csv(
-                csv_stream, source, queryset_builder, export_form.cleaned_data)
-            session_data = file_to_session_data(
-                filename=self.get_export_filename(source),
-                io_stream=csv_stream,
-                is_binary=False,
-            )
+        export = SourceExport.create(request, source, type(self))
+        job, _ = get_or_create_job(
+            'generate_source_export', export.key,
+            source_id=source.pk, user=request.user)
+        export.update_cache_entry(job_id=job.pk)
+        # This view is non-atomic, so the job can be started right away.
+        start_job(job)
 
         session_data_timestamp = save_session_data(
-            request.session, 'export', session_data)
+            request.session, 'export', dict(export_key=export.key))
 
         return JsonResponse(dict(
             session_data_timestamp=session_data_timestamp,
             success=True,
         ))
 
+    def generate_export(self, source, export: SourceExport):
+        """
+        Write the export file for the given SourceExport, and save it to
+        storage. This runs in a background job.
+
+        Rows are written to a local temporary file as they're generated,
+        so memory use doesn't grow with the size of the export.
+        Returns the number of images in the export.
+        """
+        self.export = export
+        request_data = export.request_data
+
+        try:
+            queryset_builder, applied_search_display = get_images_from_data(
+                request_data, source)
+        except ValidationError as e:
+            raise JobError(e.message)
+
+        export_form = self.get_export_form(source, request_data)
+        if not export_form.is_valid():
+            raise JobError(get_one_form_error(export_form))
+        export_form_data = export_form.cleaned_data
+
+        with tempfile.TemporaryDirectory() as temp_dir:
+            csv_filepath = Path(temp_dir) / 'export.csv'
+            # newline='' is recommended for files used by csv writers.
+            with open(
+                csv_filepath, 'w', newline='', encoding='utf-8'
+            ) as csv_stream:
+                num_images_in_export = self.write_csv(
+                    csv_stream, source, queryset_builder, export_form_data)
+
+            if export_form_data.get('export_format') == 'excel':
+
+                # Excel with meta information in additional sheet(s).
+                # The data sheet's rows are read from the CSV file as the
+                # workbook is written (in openpyxl's write-only mode), so
+                # the sheet is never loaded into memory as a whole.
+                book_dict = collections.OrderedDict()
+                book_dict["Data"] = pyexcel.iget_array(
+                    file_name=str(csv_filepath), encoding='utf-8')
+                book_dict["Meta"] = [
+                    ["Source name", source.name],
+                    ["Image search method", applied_search_display],
+                    ["Images in export", num_images_in_export],
+                    ["Images in source", source.image_set.count()],
+                    ["Export date", timezone.now().isoformat()],
+                ]
+                book_dict = self.finish_workbook(book_dict, source)
+
+                excel_filepath = Path(temp_dir) / 'export.xlsx'
+                pyexcel.isave_book_as(
+                    bookdict=book_dict, dest_file_name=str(excel_filepath))
+                # Close the CSV file which iget_array() opened.
+                pyexcel.free_resources()
+
+                export.save_file(
+                    excel_filepath,
+                    self.get_export_filename(source, '.xlsx'))
+
+            else:
+
+                # CSV
+                export.save_file(
+                    csv_filepath, self.get_export_filename(source))
+
+        return num_images_in_export
+
+
+@require_GET
+@source_visibility_required('source_id', ajax=True)
+@login_required_ajax
+def source_export_poll_ajax(request, source_id):
+    """
+    Check on the progress of an export started by a
+    SourceCsvExportPrepView. Once the export is done, the browser can
+    download it from the serve view.
+    """
+    try:
+        session_data = get_session_data(
+            key='export', request=request, pop=False)
+        export = SourceExport.get_existing(
+            session_data['export_key'], request)
+    except (SessionError, ExportRequestDenied) as e:
+        return JsonResponse(dict(error=f"Export failed: {e}"))
+
+    try:
+        job = Job.objects.get(
+            pk=export.job_id, job_name='generate_source_export')
+    except Job.DoesNotExist:
+        return JsonResponse(dict(
+            error="Export failed: Couldn't find the export job."))
+
+    if job.status == Job.Status.SUCCESS:
+        return JsonResponse(dict(status='done'))
+    if job.status == Job.Status.FAILURE:
+        return JsonResponse(dict(
+            error=f"Export failed: {job.result_message}"))
+
+    images_done, images_total = export.progress
+    return JsonResponse(dict(
+        status='in_progress',
+        images_done=images_done,
+        images_total=images_total,
+    ))
+
 
 class ExportServeView(View, ABC):
 
@@ -180,33 +299,41 @@ class ExportServeView(View, ABC):
             session_data = get_session_data(
                 key=self.session_key, request=request)
         except SessionError as error:
-            return session_error_response(
-                error=error,
-                request=request,
-                redirect_spec=self.session_error_redirect,
-                prefix=self.session_error_prefix,
-                view_kwargs=kwargs,
-            )
+            return self.error_response(request, error, kwargs)
 
         # get() or post() must expect a session_data arg.
         return super().dispatch(
             request, *args, session_data=session_data, **kwargs)
 
+    def error_response(self, request, error, view_kwargs):
+        return session_error_response(
+            error=error,
+            request=request,
+            redirect_spec=self.session_error_redirect,
+            prefix=self.session_error_prefix,
+            view_kwargs=view_kwargs,
+        )
+
     def get(self, request, session_data, **kwargs):
+        if 'export_key' in session_data:
+            # Export that was generated to storage by a job.
+            try:
+                export = SourceExport.get_existing(
+                    session_data['export_key'], request)
+                filename = export.filename
+                if filename is None:
+                    raise ExportRequestDenied(
+                        "The export isn't finished yet.")
+            except ExportRequestDenied as error:
+                return self.error_response(request, error, kwargs)
+
+            return create_file_stream_response(
+                export.open_file(), export_content_type(filename), filename)
+
+        # Export that was stored entirely in the session.
         filename, content = session_data_to_file(session_data)
-
-        if filename.endswith('.csv'):
-            response = create_csv_stream_response(filename)
-        elif filename.endswith('.xlsx'):
-            response = create_stream_response(
-                'application/'
-                'vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                filename)
-        elif filename.endswith('.zip'):
-            response = create_zip_stream_response(filename)
-        else:
-            raise ValueError(f"Unsupported filetype: {filename}")
-
+        response = create_stream_response(
+            export_content_type(filename), filename)
         response.content = content
         return response
 
@@ -234,7 +361,11 @@ class ImageStatsExportPrepView(SourceCsvExportPrepView, ABC):
         raise NotImplementedError
 
     def image_loop_main_body(
-            self, row, label_counter, num_annotations_in_image):
+            self, row, label_counts, num_annotations_in_image):
+        """
+        label_counts is a NumPy array of the image's annotation counts per
+        label, in the same order as self.label_ids_to_displays.
+        """
         raise NotImplementedError
 
     def finish_summary_row(self, summary_row, num_annotated_images):
@@ -251,6 +382,40 @@ class ImageStatsExportPrepView(SourceCsvExportPrepView, ABC):
             return '0.000'
         return s
 
+    @staticmethod
+    def label_counts_for_images(images, label_indices):
+        """
+        Count each image's annotations per label, with one aggregate
+        query for the whole chunk of images.
+
+        Returns a 2D array of label counts (one row per image, one column
+        per label, ordered by label_indices), and a 1D array of total
+        annotation counts per image.
+        """
+        image_indices = {
+            image.pk: index for index, image in enumerate(images)}
+        label_counts = np.zeros(
+            (len(images), len(label_indices)), dtype=np.int64)
+        annotation_counts = np.zeros(len(images), dtype=np.int64)
+
+        count_values = (
+            Annotation.objects
+            .filter(image_id__in=image_indices.keys())
+            .values('image_id', 'label_id')
+            .annotate(count=Count('id'))
+            # Clear any default ordering, which would otherwise be added
+            # to the GROUP BY.
+            .order_by()
+        )
+        for values in count_values:
+            image_index = image_indices[values['image_id']]
+            annotation_counts[image_index] += values['count']
+            if values['label_id'] in label_indices:
+                label_index = label_indices[values['label_id']]
+                label_counts[image_index, label_index] = values['count']
+
+        return label_counts, annotation_counts
+
     def write_csv(self, stream, source, queryset_builder, export_form_data):
 
         # Make a dict of global label IDs to string displays for the
@@ -290,39 +455,37 @@ class ImageStatsExportPrepView(SourceCsvExportPrepView, ABC):
             ~Q(status=ImageAnnoStatuses.UNCLASSIFIED.value),
         )
 
-        # One row per image
-        for image in queryset_builder.iterator_of_model('Image'):
-
-            num_annotated_images += 1
-
-            # Counter for annotations of each label. Initialize by giving each
-            # label a 0 count.
-            label_counter = collections.Counter({
-                label_id: 0
-                for label_id in self.label_ids_to_displays.keys()
-            })
-
-            # This runs one database query per image, but there doesn't seem to
-            # be a way to avoid that without blowing up the export's memory
-            # requirements (i.e. loading all annotations at once).
-            annotation_labels = image.annotation_set.values_list(
-                'label_id', flat=True)
-            annotation_labels = [pk for pk in annotation_labels]
-            label_counter.update(annotation_labels)
-            num_annotations_in_image = len(annotation_labels)
-
-            point_count = PointGen.from_db_value(
-                image.point_generation_method).total_points
-
-            row = {
-                "Image ID": image.pk,
-                "Image name": image.metadata.name,
-                "Annotation status": image.annoinfo.status_display,
-                "Points": point_count,
-            }
-            row = self.image_loop_main_body(
-                row, label_counter, num_annotations_in_image)
-            writer.writerow(row)
+        # Label IDs to indices of the label-count arrays.
+        label_indices = {
+            label_id: index
+            for index, label_id in enumerate(self.label_ids_to_displays)
+        }
+
+        # One chunk of images at a time, one row per image
+        for images in self.iterate_image_chunks(queryset_builder):
+
+            label_counts_per_image, annotation_counts = (
+                self.label_counts_for_images(images, label_indices))
+
+            for image_index, image in enumerate(images):
+
+                num_annotated_images += 1
+
+                point_count = PointGen.from_db_value(
+                    image.point_generation_method).total_points
+
+                row = {
+                    "Image ID": image.pk,
+                    "Image name": image.metadata.name,
+                    "Annotation status": image.annoinfo.status_display,
+                    "Points": point_count,
+                }
+                row = self.image_loop_main_body(
+                    row,
+                    label_counts_per_image[image_index],
+                    annotation_counts[image_index],
+                )
+                writer.writerow(row)
 
         if num_annotated_images > 1:
 
@@ -390,33 +553,35 @@ class ImageCoversExportPrepView(ImageStatsExportPrepView):
         # One column per label
         fieldnames.extend(self.label_ids_to_displays.values())
 
-        self.coverage_sums = collections.defaultdict(float)
+        # Summed coverage fractions, indexed like label_ids_to_displays.
+        self.coverage_sums = np.zeros(len(self.label_ids_to_displays))
 
         return fieldnames
 
     def image_loop_main_body(
-            self, row, label_counter, num_annotations_in_image):
-
-        for label_id, count in label_counter.items():
+            self, row, label_counts, num_annotations_in_image):
 
-            label_display = self.label_ids_to_displays[label_id]
+        coverage_fractions = label_counts / num_annotations_in_image
 
-            coverage_fraction = count / num_annotations_in_image
-            coverage_percent_str = self.float_format(
+        for label_display, coverage_fraction in zip(
+            self.label_ids_to_displays.values(), coverage_fractions
+        ):
+            row[label_display] = self.float_format(
                 coverage_fraction * 100.0)
-            row[label_display] = coverage_percent_str
 
-            # Add to summary stats computation
-            self.coverage_sums[label_display] += coverage_fraction
+        # Add to summary stats computation
+        self.coverage_sums += coverage_fractions
 
         return row
 
     def finish_summary_row(self, summary_row, num_annotated_images):
 
-        for label_display in self.label_ids_to_displays.values():
-            summary_row[label_display] = self.float_format(
-                100.0 * self.coverage_sums[label_display]
-                / num_annotated_images)
+        coverage_means = 100.0 * self.coverage_sums / num_annotated_images
+
+        for label_display, coverage_mean in zip(
+            self.label_ids_to_displays.values(), coverage_means
+        ):
+            summary_row[label_display] = self.float_format(coverage_mean)
 
         return summary_row
 
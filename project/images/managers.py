@@ -42,27 +42,27 @@ class PointQuerySet(models.QuerySet):
 
     def delete(self):
         """Batch-delete Points."""
-        from .models import Image
+        from annotations.models import ImageAnnotationInfo
 
         # Get all the images corresponding to these points.
-        images = Image.objects.filter(point__in=self).distinct()
         # Evaluate the queryset before deleting the points.
-        images = list(images)
+        image_ids = list(
+            self.order_by().values_list('image_id', flat=True).distinct())
         # Delete the points.
         return_values = super().delete()
 
-        for image in images:
-            image.annoinfo.update_annotation_progress_fields()
+        ImageAnnotationInfo.objects.filter(
+            image_id__in=image_ids).update_annotation_progress_fields()
 
         return return_values
 
     def bulk_create(self, *args, **kwargs):
-        from .models import Image
+        from annotations.models import ImageAnnotationInfo
 
         new_points = super().bulk_create(*args, **kwargs)
 
-        images = Image.objects.filter(point__in=new_points).distinct()
-        for image in images:
-            image.annoinfo.update_annotation_progress_fields()
+        ImageAnnotationInfo.objects.filter(
+            image_id__in={point.image_id for point in new_points},
+        ).update_annotation_progress_fields()
 
         return new_points
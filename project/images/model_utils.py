@@ -5,7 +5,13 @@
 # that use models.py should go in the general utility functions
 # file, utils.py.
 
-from django.db import models
+import functools
+import uuid
+
+from django.core.cache import cache
+from django.db import models, transaction
+
+from lib.utils import ONE_DAY_IN_SECONDS
 
 
 class PointGenerationTypes(models.TextChoices):
@@ -161,3 +167,56 @@ class PointGen:
                 return self.points
             case _:
                 raise ValueError(f"Unsupported type: {self.type}")
+
+
+class ImageSetVersionKinds(models.TextChoices):
+    # Changes to which images are in the source, or to their metadata.
+    IMAGES = 'images', "Images and metadata"
+    # Changes to images' annotations (and thus annotation statuses and
+    # last-annotation info).
+    ANNOTATIONS = 'annotations', "Annotations"
+
+
+# Versions should outlive any snapshot keyed on them, or else snapshots
+# could get orphaned early; there's no other harm in expiring.
+IMAGE_SET_VERSION_TIMEOUT = ONE_DAY_IN_SECONDS*30
+
+
+def _image_set_version_cache_key(source_id, kind):
+    return f'image_set_version_{kind}_{source_id}'
+
+
+def get_image_set_version(source_id: int, kind: str) -> str:
+    """
+    Token identifying the current state of one kind of source data which
+    image-set snapshots depend on. Any change to that data gets a new
+    token, so that snapshots built on the old data stop being used.
+    """
+    cache_key = _image_set_version_cache_key(source_id, kind)
+    version = cache.get(cache_key)
+    if version is None:
+        # Never set, or expired. Since we can't know what the previous
+        # token was, a new token is the only safe choice.
+        version = uuid.uuid4().hex
+        cache.set(cache_key, version, IMAGE_SET_VERSION_TIMEOUT)
+    return version
+
+
+def _set_new_image_set_version(source_id, kind):
+    cache.set(
+        _image_set_version_cache_key(source_id, kind),
+        uuid.uuid4().hex,
+        IMAGE_SET_VERSION_TIMEOUT,
+    )
+
+
+def bump_image_set_version(source_id: int, kind: str):
+    """
+    Call this whenever the given kind of source data changes.
+    """
+    _set_new_image_set_version(source_id, kind)
+    # Also bump when the transaction commits. Otherwise, a concurrent
+    # request could build a snapshot from the pre-commit data, and save
+    # it under the version we just set.
+    transaction.on_commit(
+        functools.partial(_set_new_image_set_version, source_id, kind))
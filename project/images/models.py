@@ -15,7 +15,8 @@ from annotations.model_utils import AnnotationArea
 from lib.utils import rand_string
 from sources.models import Source
 from .managers import ImageQuerySet, PointQuerySet
-from .model_utils import PointGen
+from .model_utils import (
+    bump_image_set_version, ImageSetVersionKinds, PointGen)
 
 
 def get_original_image_upload_path(instance, filename):
@@ -151,16 +152,24 @@ class Image(models.Model):
         Returns True if the image is considered part of the validation set
         (not the training set) when creating a new classifier, else False.
         """
+        return self.in_valset(self.pk, self.metadata.name)
+
+    @staticmethod
+    def in_valset(image_id: int, image_name: str) -> bool:
+        """
+        Same as the valset property, but for when we just have the
+        image's ID and name, not the Image object.
+        """
         if settings.VALSET_SELECTION_METHOD == 'id':
             # This is a very simple method, but can make unit tests
             # unpredictable.
-            return self.pk % 8 == 0
+            return image_id % 8 == 0
         if settings.VALSET_SELECTION_METHOD == 'name':
             # This is unsuitable for production use, since users should be able
             # to give images any names they want. But this is useful for unit
             # tests, where we want predictability (and sometimes precise
             # control) regarding which images are in the validation set.
-            return self.metadata.name.startswith('val')
+            return image_name.startswith('val')
         raise ImproperlyConfigured(
             "Unrecognized VALSET_SELECTION_METHOD: {}".format(
                 settings.VALSET_SELECTION_METHOD))
@@ -346,6 +355,12 @@ class Metadata(models.Model):
                 name='metadata_to_src_name_textops_i'),
         ]
 
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        # Image-set snapshots (annotation tool navigation) may be affected
+        # by this new image or metadata edit.
+        bump_image_set_version(self.source_id, ImageSetVersionKinds.IMAGES)
+
     def __str__(self):
         return "Metadata of " + self.name
 
@@ -372,10 +387,12 @@ class Point(models.Model):
     def save(self, *args, **kwargs):
         # Check row/column against image bounds before saving.
         #
-        # We do this validation in save() because we only ever create Points
-        # through direct ORM save() calls, not through Forms or ModelForms.
-        # When calling save() directly, model field validators, clean(), etc.
-        # are not used.
+        # We do this validation in save() because we create Points through
+        # direct ORM calls, not through Forms or ModelForms. When calling
+        # save() directly, model field validators, clean(), etc. are not
+        # used.
+        # bulk_create() doesn't call save(), so generate_points_for_images()
+        # does these same checks itself, in bulk.
         assert self.row >= 0, "Row below minimum"
         assert self.row <= self.image.max_row, "Row above maximum"
         assert self.column >= 0, "Column below minimum"
@@ -0,0 +1,147 @@
+from unittest import mock
+
+import numpy as np
+
+from annotations.model_utils import AnnotationArea
+from lib.tests.utils import BaseTest, ClientTest
+from ..model_utils import PointGen
+from ..models import Image
+from ..utils import (
+    calculate_points, calculate_points_for_areas, generate_points_for_images)
+
+
+def pixel_area(min_x, max_x, min_y, max_y):
+    return AnnotationArea(
+        type=AnnotationArea.TYPE_PIXELS,
+        min_x=min_x, max_x=max_x, min_y=min_y, max_y=max_y)
+
+
+class CalculatePointsTest(BaseTest):
+
+    def assertPointsInArea(self, points, area):
+        for row, column in points.tolist():
+            self.assertTrue(area.min_y <= row <= area.max_y)
+            self.assertTrue(area.min_x <= column <= area.max_x)
+
+    def test_simple_random(self):
+        areas = [pixel_area(0, 99, 0, 49), pixel_area(200, 209, 300, 399)]
+        points = calculate_points_for_areas(
+            areas, PointGen(type='simple', points=30))
+
+        self.assertEqual(points.shape, (2, 30, 2))
+        for area, area_points in zip(areas, points):
+            self.assertPointsInArea(area_points, area)
+
+            # Numbered by 5x5 numbering cell.
+            height = area.max_y - area.min_y + 1
+            width = area.max_x - area.min_x + 1
+            cell_indices = [
+                ((row - area.min_y) * 5 // height) * 5
+                + (column - area.min_x) * 5 // width
+                for row, column in area_points.tolist()
+            ]
+            self.assertListEqual(cell_indices, sorted(cell_indices))
+
+    def test_stratified_random(self):
+        areas = [pixel_area(0, 99, 0, 49), pixel_area(10, 29, 5, 34)]
+        points = calculate_points_for_areas(
+            areas,
+            PointGen(
+                type='stratified', cell_rows=2, cell_columns=4, per_cell=3),
+        )
+
+        self.assertEqual(points.shape, (2, 24, 2))
+        for area, area_points in zip(areas, points):
+            height = area.max_y - area.min_y + 1
+            width = area.max_x - area.min_x + 1
+            for index, (row, column) in enumerate(area_points.tolist()):
+                # Points 1-3 in cell (0, 0), 4-6 in cell (0, 1), etc.
+                cell_row, cell_column = divmod(index // 3, 4)
+                self.assertEqual(
+                    (row - area.min_y) * 2 // height, cell_row)
+                self.assertEqual(
+                    (column - area.min_x) * 4 // width, cell_column)
+
+    def test_uniform_grid(self):
+        points = calculate_points_for_areas(
+            [pixel_area(0, 99, 0, 49), pixel_area(10, 29, 5, 34)],
+            PointGen(type='uniform', cell_rows=2, cell_columns=3),
+        )
+
+        self.assertListEqual(
+            points.tolist(),
+            [
+                [[12, 16], [12, 49], [12, 82],
+                 [37, 16], [37, 49], [37, 82]],
+                [[12, 12], [12, 19], [12, 26],
+                 [27, 12], [27, 19], [27, 26]],
+            ],
+        )
+
+    def test_seeded(self):
+        areas = [pixel_area(0, 99, 0, 49), pixel_area(200, 209, 300, 399)]
+        point_gen_spec = PointGen(type='simple', points=30)
+
+        points_1 = calculate_points_for_areas(
+            areas, point_gen_spec, rng=np.random.default_rng(0))
+        points_2 = calculate_points_for_areas(
+            areas, point_gen_spec, rng=np.random.default_rng(0))
+        self.assertListEqual(
+            points_1.tolist(), points_2.tolist(),
+            msg="Same seed should give the same points")
+
+    def test_single_area(self):
+        points = calculate_points(
+            pixel_area(0, 99, 0, 49),
+            PointGen(type='uniform', cell_rows=1, cell_columns=2))
+
+        self.assertListEqual(points, [
+            dict(row=24, column=24, point_number=1),
+            dict(row=24, column=74, point_number=2),
+        ])
+
+
+class GeneratePointsForImagesTest(ClientTest):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = cls.create_user()
+        cls.source = cls.create_source(
+            cls.user,
+            default_point_generation_method=dict(type='simple', points=2))
+
+    def test_out_of_bounds(self):
+        image = self.upload_image(
+            self.user, self.source,
+            image_options=dict(width=100, height=50))
+        old_points = list(
+            image.point_set.order_by('point_number')
+            .values_list('row', 'column'))
+
+        for bad_point, expected_message in [
+            ((-1, 0), "Row below minimum"),
+            ((50, 0), "Row above maximum"),
+            ((0, -1), "Column below minimum"),
+            ((0, 100), "Column above maximum"),
+        ]:
+            with self.subTest(bad_point=bad_point):
+                points = np.array([[[0, 0], bad_point]])
+                with (
+                    mock.patch(
+                        'images.utils.calculate_points_for_areas',
+                        return_value=points),
+                    self.assertRaisesMessage(
+                        AssertionError, expected_message),
+                ):
+                    generate_points_for_images(
+                        Image.objects.filter(pk=image.pk)
+                        .select_related('metadata', 'source'))
+
+                self.assertListEqual(
+                    list(
+                        image.point_set.order_by('point_number')
+                        .values_list('row', 'column')),
+                    old_points,
+                    msg="Existing points should be kept")
@@ -1,21 +1,33 @@
+from array import array
+from collections import defaultdict
 import datetime
 from functools import reduce
 import operator
 import random
 from typing import Generator
 
+import numpy as np
 from django.conf import settings
-from django.db.models import (
-    Count, Expression, F, Model, OrderBy, Q, QuerySet, Value)
+from django.core.cache import cache
+from django.db.models import Count, Expression, F, Q, QuerySet
 from django.db.models.functions import Lower
-from django.db.models.lookups import Exact, GreaterThan, IsNull, LessThan
 
 from accounts.utils import get_alleviate_user
 from annotations.model_utils import AnnotationArea
-from annotations.models import ImageAnnotationInfo
-from lib.utils import CacheableValue
+from annotations.models import Annotation, ImageAnnotationInfo
+from lib.utils import (
+    CacheableValue,
+    DEFAULT_NON_NULL_ORDERING_EXPRS,
+    filter_after_ordering_position,
+    get_ordering_position,
+)
 from sources.models import Source
-from .model_utils import PointGen
+from .model_utils import (
+    bump_image_set_version,
+    get_image_set_version,
+    ImageSetVersionKinds,
+    PointGen,
+)
 from .models import Image, Metadata, Point
 
 
@@ -37,8 +49,7 @@ def find_dupe_image(source, image_name):
 
 
 NON_NULL_ORDERING_EXPRS: list[tuple[type, Expression]] = [
-    # pk of any model
-    (Model, F('pk')),
+    *DEFAULT_NON_NULL_ORDERING_EXPRS,
     (Metadata, Lower(F('name'))),
 ]
 
@@ -52,95 +63,11 @@ def _get_next_objects_queryset(current_object, queryset):
     assert isinstance(
         current_object, queryset_model_class), "Don't mix and match models"
 
-    # Start this Q object out as 'always False' because we want to make this
-    # the starting value of an 'OR' reduce chain.
-    filter_q = Q(Value(False))
-    # Start this Q object out as 'always True' because we want to make this
-    # the starting value of an 'AND' reduce chain.
-    previous_args_equal_q = Q(Value(True))
-
-    # query.order_by example: ['metadata__name', 'pk']
-    #
-    # The query we want gets more complicated depending on the number of
-    # order_by args:
-    # 1 arg: arg1 greater
-    # 2 args: arg1 greater OR (arg1 equal AND arg2 greater)
-    # 3 args: arg1 greater OR (arg1 equal AND arg2 greater)
-    #   OR (arg1 equal AND arg2 equal AND arg3 greater)
-    # Etc.
-    for ordering_arg in queryset.query.order_by:
-
-        if isinstance(ordering_arg, Expression):
-            if isinstance(ordering_arg, OrderBy):
-                # OrderBy Expression
-                descending = ordering_arg.descending
-                ordering_expr = ordering_arg.expression
-            else:
-                # Other Expression
-                descending = False
-                ordering_expr = ordering_arg
-        else:
-            # str
-            descending = ordering_arg.startswith('-')
-            ordering_field = ordering_arg.lstrip('-')
-            # Convert to Expression
-            ordering_expr = F(ordering_field)
-
-        if not queryset.query.standard_ordering:
-            # The queryset's reverse() method was called.
-            descending = not descending
-
-        current_object_ordering_value = (
-            queryset_model_class.objects.filter(pk=current_object.pk)
-            .values_list(ordering_expr, flat=True)[0]
-        )
-
-        # Only complicate the query with NULL handling when the field can
-        # actually take on NULL values.
-        # NULL handling can make PostgreSQL unable to use indexes for
-        # certain queries, hurting performance.
-        non_nullable = any([
-            (issubclass(queryset_model_class, cls)
-             and str(ordering_expr) == str(expr))
-            for cls, expr in NON_NULL_ORDERING_EXPRS
-        ])
-        nullable = not non_nullable
-
-        if current_object_ordering_value is None:
-            # Nullable fields have a complication: we can't specify
-            # `...__gt=None` as a filter kwarg. That gets
-            # `ValueError: Cannot use None as a query value`.
-            # So instead we'll use the fact that None is ordered after all
-            # non-None values. Thus, 'greater than None' means no possible
-            # values, and 'less than None' means all non-None values.
-            if descending:
-                # 'less than None' (all non-None values)
-                current_arg_after_q = Q(IsNull(ordering_expr, False))
-            else:
-                # 'greater than None' (always False)
-                current_arg_after_q = Q(Value(False))
-
-            current_arg_equal_q = Q(IsNull(ordering_expr, True))
-        else:
-            if descending:
-                # 'less than current value'
-                current_arg_after_q = Q(
-                    LessThan(ordering_expr, current_object_ordering_value))
-            else:
-                # 'greater than current value' (greater value or None)
-                current_arg_after_q = Q(
-                    GreaterThan(ordering_expr, current_object_ordering_value))
-                if nullable:
-                    current_arg_after_q |= Q(IsNull(ordering_expr, True))
-
-            current_arg_equal_q = Q(
-                Exact(ordering_expr, current_object_ordering_value))
-
-        filter_q = filter_q | (previous_args_equal_q & current_arg_after_q)
-
-        previous_args_equal_q = previous_args_equal_q & current_arg_equal_q
-
-    return queryset.filter(filter_q)
+    return filter_after_ordering_position(
+        queryset,
+        get_ordering_position(queryset, current_object.pk),
+        NON_NULL_ORDERING_EXPRS,
+    )
 
 
 def get_next_object(current_object, queryset, wrap=False):
@@ -194,6 +121,109 @@ def get_queryset_order_placement(current_instance, queryset):
     return prev_instances.count() + 1
 
 
+class ImageSetSnapshot:
+    """
+    The ordered image IDs of an image set (such as a source's Browse
+    search results), saved in the cache so that annotation tool
+    navigation (previous/next image, position, and size of the image set)
+    doesn't have to query the image set on every page load.
+
+    Snapshots are keyed on the image set's search parameters and on the
+    versions of the source data the image set depends on. When that data
+    changes, the version changes, and a new snapshot is built on the next
+    request.
+    """
+    # IDs are saved as an array of 64-bit ints, which is much more compact
+    # in the cache than a list.
+    id_typecode = 'q'
+
+    def __init__(self, image_ids: array):
+        self.image_ids = image_ids
+
+    @staticmethod
+    def get_cache_key(
+        source_id: int, search_key: str, annotation_dependent: bool,
+    ) -> str:
+        versions = [get_image_set_version(
+            source_id, ImageSetVersionKinds.IMAGES)]
+        if annotation_dependent:
+            versions.append(get_image_set_version(
+                source_id, ImageSetVersionKinds.ANNOTATIONS))
+        return (
+            f'image_set_snapshot_{source_id}_{search_key}_'
+            + '_'.join(versions)
+        )
+
+    @classmethod
+    def get(
+        cls,
+        source_id: int,
+        queryset: QuerySet,
+        search_key: str = 'default',
+        annotation_dependent: bool = False,
+    ) -> 'ImageSetSnapshot':
+        """
+        Load the snapshot of this image set, building it from the ordered
+        image-level queryset if it's not in the cache.
+
+        search_key should uniquely identify the queryset's filters and
+        ordering. annotation_dependent should be True if the queryset's
+        results depend on images' annotations.
+        """
+        cache_key = cls.get_cache_key(
+            source_id, search_key, annotation_dependent)
+
+        image_ids_bytes = cache.get(cache_key)
+        if image_ids_bytes is not None:
+            image_ids = array(cls.id_typecode)
+            image_ids.frombytes(image_ids_bytes)
+            return cls(image_ids)
+
+        if queryset.model == Image:
+            image_id_field = 'pk'
+        else:
+            image_id_field = 'image_id'
+        image_ids = array(
+            cls.id_typecode,
+            queryset.values_list(image_id_field, flat=True))
+        cache.set(
+            cache_key, image_ids.tobytes(),
+            settings.IMAGE_SET_SNAPSHOT_TIMEOUT)
+        return cls(image_ids)
+
+    def __len__(self):
+        return len(self.image_ids)
+
+    def position(self, image_id: int) -> int | None:
+        """
+        0-based position of the image in the set, or None if the image
+        isn't in the set.
+        """
+        try:
+            # Scans at C speed, which is fine even for the largest sources.
+            return self.image_ids.index(image_id)
+        except ValueError:
+            return None
+
+    def next_image_id(self, position: int, wrap: bool = False) -> int | None:
+        """
+        Next image ID after the given position. Like get_next_object(),
+        wrap allows wrapping from the last image to the first.
+        """
+        if position + 1 < len(self.image_ids):
+            return self.image_ids[position + 1]
+        if wrap and position != 0:
+            return self.image_ids[0]
+        return None
+
+    def prev_image_id(self, position: int, wrap: bool = False) -> int | None:
+        if position > 0:
+            return self.image_ids[position - 1]
+        if wrap and position != len(self.image_ids) - 1:
+            return self.image_ids[-1]
+        return None
+
+
 def metadata_obj_to_dict(metadata):
     """
     Go from Metadata DB object to metadata dict.
@@ -418,6 +448,47 @@ class ImageLevelQuerySetBuilder:
         for instance in image_level_queryset_iterator(queryset, desired_model):
             yield instance
 
+    def iterator_of_image_chunks(
+        self,
+        chunk_size: int,
+    ) -> Generator[list[Image], None, None]:
+        """
+        Get the ordered results as lists of up to chunk_size Images, with
+        metadata and annotation info loaded.
+
+        The ordered image IDs are read through a database cursor, and
+        each chunk's Images are fetched with one query. So memory use
+        depends on the chunk size, not the result count, and callers can
+        fetch related objects for a whole chunk at once.
+        """
+        if self.internal_model is Image:
+            image_id_field = 'pk'
+        else:
+            image_id_field = 'image_id'
+        image_ids = (
+            self.get_ordered_queryset()
+            .values_list(image_id_field, flat=True)
+            .iterator(chunk_size=chunk_size)
+        )
+
+        def fetch_chunk(ids):
+            images_by_id = (
+                Image.objects.select_related('metadata', 'annoinfo')
+                .in_bulk(ids)
+            )
+            return [images_by_id[image_id] for image_id in ids]
+
+        chunk_ids = []
+        for image_id in image_ids:
+            chunk_ids.append(image_id)
+            if len(chunk_ids) >= chunk_size:
+                yield fetch_chunk(chunk_ids)
+                chunk_ids = []
+
+        if chunk_ids:
+            # Last chunk
+            yield fetch_chunk(chunk_ids)
+
 
 def delete_images(image_queryset):
     """
@@ -431,138 +502,178 @@ def delete_images(image_queryset):
     It would be reasonable to delete easy-thumbnails' image thumbnails now,
     but best left for later again, for better user-end responsiveness.
     """
+    source_ids = list(
+        image_queryset.order_by().values_list('source_id', flat=True)
+        .distinct())
+    # The images' annotations get deleted by cascade, which skips
+    # Annotation's own deletion logic.
+    label_stats_changes = Annotation.objects.filter(
+        image__in=image_queryset).label_stats_removal_changes()
+
     # We call delete() on the queryset rather than the individual
     # objects for faster performance.
     _, num_objects_deleted = image_queryset.delete()
     delete_count = num_objects_deleted.get('images.Image', 0)
 
+    label_stats_changes.record()
+
+    for source_id in source_ids:
+        bump_image_set_version(source_id, ImageSetVersionKinds.IMAGES)
+
     return delete_count
 
 
 def delete_image(img: Image):
+    label_stats_changes = (
+        img.annotation_set.all().label_stats_removal_changes())
     img.delete()
+    label_stats_changes.record()
+    bump_image_set_version(img.source_id, ImageSetVersionKinds.IMAGES)
 
 
-def calculate_points(annotation_area, point_gen_spec):
-    """
-    Calculate points for an image. This doesn't actually
-    insert anything in the database; it just generates the
-    row, column for each point number.
+# To make consecutive simple-random points appear reasonably close to each
+# other, points are numbered by cell of this grid, filling the cells one by
+# one.
+SIMPLE_RANDOM_NUMBERING_CELL_ROWS = 5
+SIMPLE_RANDOM_NUMBERING_CELL_COLUMNS = 5
 
-    Returns the points as a list of dicts; each dict
-    represents a point, and has keys "row", "column",
-    and "point_number".
-    """
 
-    points = []
-
-    annoarea_min_col = annotation_area.min_x
-    annoarea_max_col = annotation_area.max_x
-    annoarea_min_row = annotation_area.min_y
-    annoarea_max_row = annotation_area.max_y
+def _cell_bounds(area_mins, area_sizes, cell_count):
+    """
+    Min and max pixels of each cell along one dimension, for each
+    annotation area. Each pixel of the annotation area goes in exactly one
+    cell, and cell sizes are within one pixel of each other.
+    Returns two arrays of shape (number of areas, cell_count).
+    """
+    cell_nums = np.arange(cell_count)
+    cell_mins = (
+        (cell_nums * area_sizes[:, None]) // cell_count
+        + area_mins[:, None])
+    cell_maxes = (
+        ((cell_nums + 1) * area_sizes[:, None]) // cell_count
+        + area_mins[:, None] - 1)
+    return cell_mins, cell_maxes
+
+
+def calculate_points_for_areas(
+    annotation_areas: list[AnnotationArea], point_gen_spec: PointGen,
+    rng: np.random.Generator = None,
+) -> np.ndarray:
+    """
+    Calculate points for several images which share a point generation
+    method, but may have different annotation areas (in pixels). This
+    doesn't insert anything in the database.
 
-    annoarea_height = annoarea_max_row - annoarea_min_row + 1
-    annoarea_width = annoarea_max_col - annoarea_min_col + 1
+    rng is the random number generator to use; pass a seeded one for
+    reproducible points. By default, a freshly seeded one is used.
 
+    Returns an int array of shape (number of areas, number of points, 2),
+    where the last axis is (row, column), and points are in point-number
+    order.
+    """
+    if rng is None:
+        rng = np.random.default_rng()
+    area_count = len(annotation_areas)
+
+    min_rows = np.array(
+        [area.min_y for area in annotation_areas], dtype=np.int64)
+    max_rows = np.array(
+        [area.max_y for area in annotation_areas], dtype=np.int64)
+    min_columns = np.array(
+        [area.min_x for area in annotation_areas], dtype=np.int64)
+    max_columns = np.array(
+        [area.max_x for area in annotation_areas], dtype=np.int64)
+    heights = max_rows - min_rows + 1
+    widths = max_columns - min_columns + 1
 
     if point_gen_spec.type == PointGen.Types.SIMPLE.value:
 
-        simple_random_points = []
-
-        for i in range(point_gen_spec.points):
-            row = random.randint(annoarea_min_row, annoarea_max_row)
-            column = random.randint(annoarea_min_col, annoarea_max_col)
-
-            simple_random_points.append({'row': row, 'column': column})
-
-        # To make consecutive points appear reasonably close to each other,
-        # impose cell rows and cols, then make consecutive points fill the
-        # cells one by one.
-        cell_rows_for_numbering = 5
-        cell_columns_for_numbering = 5
-        cell = dict()
-        for r in range(cell_rows_for_numbering):
-            cell[r] = dict()
-            for c in range(cell_columns_for_numbering):
-                cell[r][c] = []
-
-        for p in simple_random_points:
-            # Assign each random point to the cell it belongs in.
-            # This is all int math, so no floor(), int(), etc. needed.
-            # But remember to not divide until the end.
-            r = ((p['row'] - annoarea_min_row)
-                 * cell_rows_for_numbering) // annoarea_height
-            c = ((p['column'] - annoarea_min_col)
-                 * cell_columns_for_numbering) // annoarea_width
-
-            cell[r][c].append(p)
-
-        point_num = 1
-        for r in range(cell_rows_for_numbering):
-            for c in range(cell_columns_for_numbering):
-                for p in cell[r][c]:
-
-                    points.append(dict(
-                        row=p['row'], column=p['column'],
-                        point_number=point_num,
-                    ))
-                    point_num += 1
+        shape = (area_count, point_gen_spec.points)
+        rows = rng.integers(
+            min_rows[:, None], max_rows[:, None], size=shape, endpoint=True)
+        columns = rng.integers(
+            min_columns[:, None], max_columns[:, None], size=shape,
+            endpoint=True)
+
+        # Number the points by the numbering cell each one falls in.
+        # Stable sorting keeps the points within a cell in generation order.
+        cell_rows = (
+            (rows - min_rows[:, None]) * SIMPLE_RANDOM_NUMBERING_CELL_ROWS
+        ) // heights[:, None]
+        cell_columns = (
+            (columns - min_columns[:, None])
+            * SIMPLE_RANDOM_NUMBERING_CELL_COLUMNS
+        ) // widths[:, None]
+        order = np.argsort(
+            cell_rows * SIMPLE_RANDOM_NUMBERING_CELL_COLUMNS + cell_columns,
+            axis=1, kind='stable')
+        rows = np.take_along_axis(rows, order, axis=1)
+        columns = np.take_along_axis(columns, order, axis=1)
 
     elif point_gen_spec.type == PointGen.Types.STRATIFIED.value:
 
-        point_num = 1
-
-        # Each pixel of the annotation area goes in exactly one cell.
-        # Cell widths and heights are within one pixel of each other.
-        for row_num in range(0, point_gen_spec.cell_rows):
-            row_min = ((row_num * annoarea_height)
-                       // point_gen_spec.cell_rows) + annoarea_min_row
-            row_max = (((row_num+1) * annoarea_height)
-                       // point_gen_spec.cell_rows) + annoarea_min_row - 1
-
-            for col_num in range(0, point_gen_spec.cell_columns):
-                col_min = (
-                    (col_num * annoarea_width)
-                    // point_gen_spec.cell_columns) + annoarea_min_col
-                col_max = (
-                    ((col_num+1) * annoarea_width)
-                    // point_gen_spec.cell_columns) + annoarea_min_col - 1
-
-                for cell_point_num in range(0, point_gen_spec.per_cell):
-                    row = random.randint(row_min, row_max)
-                    column = random.randint(col_min, col_max)
-
-                    points.append(dict(
-                        row=row, column=column, point_number=point_num,
-                    ))
-                    point_num += 1
+        row_mins, row_maxes = _cell_bounds(
+            min_rows, heights, point_gen_spec.cell_rows)
+        column_mins, column_maxes = _cell_bounds(
+            min_columns, widths, point_gen_spec.cell_columns)
+
+        # Points are numbered by cell row, then cell column, then point
+        # within the cell.
+        shape = (
+            area_count, point_gen_spec.cell_rows,
+            point_gen_spec.cell_columns, point_gen_spec.per_cell)
+        rows = rng.integers(
+            row_mins[:, :, None, None], row_maxes[:, :, None, None],
+            size=shape, endpoint=True,
+        ).reshape(area_count, -1)
+        columns = rng.integers(
+            column_mins[:, None, :, None], column_maxes[:, None, :, None],
+            size=shape, endpoint=True,
+        ).reshape(area_count, -1)
 
     elif point_gen_spec.type == PointGen.Types.UNIFORM.value:
 
-        point_num = 1
+        row_mins, row_maxes = _cell_bounds(
+            min_rows, heights, point_gen_spec.cell_rows)
+        column_mins, column_maxes = _cell_bounds(
+            min_columns, widths, point_gen_spec.cell_columns)
+
+        # One point at the middle of each cell, numbered by cell row,
+        # then cell column.
+        shape = (
+            area_count, point_gen_spec.cell_rows,
+            point_gen_spec.cell_columns)
+        rows = np.broadcast_to(
+            ((row_mins + row_maxes) // 2)[:, :, None], shape,
+        ).reshape(area_count, -1)
+        columns = np.broadcast_to(
+            ((column_mins + column_maxes) // 2)[:, None, :], shape,
+        ).reshape(area_count, -1)
 
-        for row_num in range(0, point_gen_spec.cell_rows):
-            row_min = ((row_num * annoarea_height)
-                       // point_gen_spec.cell_rows) + annoarea_min_row
-            row_max = (((row_num+1) * annoarea_height)
-                       // point_gen_spec.cell_rows) + annoarea_min_row - 1
-            row_mid = (row_min+row_max) // 2
+    else:
 
-            for col_num in range(0, point_gen_spec.cell_columns):
-                col_min = (
-                    (col_num * annoarea_width)
-                    // point_gen_spec.cell_columns) + annoarea_min_col
-                col_max = (
-                    ((col_num+1) * annoarea_width)
-                    // point_gen_spec.cell_columns) + annoarea_min_col - 1
-                col_mid = (col_min+col_max) // 2
+        rows = np.zeros((area_count, 0), dtype=np.int64)
+        columns = np.zeros((area_count, 0), dtype=np.int64)
 
-                points.append(dict(
-                    row=row_mid, column=col_mid, point_number=point_num,
-                ))
-                point_num += 1
+    return np.stack([rows, columns], axis=-1)
 
-    return points
+
+def calculate_points(annotation_area, point_gen_spec):
+    """
+    Calculate points for an image. This doesn't actually
+    insert anything in the database; it just generates the
+    row, column for each point number.
+
+    Returns the points as a list of dicts; each dict
+    represents a point, and has keys "row", "column",
+    and "point_number".
+    """
+    points = calculate_points_for_areas([annotation_area], point_gen_spec)
+    return [
+        dict(row=row, column=column, point_number=point_number)
+        for point_number, (row, column)
+        in enumerate(points[0].tolist(), start=1)
+    ]
 
 
 def generate_points(img, usesourcemethod=True):
@@ -573,48 +684,98 @@ def generate_points(img, usesourcemethod=True):
     Does nothing if the image already has human annotations,
     because we don't want to delete any human work.
     """
+    generate_points_for_images([img], usesourcemethod=usesourcemethod)
 
-    # If there are any human annotations for this image,
-    # abort point generation.
-    human_annotations = img.annotation_set.confirmed().exclude(
-        user=get_alleviate_user())
-    if human_annotations:
-        return
 
-    # Find the annotation area, expressed in pixels.
-    anno_area = AnnotationArea.from_db_value(img.metadata.annotation_area)
-    anno_area = AnnotationArea.to_pixels(
-        anno_area, width=img.original_width, height=img.original_height)
+def generate_points_for_images(images, usesourcemethod=True, rng=None):
+    """
+    Bulk version of generate_points(). Points of images sharing a point
+    generation method are calculated together, and all the points are
+    deleted and created in bulk.
 
-    # Calculate points.
-    if usesourcemethod:
-        point_gen_method = img.source.default_point_generation_method
-    else:
-        point_gen_method = img.point_generation_method
-    
-    new_points = calculate_points(
-        annotation_area=anno_area,
-        point_gen_spec=PointGen.from_db_value(point_gen_method),
+    rng is passed to calculate_points_for_areas().
+
+    To avoid per-image queries, the images' metadata and source should
+    already be fetched (e.g. with select_related()).
+    """
+    images = list(images)
+
+    # If there are any human annotations for an image,
+    # skip point generation for that image.
+    human_annotated_image_ids = set(
+        Annotation.objects.filter(image__in=images).confirmed()
+        .exclude(user=get_alleviate_user())
+        .order_by().values_list('image_id', flat=True).distinct()
     )
+    images = [
+        image for image in images
+        if image.pk not in human_annotated_image_ids
+    ]
+    if not images:
+        return
 
-    # Delete old points for this image, if any.
-    old_points = Point.objects.filter(image=img)
-    for old_point in old_points:
-        old_point.delete()
+    images_by_point_gen_method = defaultdict(list)
+    for image in images:
+        if usesourcemethod:
+            point_gen_method = image.source.default_point_generation_method
+        else:
+            point_gen_method = image.point_generation_method
+        images_by_point_gen_method[point_gen_method].append(image)
+
+    new_points = []
+    for point_gen_method, method_images in (
+        images_by_point_gen_method.items()
+    ):
+        # Find the annotation areas, expressed in pixels.
+        anno_areas = [
+            AnnotationArea.to_pixels(
+                AnnotationArea.from_db_value(image.metadata.annotation_area),
+                width=image.original_width, height=image.original_height)
+            for image in method_images
+        ]
+        points_per_image = calculate_points_for_areas(
+            anno_areas, PointGen.from_db_value(point_gen_method), rng=rng)
+
+        # Same bounds checks as Point.save(), which bulk_create() skips.
+        # Done for all of these images at once.
+        max_rows = np.array([image.max_row for image in method_images])
+        max_columns = np.array(
+            [image.max_column for image in method_images])
+        rows = points_per_image[:, :, 0]
+        columns = points_per_image[:, :, 1]
+        assert (rows >= 0).all(), "Row below minimum"
+        assert (rows <= max_rows[:, np.newaxis]).all(), "Row above maximum"
+        assert (columns >= 0).all(), "Column below minimum"
+        assert (columns <= max_columns[:, np.newaxis]).all(), \
+            "Column above maximum"
+
+        for image, image_points in zip(method_images, points_per_image):
+            new_points.extend(
+                Point(
+                    row=row, column=column, point_number=point_number,
+                    image=image,
+                )
+                for point_number, (row, column)
+                in enumerate(image_points.tolist(), start=1)
+            )
+
+    # Delete old points for these images, if any. Annotations are deleted
+    # first so that it's done through Annotation's bulk delete(), rather
+    # than by cascade.
+    image_ids = [image.pk for image in images]
+    Annotation.objects.filter(image_id__in=image_ids).delete()
+    Point.objects.filter(image_id__in=image_ids).delete()
 
     # Any CPC (Coral Point Count file) we had saved previously no longer has
     # the correct point positions, so we'll just discard the CPC.
-    img.cpc_content = ''
-    img.cpc_filename = ''
-    img.save()
+    Image.objects.filter(pk__in=image_ids).update(
+        cpc_content='', cpc_filename='')
+    for image in images:
+        image.cpc_content = ''
+        image.cpc_filename = ''
 
     # Save the newly calculated points.
-    for new_point in new_points:
-        Point(row=new_point['row'],
-              column=new_point['column'],
-              point_number=new_point['point_number'],
-              image=img,
-        ).save()
+    Point.objects.bulk_create(new_points)
 
 
 def get_carousel_images():
@@ -1,20 +1,19 @@
-from collections import Counter, defaultdict
 import datetime
-from datetime import timedelta
 import operator
 
 from django import forms
 from django.conf import settings
 from django.db import models
+from django.db.models import Count
 from django.db.models.expressions import Case, F, When
-from django.utils import timezone
 
 from lib.forms import BoxFormRenderer, InlineFormRenderer
-from sources.models import Source
 from .models import Job
 from .utils import (
+    get_cacheable_job_summary,
     get_job_details,
     get_job_names_by_task_queue,
+    get_job_status_filters,
     get_non_source_job_names,
     get_source_job_names,
 )
@@ -117,25 +116,20 @@ class BaseJobForm(forms.Form):
         return jobs
 
     def get_jobs_by_status(self):
-        now = timezone.now()
-
         jobs = self.get_jobs()
-
+        status_filters = get_job_status_filters(self.completed_day_limit)
         return {
-            Job.Status.IN_PROGRESS: jobs.filter(status=Job.Status.IN_PROGRESS),
-            Job.Status.PENDING: jobs.filter(status=Job.Status.PENDING),
-            'completed': jobs.filter(
-                status__in=[Job.Status.SUCCESS, Job.Status.FAILURE],
-                modify_date__gt=now - timedelta(days=self.completed_day_limit)
-            )
+            status_tag: jobs.filter(status_filter)
+            for status_tag, status_filter in status_filters.items()
         }
 
     def get_job_counts(self):
-        jobs_by_status = self.get_jobs_by_status()
-        return {
-            status: job_group.count()
-            for status, job_group in jobs_by_status.items()
-        }
+        # One query for all the status groups.
+        status_filters = get_job_status_filters(self.completed_day_limit)
+        return self.get_jobs().order_by().aggregate(**{
+            status_tag: Count('pk', filter=status_filter)
+            for status_tag, status_filter in status_filters.items()
+        })
 
 
 class JobSearchForm(BaseJobForm):
@@ -295,59 +289,65 @@ class JobSummaryForm(BaseJobForm):
 
     @property
     def job_sort_method(self):
-        # This actually has a purpose near the end of
-        # get_job_counts_by_source().
         return 'recently_updated'
 
     @property
     def completed_day_limit(self):
         return self.get_field_value('completed_count_day_limit')
 
-    def get_job_counts_by_source(self):
-        jobs_by_status = self.get_jobs_by_status()
-
-        job_counts_by_source: dict[str | None, dict] = defaultdict(dict)
-
-        for status_tag, job_group in jobs_by_status.items():
-            job_source_ids = job_group.values_list('source_id', flat=True)
-            source_id_counts = Counter(job_source_ids)
-            for source_id, count in source_id_counts.items():
-                job_counts_by_source[source_id][status_tag] = count
-
-        non_source_job_counts = job_counts_by_source.pop(None, dict())
-
-        source_ids = list(job_counts_by_source.keys())
-        sources = Source.objects.filter(pk__in=source_ids)
-        source_names = {
-            d['pk']: d['name']
-            for d in sources.values('pk', 'name')
-        }
+    def get_job_summary(self):
+        """
+        Return:
+        - Entries of sources with in-progress, pending, or recently
+          completed jobs, with their job counts and last activity
+        - Non-source job counts and last activity
+        - Overall job counts and last activity
+        """
+        summary = get_cacheable_job_summary(self.completed_day_limit).get()
+        status_tags = list(
+            get_job_status_filters(self.completed_day_limit).keys())
 
         source_entries = []
-        for source_id, job_status_counts in job_counts_by_source.items():
-            source_entry = job_status_counts
-            source_entry['source_id'] = source_id
-            source_entry['source_name'] = source_names[source_id]
-            source_entries.append(source_entry)
+        non_source_job_counts = dict()
+        overall_job_counts = dict.fromkeys(status_tags, 0)
+        overall_job_counts['last_activity'] = None
+
+        for entry in summary:
+            for status_tag in status_tags:
+                overall_job_counts[status_tag] += entry[status_tag]
+            if (
+                overall_job_counts['last_activity'] is None
+                or entry['last_activity'] > overall_job_counts['last_activity']
+            ):
+                overall_job_counts['last_activity'] = entry['last_activity']
+
+            if entry['source_id'] is None:
+                non_source_job_counts = entry
+            elif any(entry[status_tag] for status_tag in status_tags):
+                source_entries.append(entry)
 
         sort_method = self.get_field_value('source_sort_method')
         if sort_method == 'job_count':
             # Most in-progress jobs first, then tiebreak by most pending
             # jobs, then tiebreak by most completed jobs
             def sort(entry):
-                return (
-                    entry.get(Job.Status.IN_PROGRESS, 0),
-                    entry.get(Job.Status.PENDING, 0),
-                    entry.get('completed', 0),
-                )
+                return tuple(
+                    entry[status_tag] for status_tag in status_tags)
             source_entries.sort(key=sort, reverse=True)
         elif sort_method == 'source':
             source_entries.sort(key=operator.itemgetter('source_name'))
-        # Else: 'recently_updated', which the sources should already be sorted
-        # by, since the source entries were added while jobs were iterated over
-        # in recently-updated-first order.
+        else:
+            # 'recently_updated': sources with in-progress jobs first, by
+            # their latest updated in-progress job; then sources with
+            # pending jobs, likewise; then sources with completed jobs.
+            def sort(entry):
+                for index, status_tag in enumerate(status_tags):
+                    if entry[status_tag]:
+                        return (
+                            -index, entry[f'{status_tag}_last_modified'])
+            source_entries.sort(key=sort, reverse=True)
 
-        return source_entries, non_source_job_counts
+        return source_entries, non_source_job_counts, overall_job_counts
 
 
 class BackgroundJobStatusForm(forms.Form):
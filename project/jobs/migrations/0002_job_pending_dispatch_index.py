@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-16 09:02
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0001_squashed_0022_job_classifier_populate'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(condition=models.Q(('status', 'pending')), fields=['source', 'job_name', 'scheduled_start_date'], name='job_pending_dispatch_i'),
+        ),
+    ]
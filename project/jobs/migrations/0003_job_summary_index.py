@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-16 15:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('jobs', '0002_job_pending_dispatch_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='job',
+            index=models.Index(fields=['source', 'status', 'modify_date'], name='job_summary_i'),
+        ),
+    ]
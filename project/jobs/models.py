@@ -98,6 +98,22 @@ class Job(models.Model):
                 name='unique_incomplete_jobs',
             ),
         ]
+        indexes = [
+            # Pick the next batch of pending Jobs to dispatch, ranked
+            # within each source + job name.
+            models.Index(
+                fields=['source', 'job_name', 'scheduled_start_date'],
+                condition=Q(status='pending'),
+                name='job_pending_dispatch_i',
+            ),
+            # Job counts and last activity by source and status, for the
+            # job summary. Covers the summary's GROUP BY query, so it can
+            # be an index-only scan.
+            models.Index(
+                fields=['source', 'status', 'modify_date'],
+                name='job_summary_i',
+            ),
+        ]
 
     def __str__(self):
         s = self.job_name
@@ -3,6 +3,9 @@ from logging import getLogger
 
 from django.conf import settings
 from django.core.mail import mail_admins
+from django.db.models import (
+    Case, ExpressionWrapper, F, FloatField, Value, When, Window)
+from django.db.models.functions import RowNumber
 from django.utils import timezone
 import django_huey
 
@@ -12,6 +15,7 @@ from .models import Job
 from .utils import (
     finish_job,
     full_job,
+    get_pending_job_stats,
     get_periodic_job_schedules,
     job_runner,
     next_run_delay,
@@ -23,19 +27,68 @@ from .utils import (
 logger = getLogger(__name__)
 
 
-def get_scheduled_jobs():
+def get_scheduled_jobs(exclude_pks=()):
+    """
+    Get the next batch of pending jobs to start, in dispatch order.
+
+    Dispatch order is a weighted fair queue over (source, job name) groups,
+    so that a source with a huge backlog of jobs doesn't starve the other
+    sources. Within each group, jobs are ranked by scheduled start date.
+    A job's rank divided by its job name's weight gives its 'virtual start',
+    and jobs are dispatched in virtual-start order. For example, with
+    equal weights, every group gets its first job dispatched, then every
+    group gets its second job dispatched, and so on.
+    The order only decides which jobs go first; any group can fill the
+    rest of a batch if the other groups run out of jobs.
+
+    exclude_pks are jobs which were already looked at in this dispatch
+    run. They're excluded before ranking, so they don't hold up the rest
+    of their group.
+
+    This is all one query, using the pending-jobs index.
+    """
     jobs = (
         Job.objects.filter(status=Job.Status.PENDING)
-        # Ensure that jobs scheduled to start first get processed first.
-        # For jobs with no scheduled start date, tiebreak by pk for
-        # consistency. (TODO: Test)
-        .order_by('scheduled_start_date', 'pk')
+        .exclude(pk__in=exclude_pks)
     )
     # We'll run any pending jobs immediately if django-huey's default queue
     # is configured to act similarly.
     if not django_huey.get_queue(settings.DJANGO_HUEY['default']).immediate:
         jobs = jobs.filter(scheduled_start_date__lt=timezone.now())
-    return jobs
+
+    weights = settings.JOB_DISPATCH_WEIGHTS
+    if weights:
+        rank_multiplier = Case(
+            *[
+                When(job_name=name, then=Value(1 / weight))
+                for name, weight in weights.items()
+            ],
+            default=Value(1.0),
+            output_field=FloatField(),
+        )
+    else:
+        rank_multiplier = Value(1.0)
+
+    jobs = (
+        jobs
+        .annotate(
+            group_rank=Window(
+                RowNumber(),
+                partition_by=[F('source_id'), F('job_name')],
+                # For jobs with no scheduled start date, tiebreak by pk for
+                # consistency.
+                order_by=[F('scheduled_start_date').asc(), F('pk').asc()],
+            ),
+        )
+        .annotate(
+            virtual_start=ExpressionWrapper(
+                F('group_rank') * rank_multiplier,
+                output_field=FloatField(),
+            ),
+        )
+        .order_by('virtual_start', 'scheduled_start_date', 'pk')
+    )
+    return jobs[:settings.JOB_DISPATCH_BATCH_SIZE]
 
 
 def after_run_scheduled(job_id):
@@ -58,34 +111,45 @@ def run_scheduled_jobs():
     wrap_up_time = start + timedelta(minutes=settings.JOB_MAX_MINUTES)
     timed_out = False
 
-    jobs_to_run = get_scheduled_jobs()
     example_jobs = []
     jobs_ran = 0
-
-    for job in jobs_to_run:
-        try:
-            started = start_job(job)
-        except UnrecognizedJobNameError:
-            finish_job(
-                job, success=False, result_message="Unrecognized job name")
-            continue
-
-        if not started:
-            # May refuse to start if the start condition for the job is
-            # currently not met.
-            # Try again next time.
-            continue
-
-        jobs_ran += 1
-        if jobs_ran <= 3:
-            example_jobs.append(job)
-        if (
-            jobs_ran % 10 == 0
-            and timezone.now() > wrap_up_time
-        ):
-            timed_out = True
+    # Jobs looked at in this run. Started jobs may stay pending until a
+    # huey worker gets to them, and jobs whose start condition isn't met
+    # stay pending; either way, they shouldn't come up again in this run.
+    seen_pks = set()
+
+    while not timed_out:
+        # Fetch each dispatch batch at once.
+        jobs_to_run = list(get_scheduled_jobs(exclude_pks=seen_pks))
+        if not jobs_to_run:
             break
 
+        for job in jobs_to_run:
+            seen_pks.add(job.pk)
+            try:
+                started = start_job(job)
+            except UnrecognizedJobNameError:
+                finish_job(
+                    job, success=False,
+                    result_message="Unrecognized job name")
+                continue
+
+            if not started:
+                # May refuse to start if the start condition for the job is
+                # currently not met.
+                # Try again next time.
+                continue
+
+            jobs_ran += 1
+            if jobs_ran <= 3:
+                example_jobs.append(job)
+            if (
+                jobs_ran % 10 == 0
+                and timezone.now() > wrap_up_time
+            ):
+                timed_out = True
+                break
+
     # Build result message
 
     if jobs_ran > 3:
@@ -102,9 +166,34 @@ def run_scheduled_jobs():
     for job in example_jobs:
         message += f"\n{job.pk}: {job}"
 
+    log_pending_job_stats()
+
     return message
 
 
+def log_pending_job_stats(num_sources=5):
+    """
+    Log the queue depth and wait time of the sources with the
+    most pending jobs.
+    """
+    pending_job_stats = get_pending_job_stats()
+    if not pending_job_stats:
+        return
+
+    busiest_sources = sorted(
+        pending_job_stats.items(),
+        key=lambda item: item[1]['pending'],
+        reverse=True,
+    )[:num_sources]
+    logger.info(
+        "Pending jobs by source: " + "; ".join(
+            f"{source_id}: {stats['pending']} pending,"
+            f" longest wait {stats['longest_wait']}"
+            for source_id, stats in busiest_sources
+        )
+    )
+
+
 def run_scheduled_jobs_until_empty():
     """
     For testing purposes, it's convenient to schedule + run jobs, and
@@ -13,15 +13,16 @@ from lib.tests.utils import BaseTest
 from ..models import Job
 from ..tasks import (
     clean_up_old_jobs,
+    get_scheduled_jobs,
     schedule_periodic_jobs,
     report_stuck_jobs,
     run_scheduled_jobs,
 )
-from ..utils import job_runner, schedule_job
+from ..utils import get_pending_job_stats, job_runner, schedule_job
 from .utils import fabricate_job
 
 
-def call_run_scheduled_jobs():
+def call_run_scheduled_jobs(**kwargs):
     run_scheduled_jobs()
     return []
 
@@ -31,6 +32,15 @@ def return_arg_test(arg):
     return str(arg)
 
 
+def never_start(job_id):
+    return False
+
+
+@job_runner(start_condition=never_start)
+def start_condition_test(arg):
+    return str(arg)
+
+
 class RunScheduledJobsTest(BaseTest):
 
     @staticmethod
@@ -88,6 +98,54 @@ class RunScheduledJobsTest(BaseTest):
         self.assertTrue(
             job.result_message.startswith("Ran 2 job(s):"))
 
+    @override_settings(JOB_DISPATCH_BATCH_SIZE=3)
+    def test_multiple_batches(self):
+        user = self.create_user()
+        source = self.create_source(user)
+        jobs = [
+            fabricate_job('return_arg_test', i, source=source)
+            for i in range(8)
+        ]
+
+        run_job = self.do_run_job()
+        self.assertTrue(
+            run_job.result_message.startswith("Ran 8 jobs, including:"),
+            msg="A single source's backlog should be dispatched in one run,"
+                " even if it's bigger than a batch")
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.Status.SUCCESS)
+
+    @override_settings(JOB_DISPATCH_BATCH_SIZE=3)
+    def test_start_condition_not_met(self):
+        user = self.create_user()
+        source = self.create_source(user)
+        waiting_jobs = [
+            fabricate_job(
+                'start_condition_test', i, source=source,
+                scheduled_start_date=(
+                    timezone.now() - timedelta(minutes=60 - i)))
+            for i in range(4)
+        ]
+        jobs = [
+            fabricate_job(
+                'return_arg_test', i, source=source,
+                scheduled_start_date=(
+                    timezone.now() - timedelta(minutes=30 - i)))
+            for i in range(3)
+        ]
+
+        run_job = self.do_run_job()
+        self.assertTrue(
+            run_job.result_message.startswith("Ran 3 job(s):"),
+            msg="Jobs that can't start yet shouldn't hold up other jobs")
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.Status.SUCCESS)
+        for job in waiting_jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, Job.Status.PENDING)
+
     def test_no_multiple_runs(self):
         """
         Should block multiple existing runs of this task. That way, no job
@@ -122,6 +180,125 @@ class RunScheduledJobsTest(BaseTest):
         self.assertEqual(job_2.result_message, "Unrecognized job name")
 
 
+class DispatchOrderTest(BaseTest):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = cls.create_user()
+        cls.source_1 = cls.create_source(cls.user)
+        cls.source_2 = cls.create_source(cls.user)
+
+    def fabricate_jobs(self, name, source, count, minutes_ago):
+        return [
+            fabricate_job(
+                name, source.pk, i, source=source,
+                scheduled_start_date=(
+                    timezone.now() - timedelta(minutes=minutes_ago - i)),
+            )
+            for i in range(count)
+        ]
+
+    def assert_dispatch_order(self, expected_jobs):
+        self.assertListEqual(
+            [job.pk for job in get_scheduled_jobs()],
+            [job.pk for job in expected_jobs],
+        )
+
+    def test_interleave_sources(self):
+        jobs_1 = self.fabricate_jobs('return_arg_test', self.source_1, 3, 60)
+        jobs_2 = self.fabricate_jobs('return_arg_test', self.source_2, 2, 30)
+
+        # The source with the later backlog doesn't have to wait for
+        # the other source's whole backlog.
+        self.assert_dispatch_order([
+            jobs_1[0], jobs_2[0], jobs_1[1], jobs_2[1], jobs_1[2]])
+
+    def test_interleave_job_names(self):
+        jobs_a = self.fabricate_jobs('return_arg_test', self.source_1, 2, 60)
+        jobs_b = self.fabricate_jobs('other_test', self.source_1, 2, 30)
+
+        self.assert_dispatch_order([
+            jobs_a[0], jobs_b[0], jobs_a[1], jobs_b[1]])
+
+    @override_settings(JOB_DISPATCH_WEIGHTS={'other_test': 2})
+    def test_weights(self):
+        jobs_a = self.fabricate_jobs('return_arg_test', self.source_1, 2, 60)
+        jobs_b = self.fabricate_jobs('other_test', self.source_2, 4, 30)
+
+        # other_test gets twice the share of return_arg_test.
+        self.assert_dispatch_order([
+            jobs_b[0], jobs_a[0], jobs_b[1], jobs_b[2], jobs_a[1], jobs_b[3]])
+
+    @override_settings(JOB_DISPATCH_BATCH_SIZE=4)
+    def test_fill_batch_from_one_group(self):
+        jobs_1 = self.fabricate_jobs('return_arg_test', self.source_1, 5, 60)
+        jobs_2 = self.fabricate_jobs('return_arg_test', self.source_2, 1, 30)
+
+        # Once source 2 runs out of jobs, source 1 gets the rest of
+        # the batch.
+        self.assert_dispatch_order(
+            [jobs_1[0], jobs_2[0], jobs_1[1], jobs_1[2]])
+
+    def test_exclude(self):
+        jobs_1 = self.fabricate_jobs('return_arg_test', self.source_1, 3, 60)
+        jobs_2 = self.fabricate_jobs('return_arg_test', self.source_2, 2, 30)
+
+        # Excluded jobs don't take up ranks in their group.
+        self.assertListEqual(
+            [
+                job.pk for job in get_scheduled_jobs(
+                    exclude_pks=[jobs_1[0].pk, jobs_1[1].pk])
+            ],
+            [job.pk for job in [jobs_1[2], jobs_2[0], jobs_2[1]]],
+        )
+
+    @override_settings(JOB_DISPATCH_BATCH_SIZE=3)
+    def test_batch_size(self):
+        jobs_1 = self.fabricate_jobs('return_arg_test', self.source_1, 4, 60)
+        jobs_2 = self.fabricate_jobs('return_arg_test', self.source_2, 4, 30)
+
+        self.assert_dispatch_order([jobs_1[0], jobs_2[0], jobs_1[1]])
+
+    def test_one_query(self):
+        self.fabricate_jobs('return_arg_test', self.source_1, 4, 60)
+        self.fabricate_jobs('return_arg_test', self.source_2, 4, 30)
+
+        with self.assertNumQueries(1):
+            list(get_scheduled_jobs())
+
+
+class PendingJobStatsTest(BaseTest):
+
+    def test(self):
+        user = self.create_user()
+        source = self.create_source(user)
+        fabricate_job(
+            'name', 1, source=source,
+            scheduled_start_date=timezone.now() - timedelta(hours=2))
+        fabricate_job(
+            'name', 2, source=source,
+            scheduled_start_date=timezone.now() - timedelta(hours=1))
+        fabricate_job(
+            'name', 3, source=source, status=Job.Status.IN_PROGRESS,
+            scheduled_start_date=timezone.now() - timedelta(hours=3))
+        fabricate_job(
+            'name', 4, delay=timedelta(hours=1))
+
+        stats = get_pending_job_stats()
+
+        self.assertSetEqual(set(stats.keys()), {source.pk, None})
+        self.assertEqual(stats[source.pk]['pending'], 2)
+        self.assertAlmostEqual(
+            stats[source.pk]['longest_wait'], timedelta(hours=2),
+            delta=timedelta(minutes=10))
+        self.assertEqual(stats[None]['pending'], 1)
+        self.assertIsNone(
+            stats[None]['longest_wait'],
+            msg="Not due yet, so no wait time")
+
+
 @override_settings(JOB_MAX_DAYS=30)
 class CleanupTaskTest(BaseTest):
 
@@ -10,6 +10,7 @@ from ..exceptions import JobError
 from ..models import Job
 from ..utils import (
     bulk_create_jobs,
+    bulk_schedule_jobs,
     finish_job,
     full_job,
     job_runner,
@@ -214,6 +215,95 @@ class BulkCreateJobsTest(BaseTest):
         self.assertEqual(len(jobs), 3)
 
 
+class BulkScheduleJobsTest(BaseTest, EmailAssertionsMixin):
+
+    def test_create(self):
+        jobs = bulk_schedule_jobs(
+            'name', [('arg1a', 'arg2a'), ('arg1b', 'arg2b')], source_id=None)
+
+        self.assertSetEqual(
+            {job.arg_identifier for job in jobs},
+            {'arg1a,arg2a', 'arg1b,arg2b'},
+        )
+        for job in jobs:
+            self.assertEqual(job.status, Job.Status.PENDING)
+            self.assertEqual(job.attempt_number, 1)
+            self.assertIsNotNone(job.pk)
+            self.assertIsNotNone(job.scheduled_start_date)
+
+    def test_duplicate_args(self):
+        jobs = bulk_schedule_jobs('name', [('arg',), ('arg',)])
+        self.assertEqual(len(jobs), 1)
+        self.assertEqual(Job.objects.count(), 1)
+
+    def test_existing_incomplete_jobs(self):
+        pending_job = fabricate_job('name', 'arg1')
+        fabricate_job('name', 'arg2', status=Job.Status.IN_PROGRESS)
+        fabricate_job('name', 'arg3', status=Job.Status.SUCCESS)
+
+        jobs = bulk_schedule_jobs(
+            'name', [('arg1',), ('arg2',), ('arg3',), ('arg4',)])
+
+        self.assertSetEqual(
+            {job.arg_identifier for job in jobs}, {'arg3', 'arg4'},
+            msg="Should only create jobs which aren't already incomplete")
+        self.assertEqual(
+            Job.objects.incomplete().count(), 4,
+            msg="Should have one incomplete job per arg")
+
+        pending_job.refresh_from_db()
+        self.assertIsNotNone(
+            pending_job.scheduled_start_date,
+            msg="Existing pending job should have gotten a start date")
+
+    def test_attempt_numbers(self):
+        for _ in range(2):
+            job, _ = schedule_job('name', 'arg1')
+            finish_job(job, success=False, result_message="An error")
+        job, _ = schedule_job('name', 'arg2')
+        finish_job(job, success=False, result_message="An error")
+        job, _ = schedule_job('name', 'arg2')
+        finish_job(job, success=True)
+
+        jobs = bulk_schedule_jobs('name', [('arg1',), ('arg2',), ('arg3',)])
+
+        attempt_numbers = {job.arg_identifier: job.attempt_number
+                           for job in jobs}
+        self.assertDictEqual(
+            attempt_numbers,
+            {'arg1': 3, 'arg2': 1, 'arg3': 1},
+            msg="Should continue counting only from a failed latest run",
+        )
+
+    def test_repeated_failure(self):
+        # 5 fails in a row
+        for _ in range(5):
+            job, _ = schedule_job('name', 'arg')
+            finish_job(job, success=False, result_message="An error")
+
+        jobs = bulk_schedule_jobs('name', [('arg',)])
+
+        self.assert_latest_email(
+            "Job has been failing repeatedly: name / arg, attempt 5",
+            ["Error info:\n\nAn error"],
+        )
+        self.assertAlmostEqual(
+            datetime.now(timezone.utc) + timedelta(days=3),
+            jobs[0].scheduled_start_date,
+            delta=timedelta(minutes=10),
+            msg="Job should be pushed back to 3 days in the future",
+        )
+
+    def test_num_queries(self):
+        fabricate_job('name', '1')
+        fabricate_job('name', '2', status=Job.Status.FAILURE)
+
+        with self.assertNumQueries(5):
+            jobs = bulk_schedule_jobs(
+                'name', [(i,) for i in range(50)])
+        self.assertEqual(len(jobs), 49)
+
+
 class FinishJobTest(BaseTest):
 
     @override_settings(ENABLE_PERIODIC_JOBS=True)
@@ -6,6 +6,7 @@ from unittest import mock
 
 from bs4 import BeautifulSoup
 from django.contrib.auth.models import User
+from django.core.cache import cache
 from django.template.defaultfilters import date as date_template_filter
 from django.test import override_settings
 from django.urls import reverse
@@ -16,7 +17,7 @@ from lib.tests.utils import (
     BasePermissionTest, ClientTest, HtmlAssertionsMixin, scrambled_run
 )
 from ..models import Job
-from ..utils import abort_job
+from ..utils import abort_job, compute_job_summary
 from .utils import fabricate_job
 
 
@@ -66,6 +67,14 @@ class PermissionTest(BasePermissionTest):
         self.source_to_public()
         self.assertPermissionLevel(url, self.SOURCE_EDIT, template=template)
 
+    def test_performance_summary(self):
+        url = reverse('jobs:performance_summary')
+        template = 'jobs/performance_summary.html'
+
+        self.assertPermissionLevel(
+            url, self.SUPERUSER, template=template,
+            deny_type=self.REQUIRE_LOGIN)
+
     def test_background_job_status(self):
         url = reverse('jobs:status')
         template = 'jobs/background_job_status.html'
@@ -412,6 +421,61 @@ class JobSummaryTest(JobViewTestMixin, ClientTest):
             data=dict(completed_count_day_limit=13)
         )
 
+    def test_last_activity(self):
+        # Outside the completed-job cutoff, but still counts as activity
+        old_job = self.job(
+            Job.Status.SUCCESS, source=1,
+            modified_time_ago=timedelta(days=5))
+        self.job(
+            Job.Status.PENDING, source=1,
+            modified_time_ago=timedelta(days=10))
+        non_source_job = self.job(
+            Job.Status.SUCCESS,
+            modified_time_ago=timedelta(days=1))
+        # Source with no counted jobs; not listed, but still counts
+        # toward overall activity
+        self.job(
+            Job.Status.SUCCESS, source=2,
+            modified_time_ago=timedelta(days=4))
+
+        self.assert_summary_table_values(
+            [
+                [self.all_jobs_first_cell, 0, 1, 1,
+                 date_display(non_source_job.modify_date)],
+                [self.non_source_jobs_first_cell, 0, 0, 1,
+                 date_display(non_source_job.modify_date)],
+                [self.source_cell(1), 0, 1, 0,
+                 date_display(old_job.modify_date)],
+            ]
+        )
+
+    def test_summary_query_count(self):
+        for source_number in range(1, 6+1):
+            self.job(Job.Status.IN_PROGRESS, source=source_number)
+            self.job(Job.Status.PENDING, source=source_number)
+            self.job(Job.Status.SUCCESS, source=source_number)
+        self.job(Job.Status.PENDING)
+
+        # One GROUP BY query for the counts, and one for source names.
+        with self.assertNumQueries(2):
+            summary = compute_job_summary(3)
+        self.assertEqual(len(summary), 6+1)
+
+    def test_cached(self):
+        self.job(Job.Status.PENDING, source=1)
+        self.assert_summary_table_values(
+            [{}, {}, [self.source_cell(1), 0, 1, 0, None]])
+
+        # The cached summary is still used.
+        self.job(Job.Status.PENDING, source=1)
+        self.assert_summary_table_values(
+            [{}, {}, [self.source_cell(1), 0, 1, 0, None]])
+
+        # Recomputed after the cache expires.
+        cache.clear()
+        self.assert_summary_table_values(
+            [{}, {}, [self.source_cell(1), 0, 2, 0, None]])
+
     def test_age_cutoff_limits(self):
         def page_response(day_limit):
             return self.get_response(
@@ -525,6 +589,7 @@ class JobListTestsMixin(JobViewTestMixin, ABC):
         form = response.context['job_search_form']
 
         source_types = [
+            ('check_features_for_source', "Check features for source"),
             ('check_source', "Check source"),
             ('classify_features', "Classify"),
             ('extract_features', "Extract features"),
@@ -538,6 +603,8 @@ class JobListTestsMixin(JobViewTestMixin, ABC):
             ('clean_up_old_api_jobs', "Clean up old api jobs"),
             ('clean_up_old_jobs', "Clean up old jobs"),
             ('collect_spacer_jobs', "Collect spacer jobs"),
+            ('generate_label_example_patches',
+             "Generate label example patches"),
             ('generate_patch', "Generate patch"),
             ('generate_thumbnail', "Generate thumbnail"),
             ('report_stuck_jobs', "Report stuck jobs"),
@@ -1803,3 +1870,41 @@ class BackgroundJobStatusTest(JobViewTestMixin, ClientTest):
 
         response = self.get_response()
         self.assertNotContains(response, "Current longest incomplete job")
+
+
+class PerformanceMetricsTest(ClientTest):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = cls.create_user()
+        cls.url = reverse('jobs:performance_metrics')
+
+    def test_superuser(self):
+        self.client.force_login(self.superuser)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(
+            '# TYPE coralnet_view_wall_time_seconds histogram',
+            response.content.decode())
+
+    def test_regular_user(self):
+        self.client.force_login(self.user)
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 403)
+
+    @override_settings(INSTRUMENTATION_METRICS_TOKEN='abc123')
+    def test_token(self):
+        response = self.client.get(
+            self.url, headers={'Authorization': 'Bearer abc123'})
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(
+            self.url, headers={'Authorization': 'Bearer wrong'})
+        self.assertEqual(response.status_code, 403)
+
+    def test_blank_token_setting(self):
+        response = self.client.get(
+            self.url, headers={'Authorization': 'Bearer '})
+        self.assertEqual(response.status_code, 403)
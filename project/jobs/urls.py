@@ -8,6 +8,10 @@ app_name = 'jobs'
 urlpatterns = [
     path(r'jobs/summary/',
          views.JobSummaryView.as_view(), name='summary'),
+    path(r'jobs/performance/',
+         views.PerformanceSummaryView.as_view(), name='performance_summary'),
+    path(r'jobs/metrics/',
+         views.performance_metrics, name='performance_metrics'),
     path(r'jobs/list/',
          views.AllJobsListView.as_view(), name='all_jobs_list'),
     path(r'jobs/non_source_list/',
@@ -14,14 +14,16 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.mail import mail_admins
 from django.db import transaction
-from django.db.models import Aggregate, DurationField
+from django.db.models import Aggregate, Count, DurationField, Max, Min, Q
 from django.utils.module_loading import autodiscover_modules
 from django.views.debug import ExceptionReporter
 from django_huey import db_periodic_task, db_task
 from huey import crontab
 
 from errorlogs.utils import instantiate_error_log
-from lib.utils import context_scoped_cache
+from lib.instrumentation import measure
+from lib.utils import CacheableValue, context_scoped_cache
+from sources.models import Source
 from .exceptions import JobError, UnrecognizedJobNameError
 from .models import Job
 
@@ -31,6 +33,12 @@ task_logger = getLogger('coralnet_tasks')
 
 MANY_FAILURES = 5
 
+# Max number of Jobs to insert per query in bulk_schedule_jobs().
+BULK_SCHEDULE_BATCH_SIZE = 1000
+
+# The job summary is for monitoring, so it can be a minute behind.
+JOB_SUMMARY_CACHE_SECONDS = 60
+
 
 def get_or_create_job(
     name: str,
@@ -168,6 +176,128 @@ def schedule_job_on_commit(name: str, *args, **kwargs) -> None:
         functools.partial(schedule_job, name, *args, **kwargs))
 
 
+def bulk_schedule_jobs(
+    name: str,
+    tasks_args: list[tuple],
+    source_id: int = None,
+    user: User = None,
+    delay: timedelta = None,
+) -> list[Job]:
+    """
+    Set-based equivalent of calling schedule_job() once per args tuple.
+    Intended for scheduling many Jobs of the same name, such as all of a
+    source's feature extractions, with a fixed number of queries instead
+    of a few queries per Job.
+
+    Incomplete Jobs which already match any of the args are left in place
+    (just with their scheduled start dates updated, as in schedule_job()).
+    The rest are created with bulk_create(). The DB's uniqueness constraint
+    on incomplete Jobs is still respected: if another thread creates a
+    matching Job in the meantime, our conflicting insert is skipped.
+
+    Return the newly created Jobs.
+    """
+    arg_identifiers = list(dict.fromkeys(
+        Job.args_to_identifier(task_args) for task_args in tasks_args))
+    if not arg_identifiers:
+        return []
+
+    now = datetime.now(timezone.utc)
+    user = user if user and user.is_authenticated else None
+
+    # Incomplete Jobs which already exist.
+    incomplete_jobs = Job.objects.incomplete().filter(
+        job_name=name, arg_identifier__in=arg_identifiers)
+    existing_identifiers = set(
+        incomplete_jobs.values_list('arg_identifier', flat=True))
+
+    if existing_identifiers:
+        # Expedite existing pending Jobs' scheduled start dates if an
+        # earlier date was just requested (or if there's no date yet).
+        scheduled_start_date = now + (delay or random_job_delay())
+        (
+            incomplete_jobs
+            .filter(
+                status=Job.Status.PENDING,
+                arg_identifier__in=existing_identifiers,
+                attempt_number__lte=MANY_FAILURES,
+            )
+            .filter(
+                Q(scheduled_start_date__isnull=True)
+                | Q(scheduled_start_date__gt=scheduled_start_date)
+            )
+            .update(scheduled_start_date=scheduled_start_date, modify_date=now)
+        )
+
+    identifiers_to_create = [
+        identifier for identifier in arg_identifiers
+        if identifier not in existing_identifiers
+    ]
+    if not identifiers_to_create:
+        return []
+
+    # For each identifier that's run before, see whether the latest
+    # completed run failed. If so, this is a retry.
+    latest_completed_pks = (
+        Job.objects.completed()
+        .filter(job_name=name, arg_identifier__in=identifiers_to_create)
+        .values('arg_identifier')
+        .annotate(latest_pk=Max('pk'))
+        .values('latest_pk')
+    )
+    last_failed_jobs = {
+        job.arg_identifier: job
+        for job in Job.objects.filter(
+            pk__in=latest_completed_pks, status=Job.Status.FAILURE)
+    }
+
+    jobs = []
+    for identifier in identifiers_to_create:
+        attempt_number = 1
+        scheduled_start_date = now + (delay or random_job_delay())
+
+        last_failed_job = last_failed_jobs.get(identifier)
+        if last_failed_job:
+            attempt_number = last_failed_job.attempt_number + 1
+
+            if attempt_number > MANY_FAILURES:
+                # Notify admins on repeated failure.
+                mail_admins(
+                    f"Job has been failing repeatedly:"
+                    f" {last_failed_job}",
+                    f"Error info:\n\n{last_failed_job.result_message}",
+                )
+                # Make sure it doesn't retry too quickly until the failure
+                # situation's manually resolved.
+                scheduled_start_date = max(
+                    scheduled_start_date, now + timedelta(days=3))
+
+        jobs.append(Job(
+            job_name=name,
+            arg_identifier=identifier,
+            source_id=source_id,
+            user=user,
+            status=Job.Status.PENDING,
+            attempt_number=attempt_number,
+            scheduled_start_date=scheduled_start_date,
+        ))
+
+    # ignore_conflicts makes any insert that would violate the incomplete-Jobs
+    # uniqueness constraint get skipped, rather than erroring. The
+    # tradeoff is that the created Jobs don't get their PKs set, so we
+    # re-fetch them.
+    Job.objects.bulk_create(
+        jobs, batch_size=BULK_SCHEDULE_BATCH_SIZE, ignore_conflicts=True)
+
+    return list(
+        Job.objects.incomplete().filter(
+            job_name=name,
+            arg_identifier__in=identifiers_to_create,
+            create_date__gte=now,
+        )
+    )
+
+
 def bulk_create_jobs(
     name: str,
     tasks_args: list[list],
@@ -197,6 +327,99 @@ def bulk_create_jobs(
     return jobs
 
 
+def get_pending_job_stats() -> dict[int | None, dict]:
+    """
+    Per-source queue depth and wait time of pending Jobs, in one query.
+
+    Return a dict of source ID (None for non-source Jobs) to a dict with:
+    - pending: number of pending Jobs
+    - longest_wait: how long the longest-waiting Job has been past its
+      scheduled start date, or None if no Jobs are due to start yet
+    """
+    now = datetime.now(timezone.utc)
+    values = (
+        Job.objects.pending()
+        .values('source_id')
+        .annotate(
+            pending=Count('pk'),
+            earliest_due=Min(
+                'scheduled_start_date',
+                filter=Q(scheduled_start_date__lte=now),
+            ),
+        )
+        .order_by()
+    )
+    return {
+        value_dict['source_id']: dict(
+            pending=value_dict['pending'],
+            longest_wait=(
+                now - value_dict['earliest_due']
+                if value_dict['earliest_due'] else None
+            ),
+        )
+        for value_dict in values
+    }
+
+
+def get_job_status_filters(completed_day_limit: int) -> dict[str, Q]:
+    """
+    Filters for the status groups shown in job counts: in progress,
+    pending, and completed within the last completed_day_limit days.
+    """
+    completed_cutoff = (
+        datetime.now(timezone.utc) - timedelta(days=completed_day_limit))
+    return {
+        Job.Status.IN_PROGRESS.value: Q(status=Job.Status.IN_PROGRESS),
+        Job.Status.PENDING.value: Q(status=Job.Status.PENDING),
+        'completed': Q(
+            status__in=[Job.Status.SUCCESS, Job.Status.FAILURE],
+            modify_date__gt=completed_cutoff,
+        ),
+    }
+
+
+def compute_job_summary(completed_day_limit: int) -> list[dict]:
+    """
+    Per-source Job counts and last activity, in one GROUP BY query.
+
+    Return a list of dicts, one per source with any Jobs (source_id None
+    for non-source Jobs), with:
+    - source_id and source_name
+    - the Job count of each status group from get_job_status_filters()
+    - <status group>_last_modified: latest modify date in that group
+    - last_activity: latest modify date of any of the source's Jobs
+    """
+    aggregates = dict()
+    status_filters = get_job_status_filters(completed_day_limit)
+    for status_tag, status_filter in status_filters.items():
+        aggregates[status_tag] = Count('pk', filter=status_filter)
+        aggregates[f'{status_tag}_last_modified'] = Max(
+            'modify_date', filter=status_filter)
+    summary = list(
+        Job.objects
+        .values('source_id')
+        .annotate(last_activity=Max('modify_date'), **aggregates)
+        .order_by()
+    )
+
+    source_names = dict(
+        Source.objects
+        .filter(pk__in=[entry['source_id'] for entry in summary])
+        .values_list('pk', 'name')
+    )
+    for entry in summary:
+        entry['source_name'] = source_names.get(entry['source_id'])
+    return summary
+
+
+def get_cacheable_job_summary(completed_day_limit: int) -> CacheableValue:
+    return CacheableValue(
+        cache_key=f'job_summary_{completed_day_limit}',
+        compute_function=lambda: compute_job_summary(completed_day_limit),
+        cache_timeout_interval=JOB_SUMMARY_CACHE_SECONDS,
+    )
+
+
 def start_job(job: Job) -> bool:
     """
     Immediately add an existing Job to huey's queue.
@@ -217,6 +440,50 @@ def start_job(job: Job) -> bool:
     return True
 
 
+def claim_pending_job(job_id: int) -> bool:
+    """
+    Update a pending Job to in-progress, unless something else got to it
+    first; for example, another worker running the same job, or feature
+    extraction packing the job into another spacer job.
+    The status check and update are a single UPDATE query, so only one
+    claimant can succeed.
+
+    Return True if this call claimed the Job, else False.
+    """
+    now = datetime.now(timezone.utc)
+    # auto_now fields like modify_date don't get auto-updated by
+    # update(); so we set it explicitly here.
+    claimed_count = Job.objects.filter(
+        pk=job_id, status=Job.Status.PENDING,
+    ).update(
+        status=Job.Status.IN_PROGRESS, start_date=now, modify_date=now,
+    )
+    return claimed_count == 1
+
+
+def claim_pending_jobs(job_ids: list[int]) -> list[int]:
+    """
+    Bulk version of claim_pending_job(), using two queries total.
+    Jobs that another claimant is in the middle of claiming are skipped.
+
+    Return the IDs of the Jobs that this call claimed.
+    """
+    now = datetime.now(timezone.utc)
+    with transaction.atomic():
+        # The row locks make any concurrent claim_pending_job() calls on
+        # these Jobs wait until we commit, at which point the Jobs aren't
+        # pending anymore.
+        claimed_ids = list(
+            Job.objects.select_for_update(skip_locked=True)
+            .filter(pk__in=job_ids, status=Job.Status.PENDING)
+            .values_list('pk', flat=True)
+        )
+        Job.objects.filter(pk__in=claimed_ids).update(
+            status=Job.Status.IN_PROGRESS, start_date=now, modify_date=now,
+        )
+    return claimed_ids
+
+
 def finish_job(
     job: Job,
     success: bool = False,
@@ -374,7 +641,7 @@ class JobDecorator:
             ])
             start_time = datetime.now()
 
-            with context_scoped_cache():
+            with measure('job', self.job_name), context_scoped_cache():
                 self.run_task_wrapper(task_func, task_args)
 
             # Log a message after task exit.
@@ -485,9 +752,10 @@ class JobDecorator:
         except Job.DoesNotExist:
             return None
 
-        job.status = Job.Status.IN_PROGRESS
-        job.start_date = datetime.now(timezone.utc)
-        job.save()
+        if not claim_pending_job(job.pk):
+            # Claimed by something else since the above query.
+            return None
+        job.refresh_from_db()
         return job
 
     @staticmethod
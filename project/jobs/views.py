@@ -1,15 +1,20 @@
 from abc import ABC, abstractmethod
 import datetime
+import math
+import operator
 
 from django.conf import settings
 from django.contrib.auth.decorators import (
     login_required, permission_required)
 from django.db.models import F
+from django.http import HttpResponse, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, render
 from django.utils.decorators import method_decorator
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
 from django.views import View
 
+from lib import instrumentation
 from lib.templatetags.common_tags import timedelta_display
 from lib.decorators import source_permission_required
 from lib.utils import paginate
@@ -257,32 +262,8 @@ class JobSummaryView(View):
         else:
             summary_form = JobSummaryForm()
 
-        source_entries, non_source_job_counts = \
-            summary_form.get_job_counts_by_source()
-
-        overall_job_counts = summary_form.get_job_counts()
-
-        # Last-activity info
-        last_active_job_per_source = (
-            Job.objects.order_by('source', '-modify_date')
-            .distinct('source')
-        )
-        last_activity_per_source = {
-            value_dict['source']: value_dict['modify_date']
-            for value_dict
-            in last_active_job_per_source.values('source', 'modify_date')
-        }
-
-        for entry in source_entries:
-            entry['last_activity'] = \
-                last_activity_per_source[entry['source_id']]
-        non_source_job_counts['last_activity'] = \
-            last_activity_per_source.get(None, None)
-        if last_activity_per_source:
-            overall_job_counts['last_activity'] = \
-                sorted(last_activity_per_source.values(), reverse=True)[0]
-        else:
-            overall_job_counts['last_activity'] = None
+        source_entries, non_source_job_counts, overall_job_counts = \
+            summary_form.get_job_summary()
 
         context = dict(
             job_summary_form=summary_form,
@@ -295,6 +276,88 @@ class JobSummaryView(View):
         return render(request, self.template_name, context)
 
 
+@method_decorator(
+    permission_required('is_superuser'),
+    name='dispatch')
+class PerformanceSummaryView(View):
+    """
+    Dashboard for monitoring the performance of views and jobs, over the
+    rolling windows of lib.instrumentation.
+    """
+    template_name = 'jobs/performance_summary.html'
+
+    @staticmethod
+    def quantile_display(histogram, q):
+        value = histogram.quantile(q)
+        if value == math.inf:
+            return f"> {histogram.spec.bucket_bounds[-1]}"
+        return f"\u2264 {value}"
+
+    def get_row(self, name, histograms):
+        wall_time = histograms['wall_time']
+        cache_hits = histograms['cache_hits'].total
+        cache_accesses = cache_hits + histograms['cache_misses'].total
+        classifier_cache_hits = histograms['classifier_cache_hits'].total
+        classifier_cache_accesses = (
+            classifier_cache_hits
+            + histograms['classifier_cache_misses'].total)
+        return dict(
+            name=name,
+            count=wall_time.count,
+            total_time=wall_time.total,
+            mean_time=wall_time.mean,
+            p50_time=self.quantile_display(wall_time, 0.5),
+            p95_time=self.quantile_display(wall_time, 0.95),
+            mean_queries=histograms['db_queries'].mean,
+            mean_db_time=histograms['db_time'].mean,
+            cache_hit_percent=(
+                100 * cache_hits / cache_accesses
+                if cache_accesses else None),
+            classifier_cache_hit_percent=(
+                100 * classifier_cache_hits / classifier_cache_accesses
+                if classifier_cache_accesses else None),
+            mean_bytes_read=histograms['storage_bytes_read'].mean,
+            mean_bytes_written=histograms['storage_bytes_written'].mean,
+        )
+
+    def get(self, request, **kwargs):
+        tables = []
+        for kind in instrumentation.KINDS:
+            rows = [
+                self.get_row(name, histograms)
+                for name, histograms
+                in instrumentation.get_histograms(kind).items()
+            ]
+            # Whatever's taking the most time overall goes first.
+            rows.sort(key=operator.itemgetter('total_time'), reverse=True)
+            tables.append(dict(kind=kind, rows=rows))
+
+        context = dict(
+            tables=tables,
+            window_hours=(
+                settings.INSTRUMENTATION_WINDOW_SECONDS
+                * settings.INSTRUMENTATION_WINDOW_COUNT / 3600),
+        )
+        return render(request, self.template_name, context)
+
+
+def performance_metrics(request):
+    """
+    The performance metrics of lib.instrumentation, in the Prometheus text
+    format. Available to superusers, and to requests with the
+    INSTRUMENTATION_METRICS_TOKEN as a bearer token.
+    """
+    token = settings.INSTRUMENTATION_METRICS_TOKEN
+    has_token = bool(token) and constant_time_compare(
+        request.headers.get('Authorization', ''), f'Bearer {token}')
+    if not (request.user.is_superuser or has_token):
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        instrumentation.prometheus_text(),
+        content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
 @login_required
 def background_job_status(request):
     context = dict()
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-16 23:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0001_squashed_0007_label_big_auto_field'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabelStats',
+            fields=[
+                ('label', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='stats', serialize=False, to='labels.label')),
+                ('confirmed_annotation_count', models.IntegerField(default=0)),
+                ('source_count', models.IntegerField(default=0)),
+                ('example_annotations', models.JSONField(default=list)),
+                ('reconcile_date', models.DateTimeField(null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.2.27 on 2026-10-17 00:10
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('labels', '0002_labelstats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='LabelStatsDelta',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count_delta', models.IntegerField()),
+                ('label', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='labels.label')),
+            ],
+        ),
+    ]
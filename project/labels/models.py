@@ -1,3 +1,6 @@
+from collections import Counter
+from contextlib import ContextDecorator
+from contextvars import ContextVar
 import posixpath
 import re
 
@@ -5,7 +8,8 @@ from django.conf import settings
 from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 from django.core.validators import RegexValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Sum
 from django.forms import model_to_dict
 from easy_thumbnails.fields import ThumbnailerImageField
 
@@ -254,3 +258,331 @@ class LocalLabel(models.Model):
         To-string method.
         """
         return self.code
+
+
+label_stats_batch_context_var = ContextVar('label_stats_batch', default=None)
+
+
+class LabelStatsChanges:
+    """
+    Changes to LabelStats from confirmed annotations being added to, or
+    removed from, labels. Changing a confirmed annotation's label counts
+    as removing it from one label and adding it to the other.
+    """
+    def __init__(self):
+        # Label ID -> change in confirmed annotation count
+        self.count_deltas = Counter()
+        # Label ID -> [scrambled_sort_key, annotation ID] of each
+        # annotation added
+        self.added = dict()
+        # IDs of labels which had annotations removed
+        self.removed_from = set()
+
+    def add(self, label_id, scrambled_sort_key, annotation_id):
+        self.count_deltas[label_id] += 1
+        self.added.setdefault(label_id, []).append(
+            [scrambled_sort_key, annotation_id])
+
+    def remove(self, label_id, count=1):
+        self.count_deltas[label_id] -= count
+        self.removed_from.add(label_id)
+
+    def update(self, other: 'LabelStatsChanges'):
+        self.count_deltas.update(other.count_deltas)
+        for label_id, pairs in other.added.items():
+            self.added.setdefault(label_id, []).extend(pairs)
+        self.removed_from |= other.removed_from
+
+    @property
+    def label_ids(self):
+        return (
+            set(self.count_deltas.keys()) | set(self.added.keys())
+            | self.removed_from)
+
+    def __bool__(self):
+        return len(self.label_ids) > 0
+
+    def record(self):
+        """
+        Apply these changes now, or at the end of the enclosing
+        label_stats_batch if there is one.
+
+        This should be called after the annotations are saved or deleted.
+        """
+        if not self:
+            return
+        batch = label_stats_batch_context_var.get()
+        if batch is None:
+            LabelStats.objects.apply_changes(self)
+        else:
+            batch.update(self)
+
+
+class label_stats_batch(ContextDecorator):
+    """
+    Collect the LabelStats changes recorded within this context, and apply
+    them together at the end. Use this when saving many annotations in one
+    transaction.
+
+    LabelStats rows whose examples change stay locked until the
+    transaction ends. Applying changes together means each row is locked
+    once, and in label ID order, so that concurrent transactions touching
+    the same labels wait on each other instead of deadlocking.
+    """
+    def __enter__(self):
+        self.token = label_stats_batch_context_var.set(LabelStatsChanges())
+
+    def __exit__(self, exc_type, *exc):
+        changes = label_stats_batch_context_var.get()
+        label_stats_batch_context_var.reset(self.token)
+        if exc_type is None:
+            # To the enclosing batch if any, else applied now.
+            changes.record()
+
+
+class LabelStatsManager(models.Manager):
+
+    def get_locked(self, label_ids) -> dict[int, 'LabelStats']:
+        """
+        LabelStats of the given labels, by label ID, locked until the
+        end of the transaction. LabelStats which don't exist yet are
+        created.
+        """
+        label_ids = sorted(label_ids)
+        stats = self._select_locked(label_ids)
+
+        missing_label_ids = [
+            label_id for label_id in label_ids if label_id not in stats]
+        if missing_label_ids:
+            self.bulk_create(
+                [self.model(label_id=label_id)
+                 for label_id in missing_label_ids],
+                # Another transaction may be creating some of these too.
+                ignore_conflicts=True,
+            )
+            stats |= self._select_locked(missing_label_ids)
+
+        return stats
+
+    def _select_locked(self, label_ids):
+        queryset = (
+            self.select_for_update()
+            .filter(label_id__in=label_ids)
+            # Consistent locking order
+            .order_by('label_id')
+        )
+        return {stats.label_id: stats for stats in queryset}
+
+    def apply_changes(self, changes: LabelStatsChanges):
+        # Count changes are inserted as new rows rather than updating the
+        # LabelStats rows, so that transactions changing the same label's
+        # annotations don't wait on each other's row locks.
+        LabelStatsDelta.objects.bulk_create([
+            LabelStatsDelta(label_id=label_id, count_delta=count_delta)
+            for label_id, count_delta in sorted(changes.count_deltas.items())
+            if count_delta != 0
+        ])
+
+        example_label_ids = self.labels_with_example_changes(changes)
+        if not example_label_ids:
+            return
+
+        with transaction.atomic():
+            stats_by_label = self.get_locked(example_label_ids)
+
+            for label_id, stats in stats_by_label.items():
+                if label_id in changes.removed_from:
+                    # Some of the examples may be gone, and only the
+                    # annotations can tell what should replace them.
+                    stats.example_annotations = (
+                        self.sample_example_annotations(label_id))
+                else:
+                    # The examples are the lowest sort keys, so the added
+                    # annotations either displace some of them or don't
+                    # make the cut.
+                    stats.example_annotations = sorted(
+                        stats.example_annotations
+                        + changes.added.get(label_id, [])
+                    )[:settings.LABEL_EXAMPLE_PATCHES_PER_PAGE]
+
+            self.bulk_update(stats_by_label.values(), ['example_annotations'])
+
+    def labels_with_example_changes(self, changes: LabelStatsChanges):
+        """
+        IDs of the labels whose examples are affected by the given changes.
+        For most changes to a label with plenty of annotations, that's
+        none, since added annotations rarely have low enough sort keys,
+        and removed annotations are rarely among the examples.
+        """
+        from annotations.models import Annotation
+
+        page_size = settings.LABEL_EXAMPLE_PATCHES_PER_PAGE
+        stats_by_label = self.in_bulk(changes.label_ids)
+        label_ids = set()
+        removed_examples = dict()
+
+        for label_id in changes.label_ids:
+            if label_id not in stats_by_label:
+                label_ids.add(label_id)
+                continue
+            examples = stats_by_label[label_id].example_annotations
+
+            added = changes.added.get(label_id, [])
+            if added and (
+                len(examples) < page_size or min(added) < examples[-1]
+            ):
+                label_ids.add(label_id)
+            elif label_id in changes.removed_from:
+                removed_examples[label_id] = (
+                    stats_by_label[label_id].example_annotation_ids)
+
+        if removed_examples:
+            remaining_examples = set(
+                Annotation.objects.confirmed()
+                .filter(pk__in=[
+                    annotation_id
+                    for annotation_ids in removed_examples.values()
+                    for annotation_id in annotation_ids
+                ])
+                .values_list('label_id', 'pk')
+            )
+            for label_id, annotation_ids in removed_examples.items():
+                if any(
+                    (label_id, annotation_id) not in remaining_examples
+                    for annotation_id in annotation_ids
+                ):
+                    label_ids.add(label_id)
+
+        return label_ids
+
+    def confirmed_annotation_counts(self, label_ids=None) -> dict[int, int]:
+        """
+        Confirmed annotation counts by label ID, including the count
+        changes which haven't been folded into the LabelStats yet.
+        Labels with no stats and no changes are left out.
+        """
+        stats = self.all()
+        deltas = LabelStatsDelta.objects.all()
+        if label_ids is not None:
+            stats = stats.filter(label_id__in=label_ids)
+            deltas = deltas.filter(label_id__in=label_ids)
+
+        counts = Counter(dict(
+            stats.values_list('label_id', 'confirmed_annotation_count')))
+        counts.update(dict(
+            deltas.order_by().values('label_id')
+            .annotate(total=Sum('count_delta'))
+            .values_list('label_id', 'total')
+        ))
+        return dict(counts)
+
+    def fold_count_deltas(self) -> int:
+        """
+        Fold the pending count changes into the LabelStats counts.
+        Returns the number of changes folded.
+        """
+        label_ids = list(
+            LabelStatsDelta.objects.order_by()
+            .values_list('label_id', flat=True).distinct())
+        if not label_ids:
+            return 0
+
+        with transaction.atomic():
+            # Reconciling also discards changes, so the stats are locked
+            # before reading the changes; that way, a change can't be
+            # applied by both.
+            stats_by_label = self.get_locked(label_ids)
+            deltas = list(
+                LabelStatsDelta.objects.filter(label_id__in=label_ids)
+                .values_list('pk', 'label_id', 'count_delta'))
+
+            for _, label_id, count_delta in deltas:
+                stats_by_label[label_id].confirmed_annotation_count += (
+                    count_delta)
+            self.bulk_update(
+                stats_by_label.values(), ['confirmed_annotation_count'])
+            LabelStatsDelta.objects.filter(
+                pk__in=[pk for pk, _, _ in deltas]).delete()
+
+        return len(deltas)
+
+    def resample_examples(self):
+        """
+        Re-pick every label's example annotations, such as after the
+        annotations' sort keys have changed.
+        """
+        for label_id in self.order_by('label_id').values_list(
+            'label_id', flat=True
+        ):
+            with transaction.atomic():
+                stats = self.get_locked([label_id])[label_id]
+                stats.example_annotations = (
+                    self.sample_example_annotations(label_id))
+                stats.save(update_fields=['example_annotations'])
+
+    @staticmethod
+    def sample_example_annotations(label_id) -> list[list[int]]:
+        """
+        Example annotations of the label, as defined by
+        LabelStats.example_annotations. This only reads one page's worth
+        of annotations, using the label/confirmed/sort key index.
+        """
+        from annotations.models import Annotation
+
+        values = (
+            Annotation.objects.confirmed()
+            .filter(label_id=label_id)
+            .order_by('scrambled_sort_key', 'pk')
+            .values_list('scrambled_sort_key', 'pk')
+            [:settings.LABEL_EXAMPLE_PATCHES_PER_PAGE]
+        )
+        return [list(pair) for pair in values]
+
+
+class LabelStats(models.Model):
+    """
+    Usage stats of a label. These are kept up to date as confirmed
+    annotations are added, changed, and deleted (see LabelStatsChanges),
+    and are periodically reconciled against the annotations, since some
+    deletions (such as cascades from deleting points) aren't tracked.
+
+    Changes to the count are recorded as LabelStatsDeltas first, so the
+    up-to-date count is from LabelStatsManager.confirmed_annotation_counts().
+    """
+    objects = LabelStatsManager()
+
+    label = models.OneToOneField(
+        Label, on_delete=models.CASCADE, primary_key=True,
+        related_name='stats')
+
+    confirmed_annotation_count = models.IntegerField(default=0)
+
+    # Number of labelsets which have this label. This is only updated
+    # when reconciling, since it's cheap to count for all labels at once.
+    source_count = models.IntegerField(default=0)
+
+    # The label's confirmed annotations which have the lowest scrambled
+    # sort keys (ties broken by ID), up to a page of example patches, as
+    # [scrambled_sort_key, annotation ID] pairs in that order.
+    # Since the sort keys are pseudo-random, this is a random sample, and
+    # it can be kept up to date without rescanning the label's annotations.
+    example_annotations = models.JSONField(default=list)
+
+    # When these stats were last recomputed from the annotations.
+    reconcile_date = models.DateTimeField(null=True)
+
+    @property
+    def example_annotation_ids(self) -> list[int]:
+        return [annotation_id for _, annotation_id in self.example_annotations]
+
+
+class LabelStatsDelta(models.Model):
+    """
+    A change to a label's confirmed annotation count which hasn't been
+    folded into its LabelStats yet. These are only ever inserted until
+    they're folded in, so concurrent annotation changes don't contend for
+    a row lock.
+    """
+    label = models.ForeignKey(
+        Label, on_delete=models.CASCADE, related_name='+')
+    count_delta = models.IntegerField()
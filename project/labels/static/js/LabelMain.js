@@ -28,6 +28,11 @@ var LabelMain = (function() {
             $('<div>' + jsonResponse['patchesHtml'] + '</div>');
         var children = $htmlResponse.children();
 
+        // Request generation of any patches which don't exist yet.
+        // The img elements are found right away (before any awaiting),
+        // so it's fine that they get moved to the container just after.
+        new globalThis.AsyncMedia($htmlResponse[0]).startGeneratingAsyncMedia();
+
         if (children.length > 0) {
             children.each(function () {
                 $patchesContainer.append($(this));
@@ -1,8 +1,64 @@
-from jobs.utils import job_runner
-from .utils import cacheable_label_details
+from datetime import timedelta
+
+from django.conf import settings
+
+from annotations.models import Annotation
+from jobs.models import Job
+from jobs.utils import job_runner, schedule_job
+from visualization.utils import generate_patches_if_dont_exist
+from .models import LabelStats
+from .utils import cacheable_label_details, reconcile_label_stats
 
 
 @job_runner(interval=cacheable_label_details.cache_update_interval)
 def update_label_details():
+    reconcile_label_stats()
     label_details = cacheable_label_details.update()
+    # Popularities, and thus which labels get patches pre-generated, may
+    # have changed.
+    schedule_job('generate_label_example_patches')
     return f"Updated details for all {len(label_details)} label(s)"
+
+
+def after_fold(job_id):
+    job = Job.objects.get(pk=job_id)
+    if job.result_message == "Folded 0 label count change(s)":
+        job.hidden = True
+        job.save()
+
+
+@job_runner(interval=timedelta(minutes=10), after_finishing_job=after_fold)
+def fold_label_stats_deltas():
+    delta_count = LabelStats.objects.fold_count_deltas()
+    return f"Folded {delta_count} label count change(s)"
+
+
+@job_runner()
+def generate_label_example_patches():
+    """
+    Generate the first page of example patches for popular labels, so that
+    visitors of those label_main pages don't have to wait for patches to
+    be generated.
+    """
+    label_details = cacheable_label_details.get()
+    if not label_details:
+        return "Label details aren't available"
+
+    min_popularity = settings.LABEL_EXAMPLE_PATCHES_PREGENERATE_MIN_POPULARITY
+    popular_label_ids = [
+        label_id for label_id, details in label_details.items()
+        if details['popularity'] >= min_popularity
+    ]
+    annotation_ids = []
+    for stats in LabelStats.objects.filter(label_id__in=popular_label_ids):
+        annotation_ids.extend(stats.example_annotation_ids)
+    label_count = len(popular_label_ids)
+
+    annotations = (
+        Annotation.objects.filter(pk__in=annotation_ids)
+        .select_related('point', 'point__image')
+    )
+    generate_patches_if_dont_exist(
+        [annotation.point for annotation in annotations])
+
+    return f"Checked example patches for {label_count} label(s)"
@@ -1,26 +1,31 @@
 from pathlib import Path
+import re
 from unittest import mock
 import urllib.parse
 
 from bs4 import BeautifulSoup
+from django.core.files.storage import default_storage
 from django.test import override_settings
 from django.urls import reverse
 from django.utils.html import escape as html_escape
 
 from annotations.tests.utils import (
     controlled_sort_hashes, EXPECTED_HASHES)
+from async_media.utils import AsyncPatch
 from calcification.tests.utils import create_global_calcify_table
+from images.models import Point
+from jobs.models import Job
 from jobs.tests.utils import do_job
 from lib.tests.utils import (
     BasePermissionTest,
     ClientTest,
     HtmlAssertionsMixin,
     IndexesMixin,
-    make_media_url_comparable,
 )
 from lib.utils import context_scoped_cache
 from sources.models import Source
-from visualization.utils import get_patch_path
+from visualization.utils import (
+    generate_patch_if_doesnt_exist, get_patch_path)
 from ..models import LabelGroup, Label
 from ..templatetags.labels import (
     popularity_bar as popularity_bar_tag, status_icon as status_icon_tag)
@@ -97,6 +102,30 @@ class BaseLabelMainTest(ClientTest):
         patches_soup = BeautifulSoup(response['patchesHtml'], 'html.parser')
         return len(patches_soup.find_all('img'))
 
+    @staticmethod
+    def patch_point_ids(response):
+        """
+        response should be from label_example_patches_ajax.
+        Returns the IDs of the points that the patches are for, in order.
+        Patches which don't exist yet are identified by their async media
+        key; ones which do exist are identified by their URL.
+        """
+        patches_soup = BeautifulSoup(response['patchesHtml'], 'html.parser')
+        point_ids = []
+        for img_soup in patches_soup.find_all('img'):
+            media_key = img_soup.attrs.get('data-media-key')
+            if media_key:
+                point_ids.append(AsyncPatch.from_media_key(media_key).point_id)
+            else:
+                # src is a URL ending with the patch path.
+                src_filename = Path(
+                    urllib.parse.urlsplit(img_soup.attrs.get('src')).path).name
+                point = Point.objects.get(
+                    pk=int(re.search(r'pointpk(\d+)', src_filename).group(1)))
+                assert get_patch_path(point).endswith(src_filename)
+                point_ids.append(point.pk)
+        return point_ids
+
 
 class LabelMainTest(BaseLabelMainTest):
     """
@@ -445,22 +474,16 @@ class LabelMainPatchesTest(BaseLabelMainTest):
         # Check patch order.
 
         response = self.get_example_patches()
-        patches_soup = BeautifulSoup(response['patchesHtml'], 'html.parser')
         # This is based on the values in EXPECTED_HASHES.
         expected_order = [3, 2, 1, 4]
-
-        for patch_index, thumbnail in enumerate(patches_soup.find_all('img')):
-            patch_thumbnail_url = thumbnail.attrs['src']
-            expected_point = self.image.point_set.get(
-                point_number=expected_order[patch_index])
-            expected_patch_path = get_patch_path(expected_point)
-
-            self.assertIn(
-                expected_patch_path, patch_thumbnail_url,
-                f"The thumbnail URL at index {patch_index} should contain"
-                f" (specifically, should end with) the patch path of the"
-                f" expected point"
-            )
+        self.assertListEqual(
+            self.patch_point_ids(response),
+            [
+                self.image.point_set.get(point_number=point_number).pk
+                for point_number in expected_order
+            ],
+            "Patches should be for the expected points, in order",
+        )
 
     def test_cache(self):
         """
@@ -479,25 +502,12 @@ class LabelMainPatchesTest(BaseLabelMainTest):
 
         # Get page 1 patches...
         response = self.get_example_patches()
-        patches_soup = BeautifulSoup(response['patchesHtml'], 'html.parser')
-        img_soups = patches_soup.find_all('img')
-        thumbnail_urls = set([
-            make_media_url_comparable(img_soup.attrs.get('src'))
-            for img_soup in img_soups])
+        point_ids = set(self.patch_point_ids(response))
 
         # ...then get page 1 patches again, and it should
-        # have the same thumbnail URLs, not necessarily in
-        # the same order.
+        # have the same points, not necessarily in the same order.
         response = self.get_example_patches()
-        patches_soup = BeautifulSoup(response['patchesHtml'], 'html.parser')
-        img_soups = patches_soup.find_all('img')
-        self.assertSetEqual(
-            thumbnail_urls,
-            set([
-                make_media_url_comparable(img_soup.attrs.get('src'))
-                for img_soup in img_soups
-            ]),
-        )
+        self.assertSetEqual(point_ids, set(self.patch_point_ids(response)))
 
         # A couple more checks to see that the cache entry's presence
         # doesn't break other cases.
@@ -527,29 +537,106 @@ class LabelMainPatchesTest(BaseLabelMainTest):
         self.image.annotation_set \
             .filter(point__point_number__in=[2, 4]).delete()
 
-        remaining_annotations = set(
-            self.image.annotation_set.select_related('point'))
-        expected_thumbnail_filenames = set([
-            Path(get_patch_path(annotation.point)).name
-            for annotation in remaining_annotations])
+        expected_point_ids = set(
+            self.image.annotation_set.values_list('point_id', flat=True))
 
         response = self.get_example_patches()
-        patches_soup = BeautifulSoup(response['patchesHtml'], 'html.parser')
-        img_soups = patches_soup.find_all('img')
-        actual_thumbnail_filenames = set([
-            # src is a URL; get just the filename part.
-            Path(urllib.parse.urlsplit(img_soup.attrs.get('src')).path).name
-            for img_soup in img_soups])
+        actual_point_ids = set(self.patch_point_ids(response))
         self.assertEqual(
-            len(actual_thumbnail_filenames), 3,
+            len(actual_point_ids), 3,
             msg="Should show 3 patches")
         self.assertSetEqual(
-            expected_thumbnail_filenames,
-            actual_thumbnail_filenames,
+            expected_point_ids,
+            actual_point_ids,
             msg="Should show patches for just the annotations"
                 " that still exist",
         )
 
+    def test_missing_patches_shown_as_placeholders(self):
+        self.add_annotations(self.user, self.image, {1: 'A'})
+        point = self.image.point_set.get(point_number=1)
+
+        response = self.get_example_patches()
+        img_soup = BeautifulSoup(
+            response['patchesHtml'], 'html.parser').find('img')
+        self.assertIn('media-loading', img_soup.attrs['src'])
+        self.assertEqual(
+            img_soup.attrs['data-media-key'], f'point:{point.pk}')
+        self.assertTrue(img_soup.attrs['data-media-batch-key'])
+        self.assertFalse(
+            default_storage.exists(get_patch_path(point)),
+            msg="Patch shouldn't be generated during the request")
+
+    def test_existing_patches_shown_directly(self):
+        self.add_annotations(self.user, self.image, {1: 'A'})
+        point = self.image.point_set.get(point_number=1)
+        generate_patch_if_doesnt_exist(point)
+
+        response = self.get_example_patches()
+        img_soup = BeautifulSoup(
+            response['patchesHtml'], 'html.parser').find('img')
+        self.assertIn(get_patch_path(point), img_soup.attrs['src'])
+        self.assertEqual(img_soup.attrs['data-media-key'], '')
+
+
+class GenerateLabelExamplePatchesTest(BaseLabelMainTest):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = cls.create_user()
+        cls.source = cls.create_source(
+            cls.user,
+            default_point_generation_method=dict(type='simple', points=5),
+        )
+        cls.labels = cls.create_labels(cls.user, ['A', 'B'], "Group1")
+        cls.create_labelset(cls.user, cls.source, cls.labels)
+        cls.source.refresh_from_db()
+
+        cls.image = cls.upload_image(cls.user, cls.source)
+        cls.add_annotations(
+            cls.user, cls.image, {1: 'A', 2: 'A', 3: 'A', 4: 'B'})
+
+    def patch_exists(self, point_number):
+        point = self.image.point_set.get(point_number=point_number)
+        return default_storage.exists(get_patch_path(point))
+
+    def test_scheduled_after_label_details_update(self):
+        self.update_cache_and_get_result()
+        self.assertTrue(
+            Job.objects.filter(
+                job_name='generate_label_example_patches',
+                status=Job.Status.PENDING,
+            ).exists()
+        )
+
+    def test_popular_labels(self):
+        self.update_cache_and_get_result()
+        # Only A is popular enough.
+        with context_scoped_cache():
+            popularity_a = label_popularity(self.labels.get(name='A').pk)
+            popularity_b = label_popularity(self.labels.get(name='B').pk)
+        self.assertGreater(popularity_a, popularity_b)
+
+        with override_settings(
+            LABEL_EXAMPLE_PATCHES_PREGENERATE_MIN_POPULARITY=popularity_a,
+        ):
+            job = do_job('generate_label_example_patches')
+        self.assertEqual(
+            job.result_message, "Checked example patches for 1 label(s)")
+
+        self.assertTrue(self.patch_exists(1))
+        self.assertTrue(self.patch_exists(2))
+        self.assertTrue(self.patch_exists(3))
+        self.assertFalse(self.patch_exists(4))
+        self.assertFalse(self.patch_exists(5))
+
+    def test_no_label_details(self):
+        job = do_job('generate_label_example_patches')
+        self.assertEqual(
+            job.result_message, "Label details aren't available")
+
 
 class LabelMainPatchLinksTest(BaseLabelMainTest):
     """
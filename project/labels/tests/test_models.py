@@ -1,7 +1,24 @@
+from unittest import mock
+
 from django.db import IntegrityError
+from django.test import override_settings
 
-from lib.tests.utils import BaseTest
-from ..models import Label, LabelGroup, LabelSet, LocalLabel
+from annotations.models import Annotation
+from annotations.utils import apply_alleviate
+from images.utils import delete_images
+from jobs.tests.utils import do_job
+from lib.tests.utils import BaseTest, ClientTest
+from lib.utils import context_scoped_cache
+from ..models import (
+    Label,
+    LabelGroup,
+    LabelSet,
+    LabelStats,
+    LabelStatsDelta,
+    LocalLabel,
+    label_stats_batch,
+)
+from ..utils import cacheable_label_details, label_confirmed_annotation_count
 
 
 class LocalLabelTest(BaseTest):
@@ -38,3 +55,244 @@ class LocalLabelTest(BaseTest):
         self.assertIn(
             "duplicate key value violates unique constraint",
             str(cm.exception))
+
+
+@override_settings(LABEL_EXAMPLE_PATCHES_PER_PAGE=3)
+class LabelStatsTest(ClientTest):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = cls.create_user()
+        cls.source = cls.create_source(
+            cls.user,
+            default_point_generation_method=dict(type='simple', points=5))
+        cls.labels = cls.create_labels(cls.user, ['A', 'B'], "Group1")
+        cls.create_labelset(cls.user, cls.source, cls.labels)
+        cls.label_a = cls.labels.get(name='A')
+        cls.label_b = cls.labels.get(name='B')
+
+        cls.img1 = cls.upload_image(cls.user, cls.source)
+        cls.img2 = cls.upload_image(cls.user, cls.source)
+
+    def assert_stats(self, label, expected_count):
+        stats = LabelStats.objects.get(label=label)
+        self.assertEqual(
+            LabelStats.objects.confirmed_annotation_counts([label.pk])
+            [label.pk],
+            expected_count,
+            msg="Count should be as expected")
+
+        # The examples should be the confirmed annotations with the lowest
+        # sort keys.
+        expected_examples = [
+            [key, pk] for key, pk in
+            Annotation.objects.confirmed().filter(label=label)
+            .order_by('scrambled_sort_key', 'pk')
+            .values_list('scrambled_sort_key', 'pk')[:3]
+        ]
+        self.assertListEqual(
+            stats.example_annotations, expected_examples,
+            msg="Examples should be as expected")
+
+    def test_reconcile(self):
+        self.add_annotations(
+            self.user, self.img1, {1: 'A', 2: 'A', 3: 'A', 4: 'A', 5: 'B'})
+        # Drift, such as from untracked deletions.
+        LabelStats.objects.filter(label=self.label_a).update(
+            confirmed_annotation_count=10, example_annotations=[])
+        with context_scoped_cache():
+            self.assertEqual(
+                label_confirmed_annotation_count(self.label_a.pk), 0,
+                msg="Stats shouldn't be used until they're reconciled")
+
+        do_job('update_label_details')
+
+        self.assert_stats(self.label_a, 4)
+        self.assert_stats(self.label_b, 1)
+        self.assertFalse(
+            LabelStatsDelta.objects.exists(),
+            msg="Count changes should be covered by the recount")
+        self.assertEqual(
+            LabelStats.objects.get(label=self.label_a).source_count, 1)
+        self.assertEqual(
+            label_confirmed_annotation_count(self.label_a.pk), 4)
+
+    @override_settings(LABEL_STATS_RECONCILE_BATCH_SIZE=1)
+    def test_reconcile_batch(self):
+        do_job('update_label_details')
+        self.assertFalse(
+            LabelStats.objects.filter(reconcile_date__isnull=True).exists(),
+            msg="Should reconcile all never-reconciled labels, regardless"
+                " of batch size")
+
+        reconcile_dates = dict(
+            LabelStats.objects.values_list('label_id', 'reconcile_date'))
+        do_job('update_label_details')
+        reconciled_label_ids = [
+            label_id for label_id, reconcile_date
+            in LabelStats.objects.values_list('label_id', 'reconcile_date')
+            if reconcile_date != reconcile_dates[label_id]
+        ]
+        self.assertListEqual(
+            reconciled_label_ids, [self.label_a.pk],
+            msg="Should only reconcile 1 label per run after that, least"
+                " recently reconciled first")
+
+    def test_unreconciled_fallback(self):
+        self.add_annotations(
+            self.user, self.img1, {1: 'A', 2: 'A', 3: 'A', 4: 'A', 5: 'B'})
+        # Stats that were created after some annotations already existed.
+        LabelStats.objects.filter(label=self.label_a).update(
+            confirmed_annotation_count=1, source_count=0)
+
+        with context_scoped_cache():
+            label_details = cacheable_label_details.update()
+            self.assertEqual(
+                label_details[self.label_a.pk]['confirmed_annotation_count'],
+                4,
+                msg="Should count from the annotations instead of the stats")
+            self.assertEqual(
+                label_details[self.label_a.pk]['source_count'], 1,
+                msg="Should count from the labelsets instead of the stats")
+            self.assertEqual(
+                label_confirmed_annotation_count(self.label_a.pk), 4,
+                msg="Should use the label details instead of the stats")
+
+    def test_add(self):
+        do_job('update_label_details')
+        self.add_annotations(
+            self.user, self.img1, {1: 'A', 2: 'A', 3: 'A', 4: 'A', 5: 'B'})
+        self.add_annotations(self.user, self.img2, {1: 'A'})
+
+        self.assert_stats(self.label_a, 5)
+        self.assert_stats(self.label_b, 1)
+        self.assertEqual(
+            label_confirmed_annotation_count(self.label_a.pk), 5)
+
+    def test_change_label(self):
+        do_job('update_label_details')
+        self.add_annotations(
+            self.user, self.img1, {1: 'A', 2: 'A', 3: 'A', 4: 'A'})
+        self.add_annotations(self.user, self.img1, {1: 'B', 2: 'B'})
+
+        self.assert_stats(self.label_a, 2)
+        self.assert_stats(self.label_b, 2)
+
+    def test_confirm_robot_annotations(self):
+        do_job('update_label_details')
+        robot = self.create_robot(self.source)
+        self.add_robot_annotations(
+            robot, self.img1, {1: 'A', 2: 'A', 3: 'B', 4: 'B', 5: 'B'})
+        self.assert_stats(self.label_a, 0)
+        self.assert_stats(self.label_b, 0)
+
+        self.add_annotations(self.user, self.img1, {1: 'A', 3: 'A'})
+        self.assert_stats(self.label_a, 2)
+        self.assert_stats(self.label_b, 0)
+
+    def test_delete_annotations(self):
+        do_job('update_label_details')
+        self.add_annotations(
+            self.user, self.img1, {1: 'A', 2: 'A', 3: 'A', 4: 'A', 5: 'B'})
+
+        # Individual delete
+        self.img1.annotation_set.get(point__point_number=1).delete()
+        self.assert_stats(self.label_a, 3)
+        # Batch delete
+        self.img1.annotation_set.filter(
+            point__point_number__in=[2, 5]).delete()
+        self.assert_stats(self.label_a, 2)
+        self.assert_stats(self.label_b, 0)
+
+    def test_count_changes_without_locking(self):
+        do_job('update_label_details')
+        self.add_annotations(
+            self.user, self.img1, {1: 'A', 2: 'A', 3: 'A', 4: 'A'})
+        example_ids = LabelStats.objects.get(
+            label=self.label_a).example_annotation_ids
+        non_example = self.img1.annotation_set.exclude(
+            pk__in=example_ids).get()
+
+        with mock.patch.object(
+            LabelStats.objects, 'get_locked',
+            wraps=LabelStats.objects.get_locked,
+        ) as mock_get_locked:
+            non_example.delete()
+        self.assertEqual(
+            mock_get_locked.call_count, 0,
+            msg="Removing a non-example annotation shouldn't lock the stats")
+        self.assert_stats(self.label_a, 3)
+
+    def test_fold(self):
+        do_job('update_label_details')
+        self.add_annotations(
+            self.user, self.img1, {1: 'A', 2: 'A', 3: 'A', 4: 'A', 5: 'B'})
+        self.img1.annotation_set.get(point__point_number=1).delete()
+        self.assertTrue(LabelStatsDelta.objects.exists())
+
+        job = do_job('fold_label_stats_deltas')
+
+        self.assertEqual(
+            job.result_message, "Folded 3 label count change(s)")
+        self.assertFalse(LabelStatsDelta.objects.exists())
+        self.assertEqual(
+            LabelStats.objects.get(
+                label=self.label_a).confirmed_annotation_count,
+            3)
+        self.assert_stats(self.label_a, 3)
+        self.assert_stats(self.label_b, 1)
+
+    def test_delete_images(self):
+        do_job('update_label_details')
+        self.add_annotations(
+            self.user, self.img1, {1: 'A', 2: 'A', 3: 'B'})
+        self.add_annotations(self.user, self.img2, {1: 'A'})
+
+        delete_images(self.source.image_set.filter(pk=self.img1.pk))
+        self.assert_stats(self.label_a, 1)
+        self.assert_stats(self.label_b, 0)
+
+    def test_batch(self):
+        do_job('update_label_details')
+        self.add_annotations(self.user, self.img1, {1: 'A', 2: 'A'})
+
+        with label_stats_batch():
+            self.add_annotations(self.user, self.img2, {1: 'A', 2: 'B'})
+            self.img1.annotation_set.filter(
+                point__point_number=1).delete()
+            self.assertNotIn(
+                self.label_b.pk,
+                LabelStats.objects.confirmed_annotation_counts(),
+                msg="Changes shouldn't apply until the end of the batch")
+
+        self.assert_stats(self.label_a, 2)
+        self.assert_stats(self.label_b, 1)
+
+    def test_alleviate(self):
+        do_job('update_label_details')
+        robot = self.create_robot(self.source)
+        self.add_robot_annotations(
+            robot, self.img1, {1: 'A', 2: 'A', 3: 'B', 4: 'B', 5: 'B'})
+        self.source.classifier_options.confidence_threshold = 50
+        self.source.classifier_options.save()
+
+        label_scores = {
+            1: [dict(label='A', score=80)],
+            2: [dict(label='A', score=40)],
+            3: [dict(label='B', score=80)],
+            4: [dict(label='B', score=80)],
+            5: [dict(label='B', score=40)],
+        }
+        with mock.patch.object(
+            LabelStats.objects, 'apply_changes',
+            wraps=LabelStats.objects.apply_changes,
+        ) as mock_apply_changes:
+            apply_alleviate(self.img1, label_scores)
+        self.assertEqual(
+            mock_apply_changes.call_count, 1,
+            msg="Should apply the label stats changes all at once")
+
+        self.assert_stats(self.label_a, 1)
+        self.assert_stats(self.label_b, 2)
@@ -1,14 +1,15 @@
-from collections import defaultdict
 import math
 import re
 
 from django.conf import settings
-from django.db.models import Count, Q
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
 
 from annotations.models import Annotation
 from lib.utils import CacheableValue
 from sources.models import Source
-from .models import Label, LocalLabel
+from .models import Label, LabelStats, LabelStatsDelta, LocalLabel
 
 
 def search_labels_by_text(search_value):
@@ -64,57 +65,126 @@ def is_label_editable_by_user(label, user):
     return True
 
 
+def reconcile_label_stats(batch_size: int = None) -> int:
+    """
+    Recompute LabelStats from the annotations, to correct any drift from
+    changes that weren't tracked incrementally (such as cascade deletions).
+
+    Source counts are recomputed for all labels, since that's one query on
+    the LocalLabel table. Annotation stats are recomputed for every label
+    that's never been reconciled (so the first run backfills the whole
+    table), plus up to batch_size other labels, least recently reconciled
+    first. Each label only takes a count and a page of annotations from
+    the label/confirmed/sort key index, so there's no scan over all of
+    the site's annotations.
+
+    Returns the number of labels whose annotation stats were recomputed.
+    """
+    if batch_size is None:
+        batch_size = settings.LABEL_STATS_RECONCILE_BATCH_SIZE
+
+    label_ids = list(Label.objects.order_by('pk').values_list('pk', flat=True))
+    LabelStats.objects.bulk_create(
+        [LabelStats(label_id=label_id) for label_id in label_ids],
+        ignore_conflicts=True,
+    )
+
+    source_counts = dict(
+        LocalLabel.objects.order_by().values('global_label_id')
+        .annotate(count=Count('pk'))
+        .values_list('global_label_id', 'count')
+    )
+    # Only the source_count field gets written, so this doesn't conflict
+    # with concurrent updates of the other stats.
+    all_stats = list(LabelStats.objects.only('pk'))
+    for stats in all_stats:
+        stats.source_count = source_counts.get(stats.label_id, 0)
+    LabelStats.objects.bulk_update(all_stats, ['source_count'])
+
+    # Stats which were never reconciled can be missing annotations from
+    # before they were tracked, so those don't wait for a batch.
+    batch_label_ids = list(
+        LabelStats.objects.filter(reconcile_date__isnull=True)
+        .order_by('label_id')
+        .values_list('label_id', flat=True)
+    )
+    batch_label_ids.extend(
+        LabelStats.objects.filter(reconcile_date__isnull=False)
+        .order_by('reconcile_date', 'label_id')
+        .values_list('label_id', flat=True)[:batch_size]
+    )
+    for label_id in batch_label_ids:
+        # One transaction per label, so that each label's stats are only
+        # locked briefly.
+        with transaction.atomic():
+            stats = LabelStats.objects.get_locked([label_id])[label_id]
+            # The recount covers the count changes made so far, so those
+            # are discarded.
+            delta_ids = list(
+                LabelStatsDelta.objects.filter(label_id=label_id)
+                .values_list('pk', flat=True))
+            stats.confirmed_annotation_count = (
+                Annotation.objects.confirmed()
+                .filter(label_id=label_id).count())
+            LabelStatsDelta.objects.filter(pk__in=delta_ids).delete()
+            stats.example_annotations = (
+                LabelStats.objects.sample_example_annotations(label_id))
+            stats.reconcile_date = timezone.now()
+            stats.save()
+
+    return len(batch_label_ids)
+
+
 def compute_label_details():
     """
     Details (which are worth caching) for all labels, including annotation
     counts and popularities.
 
-    We cache the first page of random patches, because there isn't really a
-    point in showing different patch images for different visitors of the
-    label_main page. And most folks will only look at the first page of
-    patches (if anything).
-
-    Computing details for all labels like this is much more efficient than
-    computing details individually for every label. One aggregated Count
-    instead of a count per label, and one random ordering instead of a
-    random ordering per label.
+    These are computed from the LabelStats tables, which are maintained
+    as annotations change, so this is generally a few queries. Labels
+    whose stats haven't been reconciled yet may have incomplete stats, so
+    those labels' counts are queried from the annotations and labelsets
+    instead.
     """
-    values = (
-        Label.objects.all().annotate(
-            num_confirmed_annotations=Count(
-                "annotation", filter=Q(annotation__confirmed=True))
+    label_ids = list(Label.objects.order_by('pk').values_list('pk', flat=True))
+    stats_by_label_id = {
+        stats.label_id: stats for stats in LabelStats.objects.all()}
+    annotation_counts = LabelStats.objects.confirmed_annotation_counts()
+    unreconciled_label_ids = {
+        label_id for label_id in label_ids
+        if label_id not in stats_by_label_id
+        or stats_by_label_id[label_id].reconcile_date is None
+    }
+    fallback_annotation_counts = dict()
+    fallback_source_counts = dict()
+    if unreconciled_label_ids:
+        fallback_annotation_counts = dict(
+            Annotation.objects.confirmed()
+            .filter(label_id__in=unreconciled_label_ids)
+            .order_by().values('label_id')
+            .annotate(count=Count('pk'))
+            .values_list('label_id', 'count')
+        )
+        fallback_source_counts = dict(
+            LocalLabel.objects
+            .filter(global_label_id__in=unreconciled_label_ids)
+            .order_by().values('global_label_id')
+            .annotate(count=Count('pk'))
+            .values_list('global_label_id', 'count')
         )
-        .values('pk', 'num_confirmed_annotations')
-    )
-    confirmed_annotation_counts = {
-        d['pk']: d['num_confirmed_annotations'] for d in values}
-
-    random_annotations_per_label = defaultdict(list)
-    # Scramble the order within each label.
-    # The code that follows this doesn't really take advantage of the label
-    # ordering, but ordering by label and sort-key lets us take advantage of
-    # a database index.
-    confirmed_annotations = (
-        Annotation.objects.confirmed()
-        .order_by('label', 'scrambled_sort_key')
-        .values('pk', 'label')
-    )
-    target_num_patches = settings.LABEL_EXAMPLE_PATCHES_PER_PAGE
-    # iterator() helps to not run out of memory with lots of annotations.
-    for values in confirmed_annotations.iterator():
-        this_label_annotations = random_annotations_per_label[values['label']]
-        if len(this_label_annotations) < target_num_patches:
-            this_label_annotations.append(values['pk'])
 
     details = dict()
 
-    # confirmed_annotation_counts has all labels, random_annotations_per_label
-    # does not.
-    for label_id in confirmed_annotation_counts.keys():
+    for label_id in label_ids:
 
-        source_count = (
-            LocalLabel.objects.filter(global_label_id=label_id).count())
-        confirmed_annotation_count = confirmed_annotation_counts[label_id]
+        if label_id in unreconciled_label_ids:
+            source_count = fallback_source_counts.get(label_id, 0)
+            confirmed_annotation_count = fallback_annotation_counts.get(
+                label_id, 0)
+        else:
+            stats = stats_by_label_id[label_id]
+            source_count = stats.source_count
+            confirmed_annotation_count = annotation_counts[label_id]
 
         # This popularity formula accounts for:
         # - The number of sources using the label
@@ -123,7 +193,7 @@ def compute_label_details():
         # Overall, it's not too nuanced, and could use further tinkering
         # at some point.
         raw_score = (
-            source_count * math.sqrt(confirmed_annotation_count)
+            source_count * math.sqrt(max(confirmed_annotation_count, 0))
         )
         if raw_score == 0:
             popularity = 0
@@ -134,15 +204,10 @@ def compute_label_details():
             # 10000 to 75%, and 10000000 to 91%.
             popularity = 100 * (1 - raw_score**(-0.15))
 
-        # List of annotation IDs to use for the first page of random patches
-        # on the label detail page.
-        random_patches_page_1 = random_annotations_per_label[label_id]
-
         details[label_id] = dict(
             source_count=source_count,
             confirmed_annotation_count=confirmed_annotation_count,
             popularity=popularity,
-            random_patches_page_1=random_patches_page_1,
         )
 
     return details
@@ -151,7 +216,7 @@ def compute_label_details():
 cacheable_label_details = CacheableValue(
     cache_key='label_details',
     compute_function=compute_label_details,
-    cache_update_interval=60*60*24*7,
+    cache_update_interval=60*60*24,
     cache_timeout_interval=60*60*24*30,
     on_demand_computation_ok=False,
     use_context_scoped_cache=True,
@@ -159,6 +224,17 @@ cacheable_label_details = CacheableValue(
 
 
 def label_confirmed_annotation_count(label_id):
+    # This is kept up to date in LabelStats, so there's no need to wait
+    # for the label details cache. But until the stats have been
+    # reconciled with the annotations once, they're incomplete, so we
+    # fall back to the label details.
+    if LabelStats.objects.filter(
+        label_id=label_id, reconcile_date__isnull=False
+    ).exists():
+        return (
+            LabelStats.objects.confirmed_annotation_counts([label_id])
+            [label_id])
+
     label_details = cacheable_label_details.get()
     if not label_details or label_id not in label_details:
         return 0
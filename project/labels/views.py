@@ -13,6 +13,8 @@ from django.views.decorators.http import require_POST, require_GET
 
 from annotations.models import Annotation
 from annotations.utils import label_ids_with_confirmed_annotations_in_source
+from async_media.templatetags.async_media_tags import media_async
+from async_media.utils import AsyncMediaBatch, AsyncPatch
 from calcification.utils import get_default_calcify_tables
 from images.utils import cacheable_source_image_counts
 from jobs.utils import schedule_job
@@ -24,14 +26,12 @@ from lib.forms import get_one_formset_error, get_one_form_error
 from sources.models import Source
 from sources.utils import filter_out_test_sources
 from upload.forms import CSVImportForm
-from visualization.utils import generate_patch_if_doesnt_exist, get_patch_url
 from .decorators import label_edit_permission_required
 from .forms import (
     LabelForm, LabelSearchForm, LabelSetForm, LocalLabelForm,
     BaseLocalLabelFormSet, labels_csv_process, LabelFormForCurators)
-from .models import Label, LocalLabel, LabelSet
+from .models import Label, LabelStats, LocalLabel, LabelSet
 from .utils import (
-    cacheable_label_details,
     is_label_editable_by_user,
     label_confirmed_annotation_count,
     label_popularity,
@@ -46,9 +46,17 @@ def duplicates_overview(request):
     """
     duplicates = Label.objects.filter(duplicate__isnull=False).values(
         'id', 'name', 'duplicate_id', 'duplicate__name',
+        'stats__reconcile_date',
     )
+    annotation_counts = LabelStats.objects.confirmed_annotation_counts(
+        [d['id'] for d in duplicates])
     duplicates = [
-        d | {'annotation_count': label_confirmed_annotation_count(d['id'])}
+        d | {'annotation_count': (
+            # Stats count once they've been reconciled with the
+            # annotations.
+            annotation_counts.get(d['id'], 0)
+            if d['stats__reconcile_date'] else 0
+        )}
         for d in duplicates
     ]
 
@@ -457,23 +465,36 @@ def label_example_patches_ajax(request, label_id):
     else:
         page_size = settings.LABEL_EXAMPLE_PATCHES_PER_PAGE_GUEST
 
-    label_details = cacheable_label_details.get()
-
-    if page == 1 and label_details and label_id in label_details:
-        # Use the cache
-        annotation_ids_full_page = \
-            label_details[label_id]['random_patches_page_1']
-        # The cached annotations fill up a regular sized page,
-        # but if we're requesting as a guest, then we only need
-        # the first few elements of that.
-        annotation_ids = annotation_ids_full_page[:page_size]
-
-        patch_annotations = Annotation.objects.filter(pk__in=annotation_ids)
-        is_last_page = page_size >= label_confirmed_annotation_count(label_id)
+    try:
+        label_stats = label.stats
+    except LabelStats.DoesNotExist:
+        label_stats = None
+
+    if page == 1 and label_stats and label_stats.reconcile_date:
+        # The label stats have the first page's annotations.
+        # They fill up a regular sized page, but if we're requesting as a
+        # guest, then we only need the first few elements of that.
+        annotation_ids = label_stats.example_annotation_ids[:page_size]
+
+        annotations_by_id = (
+            Annotation.objects.filter(pk__in=annotation_ids)
+            .select_related('point', 'point__image', 'source')
+            .in_bulk()
+        )
+        patch_annotations = [
+            annotations_by_id[annotation_id]
+            for annotation_id in annotation_ids
+            if annotation_id in annotations_by_id
+        ]
+        annotation_count = (
+            LabelStats.objects.confirmed_annotation_counts([label.pk])
+            .get(label.pk, 0))
+        is_last_page = page_size >= annotation_count
     else:
+        # Same ordering as the label stats' examples.
         all_annotations = Annotation.objects.confirmed() \
             .filter(label=label) \
-            .order_by('scrambled_sort_key')
+            .order_by('scrambled_sort_key', 'pk')
         paginator = Paginator(all_annotations, page_size)
 
         try:
@@ -481,19 +502,21 @@ def label_example_patches_ajax(request, label_id):
         except (EmptyPage, InvalidPage):
             page_annotations = paginator.page(paginator.num_pages)
 
-        patch_annotations = page_annotations.object_list
+        patch_annotations = list(
+            page_annotations.object_list.select_related(
+                'point', 'point__image', 'source'))
         is_last_page = page >= paginator.num_pages
 
-    patch_annotations = patch_annotations.select_related(
-        'point', 'point__image', 'source')
+    # Patches which don't exist yet are shown as placeholders, and
+    # generated asynchronously once the page requests them.
+    media_batch_key = AsyncMediaBatch.create(request).key
+
     patches = []
     for index, annotation in enumerate(patch_annotations):
         point = annotation.point
         image = point.image
         source = annotation.source
 
-        generate_patch_if_doesnt_exist(point)
-
         if source.visible_to_user(request.user):
             dest_url = reverse('image_detail', args=[image.pk])
         else:
@@ -502,12 +525,14 @@ def label_example_patches_ajax(request, label_id):
         patches.append(dict(
             source=source,
             dest_url=dest_url,
-            thumbnail_url=get_patch_url(point),
+            thumbnail=media_async(
+                AsyncPatch(point=point), media_batch_key, request),
         ))
 
     return JsonResponse({
         'patchesHtml': render_to_string('labels/label_example_patches.html', {
             'patches': patches,
+            'media_batch_key': media_batch_key,
         }),
         'isLastPage': is_last_page,
     })
@@ -0,0 +1,246 @@
+import dataclasses
+import random
+import statistics
+
+import numpy as np
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+
+from images.models import Image
+from images.utils import generate_points_for_images
+from jobs.models import Job
+from jobs.tests.utils import do_job
+from .instrumentation import measure, METRICS
+from .tests.utils import ClientTest
+
+
+@dataclasses.dataclass
+class BenchmarkScale:
+    """
+    Size of the synthetic source that the benchmarks run against.
+    """
+    images: int = 50
+    points: int = 50
+    labels: int = 20
+    # Fraction of images with confirmed annotations. The rest get
+    # unconfirmed (machine) annotations with scores.
+    annotated_fraction: float = 0.5
+    # Scores saved per machine-annotated point.
+    scores: int = 5
+
+
+class HotPathBenchmark(ClientTest):
+    """
+    Times the site's hot paths against one synthetic source, built with
+    the usual test data helpers. Run by the benchmark management command,
+    not by the test suite.
+
+    Each test method is one benchmark, and each of its runs starts from
+    the same state: DB changes are rolled back, and the storage dir and
+    cache are reset between runs. That way, runs (and results from
+    different commits) are comparable.
+    """
+    scale = BenchmarkScale()
+    repeat = 3
+    # Benchmark name -> list of measurement values, one per run.
+    results: dict[str, list[dict]] = dict()
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        # Same sample images and annotations every time.
+        random.seed(0)
+
+        scale = cls.scale
+        cls.user = cls.create_user()
+        cls.source = cls.create_source(
+            cls.user,
+            default_point_generation_method=dict(
+                type='simple', points=scale.points),
+        )
+
+        label_numbers = range(1, scale.labels+1)
+        labels = cls.create_labels(
+            cls.user,
+            [f'Label {n:04d}' for n in label_numbers],
+            'Benchmark',
+            default_codes=[f'L{n:04d}' for n in label_numbers],
+        )
+        cls.create_labelset(cls.user, cls.source, labels)
+        robot = cls.create_robot(cls.source)
+
+        cls.images = [
+            cls.upload_image(
+                cls.user, cls.source,
+                image_options=dict(filename=f'{n:05d}.png'))
+            for n in range(scale.images)
+        ]
+        # Uploads generate points with an unseeded generator, so
+        # regenerate them with a seeded one for the same point layouts
+        # every time.
+        generate_points_for_images(
+            Image.objects.filter(source=cls.source).order_by('pk')
+            .select_related('metadata', 'source'),
+            rng=np.random.default_rng(0),
+        )
+
+        annotated_count = round(scale.images * scale.annotated_fraction)
+        for n, image in enumerate(cls.images):
+            if n < annotated_count:
+                cls.add_annotations(cls.user, image)
+            else:
+                cls.add_robot_annotations(robot, image)
+
+    def run_benchmark(self, name, func, prepare=None):
+        """
+        Measure func() self.repeat times. prepare() runs before each
+        measurement, and isn't measured.
+        """
+        runs = []
+        for _ in range(self.repeat):
+            self.reset_storage_dir()
+            cache.clear()
+            with transaction.atomic():
+                if prepare:
+                    prepare()
+                with measure('benchmark', name, record=False) as measurement:
+                    func()
+                transaction.set_rollback(True)
+            runs.append(measurement.values)
+        self.results[name] = runs
+
+    def check_source(self):
+        job = do_job('check_source', self.source.pk, source_id=self.source.pk)
+        self.assertEqual(
+            job.status, Job.Status.SUCCESS,
+            f"check_source should succeed: {job.result_message}")
+
+    def collect_spacer_jobs(self):
+        job = do_job('collect_spacer_jobs')
+        self.assertEqual(
+            job.status, Job.Status.SUCCESS,
+            f"collect_spacer_jobs should succeed: {job.result_message}")
+
+    def extract_features(self):
+        # Extraction jobs are scheduled by the source check, and stay in
+        # progress until their results are collected.
+        self.check_source()
+        for image in self.images:
+            do_job('extract_features', image.pk, source_id=self.source.pk)
+
+    def extract_and_collect_features(self):
+        self.extract_features()
+        self.collect_spacer_jobs()
+
+    def get(self, url, **kwargs):
+        self.client.force_login(self.user)
+        response = self.client.get(url, **kwargs)
+        self.assertStatusOK(response)
+        # Streamed content is only generated as it's read.
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    def post(self, url, data):
+        self.client.force_login(self.user)
+        response = self.client.post(url, data)
+        self.assertStatusOK(response)
+        return response
+
+    def export(self, prep_url_name, data):
+        prep_response = self.post(
+            reverse(prep_url_name, args=[self.source.pk]), data)
+        self.get(
+            reverse('source_export_serve', args=[self.source.pk]),
+            data=dict(
+                session_data_timestamp=(
+                    prep_response.json()['session_data_timestamp'])),
+        )
+
+    def test_check_source_before_extraction(self):
+        self.run_benchmark(
+            'check_source_before_extraction', self.check_source)
+
+    def test_collect_spacer_jobs(self):
+        self.run_benchmark(
+            'collect_spacer_jobs', self.collect_spacer_jobs,
+            prepare=self.extract_features)
+
+    def test_check_source_after_extraction(self):
+        self.run_benchmark(
+            'check_source_after_extraction', self.check_source,
+            prepare=self.extract_and_collect_features)
+
+    def test_browse_images(self):
+        self.run_benchmark(
+            'browse_images',
+            lambda: self.get(reverse('browse_images', args=[self.source.pk])))
+
+    def test_annotation_tool(self):
+        # Last image has machine annotations, and thus scores to show.
+        image = self.images[-1]
+        self.run_benchmark(
+            'annotation_tool',
+            lambda: self.get(reverse('annotation_tool', args=[image.pk])))
+
+    def test_export_annotations(self):
+        data = dict(
+            label_format='both',
+            optional_columns=[
+                'annotator_info', 'machine_suggestions',
+                'metadata_date_aux', 'metadata_other'],
+        )
+        self.run_benchmark(
+            'export_annotations',
+            lambda: self.export('annotations_export_prep', data))
+
+    def test_export_image_covers(self):
+        data = dict(label_display='code', export_format='csv')
+        self.run_benchmark(
+            'export_image_covers',
+            lambda: self.export('export_image_covers_prep', data))
+
+    def test_export_metadata(self):
+        self.run_benchmark(
+            'export_metadata',
+            lambda: self.post(
+                reverse('export_metadata', args=[self.source.pk]), dict()))
+
+
+def summarize_runs(runs: list[dict]) -> dict:
+    """
+    Median of each metric over a benchmark's runs, plus the fastest run's
+    wall time.
+    """
+    summary = {
+        metric: statistics.median(run[metric] for run in runs)
+        for metric in METRICS
+    }
+    summary['wall_time_min'] = min(run['wall_time'] for run in runs)
+    return summary
+
+
+def compare_summaries(summaries: dict, baseline_summaries: dict) -> list[str]:
+    """
+    Lines comparing each benchmark's median wall time and DB query count
+    against a baseline's.
+    """
+    lines = []
+    for name, summary in summaries.items():
+        if name not in baseline_summaries:
+            lines.append(f"{name}: not in baseline")
+            continue
+        baseline = baseline_summaries[name]
+        parts = []
+        for metric in ['wall_time', 'db_queries', 'db_time']:
+            before = baseline[metric]
+            after = summary[metric]
+            if before:
+                change = f"{(after - before) / before:+.1%}"
+            else:
+                change = "n/a"
+            parts.append(f"{metric} {before:.4g} -> {after:.4g} ({change})")
+        lines.append(f"{name}: {'; '.join(parts)}")
+    return lines
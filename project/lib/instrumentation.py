@@ -0,0 +1,331 @@
+"""
+Performance metrics of views and jobs: wall time, DB queries, context
+scoped cache usage, classifier model cache usage, and storage I/O.
+
+Each view or job run is measured with measure(), and its measurements are
+added to histograms in the Django cache, per view name or job name. The
+histograms are kept per time window, and only the latest windows are
+kept, so the aggregated histograms are rolling ones.
+
+Updating a histogram is a cache get and set, without locking, so
+concurrent updates can occasionally drop a measurement. That's
+acceptable for monitoring purposes.
+"""
+from contextlib import ContextDecorator
+from contextvars import ContextVar
+import dataclasses
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection
+
+
+@dataclasses.dataclass(frozen=True)
+class MetricSpec:
+    description: str
+    # Suffix of the Prometheus metric name; blank for counts.
+    unit: str
+    # Upper bounds of the histogram buckets. There's also an implicit
+    # final bucket with no upper bound.
+    bucket_bounds: tuple
+
+
+_TIME_BUCKET_BOUNDS = (
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300)
+_COUNT_BUCKET_BOUNDS = (0, 1, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+_BYTES_BUCKET_BOUNDS = tuple(10**exponent for exponent in range(3, 10))
+
+METRICS = dict(
+    wall_time=MetricSpec(
+        "Wall time", 'seconds', _TIME_BUCKET_BOUNDS),
+    db_queries=MetricSpec(
+        "DB query count", '', _COUNT_BUCKET_BOUNDS),
+    db_time=MetricSpec(
+        "Time spent in DB queries", 'seconds', _TIME_BUCKET_BOUNDS),
+    cache_hits=MetricSpec(
+        "Context scoped cache hits", '', _COUNT_BUCKET_BOUNDS),
+    cache_misses=MetricSpec(
+        "Context scoped cache misses (Django cache reads)", '',
+        _COUNT_BUCKET_BOUNDS),
+    classifier_cache_hits=MetricSpec(
+        "Classifier model cache hits", '', _COUNT_BUCKET_BOUNDS),
+    classifier_cache_misses=MetricSpec(
+        "Classifier model cache misses (model loads from storage)", '',
+        _COUNT_BUCKET_BOUNDS),
+    storage_bytes_read=MetricSpec(
+        "Bytes of files opened from storage", 'bytes',
+        _BYTES_BUCKET_BOUNDS),
+    storage_bytes_written=MetricSpec(
+        "Bytes of files saved to storage", 'bytes', _BYTES_BUCKET_BOUNDS),
+)
+
+KINDS = ['view', 'job']
+
+
+class Histogram:
+
+    def __init__(self, spec: MetricSpec, counts=None, total=0):
+        self.spec = spec
+        self.counts = counts or [0] * (len(spec.bucket_bounds) + 1)
+        self.total = total
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    @property
+    def mean(self):
+        if self.count == 0:
+            return None
+        return self.total / self.count
+
+    def add(self, value):
+        for index, bound in enumerate(self.spec.bucket_bounds):
+            if value <= bound:
+                break
+        else:
+            index = len(self.spec.bucket_bounds)
+        self.counts[index] += 1
+        self.total += value
+
+    def merge(self, other: 'Histogram'):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+
+    def quantile(self, q: float):
+        """
+        Upper bound of the bucket containing the q-quantile. None if there
+        are no values, and infinity if it's in the final bucket.
+        """
+        if self.count == 0:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            cumulative += count
+            if cumulative >= target and count > 0:
+                break
+        if index < len(self.spec.bucket_bounds):
+            return self.spec.bucket_bounds[index]
+        return math.inf
+
+    def to_cache_value(self):
+        return [self.counts, self.total]
+
+    @classmethod
+    def from_cache_value(cls, spec, value):
+        counts, total = value
+        return cls(spec, counts=list(counts), total=total)
+
+
+class Measurement:
+    """
+    Metric values of one view or job run.
+    """
+    def __init__(self):
+        self.values = dict.fromkeys(METRICS, 0)
+        self.start_time = time.perf_counter()
+
+    def db_execute_wrapper(self, execute, sql, params, many, context):
+        start_time = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.values['db_queries'] += 1
+            self.values['db_time'] += time.perf_counter() - start_time
+
+
+# Measurements in progress. Nested measurements (such as a job which
+# runs within a view, as can happen in tests) all get counts.
+active_measurements_context_var = ContextVar(
+    'active_measurements', default=())
+
+
+def record_cache_access(hit: bool):
+    metric = 'cache_hits' if hit else 'cache_misses'
+    for measurement in active_measurements_context_var.get():
+        measurement.values[metric] += 1
+
+
+def record_classifier_cache_access(hit: bool):
+    metric = 'classifier_cache_hits' if hit else 'classifier_cache_misses'
+    for measurement in active_measurements_context_var.get():
+        measurement.values[metric] += 1
+
+
+def record_storage_io(bytes_read: int = 0, bytes_written: int = 0):
+    for measurement in active_measurements_context_var.get():
+        measurement.values['storage_bytes_read'] += bytes_read
+        measurement.values['storage_bytes_written'] += bytes_written
+
+
+class measure(ContextDecorator):
+    """
+    Measure the enclosed view or job run, and add the measurements to the
+    histograms of the given kind ('view' or 'job') and name.
+
+    With record=False, the measurements aren't added to any histograms;
+    the caller can read them from the Measurement returned on entering
+    the context.
+    """
+    def __init__(self, kind: str, name: str, record: bool = True):
+        self.kind = kind
+        self.name = name
+        self.record = record
+
+    def __enter__(self):
+        if not settings.INSTRUMENTATION_ENABLED:
+            self.measurement = None
+            return None
+
+        self.measurement = Measurement()
+        self.token = active_measurements_context_var.set(
+            active_measurements_context_var.get() + (self.measurement,))
+        self.execute_wrapper = connection.execute_wrapper(
+            self.measurement.db_execute_wrapper)
+        self.execute_wrapper.__enter__()
+        return self.measurement
+
+    def __exit__(self, *exc):
+        if self.measurement is None:
+            return
+
+        self.execute_wrapper.__exit__(*exc)
+        active_measurements_context_var.reset(self.token)
+
+        self.measurement.values['wall_time'] = (
+            time.perf_counter() - self.measurement.start_time)
+        if self.record:
+            record_measurement(
+                self.kind, self.name, self.measurement.values)
+
+
+NAMES_CACHE_KEY = 'instrumentation_names'
+
+
+def _window_start(timestamp: float) -> int:
+    window_seconds = settings.INSTRUMENTATION_WINDOW_SECONDS
+    return int(timestamp // window_seconds) * window_seconds
+
+
+def _histograms_cache_key(kind, name, window_start):
+    return f'instrumentation_histograms:{kind}:{name}:{window_start}'
+
+
+def _cache_timeout():
+    # Long enough to span all the windows that are aggregated.
+    return (
+        settings.INSTRUMENTATION_WINDOW_SECONDS
+        * (settings.INSTRUMENTATION_WINDOW_COUNT + 1))
+
+
+def record_measurement(kind: str, name: str, values: dict):
+    window_start = _window_start(time.time())
+    key = _histograms_cache_key(kind, name, window_start)
+
+    cache_value = cache.get(key) or dict()
+    for metric, spec in METRICS.items():
+        if metric in cache_value:
+            histogram = Histogram.from_cache_value(spec, cache_value[metric])
+        else:
+            histogram = Histogram(spec)
+        histogram.add(values[metric])
+        cache_value[metric] = histogram.to_cache_value()
+    cache.set(key, cache_value, _cache_timeout())
+
+    names = cache.get(NAMES_CACHE_KEY) or set()
+    if (kind, name) not in names:
+        names.add((kind, name))
+        cache.set(NAMES_CACHE_KEY, names, _cache_timeout())
+
+
+def get_histograms(kind: str) -> dict[str, dict[str, Histogram]]:
+    """
+    Rolling histograms of the given kind, aggregated over the latest
+    INSTRUMENTATION_WINDOW_COUNT windows.
+    Returns a dict of name -> metric -> Histogram.
+    """
+    latest_window_start = _window_start(time.time())
+    window_starts = [
+        latest_window_start - n * settings.INSTRUMENTATION_WINDOW_SECONDS
+        for n in range(settings.INSTRUMENTATION_WINDOW_COUNT)
+    ]
+    names = sorted(
+        name for name_kind, name in (cache.get(NAMES_CACHE_KEY) or set())
+        if name_kind == kind
+    )
+
+    keys_to_names = {
+        _histograms_cache_key(kind, name, window_start): name
+        for name in names
+        for window_start in window_starts
+    }
+    cache_values = cache.get_many(keys_to_names.keys())
+
+    histograms = dict()
+    for key, cache_value in cache_values.items():
+        name_histograms = histograms.setdefault(keys_to_names[key], dict())
+        for metric, spec in METRICS.items():
+            if metric in cache_value:
+                histogram = Histogram.from_cache_value(
+                    spec, cache_value[metric])
+            else:
+                # Recorded before this metric was added.
+                histogram = Histogram(spec)
+            if metric in name_histograms:
+                name_histograms[metric].merge(histogram)
+            else:
+                name_histograms[metric] = histogram
+    return histograms
+
+
+def _prometheus_number(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+def prometheus_text() -> str:
+    """
+    All histograms in the Prometheus text exposition format.
+
+    Since the histograms are rolling, their counts can decrease over time
+    unlike Prometheus counters; so they're best used as-is, rather than
+    through rate().
+    """
+    lines = []
+    for kind in KINDS:
+        histograms = get_histograms(kind)
+        for metric, spec in METRICS.items():
+            metric_name = '_'.join(
+                part for part in ['coralnet', kind, metric, spec.unit]
+                if part)
+            lines.append(
+                f'# HELP {metric_name} {spec.description} per {kind}'
+                f' run, over the last'
+                f' {settings.INSTRUMENTATION_WINDOW_COUNT} windows of'
+                f' {settings.INSTRUMENTATION_WINDOW_SECONDS} seconds.')
+            lines.append(f'# TYPE {metric_name} histogram')
+
+            for name, name_histograms in histograms.items():
+                if metric not in name_histograms:
+                    continue
+                histogram = name_histograms[metric]
+                label = f'name="{name}"'
+                cumulative = 0
+                bounds = [*spec.bucket_bounds, math.inf]
+                for bound, count in zip(bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(
+                        f'{metric_name}_bucket'
+                        f'{{{label},le="{_prometheus_number(bound)}"}}'
+                        f' {cumulative}')
+                lines.append(
+                    f'{metric_name}_sum{{{label}}}'
+                    f' {_prometheus_number(histogram.total)}')
+                lines.append(
+                    f'{metric_name}_count{{{label}}} {histogram.count}')
+
+    return '\n'.join(lines) + '\n'
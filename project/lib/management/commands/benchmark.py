@@ -0,0 +1,126 @@
+import dataclasses
+import json
+from pathlib import Path
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+
+from ...benchmark_utils import (
+    BenchmarkScale, compare_summaries, HotPathBenchmark, summarize_runs)
+from ...tests.utils import CustomTestRunner
+
+
+class Command(BaseCommand):
+    help = (
+        "Build a synthetic source on a test database, then time the site's"
+        " hot paths (source checks, spacer job collection, Browse Images,"
+        " the annotation tool, and exports) with DB query counts."
+        " Results are saved as JSON, so they can be compared between"
+        " commits."
+    )
+
+    def add_arguments(self, parser):
+        defaults = BenchmarkScale()
+        parser.add_argument(
+            '--images', type=int, default=defaults.images,
+            help="Number of images in the synthetic source.")
+        parser.add_argument(
+            '--points', type=int, default=defaults.points,
+            help="Number of points per image.")
+        parser.add_argument(
+            '--labels', type=int, default=defaults.labels,
+            help="Number of labels in the labelset.")
+        parser.add_argument(
+            '--annotated_fraction', type=float,
+            default=defaults.annotated_fraction,
+            help="Fraction of images with confirmed annotations. The rest"
+                 " get machine annotations.")
+        parser.add_argument(
+            '--scores', type=int, default=defaults.scores,
+            help="Number of scores saved per machine-annotated point.")
+        parser.add_argument(
+            '--repeat', type=int, default=HotPathBenchmark.repeat,
+            help="Number of runs per benchmark. Results are medians over"
+                 " the runs.")
+        parser.add_argument(
+            '--output', type=str,
+            default=str(settings.COMMAND_OUTPUT_DIR / 'benchmark.json'),
+            help="Path to save the JSON results to.")
+        parser.add_argument(
+            '--baseline', type=str,
+            help="Path to JSON results of a previous run (such as on"
+                 " another commit) to compare against.")
+        parser.add_argument(
+            '--keepdb', action='store_true',
+            help="Preserve the test database between runs.")
+
+    def handle(self, *args, **options):
+        scale = BenchmarkScale(
+            images=options['images'],
+            points=options['points'],
+            labels=options['labels'],
+            annotated_fraction=options['annotated_fraction'],
+            scores=options['scores'],
+        )
+        HotPathBenchmark.scale = scale
+        HotPathBenchmark.repeat = options['repeat']
+        HotPathBenchmark.results = dict()
+
+        runner = CustomTestRunner(
+            verbosity=options['verbosity'],
+            interactive=False,
+            keepdb=options['keepdb'],
+        )
+        with override_settings(
+            INSTRUMENTATION_ENABLED=True,
+            NBR_SCORES_PER_ANNOTATION=scale.scores,
+        ):
+            failures = runner.run_tests(
+                ['lib.benchmark_utils.HotPathBenchmark'])
+        if failures:
+            raise CommandError("Benchmarks failed; see the output above.")
+
+        summaries = {
+            name: summarize_runs(runs)
+            for name, runs in sorted(HotPathBenchmark.results.items())
+        }
+        results = dict(
+            revision=self.get_revision(),
+            python_version=platform.python_version(),
+            django_version=django.get_version(),
+            scale=dataclasses.asdict(scale),
+            repeat=options['repeat'],
+            benchmarks=summaries,
+        )
+
+        output_path = Path(options['output'])
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        self.stdout.write(f"Output: {output_path}")
+
+        if options['baseline']:
+            with open(options['baseline'], encoding='utf-8') as f:
+                baseline = json.load(f)
+            if baseline['scale'] != results['scale']:
+                self.stdout.write(self.style.WARNING(
+                    "Baseline was run at a different scale:"
+                    f" {baseline['scale']}"))
+            for line in compare_summaries(
+                summaries, baseline['benchmarks']
+            ):
+                self.stdout.write(line)
+
+    @staticmethod
+    def get_revision():
+        try:
+            result = subprocess.run(
+                ['git', 'rev-parse', 'HEAD'],
+                cwd=settings.REPO_DIR, capture_output=True, text=True,
+                check=True)
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        return result.stdout.strip()
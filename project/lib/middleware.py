@@ -5,6 +5,7 @@ import uuid
 from django.http import HttpRequest, HttpResponse
 from django.urls import resolve
 
+from .instrumentation import measure
 from .utils import context_scoped_cache
 
 view_logger = getLogger('coralnet_views')
@@ -26,6 +27,23 @@ class ViewScopedCacheMiddleware:
         return response
 
 
+class InstrumentationMiddleware:
+    """
+    Record performance metrics of each view, by view name (see
+    lib.instrumentation).
+    Should enclose ViewScopedCacheMiddleware so that the view-scoped
+    cache's hits and misses are counted.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request: HttpRequest):
+        view_name = resolve(request.path).view_name
+        with measure('view', view_name):
+            response = self.get_response(request)
+        return response
+
+
 class ViewLoggingMiddleware:
     """
     Log when each view starts and ends.
@@ -28,11 +28,15 @@ def save_session_data(session, key, data):
     return timestamp
 
 
-def get_session_data(key: str, request):
+def get_session_data(key: str, request, pop: bool = True):
     """
     Requirements: session data must exist at `key`, and the timestamp
     stored there must match with the timestamp request arg.
     Returns the requested session data (and validates that it exists).
+
+    By default the data is removed from the session once it's read. Pass
+    pop=False for requests that only check on the data, such as
+    progress polling, so that a later request can still get it.
     """
     timestamp = request.GET.get('session_data_timestamp', None)
     # Can be None, or can be '' if it's from a form field that
@@ -44,7 +48,10 @@ def get_session_data(key: str, request):
             " If the problem persists, let us know on the forum."
         )
 
-    session_value = request.session.pop(key, None)
+    if pop:
+        session_value = request.session.pop(key, None)
+    else:
+        session_value = request.session.get(key, None)
     if not session_value:
         raise SessionError(
             "We couldn't find the expected data in your session."
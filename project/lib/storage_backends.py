@@ -12,6 +12,7 @@ from django.test import override_settings
 from spacer.data_classes import DataLocation
 
 from .exceptions import FileStorageUsageError
+from .instrumentation import record_storage_io
 
 
 # Abstract class
@@ -127,7 +128,22 @@ class StorageManagerLocal(StorageManager):
         shutil.rmtree(dir_to_remove)
 
 
-class MediaStorageLocal(FileSystemStorage):
+class InstrumentedStorageMixin:
+    """
+    Record the sizes of files opened and saved, for lib.instrumentation.
+    """
+    def _open(self, name, mode='rb'):
+        file = super()._open(name, mode)
+        if 'r' in mode:
+            record_storage_io(bytes_read=file.size)
+        return file
+
+    def _save(self, name, content):
+        record_storage_io(bytes_written=content.size)
+        return super()._save(name, content)
+
+
+class MediaStorageLocal(InstrumentedStorageMixin, FileSystemStorage):
     """
     Local-filesystem storage backend.
     Storage root defaults to MEDIA_ROOT.
@@ -10,7 +10,8 @@ from django.test.utils import override_settings
 from django.urls import reverse
 from django.utils import timezone
 
-from .utils import ManagementCommandTest
+from ..benchmark_utils import compare_summaries, summarize_runs
+from .utils import BaseTest, ManagementCommandTest
 
 
 def get_time(**kwargs):
@@ -203,3 +204,41 @@ class MaintenanceOnTest(ManagementCommandTest):
 
         self.assertHTMLEqual(
             maintenance_message, "Here's a <em>custom</em> message.")
+
+
+class BenchmarkResultsTest(BaseTest):
+
+    @staticmethod
+    def make_run(wall_time, db_queries):
+        return dict(
+            wall_time=wall_time, db_queries=db_queries, db_time=0.5,
+            cache_hits=0, cache_misses=0,
+            classifier_cache_hits=0, classifier_cache_misses=0,
+            storage_bytes_read=0, storage_bytes_written=0)
+
+    def test_summarize_runs(self):
+        summary = summarize_runs([
+            self.make_run(3.0, 10),
+            self.make_run(1.0, 10),
+            self.make_run(2.0, 12),
+        ])
+        self.assertEqual(summary['wall_time'], 2.0)
+        self.assertEqual(summary['wall_time_min'], 1.0)
+        self.assertEqual(summary['db_queries'], 10)
+
+    def test_compare_summaries(self):
+        baseline = dict(
+            browse_images=summarize_runs([self.make_run(2.0, 100)]))
+        summaries = dict(
+            browse_images=summarize_runs([self.make_run(1.0, 25)]),
+            annotation_tool=summarize_runs([self.make_run(1.0, 5)]),
+        )
+        self.assertListEqual(
+            compare_summaries(summaries, baseline),
+            [
+                "browse_images: wall_time 2 -> 1 (-50.0%);"
+                " db_queries 100 -> 25 (-75.0%);"
+                " db_time 0.5 -> 0.5 (+0.0%)",
+                "annotation_tool: not in baseline",
+            ],
+        )
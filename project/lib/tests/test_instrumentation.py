@@ -0,0 +1,188 @@
+import math
+import time
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import override_settings
+from django.urls import reverse
+
+from images.models import Image
+from jobs.tests.utils import do_job
+from ..instrumentation import (
+    get_histograms, Histogram, measure, METRICS, prometheus_text)
+from ..utils import context_scoped_cache, scoped_cache_context_var
+from .utils import BaseTest, ClientTest
+
+
+class HistogramTest(BaseTest):
+
+    def test_add(self):
+        histogram = Histogram(METRICS['db_queries'])
+        for value in [0, 1, 3, 3, 6000]:
+            histogram.add(value)
+
+        self.assertEqual(histogram.count, 5)
+        self.assertEqual(histogram.total, 6007)
+        # Buckets: <= 0, <= 1, <= 5, ..., <= 5000, > 5000
+        self.assertListEqual(
+            histogram.counts, [1, 1, 2, 0, 0, 0, 0, 0, 0, 0, 0, 1])
+
+    def test_quantile(self):
+        histogram = Histogram(METRICS['wall_time'])
+        self.assertIsNone(histogram.quantile(0.5))
+
+        for value in [0.005, 0.2, 0.2, 0.3, 1000]:
+            histogram.add(value)
+        self.assertEqual(histogram.quantile(0.5), 0.25)
+        self.assertEqual(histogram.quantile(0.8), 0.5)
+        self.assertEqual(histogram.quantile(0.95), math.inf)
+
+    def test_merge(self):
+        histogram_1 = Histogram(METRICS['db_queries'])
+        histogram_1.add(1)
+        histogram_2 = Histogram(METRICS['db_queries'])
+        histogram_2.add(1)
+        histogram_2.add(10)
+
+        histogram_1.merge(histogram_2)
+        self.assertEqual(histogram_1.count, 3)
+        self.assertEqual(histogram_1.total, 12)
+
+
+class MeasureTest(ClientTest):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = cls.create_user()
+        cls.source = cls.create_source(cls.user)
+
+    def test_db_queries(self):
+        with measure('job', 'test_name'):
+            list(Image.objects.all())
+            list(Image.objects.all())
+
+        histograms = get_histograms('job')['test_name']
+        self.assertEqual(histograms['db_queries'].total, 2)
+        self.assertEqual(histograms['wall_time'].count, 1)
+        self.assertGreater(histograms['wall_time'].total, 0)
+        self.assertGreater(histograms['db_time'].total, 0)
+
+    def test_cache_hits_and_misses(self):
+        with measure('job', 'test_name'), context_scoped_cache():
+            scoped_cache = scoped_cache_context_var.get()
+            scoped_cache.get('key_1')
+            scoped_cache.get('key_1')
+            scoped_cache.get('key_2')
+
+        histograms = get_histograms('job')['test_name']
+        self.assertEqual(histograms['cache_hits'].total, 1)
+        self.assertEqual(histograms['cache_misses'].total, 2)
+
+    def test_storage_io(self):
+        with measure('job', 'test_name'):
+            filepath = default_storage.save(
+                'instrumentation_test.txt', ContentFile(b'12345'))
+            with default_storage.open(filepath) as f:
+                f.read()
+
+        histograms = get_histograms('job')['test_name']
+        self.assertEqual(histograms['storage_bytes_written'].total, 5)
+        self.assertEqual(histograms['storage_bytes_read'].total, 5)
+
+    def test_nested(self):
+        with measure('view', 'outer'):
+            list(Image.objects.all())
+            with measure('job', 'inner'):
+                list(Image.objects.all())
+
+        self.assertEqual(
+            get_histograms('view')['outer']['db_queries'].total, 2)
+        self.assertEqual(
+            get_histograms('job')['inner']['db_queries'].total, 1)
+
+    def test_multiple_runs(self):
+        for _ in range(3):
+            with measure('job', 'test_name'):
+                pass
+        with measure('job', 'other_name'):
+            pass
+
+        histograms = get_histograms('job')
+        self.assertEqual(histograms['test_name']['wall_time'].count, 3)
+        self.assertEqual(histograms['other_name']['wall_time'].count, 1)
+        self.assertDictEqual(get_histograms('view'), dict())
+
+    @override_settings(
+        INSTRUMENTATION_WINDOW_SECONDS=60, INSTRUMENTATION_WINDOW_COUNT=2)
+    def test_rolling_windows(self):
+        now = time.time()
+
+        def measure_at(timestamp):
+            with mock.patch('time.time', return_value=timestamp):
+                with measure('job', 'test_name'):
+                    pass
+
+        measure_at(now - 180)
+        measure_at(now - 60)
+        measure_at(now)
+        measure_at(now)
+
+        with mock.patch('time.time', return_value=now):
+            histograms = get_histograms('job')['test_name']
+        self.assertEqual(
+            histograms['wall_time'].count, 3,
+            "Should only include the latest 2 windows")
+
+    def test_no_record(self):
+        with measure('job', 'test_name', record=False) as measurement:
+            list(Image.objects.all())
+
+        self.assertEqual(measurement.values['db_queries'], 1)
+        self.assertGreater(measurement.values['wall_time'], 0)
+        self.assertDictEqual(get_histograms('job'), dict())
+
+    @override_settings(INSTRUMENTATION_ENABLED=False)
+    def test_disabled(self):
+        with measure('job', 'test_name'):
+            list(Image.objects.all())
+
+        self.assertDictEqual(get_histograms('job'), dict())
+
+    def test_view(self):
+        self.client.force_login(self.user)
+        self.client.get(reverse('source_main', args=[self.source.pk]))
+
+        histograms = get_histograms('view')['source_main']
+        self.assertEqual(histograms['wall_time'].count, 1)
+        self.assertGreater(histograms['db_queries'].total, 0)
+
+    def test_job(self):
+        do_job('update_sitewide_annotation_count')
+
+        histograms = get_histograms('job')['update_sitewide_annotation_count']
+        self.assertEqual(histograms['wall_time'].count, 1)
+
+    def test_prometheus_text(self):
+        with measure('job', 'test_name'):
+            list(Image.objects.all())
+
+        lines = prometheus_text().splitlines()
+        self.assertIn('# TYPE coralnet_job_db_queries histogram', lines)
+        self.assertIn(
+            'coralnet_job_db_queries_bucket{name="test_name",le="0"} 0',
+            lines)
+        self.assertIn(
+            'coralnet_job_db_queries_bucket{name="test_name",le="1"} 1',
+            lines)
+        self.assertIn(
+            'coralnet_job_db_queries_bucket{name="test_name",le="+Inf"} 1',
+            lines)
+        self.assertIn(
+            'coralnet_job_db_queries_sum{name="test_name"} 1', lines)
+        self.assertIn(
+            'coralnet_job_db_queries_count{name="test_name"} 1', lines)
+        self.assertIn(
+            '# TYPE coralnet_job_wall_time_seconds histogram', lines)
@@ -116,15 +116,21 @@ class StorageDirTest(TestCase):
             settings.TEST_STORAGE_DIR, settings.POST_SETUPTESTDATA_STATE_DIR)
 
     def setUp(self):
-        # Reset the storage dir contents to the post-setUpTestData contents,
-        # thus undoing any changes from previous test methods.
+        # Undo any storage changes from previous test methods.
+        self.reset_storage_dir()
+
+        super().setUp()
+
+    @staticmethod
+    def reset_storage_dir():
+        """
+        Reset the storage dir contents to the post-setUpTestData contents.
+        """
         storage_manager = get_storage_manager()
         storage_manager.empty_temp_dir(settings.TEST_STORAGE_DIR)
         storage_manager.copy_dir(
             settings.POST_SETUPTESTDATA_STATE_DIR, settings.TEST_STORAGE_DIR)
 
-        super().setUp()
-
 
 class _AssertQueriesLessThanContext(CaptureQueriesContext):
     """
@@ -11,9 +11,14 @@ import urllib.parse
 
 from django.core.cache import cache
 from django.core.paginator import Page, Paginator, EmptyPage, InvalidPage
+from django.db.models import (
+    Expression, F, Model, OrderBy, Q, QuerySet, Value)
+from django.db.models.lookups import Exact, GreaterThan, IsNull, LessThan
 from django.template.defaultfilters import date as date_template_filter
 from django.utils import timezone
 
+from .instrumentation import record_cache_access
+
 scoped_cache_context_var = ContextVar('scoped_cache', default=None)
 
 
@@ -29,7 +34,9 @@ class ContextScopedCache:
         self._written_keys = dict()
 
     def get(self, key):
-        if key not in self._dict:
+        hit = key in self._dict
+        record_cache_access(hit)
+        if not hit:
             # Get value from the Django cache
             self._dict[key] = cache.get(key)
         return self._dict[key]
@@ -267,6 +274,284 @@ def paginate(results, items_per_page, request_args, count_limit=None):
     return page_results
 
 
+# Ordering expressions known to never be NULL, per model. Ordering by
+# anything else gets NULL handling, which can make PostgreSQL unable to use
+# indexes for certain queries, so callers can add to this as applicable.
+DEFAULT_NON_NULL_ORDERING_EXPRS: list[tuple[type, Expression]] = [
+    # pk of any model
+    (Model, F('pk')),
+]
+
+
+def get_ordering_exprs(queryset: QuerySet) -> list[tuple[Expression, bool]]:
+    """
+    The queryset's ordering, as (expression, descending) pairs.
+    """
+    ordering = []
+    for ordering_arg in queryset.query.order_by:
+
+        if isinstance(ordering_arg, Expression):
+            if isinstance(ordering_arg, OrderBy):
+                # OrderBy Expression
+                descending = ordering_arg.descending
+                ordering_expr = ordering_arg.expression
+            else:
+                # Other Expression
+                descending = False
+                ordering_expr = ordering_arg
+        else:
+            # str
+            descending = ordering_arg.startswith('-')
+            ordering_field = ordering_arg.lstrip('-')
+            # Convert to Expression
+            ordering_expr = F(ordering_field)
+
+        if not queryset.query.standard_ordering:
+            # The queryset's reverse() method was called.
+            descending = not descending
+
+        ordering.append((ordering_expr, descending))
+    return ordering
+
+
+def get_ordering_position(queryset: QuerySet, pk) -> tuple | None:
+    """
+    Values of the queryset's ordering expressions for the object with the
+    given pk, or None if there's no such object.
+
+    The object is looked up among all of the model's objects, not just the
+    queryset's, so that we can find the position of objects which don't
+    match the queryset's filters.
+    """
+    ordering_exprs = [expr for expr, _ in get_ordering_exprs(queryset)]
+    try:
+        return (
+            queryset.model.objects.filter(pk=pk)
+            .values_list(*ordering_exprs)[0]
+        )
+    except IndexError:
+        return None
+
+
+def filter_after_ordering_position(
+    queryset: QuerySet,
+    position: tuple,
+    non_null_ordering_exprs: list[tuple[type, Expression]] = None,
+) -> QuerySet:
+    """
+    Filter the queryset to the objects that are ordered after the given
+    position (see get_ordering_position()), based on the queryset's
+    ordering.
+    """
+    if non_null_ordering_exprs is None:
+        non_null_ordering_exprs = DEFAULT_NON_NULL_ORDERING_EXPRS
+    queryset_model_class = queryset.model
+
+    # Start this Q object out as 'always False' because we want to make this
+    # the starting value of an 'OR' reduce chain.
+    filter_q = Q(Value(False))
+    # Start this Q object out as 'always True' because we want to make this
+    # the starting value of an 'AND' reduce chain.
+    previous_args_equal_q = Q(Value(True))
+
+    # query.order_by example: ['metadata__name', 'pk']
+    #
+    # The query we want gets more complicated depending on the number of
+    # order_by args:
+    # 1 arg: arg1 greater
+    # 2 args: arg1 greater OR (arg1 equal AND arg2 greater)
+    # 3 args: arg1 greater OR (arg1 equal AND arg2 greater)
+    #   OR (arg1 equal AND arg2 equal AND arg3 greater)
+    # Etc.
+    for (ordering_expr, descending), current_value in zip(
+        get_ordering_exprs(queryset), position
+    ):
+        # Only complicate the query with NULL handling when the field can
+        # actually take on NULL values.
+        # NULL handling can make PostgreSQL unable to use indexes for
+        # certain queries, hurting performance.
+        non_nullable = any([
+            (issubclass(queryset_model_class, cls)
+             and str(ordering_expr) == str(expr))
+            for cls, expr in non_null_ordering_exprs
+        ])
+        nullable = not non_nullable
+
+        if current_value is None:
+            # Nullable fields have a complication: we can't specify
+            # `...__gt=None` as a filter kwarg. That gets
+            # `ValueError: Cannot use None as a query value`.
+            # So instead we'll use the fact that None is ordered after all
+            # non-None values. Thus, 'greater than None' means no possible
+            # values, and 'less than None' means all non-None values.
+            if descending:
+                # 'less than None' (all non-None values)
+                current_arg_after_q = Q(IsNull(ordering_expr, False))
+            else:
+                # 'greater than None' (always False)
+                current_arg_after_q = Q(Value(False))
+
+            current_arg_equal_q = Q(IsNull(ordering_expr, True))
+        else:
+            if descending:
+                # 'less than current value'
+                current_arg_after_q = Q(
+                    LessThan(ordering_expr, current_value))
+            else:
+                # 'greater than current value' (greater value or None)
+                current_arg_after_q = Q(
+                    GreaterThan(ordering_expr, current_value))
+                if nullable:
+                    current_arg_after_q |= Q(IsNull(ordering_expr, True))
+
+            current_arg_equal_q = Q(Exact(ordering_expr, current_value))
+
+        filter_q = filter_q | (previous_args_equal_q & current_arg_after_q)
+
+        previous_args_equal_q = previous_args_equal_q & current_arg_equal_q
+
+    return queryset.filter(filter_q)
+
+
+class KeysetPaginator(CustomPaginator):
+    """
+    Paginator which can get a page by seeking from the previous or next
+    page's boundary object (keyset pagination), instead of using an OFFSET.
+    With an OFFSET, the database has to walk through all the preceding
+    results, so deep pages get slower and slower; seeking can use an
+    index on the ordering, so any page costs about the same as page 1.
+
+    The object list must be a QuerySet with an unambiguous ordering
+    (no ties).
+
+    Page links carry the boundary object's pk in the 'after' or 'before'
+    request arg. Without those args (e.g. a manually typed page number),
+    or if the boundary object's gone, this falls back to regular
+    OFFSET pagination.
+    """
+    cursor_args = ['after', 'before']
+
+    def __init__(
+        self, request_args, *args,
+        non_null_ordering_exprs=None, **kwargs
+    ):
+        super().__init__(request_args, *args, **kwargs)
+
+        self.args_besides_page = {
+            k: v for k, v in self.args_besides_page.items()
+            if k not in self.cursor_args}
+        self.non_null_ordering_exprs = non_null_ordering_exprs
+
+    def _get_page(self, *args, **kwargs):
+        return KeysetViewPage(self.args_besides_page, *args, **kwargs)
+
+    def page_from_cursor(self, number, cursor_arg, cursor_pk):
+        """
+        Get page `number`, given the pk of the object just before that page
+        (cursor_arg 'after') or just after that page (cursor_arg 'before').
+        Returns None if the page can't be found this way.
+        """
+        if number < 1 or number > self.num_pages:
+            return None
+
+        bottom = (number - 1) * self.per_page
+        # Like Paginator.page(), don't go past the count. This matters when
+        # the count is limited.
+        page_size = min(self.per_page, self.count - bottom)
+        if page_size <= 0:
+            return None
+
+        position = get_ordering_position(self.object_list, cursor_pk)
+        if position is None:
+            return None
+
+        if cursor_arg == 'after':
+            page_object_list = filter_after_ordering_position(
+                self.object_list, position, self.non_null_ordering_exprs,
+            )[:page_size]
+        else:
+            # Seek backwards, then put the page in the regular order.
+            page_pks = list(
+                filter_after_ordering_position(
+                    self.object_list.reverse(), position,
+                    self.non_null_ordering_exprs,
+                )[:page_size].values_list('pk', flat=True)
+            )
+            if len(page_pks) < page_size:
+                # The results have shifted since the link was made, such
+                # that this is no longer a full page. Numbering would be
+                # off, so don't seek.
+                return None
+            page_object_list = self.object_list.filter(pk__in=page_pks)
+
+        return self._get_page(page_object_list, number, self)
+
+
+class KeysetViewPage(ViewPage):
+
+    @cached_property
+    def boundary_pks(self):
+        """pks of the first and last objects on this page."""
+        if isinstance(self.object_list, QuerySet):
+            pks = list(self.object_list.values_list('pk', flat=True))
+        else:
+            pks = [obj.pk for obj in self.object_list]
+        return pks[0], pks[-1]
+
+    def previous_page_link(self):
+        previous_page_number = self.previous_page_number()
+        args = self.args_besides_page | {'page': previous_page_number}
+        if previous_page_number > 1:
+            # Page 1 is just as fast without a cursor, and that keeps
+            # page-1 links simple.
+            args['before'] = self.boundary_pks[0]
+        return '?' + urllib.parse.urlencode(args)
+
+    def next_page_link(self):
+        args = self.args_besides_page | {
+            'page': self.next_page_number(),
+            'after': self.boundary_pks[1],
+        }
+        return '?' + urllib.parse.urlencode(args)
+
+
+def paginate_by_keyset(
+    results, items_per_page, request_args, count_limit=None,
+    non_null_ordering_exprs=None,
+):
+    """
+    Like paginate(), but uses keyset pagination (see KeysetPaginator)
+    when the request args have a page cursor.
+    """
+    paginator = KeysetPaginator(
+        request_args, results, items_per_page, count_limit=count_limit,
+        non_null_ordering_exprs=non_null_ordering_exprs)
+    request_args = request_args or dict()
+
+    try:
+        page = int(request_args.get('page', '1'))
+    except ValueError:
+        page = 1
+
+    for cursor_arg in paginator.cursor_args:
+        try:
+            cursor_pk = int(request_args.get(cursor_arg, ''))
+        except ValueError:
+            continue
+        page_results = paginator.page_from_cursor(
+            page, cursor_arg, cursor_pk)
+        if page_results is not None:
+            return page_results
+
+    # No usable cursor; use OFFSET pagination.
+    try:
+        page_results = paginator.page(page)
+    except (EmptyPage, InvalidPage):
+        page_results = paginator.page(paginator.num_pages)
+
+    return page_results
+
+
 def rand_string(num_of_chars):
     """
     Generates a string of lowercase letters and numbers.
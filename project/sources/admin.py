@@ -7,3 +7,9 @@ from .models import Source
 @admin.register(Source)
 class SourceAdmin(GuardedModelAdmin):
     list_display = ('name', 'visibility', 'create_date')
+
+    def delete_queryset(self, request, queryset):
+        # Delete one by one, so that Source.delete() can clean up
+        # the source's files in storage.
+        for source in queryset:
+            source.delete()
@@ -417,6 +417,16 @@ class Source(models.Model):
         return {field: str(getattr(self, field)) for
                 field in field_names}
 
+    def delete(self, *args, **kwargs):
+        from vision_backend.label_manifest import TrainingLabelManifest
+
+        source_id = self.pk
+        return_values = super().delete(*args, **kwargs)
+        # This file isn't tied to any DB row, so it doesn't get cleaned up
+        # along with the cascade-deleted objects.
+        TrainingLabelManifest.delete(source_id)
+        return return_values
+
     def __str__(self):
         """
         To-string method.
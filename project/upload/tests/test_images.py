@@ -49,6 +49,16 @@ class PermissionTest(BasePermissionTest):
         self.assertPermissionLevel(
             url, self.SOURCE_EDIT, is_json=True, post_data={})
 
+    def test_images_batch_ajax(self):
+        url = reverse('upload_images_batch_ajax', args=[self.source.pk])
+
+        self.source_to_private()
+        self.assertPermissionLevel(
+            url, self.SOURCE_EDIT, is_json=True, post_data={})
+        self.source_to_public()
+        self.assertPermissionLevel(
+            url, self.SOURCE_EDIT, is_json=True, post_data={})
+
 
 class PreviewTest(ClientTest):
     """
@@ -257,6 +267,111 @@ class BasicsTest(UploadProcessTest):
         self.assertTrue(default_storage.exists(img.original_file.name))
 
 
+class BatchUploadTest(ClientTest):
+    """
+    Uploading multiple images in one request.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = cls.create_user()
+        cls.source = cls.create_source(
+            cls.user,
+            default_point_generation_method=dict(type='simple', points=5),
+        )
+
+    def submit_upload(self, files, names):
+        self.client.force_login(self.user)
+        response = self.client.post(
+            reverse('upload_images_batch_ajax', args=[self.source.pk]),
+            dict(files=files, names=names),
+        )
+        return response.json()
+
+    def test_multiple(self):
+        response_json = self.submit_upload(
+            [
+                self.sample_image_as_file('1.png'),
+                self.sample_image_as_file('2.jpg'),
+            ],
+            ['1.png', '2.jpg'],
+        )
+
+        statuses = response_json['statuses']
+        self.assertEqual(len(statuses), 2)
+        for status, name in zip(statuses, ['1.png', '2.jpg']):
+            self.assertTrue(status['success'])
+            image = Image.objects.get(pk=status['image_id'])
+            self.assertEqual(
+                status['link'], reverse('image_detail', args=[image.pk]))
+            self.assertEqual(image.metadata.name, name)
+            self.assertEqual(image.point_set.count(), 5)
+            self.assertEqual(
+                sorted(image.point_set.values_list(
+                    'point_number', flat=True)),
+                [1, 2, 3, 4, 5])
+            self.assertEqual(image.annoinfo.status, 'unclassified')
+            self.assertFalse(image.features.extracted)
+            self.assertTrue(default_storage.exists(image.original_file.name))
+
+    def test_errors_dont_block_other_files(self):
+        self.upload_image(
+            self.user, self.source, image_options=dict(filename='1.png'))
+
+        response_json = self.submit_upload(
+            [
+                self.sample_image_as_file('1.png'),
+                ContentFile('some text', name='2.txt'),
+                self.sample_image_as_file('3.png'),
+                self.sample_image_as_file('3.png'),
+            ],
+            ['1.png', '2.txt', '3.png', '3.PNG'],
+        )
+
+        statuses = response_json['statuses']
+        self.assertDictEqual(
+            statuses[0], dict(error="Image with this name already exists."))
+        self.assertDictEqual(
+            statuses[1],
+            dict(error=(
+                "Image file: The file is either a corrupt image,"
+                " or in a file format that we don't support."
+            )),
+        )
+        self.assertTrue(statuses[2]['success'])
+        self.assertDictEqual(
+            statuses[3], dict(error="Image with this name already exists."),
+            msg="Names should be unique within the batch too")
+
+        self.assertEqual(self.source.image_set.count(), 2)
+
+    def test_names_mismatch(self):
+        response_json = self.submit_upload(
+            [self.sample_image_as_file('1.png')], ['1.png', '2.png'])
+
+        self.assertDictEqual(
+            response_json,
+            dict(error="Each image file must have exactly one name."))
+        self.assertEqual(self.source.image_set.count(), 0)
+
+    @override_settings(IMAGE_UPLOAD_MAX_BATCH_SIZE=2)
+    def test_max_batch_size(self):
+        response_json = self.submit_upload(
+            [
+                self.sample_image_as_file('1.png'),
+                self.sample_image_as_file('2.png'),
+                self.sample_image_as_file('3.png'),
+            ],
+            ['1.png', '2.png', '3.png'],
+        )
+
+        self.assertDictEqual(
+            response_json,
+            dict(error="Can't upload more than 2 images at once."))
+        self.assertEqual(self.source.image_set.count(), 0)
+
+
 class FormatTest(UploadProcessTest):
     """
     Tests pertaining to filetype, filesize and dimensions.
@@ -11,6 +11,8 @@ urlpatterns = [
          views.upload_images_preview_ajax, name="upload_images_preview_ajax"),
     path('images_ajax/',
          views.upload_images_ajax, name="upload_images_ajax"),
+    path('images_batch_ajax/',
+         views.upload_images_batch_ajax, name="upload_images_batch_ajax"),
 
     path('metadata/',
          views.upload_metadata, name="upload_metadata"),
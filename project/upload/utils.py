@@ -9,8 +9,9 @@ import charset_normalizer
 
 from annotations.models import ImageAnnotationInfo
 from images.forms import MetadataForm
+from images.model_utils import bump_image_set_version, ImageSetVersionKinds
 from images.models import Image, Metadata
-from images.utils import generate_points
+from images.utils import generate_points_for_images
 from lib.exceptions import FileProcessError
 from sources.models import Source
 from sources.utils import (
@@ -308,31 +309,54 @@ def metadata_preview(csv_metadata, source):
 
 
 def upload_image_process(image_file, image_name, source, current_user):
+    return upload_images_process(
+        [(image_file, image_name)], source, current_user)[0]
 
-    # Save the image into the DB
-    img = Image(
-        original_file=image_file,
-        uploaded_by=current_user,
-        point_generation_method=source.default_point_generation_method,
-        source=source,
-    )
-    img.save()
-
-    metadata_obj = Metadata(
-        image=img,
-        source=source,
-        name=image_name,
-        annotation_area=source.image_annotation_area,
-    )
-    metadata_obj.save()
 
-    annotation_info = ImageAnnotationInfo(image=img, source=source)
-    annotation_info.save()
+def upload_images_process(
+    files_and_names: list[tuple], source, current_user,
+) -> list[Image]:
+    """
+    Save uploaded images, along with their related objects and points.
+    Each image is saved individually, since that's when its file gets
+    saved to storage; everything else is created in bulk.
 
-    features = Features(image=img)
-    features.save()
+    :param files_and_names: (image file, image name) tuples.
+    :return: The saved images, in the same order.
+    """
+    images = []
+    for image_file, image_name in files_and_names:
+        img = Image(
+            original_file=image_file,
+            uploaded_by=current_user,
+            point_generation_method=source.default_point_generation_method,
+            source=source,
+        )
+        img.save()
+        images.append(img)
+
+    metadata_objs = Metadata.objects.bulk_create([
+        Metadata(
+            image=img,
+            source=source,
+            name=image_name,
+            annotation_area=source.image_annotation_area,
+        )
+        for img, (_, image_name) in zip(images, files_and_names)
+    ])
+    # bulk_create() skips Metadata.save(), which would do this per image.
+    bump_image_set_version(source.pk, ImageSetVersionKinds.IMAGES)
+    for img, metadata_obj in zip(images, metadata_objs):
+        img.metadata = metadata_obj
+
+    ImageAnnotationInfo.objects.bulk_create([
+        ImageAnnotationInfo(image=img, source=source) for img in images
+    ])
+    Features.objects.bulk_create([
+        Features(image=img) for img in images
+    ])
 
     # Generate and save points
-    generate_points(img)
+    generate_points_for_images(images)
 
-    return img
+    return images
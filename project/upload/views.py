@@ -21,7 +21,11 @@ from vision_backend.utils import schedule_source_check_on_commit
 from .forms import (
     CSVImportForm, ImageUploadForm, ImageUploadFrontendForm)
 from .utils import (
-    metadata_csv_to_dict, metadata_preview, upload_image_process)
+    metadata_csv_to_dict,
+    metadata_preview,
+    upload_image_process,
+    upload_images_process,
+)
 
 
 @source_permission_required('source_id', perm=Source.PermTypes.EDIT.code)
@@ -167,6 +171,73 @@ def upload_images_ajax(request, source_id):
     ))
 
 
+@require_POST
+@source_permission_required(
+    'source_id', perm=Source.PermTypes.EDIT.code, ajax=True)
+def upload_images_batch_ajax(request, source_id):
+    """
+    Multi-image version of upload_images_ajax(). Takes several image
+    files (files) and their names (names) in one request, and saves all
+    the valid ones together.
+    Returns a status for each file, in the same order as the files.
+    """
+    source = get_object_or_404(Source, id=source_id)
+
+    files = request.FILES.getlist('files')
+    names = request.POST.getlist('names')
+    if len(files) != len(names):
+        return JsonResponse(dict(
+            error="Each image file must have exactly one name.",
+        ))
+    if len(files) > settings.IMAGE_UPLOAD_MAX_BATCH_SIZE:
+        return JsonResponse(dict(
+            error=(
+                f"Can't upload more than"
+                f" {settings.IMAGE_UPLOAD_MAX_BATCH_SIZE} images at once."),
+        ))
+
+    statuses = [None] * len(files)
+    upload_indices = []
+    files_and_names = []
+    # Lowercase, since names are unique case-insensitively.
+    batch_names = set()
+
+    for index, (image_file, name) in enumerate(zip(files, names)):
+        image_form = ImageUploadForm(dict(name=name), dict(file=image_file))
+        if not image_form.is_valid():
+            statuses[index] = dict(error=get_one_form_error(image_form))
+            continue
+
+        image_name = image_form.cleaned_data['name']
+        if (
+            image_name.lower() in batch_names
+            or find_dupe_image(source, image_name)
+        ):
+            statuses[index] = dict(
+                error="Image with this name already exists.")
+            continue
+
+        batch_names.add(image_name.lower())
+        upload_indices.append(index)
+        files_and_names.append((image_form.cleaned_data['file'], image_name))
+
+    images = upload_images_process(files_and_names, source, request.user)
+    for index, img in zip(upload_indices, images):
+        statuses[index] = dict(
+            success=True,
+            link=reverse('image_detail', args=[img.id]),
+            image_id=img.id,
+        )
+
+    if images:
+        # The uploaded images should be ready for feature extraction.
+        schedule_source_check_on_commit(source_id)
+
+    return JsonResponse(dict(
+        statuses=statuses,
+    ))
+
+
 @source_permission_required('source_id', perm=Source.PermTypes.EDIT.code)
 def upload_metadata(request, source_id):
     """
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+from logging import getLogger
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from spacer.storage import load_classifier
+
+from lib.instrumentation import record_classifier_cache_access
+
+logger = getLogger(__name__)
+
+
+class ClassifierModelCache:
+    """
+    Process-local LRU cache of deserialized (unpickled) classifier models,
+    keyed by Classifier ID.
+
+    Memory use is bounded by the total size of the cached models' files in
+    storage, which is a reasonable proxy for the unpickled models' size.
+    Least recently used models are evicted first.
+
+    Each web/huey worker process has its own copy of this cache. So,
+    invalidations are also recorded in the Django cache, allowing other
+    processes to drop their copies of a model the next time it's requested.
+    """
+    def __init__(self):
+        self._entries: OrderedDict[int, dict] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def invalidation_key(classifier_id: int) -> str:
+        return f'classifier_model_invalidated_{classifier_id}'
+
+    @property
+    def size_bytes(self) -> int:
+        return sum(entry['size'] for entry in self._entries.values())
+
+    def get(self, classifier_id: int):
+        """
+        Get the classifier model for the given Classifier ID, loading it
+        from storage if it's not cached.
+        """
+        invalidated_time = cache.get(self.invalidation_key(classifier_id))
+
+        with self._lock:
+            entry = self._entries.get(classifier_id)
+            if entry and (
+                invalidated_time is None
+                or invalidated_time < entry['load_time']
+            ):
+                self._entries.move_to_end(classifier_id)
+                self.hits += 1
+                record_classifier_cache_access(True)
+                return entry['model']
+
+            if entry:
+                # Invalidated by another process.
+                del self._entries[classifier_id]
+            self.misses += 1
+            record_classifier_cache_access(False)
+
+        # Load outside of the lock, since this can take a while.
+        load_time = time.time()
+        model, size = self._load(classifier_id)
+        logger.debug(
+            f"Loaded classifier {classifier_id} model"
+            f" ({size} bytes) in {time.time() - load_time:.3f} s")
+
+        with self._lock:
+            if size <= settings.CLASSIFIER_MODEL_CACHE_MAX_BYTES:
+                self._entries[classifier_id] = dict(
+                    model=model, size=size, load_time=load_time)
+                self._entries.move_to_end(classifier_id)
+                self._evict_as_needed()
+
+        return model
+
+    @staticmethod
+    def _load(classifier_id: int):
+        filepath = settings.ROBOT_MODEL_FILE_PATTERN.format(pk=classifier_id)
+        # spacer's load_classifier() has its own lru_cache, which is bounded
+        # by entry count instead of size. We bypass that.
+        model = load_classifier.__wrapped__(
+            default_storage.spacer_data_loc(filepath))
+        return model, default_storage.size(filepath)
+
+    def _evict_as_needed(self):
+        while self.size_bytes > settings.CLASSIFIER_MODEL_CACHE_MAX_BYTES:
+            # Pop the least recently used.
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def invalidate(self, classifier_id: int):
+        """
+        Drop the given classifier's model from this process's cache,
+        and have other processes do the same.
+        """
+        with self._lock:
+            self._entries.pop(classifier_id, None)
+        cache.set(
+            self.invalidation_key(classifier_id), time.time(),
+            timeout=settings.CLASSIFIER_MODEL_CACHE_INVALIDATION_TIMEOUT)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                hits=self.hits,
+                misses=self.misses,
+                evictions=self.evictions,
+                entries=len(self._entries),
+                size_bytes=self.size_bytes,
+            )
+
+
+classifier_model_cache = ClassifierModelCache()
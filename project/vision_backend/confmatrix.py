@@ -25,17 +25,22 @@ class ConfMatrix:
 
       if not len(gtlabels) == len(estlabels):
          raise Exception('intput gtlabels and estlabels must have the same length')
-      for (gtl, estl) in zip(gtlabels, estlabels):
-         assert gtl > -1 and estl > -1, 'label index must be positive'
-         self.cm[gtl, estl] += 1
+      gtlabels = np.asarray(gtlabels, dtype=int)
+      estlabels = np.asarray(estlabels, dtype=int)
+      assert np.all(gtlabels > -1) and np.all(estlabels > -1), 'label index must be positive'
+      # Tally all (gt, est) pairs at once as flat indices into the matrix.
+      self.cm += np.bincount(
+         gtlabels * self.nclasses + estlabels,
+         minlength=self.nclasses * self.nclasses,
+      ).reshape(self.nclasses, self.nclasses)
 
    def add_select(self, gtlabels, estlabels, scores, th):
       """
       Calls add but only for scores above a certain threshold.
       """
-      gt = [g for (g, s) in zip(gtlabels, scores) if s > th]
-      est = [e for (e, s) in zip(estlabels, scores) if s > th]
-      self.add(gt, est)
+      keep = np.asarray(scores) > th
+      self.add(np.asarray(gtlabels, dtype=int)[keep],
+               np.asarray(estlabels, dtype=int)[keep])
 
    def sort(self, sort_index = None):
       """
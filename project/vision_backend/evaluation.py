@@ -0,0 +1,169 @@
+from io import BytesIO
+from logging import getLogger
+import zipfile
+
+import numpy as np
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from .utils import get_alleviate, labelset_mapper, map_labels
+
+logger = getLogger(__name__)
+
+
+def confusion_matrices_by_threshold(
+    gt: np.ndarray, est: np.ndarray, scores: np.ndarray,
+    nclasses: int, thresholds: np.ndarray,
+) -> np.ndarray:
+    """
+    Confusion matrices of the points whose scores are above each of the
+    given ascending thresholds, as an array of shape
+    (len(thresholds), nclasses, nclasses).
+    """
+    threshold_count = len(thresholds)
+    # How many of the thresholds each point's score is above. A point
+    # counts toward matrices 0 through (that number - 1).
+    passed_counts = np.searchsorted(thresholds, scores, side='left')
+    tallies = np.bincount(
+        (passed_counts * nclasses + gt) * nclasses + est,
+        minlength=(threshold_count + 1) * nclasses * nclasses,
+    ).reshape(threshold_count + 1, nclasses, nclasses)
+    # Matrix i is the sum of tallies i+1 and up.
+    return np.cumsum(tallies[::-1], axis=0)[::-1][1:]
+
+
+class ClassifierEvaluation:
+    """
+    A classifier's results on its validation set, in the forms shown on
+    the source's backend page: confusion matrices for each label mode and
+    confidence threshold, and the alleviate curves.
+
+    Computed once from the classifier's ValResults, and saved to storage
+    as an .npz file, so page views don't have to recompute anything.
+    """
+    # Bump this when the file layout changes, so that existing files get
+    # recomputed instead of misread.
+    format_version = 1
+
+    # Confidence thresholds, as accepted by BackendMainForm.
+    threshold_percents = np.arange(0, 100+1)
+
+    def __init__(self, classifier_id: int, arrays: dict):
+        self.classifier_id = classifier_id
+        self.arrays = arrays
+
+    @staticmethod
+    def get_filepath(classifier_id: int) -> str:
+        return settings.ROBOT_MODEL_EVALUATION_PATTERN.format(
+            pk=classifier_id)
+
+    @classmethod
+    def compute(cls, classifier) -> 'ClassifierEvaluation':
+        valres = classifier.valres
+        gt = np.asarray(valres.gt, dtype=int)
+        est = np.asarray(valres.est, dtype=int)
+        scores = np.asarray(valres.scores, dtype=float)
+        thresholds = cls.threshold_percents / 100
+
+        func_classmap, func_classnames = labelset_mapper(
+            'func', valres.classes, classifier.source)
+        func_gt = np.asarray(map_labels(gt, func_classmap), dtype=int)
+        func_est = np.asarray(map_labels(est, func_classmap), dtype=int)
+
+        arrays = dict(
+            format_version=np.array(cls.format_version),
+            classes=np.asarray(valres.classes, dtype=np.int64),
+            func_classmap=np.array(
+                [func_classmap[i] for i in range(len(valres.classes))],
+                dtype=np.int64),
+            cms_full=confusion_matrices_by_threshold(
+                gt, est, scores, len(valres.classes), thresholds),
+            cms_func=confusion_matrices_by_threshold(
+                func_gt, func_est, scores, len(func_classnames), thresholds),
+        )
+
+        if len(gt) > 0:
+            acc_full, ratios, confs = get_alleviate(gt, est, scores)
+            acc_func, _, _ = get_alleviate(func_gt, func_est, scores)
+        else:
+            acc_full, ratios, confs, acc_func = [], [], [], []
+        arrays.update(
+            alleviate_acc_full=np.array(acc_full, dtype=float),
+            alleviate_acc_func=np.array(acc_func, dtype=float),
+            alleviate_ratios=np.array(ratios, dtype=float),
+            alleviate_confs=np.array(confs, dtype=float),
+        )
+
+        return cls(classifier.pk, arrays)
+
+    @classmethod
+    def load(cls, classifier_id: int) -> 'ClassifierEvaluation | None':
+        filepath = cls.get_filepath(classifier_id)
+        if not default_storage.exists(filepath):
+            return None
+
+        try:
+            with default_storage.open(filepath) as f:
+                npz = np.load(BytesIO(f.read()))
+                arrays = {key: npz[key] for key in npz.files}
+        except (OSError, ValueError, zipfile.BadZipFile) as e:
+            logger.warning(
+                f"Evaluation of classifier {classifier_id}"
+                f" couldn't be read, so it'll be recomputed: {e!r}")
+            return None
+
+        if int(arrays.get('format_version', -1)) != cls.format_version:
+            return None
+        return cls(classifier_id, arrays)
+
+    @classmethod
+    def get(cls, classifier) -> 'ClassifierEvaluation':
+        """
+        Load the classifier's evaluation, computing and saving it first if
+        needed (such as for classifiers trained before evaluations were
+        saved).
+        """
+        evaluation = cls.load(classifier.pk)
+        if evaluation is None:
+            evaluation = cls.compute(classifier)
+            evaluation.save()
+        return evaluation
+
+    def save(self):
+        stream = BytesIO()
+        np.savez_compressed(stream, **self.arrays)
+        stream.seek(0)
+
+        filepath = self.get_filepath(self.classifier_id)
+        # Storage save() doesn't overwrite; it would pick a different
+        # filename instead.
+        if default_storage.exists(filepath):
+            default_storage.delete(filepath)
+        default_storage.save(filepath, stream)
+
+    @property
+    def classes(self) -> list[int]:
+        return self.arrays['classes'].tolist()
+
+    def matches_func_classmap(self, func_classmap: dict) -> bool:
+        """
+        Functional groups are determined by labels' current groups, which
+        could have changed since this evaluation was computed.
+        """
+        return self.arrays['func_classmap'].tolist() == [
+            func_classmap[i] for i in range(len(self.classes))]
+
+    def confusion_matrix(
+        self, label_mode: str, confidence_threshold: int,
+    ) -> np.ndarray:
+        return self.arrays[f'cms_{label_mode}'][confidence_threshold]
+
+    def alleviate_curves(self) -> dict[str, list]:
+        confs = self.arrays['alleviate_confs'].tolist()
+        return {
+            member: [
+                [conf, value] for value, conf
+                in zip(self.arrays[f'alleviate_{member}'].tolist(), confs)
+            ]
+            for member in ['acc_full', 'acc_func', 'ratios']
+        }
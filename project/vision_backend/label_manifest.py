@@ -0,0 +1,169 @@
+from io import BytesIO
+from logging import getLogger
+import zipfile
+
+import numpy as np
+from django.conf import settings
+from django.core.files.storage import default_storage
+
+from annotations.models import Annotation
+
+logger = getLogger(__name__)
+
+
+class TrainingLabelManifest:
+    """
+    Per-image training labels of a source, persisted in storage so that
+    classifier training doesn't have to re-read every annotation from the
+    DB each time.
+
+    Stored as a numpy .npz file of columnar arrays: one entry per image
+    (image_ids, image_marks, offsets) and one entry per annotation (rows,
+    columns, label_ids). Image i's labels are at offsets[i]:offsets[i+1]
+    of the annotation arrays.
+
+    An image's mark identifies the state of its annotations: it's the
+    date of the image's latest annotation change, which is bumped
+    whenever any of its annotations are added, changed, or re-confirmed.
+    When an image's current mark differs from the manifest's, only that
+    image's annotations are re-read.
+    """
+    # Bump this when the file layout changes, so that existing manifests
+    # get rebuilt instead of misread.
+    format_version = 1
+
+    def __init__(self, source_id: int, image_labels: dict = None):
+        self.source_id = source_id
+        # Image ID -> (mark, list of (row, column, label_id))
+        self.image_labels: dict[int, tuple[int, list]] = image_labels or {}
+
+    @property
+    def filepath(self) -> str:
+        return settings.TRAINING_LABELS_MANIFEST_PATTERN.format(
+            source_id=self.source_id)
+
+    @staticmethod
+    def mark_from_date(annotation_date) -> int:
+        if annotation_date is None:
+            return 0
+        # Microseconds since epoch.
+        return round(annotation_date.timestamp() * 1000000)
+
+    @classmethod
+    def load(cls, source_id: int) -> 'TrainingLabelManifest':
+        """
+        Load the source's manifest from storage. If there's no usable
+        manifest, returns an empty one, which means all labels will be
+        read from the DB on the next update.
+        """
+        manifest = cls(source_id)
+        if not default_storage.exists(manifest.filepath):
+            return manifest
+
+        try:
+            with default_storage.open(manifest.filepath) as f:
+                arrays = np.load(BytesIO(f.read()))
+                if int(arrays['format_version']) != cls.format_version:
+                    return manifest
+                image_ids = arrays['image_ids'].tolist()
+                image_marks = arrays['image_marks'].tolist()
+                offsets = arrays['offsets'].tolist()
+                annotations = list(zip(
+                    arrays['rows'].tolist(),
+                    arrays['columns'].tolist(),
+                    arrays['label_ids'].tolist(),
+                ))
+        except (KeyError, OSError, ValueError, zipfile.BadZipFile) as e:
+            logger.warning(
+                f"Training label manifest for source {source_id}"
+                f" couldn't be read, so it'll be rebuilt: {e!r}")
+            return manifest
+
+        for index, image_id in enumerate(image_ids):
+            manifest.image_labels[image_id] = (
+                image_marks[index],
+                annotations[offsets[index]:offsets[index+1]],
+            )
+        return manifest
+
+    def save(self):
+        image_ids = sorted(self.image_labels.keys())
+        image_marks = []
+        offsets = [0]
+        annotations = []
+        for image_id in image_ids:
+            mark, labels = self.image_labels[image_id]
+            image_marks.append(mark)
+            annotations.extend(labels)
+            offsets.append(len(annotations))
+
+        if annotations:
+            rows, columns, label_ids = zip(*annotations)
+        else:
+            rows, columns, label_ids = [], [], []
+
+        stream = BytesIO()
+        np.savez_compressed(
+            stream,
+            format_version=np.array(self.format_version),
+            image_ids=np.array(image_ids, dtype=np.int64),
+            image_marks=np.array(image_marks, dtype=np.int64),
+            offsets=np.array(offsets, dtype=np.int64),
+            rows=np.array(rows, dtype=np.int32),
+            columns=np.array(columns, dtype=np.int32),
+            label_ids=np.array(label_ids, dtype=np.int64),
+        )
+        stream.seek(0)
+
+        # Storage save() doesn't overwrite; it would pick a different
+        # filename instead.
+        if default_storage.exists(self.filepath):
+            default_storage.delete(self.filepath)
+        default_storage.save(self.filepath, stream)
+
+    @classmethod
+    def delete(cls, source_id: int):
+        manifest = cls(source_id)
+        if default_storage.exists(manifest.filepath):
+            default_storage.delete(manifest.filepath)
+
+    def update(
+        self, image_marks: dict[int, int], chunk_size: int = 10000,
+    ) -> bool:
+        """
+        Bring the manifest in line with the given images, which map image
+        IDs to their current marks. Images not in image_marks are dropped,
+        and images whose marks changed (or which are new) get their labels
+        re-read from the DB, in a single query.
+
+        Returns True if anything changed, meaning the manifest should be
+        saved.
+        """
+        removed_ids = self.image_labels.keys() - image_marks.keys()
+        for image_id in removed_ids:
+            del self.image_labels[image_id]
+
+        stale_ids = [
+            image_id for image_id, mark in image_marks.items()
+            if image_id not in self.image_labels
+            or self.image_labels[image_id][0] != mark
+        ]
+        if not stale_ids:
+            return len(removed_ids) > 0
+
+        for image_id in stale_ids:
+            self.image_labels[image_id] = (image_marks[image_id], [])
+
+        annotation_values = (
+            Annotation.objects.filter(image_id__in=stale_ids)
+            .order_by('image_id', 'point__point_number')
+            .values_list('image_id', 'point__row', 'point__column', 'label_id')
+            .iterator(chunk_size=chunk_size)
+        )
+        for image_id, row, column, label_id in annotation_values:
+            self.image_labels[image_id][1].append((row, column, label_id))
+
+        return True
+
+    def labels_for_image(self, image_id: int) -> list:
+        return self.image_labels[image_id][1]
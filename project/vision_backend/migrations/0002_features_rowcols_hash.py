@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-16 23:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('vision_backend', '0001_squashed_0036_sourceclassifieroptions_populate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='features',
+            name='rowcols_hash',
+            field=models.CharField(blank=True, default='', max_length=64),
+        ),
+    ]
@@ -12,6 +12,7 @@ from images.models import Image, Point
 from labels.models import Label, LocalLabel
 from lib.utils import date_display
 from sources.models import Source
+from .classifier_cache import classifier_model_cache
 from .common import ClassifierStatuses, Extractors, SourceExtractorChoices
 
 
@@ -120,6 +121,12 @@ class Features(models.Model):
     # When were the features extracted
     extracted_date = models.DateTimeField(null=True)
 
+    # Fingerprint of the feature vector's point rows/columns (see
+    # utils.rowcols_fingerprint()), so they can be checked against the
+    # DB's points without loading the feature vector from S3.
+    # Blank if not computed yet, or if the features have no rowcols.
+    rowcols_hash = models.CharField(max_length=64, blank=True, default='')
+
     @property
     def data_loc(self) -> DataLocation:
         return default_storage.spacer_data_loc(
@@ -207,6 +214,25 @@ class SourceClassifierOptions(models.Model):
         choices=SourceExtractorChoices.choices,
         default=SourceExtractorChoices.EFFICIENTNET.value)
 
+    def save(self, *args, **kwargs):
+        previous_classifier_id = None
+        if self.pk:
+            previous_classifier_id = (
+                SourceClassifierOptions.objects.filter(pk=self.pk)
+                .values_list('deployed_classifier_id', flat=True)
+                .first()
+            )
+
+        super().save(*args, **kwargs)
+
+        if (
+            previous_classifier_id
+            and previous_classifier_id != self.deployed_classifier_id
+        ):
+            # The previously deployed classifier's model is probably no
+            # longer needed in memory.
+            classifier_model_cache.invalidate(previous_classifier_id)
+
     @property
     def feature_extractor(self) -> str | None:
         if not self.trains_own_classifiers and not self.deployed_classifier:
@@ -1,4 +1,5 @@
 import abc
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
 import json
 from logging import getLogger
@@ -26,14 +27,47 @@ class BaseQueue(abc.ABC):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def collect_jobs(self, jobs: list) -> tuple[list[JobReturnMsg], list[str]]:
+    def fetch_results(self, jobs: list):
+        """
+        Fetch what's needed to collect the given jobs: job statuses, result
+        messages, etc.
+        This must not touch the database or change the jobs' state, so that
+        it's safe to run in another thread, and safe to discard the
+        fetched data without collecting.
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def process_fetched_results(
+        self, jobs: list, fetched
+    ) -> tuple[list[JobReturnMsg], list[str]]:
+        """
+        Mark the given jobs as collected, using the output of
+        fetch_results(). Return the jobs' result messages and statuses.
+        """
         raise NotImplementedError
 
+    def collect_jobs(self, jobs: list) -> tuple[list[JobReturnMsg], list[str]]:
+        return self.process_fetched_results(jobs, self.fetch_results(jobs))
+
 
 def get_queue_class() -> Type[BaseQueue]:
     return import_string(settings.SPACER_QUEUE_CHOICE)
 
 
+def map_concurrently(func, items: list) -> list:
+    """
+    Like list(map(func, items)), but with up to SPACER_COLLECT_WORKERS
+    threads. Meant for I/O-bound funcs such as result-message downloads.
+    """
+    if settings.SPACER_COLLECT_WORKERS <= 1 or len(items) <= 1:
+        return [func(item) for item in items]
+    with ThreadPoolExecutor(
+        max_workers=settings.SPACER_COLLECT_WORKERS
+    ) as executor:
+        return list(executor.map(func, items))
+
+
 class LocalQueue(BaseQueue):
     """
     Used for testing the vision-backend Django tasks.
@@ -62,25 +96,25 @@ class LocalQueue(BaseQueue):
         filenames.sort()
         return filenames
 
-    def collect_jobs(
-        self, job_filenames: list[str]
-    ) -> tuple[list[JobReturnMsg], list[str]]:
+    @staticmethod
+    def read_result(job_filename: str) -> JobReturnMsg:
+        filepath = default_storage.path_join('backend_job_res', job_filename)
+        with default_storage.open(filepath) as results_file:
+            return JobReturnMsg.deserialize(json.load(results_file))
 
-        results = []
-        statuses = []
+    def fetch_results(self, job_filenames: list[str]) -> list[JobReturnMsg]:
+        # Read the job result messages
+        return map_concurrently(self.read_result, job_filenames)
+
+    def process_fetched_results(
+        self, job_filenames: list[str], return_msgs: list[JobReturnMsg]
+    ) -> tuple[list[JobReturnMsg], list[str]]:
 
         for job_filename in job_filenames:
-            # Read the job result message
-            filepath = default_storage.path_join(
-                'backend_job_res', job_filename)
-            with default_storage.open(filepath) as results_file:
-                return_msg = JobReturnMsg.deserialize(json.load(results_file))
             # Delete the job result file
-            default_storage.delete(filepath)
-
-            # Unlike BatchQueue, LocalQueue is only aware of the
-            # jobs that successfully output their results.
-            results.append(return_msg)
-            statuses.append('SUCCEEDED')
+            default_storage.delete(
+                default_storage.path_join('backend_job_res', job_filename))
 
-        return results, statuses
+        # Unlike BatchQueue, LocalQueue is only aware of the
+        # jobs that successfully output their results.
+        return return_msgs, ['SUCCEEDED'] * len(return_msgs)
@@ -5,43 +5,55 @@ import abc
 from collections import Counter, defaultdict
 from logging import getLogger
 import re
+import time
 
 import numpy as np
 from django.conf import settings
+from django.core.files.storage import default_storage
 from django.core.mail import mail_admins
 from django.db import transaction
-from django.db.models import F
+from django.db.models import QuerySet
 from django.utils import timezone
-from spacer.data_classes import ImageLabels
+from spacer.data_classes import ImageFeatures, ImageLabels
 from spacer.messages import (
     ClassifyImageMsg,
     ClassifyReturnMsg,
     ExtractFeaturesMsg,
+    ExtractFeaturesReturnMsg,
     JobReturnMsg,
     TrainClassifierMsg,
+    TrainClassifierReturnMsg,
+    TrainingTaskLabels,
 )
 
 from accounts.utils import get_robot_user
-from annotations.models import Annotation
+from annotations.models import Annotation, ImageAnnotationInfo
 from api_core.models import ApiJob, ApiJobUnit
 from errorlogs.utils import instantiate_error_log
 from images.models import Image, Point
 from jobs.exceptions import JobError
 from jobs.models import Job
-from jobs.utils import finish_jobs
+from jobs.utils import finish_jobs, schedule_job_on_commit
 from labels.models import Label
+from .classifier_cache import classifier_model_cache
 from .common import ClassifierStatuses
+from .evaluation import ClassifierEvaluation
 from .exceptions import RowColumnMismatchError
+from .label_manifest import TrainingLabelManifest
 from .models import Classifier, ClassifyImageEvent, Features, Score
 from .utils import (
     extractor_to_name,
-    reset_invalid_features_bulk,
+    reset_features_bulk,
+    rowcols_fingerprint,
     schedule_source_check_on_commit,
     source_is_finished_with_core_jobs,
 )
 
 logger = getLogger(__name__)
 
+# Number of annotations to fetch at a time when assembling training labels.
+TRAINING_LABELS_CHUNK_SIZE = 10000
+
 
 # This function is generally called outside of Django views, meaning the
 # middleware which does atomic transactions isn't active. So we use this
@@ -60,76 +72,32 @@ def add_annotations(image_id: int,
       source's labelset.
     :param classifier: Classifier that will get attribution for the changes.
 
+    The number of DB queries doesn't depend on the number of points: the
+    image's existing annotations are fetched at once, and only the
+    annotations which are new or changed are written, in bulk.
+
     May throw an IntegrityError when trying to save annotations. The caller is
     responsible for handling the error. In this error case, no annotations
     are saved due to the @transaction.atomic decorator.
     """
-    img = Image.objects.get(pk=image_id)
-    points = Point.objects.filter(image=img).order_by('id')
-    event_details = dict()
-
-    create_all = not img.annotation_set.exists()
-    create_all_list = []
-
-    # From spacer 0.2 we store row, col locations in features and in
-    # classifier scores. This allows us to match scores to points
-    # based on (row, col) locations. If not, we have to rely on
-    # the points always being ordered as order_by('id').
-    for itt, point in enumerate(points):
-        if res.valid_rowcol:
-            # Retrieve score vector for (row, column) location
-            try:
-                scores = res[(point.row, point.column)]
-            except KeyError:
-                raise RowColumnMismatchError
-        else:
-            try:
-                _, _, scores = res.scores[itt]
-            except IndexError:
-                raise RowColumnMismatchError
-        label = label_objs[int(np.argmax(scores))]
-
-        if create_all:
-            # Gather annotations to be saved more speedily in bulk. We
-            # only bother with this for the common case where all of them
-            # are new. Outside of that common case, it's typically just a
-            # few annotations being changed.
-            create_all_list.append(Annotation(
-                point=point,
-                image=img,
-                source=img.source,
-                label=label,
-                user=get_robot_user(),
-                robot_version=classifier,
-            ))
-            result = Annotation.objects.UpdateResultsCodes.ADDED.value
-        else:
-            # Individual annotation create/update.
-            result = Annotation.objects.update_point_annotation_if_applicable(
-                point=point,
-                label=label,
-                now_confirmed=False,
-                user_or_robot_version=classifier)
-
-        if result is not None:
-            event_details[point.point_number] = dict(
-                label=label.pk, result=result)
-        # If None, then we decided it's better to not include the point in
-        # the event details at all; e.g. it's a confirmed point that shouldn't
-        # be overwritten by unconfirmed.
-        # TODO: CoralNet 1.15 changed the semantics here; this case used to be
-        #  reported as 'no change'. At some point, a data migration should be
-        #  written to migrate pre-1.15 ClassifyImageEvents to use the new
-        #  semantics.
-        #  This may be difficult, involving cross-referencing reversion entries
-        #  to see if the point was already confirmed at this time, or to see
-        #  if the 'no change' entry actually disagreed with a previous entry.
-        #  There is no rush to do this until the details of pre-1.15
-        #  ClassifyImageEvents are displayed in any way, which will probably be
-        #  done on the Annotation History page at some point.
-
-    if create_all:
-        Annotation.objects.bulk_create(create_all_list)
+    img = Image.objects.select_related('annoinfo').get(pk=image_id)
+    points = list(
+        Point.objects.filter(image=img).order_by('id')
+        .values('id', 'row', 'column', 'point_number'))
+
+    score_matrix = score_matrix_for_points(
+        res, [(p['row'], p['column']) for p in points])
+    label_ids = [
+        label_objs[index].pk for index in np.argmax(score_matrix, axis=1)]
+
+    annotations_by_point_id = {
+        annotation.point_id: annotation
+        for annotation in Annotation.objects.filter(image=img)
+    }
+    new_annotations, changed_annotations, event_details = (
+        annotation_updates_for_image(
+            img, points, label_ids, annotations_by_point_id, classifier))
+    save_annotation_updates(new_annotations, changed_annotations)
 
     event = ClassifyImageEvent(
         source_id=img.source_id,
@@ -163,57 +131,498 @@ def add_scores(image_id: int,
       source's labelset.
     """
     img = Image.objects.get(pk=image_id)
+    points = list(
+        Point.objects.filter(image=img).order_by('id')
+        .values('id', 'row', 'column'))
 
-    # First, delete all scores associated with this image.
-    Score.objects.filter(image=img).delete()
+    score_matrix = score_matrix_for_points(
+        res, [(p['row'], p['column']) for p in points])
+    score_objs = scores_for_image(
+        img, points, score_matrix, [label.pk for label in label_objs])
 
-    # Figure out how many of the (top) scores to store.
-    nbr_scores = min(settings.NBR_SCORES_PER_ANNOTATION, len(res.classes))
+    with transaction.atomic():
+        save_scores_diff([image_id], score_objs)
 
-    # Now, go through and create new ones.
-    points = Point.objects.filter(image=img).order_by('id')
 
-    score_objs = []
-    for itt, point in enumerate(points):
-        if res.valid_rowcol:
-            try:
-                scores = res[(point.row, point.column)]
-            except KeyError:
-                raise RowColumnMismatchError
+def top_score_indices(
+    score_matrix: np.ndarray, nbr_scores: int,
+) -> np.ndarray:
+    """
+    For each row (point) of the score matrix, get the column (class)
+    indices of the nbr_scores highest scores, highest first.
+
+    argpartition() finds each row's top scores without sorting the entire
+    row; then only those top scores get sorted.
+    """
+    num_points, num_classes = score_matrix.shape
+    if nbr_scores < num_classes:
+        top_indices = np.argpartition(
+            -score_matrix, nbr_scores - 1, axis=1)[:, :nbr_scores]
+    else:
+        top_indices = np.tile(np.arange(num_classes), (num_points, 1))
+
+    top_scores = np.take_along_axis(score_matrix, top_indices, axis=1)
+    order = np.argsort(-top_scores, axis=1, kind='stable')
+    return np.take_along_axis(top_indices, order, axis=1)
+
+
+def scores_for_image(
+    image: Image,
+    points: list[dict],
+    score_matrix: np.ndarray,
+    label_ids: list[int],
+) -> list[Score]:
+    """
+    Unsaved Score objects for the top NBR_SCORES_PER_ANNOTATION labels of
+    each point.
+
+    :param points: Point values dicts (with at least 'id'), in the order of
+      the score matrix's rows.
+    :param label_ids: Label IDs in the order of the score matrix's columns.
+    """
+    nbr_scores = min(settings.NBR_SCORES_PER_ANNOTATION, len(label_ids))
+    top_indices = top_score_indices(score_matrix, nbr_scores)
+    top_values = np.rint(
+        np.take_along_axis(score_matrix, top_indices, axis=1) * 100
+    ).astype(int)
+
+    return [
+        Score(
+            source_id=image.source_id,
+            image_id=image.pk,
+            label_id=label_ids[class_index],
+            point_id=point['id'],
+            score=int(value),
+        )
+        for point, point_indices, point_values
+        in zip(points, top_indices.tolist(), top_values.tolist())
+        for class_index, value in zip(point_indices, point_values)
+    ]
+
+
+def save_scores_diff(image_ids: list[int], score_objs: list[Score]):
+    """
+    Make the DB's Scores for the given images match score_objs, inserting,
+    updating, or deleting only the rows that differ.
+    The caller should take care of the atomic transaction.
+    """
+    existing_scores = {
+        (score.point_id, score.label_id): score
+        for score in Score.objects.filter(image_id__in=image_ids)
+        .only('pk', 'point_id', 'label_id', 'score')
+    }
+
+    scores_to_create = []
+    scores_to_update = []
+    for score in score_objs:
+        existing_score = existing_scores.pop(
+            (score.point_id, score.label_id), None)
+        if existing_score is None:
+            scores_to_create.append(score)
+        elif existing_score.score != score.score:
+            existing_score.score = score.score
+            scores_to_update.append(existing_score)
+    # Anything left over is no longer among the top scores.
+    score_ids_to_delete = [score.pk for score in existing_scores.values()]
+
+    if score_ids_to_delete:
+        Score.objects.filter(pk__in=score_ids_to_delete).delete()
+    Score.objects.bulk_update(scores_to_update, ['score'])
+    Score.objects.bulk_create(scores_to_create)
+
+
+def annotation_updates_for_image(
+    image: Image,
+    points: list[dict],
+    label_ids: list[int],
+    annotations_by_point_id: dict[int, Annotation],
+    classifier: Classifier,
+) -> tuple[list[Annotation], list[Annotation], dict]:
+    """
+    Figure out how the image's annotations should change to reflect
+    the classifier's labels for the points. This follows the same logic
+    as Annotation.objects.update_point_annotation_if_applicable():
+    unconfirmed annotations are never saved over confirmed ones.
+
+    :param points: Point values dicts (with at least 'id' and
+      'point_number'), in the same order as label_ids.
+    :param label_ids: The classifier's top label ID for each point.
+    :param annotations_by_point_id: The image's existing annotations.
+    :return: Tuple of unsaved new Annotations, modified existing
+      Annotations which need saving, and ClassifyImageEvent details.
+    """
+    robot_user = get_robot_user()
+    now = timezone.now()
+    new_annotations = []
+    changed_annotations = []
+    event_details = dict()
+
+    for point, label_id in zip(points, label_ids):
+        annotation = annotations_by_point_id.get(point['id'])
+
+        if annotation is None:
+            new_annotations.append(Annotation(
+                point_id=point['id'],
+                image_id=image.pk,
+                source_id=image.source_id,
+                label_id=label_id,
+                user=robot_user,
+                robot_version=classifier,
+            ))
+            result = Annotation.objects.UpdateResultsCodes.ADDED.value
+        elif annotation.confirmed:
+            # Never overwrite confirmed with unconfirmed. It'd be misleading
+            # to report this as 'not changed', since the confirmed label
+            # could disagree with the classifier. So we leave the point out
+            # of the event details.
+            # TODO: CoralNet 1.15 changed the semantics here; this case used
+            #  to be reported as 'no change'. At some point, a data migration
+            #  should be written to migrate pre-1.15 ClassifyImageEvents to
+            #  use the new semantics.
+            #  This may be difficult, involving cross-referencing reversion
+            #  entries to see if the point was already confirmed at this
+            #  time, or to see if the 'no change' entry actually disagreed
+            #  with a previous entry.
+            #  There is no rush to do this until the details of pre-1.15
+            #  ClassifyImageEvents are displayed in any way, which will
+            #  probably be done on the Annotation History page at some point.
+            continue
+        elif annotation.label_id != label_id:
+            annotation.label_id = label_id
+            annotation.user = robot_user
+            annotation.robot_version = classifier
+            # bulk_update() doesn't apply auto_now.
+            annotation.annotation_date = now
+            changed_annotations.append(annotation)
+            result = Annotation.objects.UpdateResultsCodes.CHANGED.value
         else:
-            try:
-                _, _, scores = res.scores[itt]
-            except IndexError:
-                raise RowColumnMismatchError
-        inds = np.argsort(scores)[::-1][:nbr_scores]
-        for ind in inds:
-            score_objs.append(
-                Score(
-                    source=img.source,
-                    image=img,
-                    label=label_objs[int(ind)],
-                    point=point,
-                    score=int(round(scores[ind]*100))
-                )
+            result = Annotation.objects.UpdateResultsCodes.NOT_CHANGED.value
+
+        event_details[point['point_number']] = dict(
+            label=label_id, result=result)
+
+    return new_annotations, changed_annotations, event_details
+
+
+def save_annotation_updates(
+    new_annotations: list[Annotation],
+    changed_annotations: list[Annotation],
+):
+    """
+    Save the results of annotation_updates_for_image() in bulk, and update
+    the affected images' annotation progress.
+    The caller should take care of the atomic transaction.
+    """
+    # Regarding the fields: we only update robot_version when applicable;
+    # otherwise if a reset classifiers job is happening right now, then
+    # this update could hang.
+    Annotation.objects.bulk_update(
+        changed_annotations,
+        ['label', 'robot_version', 'user', 'annotation_date'])
+    # This also updates the annotation progress fields of the images
+    # getting new annotations.
+    Annotation.objects.bulk_create(new_annotations)
+
+    images_with_new_annotations = set(
+        annotation.image_id for annotation in new_annotations)
+    images_with_only_changes = set(
+        annotation.image_id for annotation in changed_annotations
+    ) - images_with_new_annotations
+    ImageAnnotationInfo.objects.filter(
+        image_id__in=images_with_only_changes,
+    ).update_annotation_progress_fields()
+
+
+def score_matrix_for_points(
+    res: ClassifyReturnMsg,
+    rowcols: list[tuple[int, int]],
+) -> np.ndarray:
+    """
+    Arrange the scores in the spacer return message as a 2-D array, with
+    one row per point (in the order of rowcols) and one column per class
+    (in the order of res.classes).
+
+    From spacer 0.2 we store row, col locations in features and in
+    classifier scores. This allows us to match scores to points
+    based on (row, col) locations. If not, we have to rely on
+    the points always being ordered as order_by('id').
+
+    Raises RowColumnMismatchError if the scores can't be matched up
+    with the given rowcols.
+    """
+    if res.valid_rowcol:
+        scores_by_rowcol = {
+            (row, col): scores for row, col, scores in res.scores}
+        try:
+            score_rows = [scores_by_rowcol[rowcol] for rowcol in rowcols]
+        except KeyError:
+            raise RowColumnMismatchError
+    else:
+        if len(res.scores) < len(rowcols):
+            raise RowColumnMismatchError
+        score_rows = [scores for _, _, scores in res.scores[:len(rowcols)]]
+
+    return np.array(score_rows, dtype=float).reshape(
+        len(rowcols), len(res.classes))
+
+
+def classify_features_in_bulk(
+    features_by_image_id: dict[int, ImageFeatures],
+    classifier: Classifier,
+) -> dict[int, ClassifyReturnMsg]:
+    """
+    Equivalent of spacer's classify_features task for many images at once.
+    The classifier model comes from the process's model cache, and all the
+    images' point features are scored as one stacked matrix, instead of one
+    predict call per point.
+    """
+    if not features_by_image_id:
+        return dict()
+
+    clf = classifier_model_cache.get(classifier.pk)
+    classes = clf.classes_.tolist()
+
+    # Images without point features have nothing to score, and their
+    # empty arrays can't be stacked with the others.
+    results = dict()
+    features_to_score = dict()
+    for image_id, features in features_by_image_id.items():
+        if features.point_features:
+            features_to_score[image_id] = features
+        else:
+            results[image_id] = ClassifyReturnMsg(
+                runtime=0,
+                scores=[],
+                classes=classes,
+                valid_rowcol=features.valid_rowcol,
             )
-    Score.objects.bulk_create(score_objs)
+    if not features_to_score:
+        return results
+
+    feature_arrays = [
+        np.array([pf.data for pf in features.point_features], dtype=float)
+        for features in features_to_score.values()
+    ]
+    split_indices = np.cumsum(
+        [len(array) for array in feature_arrays])[:-1]
+
+    start_time = time.time()
+    probabilities = clf.predict_proba(np.vstack(feature_arrays))
+    # Runtime per image, as an approximation.
+    runtime = (time.time() - start_time) / len(feature_arrays)
+
+    for (image_id, features), image_probabilities in zip(
+        features_to_score.items(),
+        np.split(probabilities, split_indices),
+    ):
+        results[image_id] = ClassifyReturnMsg(
+            runtime=runtime,
+            scores=[
+                (pf.row, pf.col, point_probabilities.tolist())
+                for pf, point_probabilities
+                in zip(features.point_features, image_probabilities)
+            ],
+            classes=classes,
+            valid_rowcol=features.valid_rowcol,
+        )
+    return results
+
 
+def classify_images_in_bulk(
+    image_ids: list[int],
+    classifier: Classifier,
+) -> str:
+    """
+    Classify many images of a source with the given classifier, and save
+    the results to the DB with bulk queries: Annotations for images which
+    aren't confirmed yet, plus Scores and ClassifyImageEvents.
+    The outcomes per point are the same as with add_annotations() and
+    add_scores().
+
+    Images whose features can't be matched up with their points get their
+    features reset instead of being classified.
+
+    May throw an IntegrityError when trying to save. The caller is
+    responsible for handling the error. In this error case, nothing
+    is saved.
+    """
+    images = list(
+        Image.objects.filter(pk__in=image_ids)
+        .select_related('features', 'annoinfo')
+        .order_by('pk')
+    )
+
+    features_by_image_id = dict()
+    image_ids_to_reset = []
+    for image in images:
+        try:
+            features_by_image_id[image.pk] = image.features.load()
+        except FileNotFoundError:
+            image_ids_to_reset.append(image.pk)
+
+    results = classify_features_in_bulk(features_by_image_id, classifier)
+
+    points_by_image_id = defaultdict(list)
+    for point_values in (
+        Point.objects.filter(image_id__in=results.keys())
+        .order_by('image_id', 'id')
+        .values('id', 'image_id', 'row', 'column', 'point_number')
+    ):
+        points_by_image_id[point_values['image_id']].append(point_values)
+
+    annotations_by_point_id = {
+        annotation.point_id: annotation
+        for annotation in Annotation.objects.filter(
+            image_id__in=results.keys())
+    }
+
+    new_annotations = []
+    changed_annotations = []
+    new_scores = []
+    events = []
+    result_counter = Counter()
+    classified_image_ids = []
+
+    for image in images:
+        if image.pk not in results:
+            continue
+        res = results[image.pk]
+        points = points_by_image_id[image.pk]
+
+        try:
+            score_matrix = score_matrix_for_points(
+                res, [(p['row'], p['column']) for p in points])
+        except RowColumnMismatchError:
+            image_ids_to_reset.append(image.pk)
+            continue
+
+        classified_image_ids.append(image.pk)
+        new_scores.extend(
+            scores_for_image(image, points, score_matrix, res.classes))
+
+        if image.annoinfo.confirmed:
+            # Only scores are added for confirmed images.
+            continue
+
+        label_ids = [
+            res.classes[index] for index in np.argmax(score_matrix, axis=1)]
+        image_new_annotations, image_changed_annotations, event_details = (
+            annotation_updates_for_image(
+                image, points, label_ids, annotations_by_point_id,
+                classifier))
+        new_annotations.extend(image_new_annotations)
+        changed_annotations.extend(image_changed_annotations)
+        result_counter.update(
+            details['result'] for details in event_details.values())
+
+        events.append(ClassifyImageEvent(
+            # bulk_create() skips Event.save(), which would set this.
+            type=ClassifyImageEvent.type_for_subclass,
+            source_id=image.source_id,
+            image_id=image.pk,
+            classifier_id=classifier.pk,
+            details=event_details,
+        ))
 
-def make_dataset(images: list[Image]) -> ImageLabels:
+    with transaction.atomic():
+        save_annotation_updates(new_annotations, changed_annotations)
+        save_scores_diff(classified_image_ids, new_scores)
+        ClassifyImageEvent.objects.bulk_create(events)
+
+        ImageAnnotationInfo.objects.filter(
+            image_id__in=classified_image_ids,
+        ).update(classifier=classifier)
+
+    if image_ids_to_reset:
+        reset_features_bulk(Image.objects.filter(pk__in=image_ids_to_reset))
+
+    result_message = (
+        f"Used classifier {classifier.pk}:"
+        f" {len(classified_image_ids)} image(s) classified")
+    if result_counter:
+        # sorted() puts added first, then changed, then not changed.
+        result_message += " (" + ", ".join([
+            f"{count} annotations {result}"
+            for result, count in sorted(result_counter.items())
+        ]) + ")"
+    if image_ids_to_reset:
+        result_message += (
+            f". {len(image_ids_to_reset)} image(s) had features not matching"
+            f" their points; feature extraction will be redone for those")
+    return result_message
+
+
+def make_training_labels(
+    images: QuerySet, source_id: int,
+) -> TrainingTaskLabels:
     """
-    Helper function for classifier_submit.
-    Assembles all features and ground truth annotations
-    for training and evaluation of the robot classifier.
+    Helper function for submit_classifier.
+    Assembles the features and ground truth annotations of the train,
+    ref, and val sets for training and evaluation of the robot classifier.
+
+    Labels come from the source's TrainingLabelManifest, which only
+    re-reads annotations of images that were confirmed or changed since
+    the manifest was last updated. So repeat trainings of a large source
+    only query the DB for the few images which actually changed.
+
+    The train+ref vs. val split is defined in advance (see Image.valset),
+    while the train vs. ref split is determined here with mod-10. This
+    matches how it's worked since coralnet 1.0.
     """
-    data = dict()
-    for img in images:
-        anns = Annotation.objects.filter(image=img).\
-            annotate(gt_label=F('label__id')).\
-            annotate(row=F('point__row')). \
-            annotate(col=F('point__column'))
-        data[img.features.data_loc] = [
-            (ann.row, ann.col, ann.gt_label) for ann in anns]
-    return ImageLabels(data)
+    image_values = list(
+        images.order_by('pk').values_list(
+            'pk', 'original_file', 'metadata__name',
+            'annoinfo__last_annotation__annotation_date',
+        )
+    )
+
+    manifest = TrainingLabelManifest.load(source_id)
+    manifest_changed = manifest.update(
+        {
+            image_id: TrainingLabelManifest.mark_from_date(annotation_date)
+            for image_id, _, _, annotation_date in image_values
+        },
+        chunk_size=TRAINING_LABELS_CHUNK_SIZE,
+    )
+    if manifest_changed:
+        manifest.save()
+
+    train_data = dict()
+    ref_data = dict()
+    val_data = dict()
+    train_and_ref_index = 0
+    ref_annotation_count = 0
+    ref_done = False
+
+    for image_id, original_file, image_name, _ in image_values:
+
+        image_labels = manifest.labels_for_image(image_id)
+
+        data_loc = default_storage.spacer_data_loc(
+            settings.FEATURE_VECTOR_FILE_PATTERN.format(
+                full_image_path=original_file))
+
+        if Image.in_valset(image_id, image_name):
+            val_data[data_loc] = image_labels
+            continue
+
+        if not ref_done and train_and_ref_index % 10 == 0:
+            if (ref_annotation_count + len(image_labels)
+                    <= settings.TRAINING_BATCH_LABEL_COUNT):
+                ref_data[data_loc] = image_labels
+                ref_annotation_count += len(image_labels)
+            else:
+                train_data[data_loc] = image_labels
+                ref_done = True
+        else:
+            train_data[data_loc] = image_labels
+        train_and_ref_index += 1
+
+    return TrainingTaskLabels(
+        train=ImageLabels(train_data),
+        ref=ImageLabels(ref_data),
+        val=ImageLabels(val_data),
+    )
 
 
 class SpacerResultHandler(abc.ABC):
@@ -241,14 +650,18 @@ class SpacerResultHandler(abc.ABC):
             else:
                 spacer_error = None
 
-            # CoralNet currently only submits spacer jobs containing a single
-            # task.
-            task = job_res.original_job.tasks[0]
-            spacer_task_results.append(dict(
-                task=task,
-                job_res=job_res,
-                spacer_error=spacer_error,
-            ))
+            # A spacer job may contain multiple tasks (such as packed
+            # feature extractions), each corresponding to one internal Job.
+            # If the spacer job errored, then the error applies to all of
+            # its tasks, since spacer doesn't say which task it came from.
+            for task_index, task in enumerate(job_res.original_job.tasks):
+                spacer_task_results.append(dict(
+                    task=task,
+                    task_res=(
+                        None if spacer_error
+                        else job_res.results[task_index]),
+                    spacer_error=spacer_error,
+                ))
 
         self.jobs_by_id = self.get_internal_jobs(
             [result['task'] for result in spacer_task_results])
@@ -347,7 +760,7 @@ class SpacerResultHandler(abc.ABC):
 
         finish_jobs(finish_jobs_args)
 
-    def handle_spacer_task_result(self, task, job_res, spacer_error):
+    def handle_spacer_task_result(self, task, task_res, spacer_error):
         """
         Handles the result of a spacer task (a sub-unit within a spacer job)
         and raises a JobError if an error is found.
@@ -385,7 +798,8 @@ class SpacerFeatureResultHandler(SpacerResultHandler):
         Features.objects.bulk_update(
             features,
             ['extracted', 'extractor', 'runtime_total',
-             'extractor_loaded_remotely', 'extracted_date', 'has_rowcols'],
+             'extractor_loaded_remotely', 'extracted_date', 'has_rowcols',
+             'rowcols_hash'],
         )
 
         source_ids = set(job.source_id for job in jobs)
@@ -398,7 +812,7 @@ class SpacerFeatureResultHandler(SpacerResultHandler):
     def handle_spacer_task_result(
             self,
             task: ExtractFeaturesMsg,
-            job_res: JobReturnMsg,
+            task_res: ExtractFeaturesReturnMsg | None,
             spacer_error: tuple[str, str] | None) -> None:
 
         internal_job = self.jobs_by_id[self.get_internal_job_id(task)]
@@ -418,9 +832,6 @@ class SpacerFeatureResultHandler(SpacerResultHandler):
             error_class, error_message = spacer_error
             raise JobError(error_message)
 
-        # If there was no spacer error, then a task result is available.
-        task_res = job_res.results[0]
-
         # Check that the row-col information hasn't changed.
         rowcols = [
             (p['row'], p['column']) for p
@@ -446,6 +857,7 @@ class SpacerFeatureResultHandler(SpacerResultHandler):
             task_res.extractor_loaded_remotely
         features.extracted_date = self.now
         features.has_rowcols = True
+        features.rowcols_hash = rowcols_fingerprint(task.rowcols)
 
 
 class SpacerTrainResultHandler(SpacerResultHandler):
@@ -483,7 +895,7 @@ class SpacerTrainResultHandler(SpacerResultHandler):
     def handle_spacer_task_result(
             self,
             task: TrainClassifierMsg,
-            job_res: JobReturnMsg,
+            task_res: TrainClassifierReturnMsg | None,
             spacer_error: tuple[str, str] | None) -> str | None:
 
         # Parse out pk for current and previous classifiers.
@@ -532,15 +944,14 @@ class SpacerTrainResultHandler(SpacerResultHandler):
                 # Note that we could have checked for this before training
                 # as well, but since checking takes a somewhat long time,
                 # we try to only check when we have to (i.e. when a failure
-                # actually happens).
-                reset_invalid_features_bulk(
-                    Image.objects.filter(source_id=classifier.source_id))
+                # actually happens). The check runs as its own job so that
+                # it doesn't hold up collection.
+                schedule_job_on_commit(
+                    'check_features_for_source', classifier.source_id,
+                    source_id=classifier.source_id)
 
             raise JobError(error_message)
 
-        # If there was no spacer error, then a task result is available.
-        task_res = job_res.results[0]
-
         if len(prev_classifier_ids) != len(task_res.pc_accs):
             raise JobError(
                 f"Number of previous classifiers doesn't match between"
@@ -596,6 +1007,17 @@ class SpacerTrainResultHandler(SpacerResultHandler):
             classifier_options.deployed_classifier = classifier
             classifier_options.save()
 
+        # Precompute what the backend page shows about the new classifier.
+        # This is just for display, and the backend page computes it
+        # anyway if it's missing, so a failure here shouldn't fail the
+        # training result.
+        try:
+            ClassifierEvaluation.compute(classifier).save()
+        except Exception:
+            logger.exception(
+                f"Couldn't precompute evaluation of classifier"
+                f" {classifier.pk}")
+
         return f"New classifier accepted: {classifier.pk}"
 
 
@@ -673,7 +1095,7 @@ class SpacerClassifyResultHandler(SpacerResultHandler):
     def handle_spacer_task_result(
             self,
             task: ClassifyImageMsg,
-            job_res: JobReturnMsg,
+            task_res: ClassifyReturnMsg | None,
             spacer_error: tuple[str, str] | None) -> None:
 
         job_id = self.get_internal_job_id(task)
@@ -690,9 +1112,6 @@ class SpacerClassifyResultHandler(SpacerResultHandler):
             error_class, error_message = spacer_error
             raise JobError(error_message)
 
-        # If there was no spacer error, then a task result is available.
-        task_res = job_res.results[0]
-
         classifier_id = job_unit.request_json['classifier_id']
         if classifier_id not in self.labelsets_by_classifier:
             try:
@@ -725,10 +1144,17 @@ class SpacerClassifyResultHandler(SpacerResultHandler):
             for global_label_id in res.classes
         ]
 
+        # Grab the indices of the highest-scoring labels of all points
+        # at once.
+        score_matrix = np.array(
+            [scores for _, _, scores in res.scores], dtype=float,
+        ).reshape(len(res.scores), len(res.classes))
+        top_indices = top_score_indices(score_matrix, nbr_scores)
+
         data = []
-        for row, col, scores in res.scores:
-            # Grab the indices of the highest-scoring labels.
-            best_scoring_indices = np.argsort(scores)[::-1][:nbr_scores]
+        for (row, col, scores), best_scoring_indices in zip(
+            res.scores, top_indices.tolist()
+        ):
             classifications = []
             for ind in best_scoring_indices:
                 class_info = classes_info[ind]
@@ -1,4 +1,5 @@
-from collections import Counter
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
 from logging import getLogger
 
@@ -9,16 +10,13 @@ from django.db.models import F
 from django.utils import timezone
 from spacer.exceptions import TrainingLabelsError
 from spacer.messages import (
-    ClassifyFeaturesMsg,
     ClassifyImageMsg,
     ClassifyReturnMsg,
     DataLocation,
     ExtractFeaturesMsg,
     JobMsg,
     TrainClassifierMsg,
-    TrainingTaskLabels,
 )
-from spacer.tasks import classify_features as spacer_classify_features
 from spacer.task_utils import preprocess_labels
 
 from annotations.models import Annotation
@@ -28,18 +26,23 @@ from images.model_utils import PointGen
 from images.models import Image, Point
 from jobs.exceptions import JobError
 from jobs.models import Job
-from jobs.utils import job_runner, job_starter, schedule_job
+from jobs.utils import (
+    bulk_schedule_jobs, claim_pending_job, finish_jobs, job_runner,
+    job_starter, schedule_job)
 from labels.models import Label
 from sources.models import Source
 from . import task_helpers as th
+from .classifier_cache import classifier_model_cache
 from .common import CLASSIFIER_MAPPINGS, ClassifierStatuses
 from .exceptions import RowColumnMismatchError
+from .label_manifest import TrainingLabelManifest
 from .models import Classifier, Score
 from .queues import get_queue_class
 from .utils import (
     get_extractor,
     reset_features,
     reset_features_bulk,
+    reset_invalid_features_bulk,
     schedule_source_check,
     source_is_finished_with_core_jobs,
 )
@@ -80,10 +83,6 @@ def check_source(source_id):
         # extract features.
         return "Machine classification isn't configured for this source"
 
-    start = timezone.now()
-    wrap_up_time = start + timedelta(minutes=settings.JOB_MAX_MINUTES)
-    timed_out = False
-
     done_caveat = None
 
     # Feature extraction
@@ -118,46 +117,22 @@ def check_source(source_id):
                 f"Feature extraction(s) ready, but not"
                 f" submitted due to training in progress")
 
-        active_extraction_jobs = Job.objects.incomplete().filter(
-            job_name='extract_features',
+        # Schedule extractions all at once (will not be scheduled if an
+        # extraction for the same image is already active)
+        created_jobs = bulk_schedule_jobs(
+            'extract_features',
+            [(image_id,) for image_id
+             in to_extract.values_list('pk', flat=True)],
             source_id=source_id,
         )
-        active_extraction_image_ids = set([
-            int(str_id) for str_id in
-            active_extraction_jobs.values_list('arg_identifier', flat=True)
-        ])
-
-        # Try to schedule extractions (will not be scheduled if an extraction
-        # for the same image is already active)
-        num_scheduled_extractions = 0
-        for image in to_extract:
-            if image.pk in active_extraction_image_ids:
-                # Very quick short-circuit without additional DB check.
-                continue
-
-            job, created = schedule_job(
-                'extract_features', image.pk, source_id=source_id)
-            if not created:
-                continue
-
-            num_scheduled_extractions += 1
-
-            if (
-                num_scheduled_extractions % 10 == 0
-                and timezone.now() > wrap_up_time
-            ):
-                timed_out = True
-                break
+        num_scheduled_extractions = len(created_jobs)
 
         # If there are extractions to be done, then having that overlap with
         # training can lead to desynced rowcols, so we return and worry about
         # training later.
         if num_scheduled_extractions > 0:
-            result_str = (
+            return (
                 f"Scheduled {num_scheduled_extractions} feature extraction(s)")
-            if timed_out:
-                result_str += " (timed out)"
-            return result_str
         else:
             return "Waiting for feature extraction(s) to finish"
 
@@ -190,18 +165,21 @@ def check_source(source_id):
         # the source.feature_extractor check earlier.
         return f"Can't train first classifier: {reason}"
 
-    # The images we should classify are the images that...
-    # - Have features extracted
-    # - Are non-confirmed (incomplete) and classifier isn't the deployed
-    #   classifier, OR, are unclassified (covering the case where the deployed
-    #   classifier's annotations were deleted)
-    extracted_images = source.image_set.with_features()
-    images_to_classify = (
-        extracted_images.incomplete().exclude(
-            annoinfo__classifier=source.classifier_options.deployed_classifier)
-        |
-        extracted_images.unclassified()
-    )
+    images_to_classify = get_images_to_classify(source)
+
+    if (
+        images_to_classify.exists()
+        and settings.SOURCE_CLASSIFICATIONS_BATCH_SIZE
+    ):
+        num_scheduled_classifications, num_batches = (
+            schedule_classification_batches(source_id, images_to_classify))
+
+        if num_scheduled_classifications > 0:
+            return (
+                f"Scheduled {num_scheduled_classifications}"
+                f" image classification(s) in {num_batches} batch(es)")
+        else:
+            return "Waiting for image classification(s) to finish"
 
     if images_to_classify.exists():
 
@@ -214,25 +192,17 @@ def check_source(source_id):
             active_classify_jobs.values_list('arg_identifier', flat=True)
         ])
 
-        num_scheduled_classifications = 0
+        image_ids_to_schedule = []
         work_score = 0
 
-        # Try to schedule classifications
         for vals in images_to_classify.values('id', 'point_generation_method'):
             image_id = vals['id']
             if image_id in active_classify_image_ids:
-                # Very quick short-circuit without additional DB check.
+                # Already scheduled, so this doesn't count as new work.
                 continue
 
-            point_count = PointGen.from_db_value(
-                vals['point_generation_method']).total_points
-            # When measuring the amount of 'work' a classification is, say each
-            # image has this base value, and add the point count to that.
-            # (Based on a vague recollection of classification runtimes with
-            # different point counts, recent changes since those recollections,
-            # and accounting for general overhead of starting/finishing jobs.)
-            image_base_value = 100
-            work_score += image_base_value + point_count
+            work_score += classification_work_score(
+                vals['point_generation_method'])
 
             if work_score > settings.SOURCE_CLASSIFICATIONS_MAX_WORK:
                 # That's enough for this source at the moment.
@@ -240,27 +210,20 @@ def check_source(source_id):
                 # jobs may not get a chance to run for a while.
                 break
 
-            job, created = schedule_job(
-                'classify_features', image_id, source_id=source_id)
-            if not created:
-                continue
-
-            num_scheduled_classifications += 1
+            image_ids_to_schedule.append(image_id)
 
-            if (
-                num_scheduled_classifications % 10 == 0
-                and timezone.now() > wrap_up_time
-            ):
-                timed_out = True
-                break
+        # Schedule classifications all at once
+        created_jobs = bulk_schedule_jobs(
+            'classify_features',
+            [(image_id,) for image_id in image_ids_to_schedule],
+            source_id=source_id,
+        )
+        num_scheduled_classifications = len(created_jobs)
 
         if num_scheduled_classifications > 0:
-            result_str = (
+            return (
                 f"Scheduled {num_scheduled_classifications}"
                 f" image classification(s)")
-            if timed_out:
-                result_str += " (timed out)"
-            return result_str
         else:
             return "Waiting for image classification(s) to finish"
 
@@ -274,6 +237,115 @@ def check_source(source_id):
     return f"Source seems to be all caught up. {reason}"
 
 
+def get_images_to_classify(source):
+    """
+    The images we should classify are the images that...
+    - Have features extracted
+    - Are non-confirmed (incomplete) and classifier isn't the deployed
+      classifier, OR, are unclassified (covering the case where the deployed
+      classifier's annotations were deleted)
+    """
+    extracted_images = source.image_set.with_features()
+    return (
+        extracted_images.incomplete().exclude(
+            annoinfo__classifier=source.classifier_options.deployed_classifier)
+        |
+        extracted_images.unclassified()
+    )
+
+
+def classification_work_score(point_generation_method):
+    """
+    When measuring the amount of 'work' a classification is, say each
+    image has this base value, and add the point count to that.
+    (Based on a vague recollection of classification runtimes with
+    different point counts, recent changes since those recollections,
+    and accounting for general overhead of starting/finishing jobs.)
+    """
+    point_count = PointGen.from_db_value(
+        point_generation_method).total_points
+    image_base_value = 100
+    return image_base_value + point_count
+
+
+def schedule_classification_batches(
+    source_id, images_to_classify,
+) -> tuple[int, int]:
+    """
+    Schedule classify_features_batch jobs for a source, each one covering
+    a contiguous range of up to SOURCE_CLASSIFICATIONS_BATCH_SIZE image IDs.
+    Images already covered by an incomplete classification job (batched or
+    not) are skipped.
+
+    Returns the number of images scheduled, and the number of batches
+    scheduled.
+    """
+    active_classify_jobs = Job.objects.incomplete().filter(
+        job_name__in=['classify_features', 'classify_features_batch'],
+        source_id=source_id,
+    )
+    active_image_ids = set()
+    active_ranges = []
+    for job_name, arg_identifier in active_classify_jobs.values_list(
+        'job_name', 'arg_identifier'
+    ):
+        args = [int(arg) for arg in Job.identifier_to_args(arg_identifier)]
+        if job_name == 'classify_features':
+            active_image_ids.add(args[0])
+        else:
+            active_ranges.append((args[1], args[2]))
+
+    def is_active(image_id):
+        if image_id in active_image_ids:
+            return True
+        return any(first <= image_id <= last for first, last in active_ranges)
+
+    batches = []
+    current_batch = []
+    work_score = 0
+
+    for vals in (
+        images_to_classify.order_by('pk')
+        .values('id', 'point_generation_method')
+    ):
+        image_id = vals['id']
+        if is_active(image_id):
+            # A batch's ID range must not overlap an active job, so end
+            # the current batch here.
+            if current_batch:
+                batches.append(current_batch)
+                current_batch = []
+            continue
+
+        work_score += classification_work_score(
+            vals['point_generation_method'])
+        if work_score > settings.SOURCE_CLASSIFICATIONS_MAX_WORK:
+            # That's enough for this source at the moment.
+            break
+
+        current_batch.append(image_id)
+        if len(current_batch) >= settings.SOURCE_CLASSIFICATIONS_BATCH_SIZE:
+            batches.append(current_batch)
+            current_batch = []
+
+    if current_batch:
+        batches.append(current_batch)
+
+    batch_sizes = {
+        Job.args_to_identifier([source_id, batch[0], batch[-1]]): len(batch)
+        for batch in batches
+    }
+    created_jobs = bulk_schedule_jobs(
+        'classify_features_batch',
+        [(source_id, batch[0], batch[-1]) for batch in batches],
+        source_id=source_id,
+    )
+    num_images = sum(
+        batch_sizes[job.arg_identifier] for job in created_jobs)
+
+    return num_images, len(created_jobs)
+
+
 def job_spec_for_extract(image) -> SpacerJobSpec:
     """
     Specs required for feature extraction. Higher resolution images seem
@@ -285,9 +357,79 @@ def job_spec_for_extract(image) -> SpacerJobSpec:
             return job_spec
 
 
+def claim_extractions_to_pack(
+    image: Image, job_spec: SpacerJobSpec, job_id: int,
+) -> list[tuple[Image, int]]:
+    """
+    Claim other pending feature-extraction Jobs that can be packed into
+    the same spacer job as the given image's extraction.
+    Packable Jobs are from the same source, have the same job spec
+    tier, and are first attempts (so that an image which keeps failing
+    doesn't keep failing the other images packed with it). We take as many
+    as fit within FEATURE_EXTRACT_PACK_MAX_IMAGES and
+    FEATURE_EXTRACT_PACK_MAX_PIXELS.
+
+    The claimed Jobs are marked in-progress. Return (image, job ID) tuples.
+    """
+    max_images = settings.FEATURE_EXTRACT_PACK_MAX_IMAGES
+    pixel_budget = (
+        settings.FEATURE_EXTRACT_PACK_MAX_PIXELS
+        - image.original_width * image.original_height)
+
+    candidate_job_ids = dict(
+        Job.objects.pending()
+        .filter(
+            job_name='extract_features',
+            source_id=image.source_id,
+            attempt_number=1,
+        )
+        .exclude(pk=job_id)
+        .order_by('pk')
+        # Fetch extra candidates in case some don't fit.
+        .values_list('arg_identifier', 'pk')[:max_images*2]
+    )
+    candidate_images = (
+        Image.objects
+        .filter(pk__in=[
+            int(arg_identifier) for arg_identifier in candidate_job_ids])
+        .select_related('features')
+        .order_by('pk')
+    )
+
+    images_to_pack = []
+    for candidate_image in candidate_images:
+        if len(images_to_pack) + 1 >= max_images:
+            break
+        num_pixels = (
+            candidate_image.original_width * candidate_image.original_height)
+        if num_pixels > pixel_budget:
+            continue
+        if job_spec_for_extract(candidate_image) != job_spec:
+            continue
+        images_to_pack.append(candidate_image)
+        pixel_budget -= num_pixels
+
+    job_ids_to_images = dict(
+        (candidate_job_ids[str(packed_image.pk)], packed_image)
+        for packed_image in images_to_pack
+    )
+
+    # Skip any Jobs that were started by their own tasks, or packed by
+    # another extraction, since we queried for candidates.
+    return [
+        (packed_image, packed_job_id)
+        for packed_job_id, packed_image in job_ids_to_images.items()
+        if claim_pending_job(packed_job_id)
+    ]
+
+
 @job_starter(job_name='extract_features')
 def submit_features(image_id, job_id):
-    """ Submits a feature extraction job. """
+    """
+    Submits a feature extraction job. If packing is enabled, other pending
+    extractions from the same source may be submitted in the same
+    spacer job.
+    """
     try:
         img = Image.objects.get(pk=image_id)
     except Image.DoesNotExist:
@@ -296,23 +438,58 @@ def submit_features(image_id, job_id):
     if img.source.feature_extractor is None:
         raise JobError(f"No feature extractor configured for this source.")
 
-    # Assemble row column information
-    rowcols = [(p.row, p.column) for p in Point.objects.filter(image=img)]
-
-    # Assemble task.
-    task = ExtractFeaturesMsg(
-        job_token=str(job_id),
-        extractor=get_extractor(img.source.feature_extractor),
-        rowcols=rowcols,
-        image_loc=default_storage.spacer_data_loc(img.original_file.name),
-        feature_loc=img.features.data_loc,
-    )
+    job_spec = job_spec_for_extract(img)
+    images_and_job_ids = [(img, job_id)]
+    job = Job.objects.get(pk=job_id)
+    if (
+        settings.FEATURE_EXTRACT_PACK_MAX_IMAGES > 1
+        and job.attempt_number == 1
+    ):
+        images_and_job_ids.extend(
+            claim_extractions_to_pack(img, job_spec, job_id))
+
+    extractor = get_extractor(img.source.feature_extractor)
+    rowcols_by_image_id = defaultdict(list)
+    for point_image_id, row, column in Point.objects.filter(
+        image_id__in=[image.pk for image, _ in images_and_job_ids]
+    ).values_list('image_id', 'row', 'column'):
+        rowcols_by_image_id[point_image_id].append((row, column))
+
+    # Assemble tasks.
+    tasks = [
+        ExtractFeaturesMsg(
+            job_token=str(task_job_id),
+            extractor=extractor,
+            rowcols=rowcols_by_image_id[image.pk],
+            image_loc=default_storage.spacer_data_loc(
+                image.original_file.name),
+            feature_loc=image.features.data_loc,
+        )
+        for image, task_job_id in images_and_job_ids
+    ]
 
-    msg = JobMsg(task_name='extract_features', tasks=[task])
+    msg = JobMsg(task_name='extract_features', tasks=tasks)
 
     # Submit.
     queue = get_queue_class()()
-    queue.submit_job(msg, job_id, job_spec_for_extract(img))
+    try:
+        queue.submit_job(msg, job_id, job_spec)
+    except Exception as e:
+        # The job_starter decorator only takes care of this Job, so
+        # finish the packed Jobs here.
+        packed_jobs = Job.objects.in_bulk(
+            [task_job_id for _, task_job_id in images_and_job_ids[1:]])
+        finish_jobs([
+            dict(
+                job=packed_job,
+                success=False,
+                result_message=(
+                    f"Packed with job {job_id}, which failed to submit:"
+                    f" {type(e).__name__}: {e}"),
+            )
+            for packed_job in packed_jobs.values()
+        ])
+        raise
 
     return msg
 
@@ -350,36 +527,11 @@ def submit_classifier(source_id, job_id):
             f" Feature extractions will be redone to fix this.")
 
     # Create new classifier
-    classifier = Classifier(source=source, nbr_train_images=len(images))
+    classifier = Classifier(source=source, nbr_train_images=images.count())
     classifier.save()
 
     # Create training datasets.
-    # The train+ref vs. val split is defined in advance, while the
-    # train vs. ref split is determined here with mod-10. This matches
-    # how it's worked since coralnet 1.0.
-    train_and_ref_images = [image for image in images if image.trainset]
-    train_images = []
-    ref_images = []
-    ref_annotation_count = 0
-    ref_done = False
-    for image_index, image in enumerate(train_and_ref_images):
-        if not ref_done and image_index % 10 == 0:
-            image_annotation_count = image.annotation_set.count()
-            if (ref_annotation_count + image_annotation_count
-                    <= settings.TRAINING_BATCH_LABEL_COUNT):
-                ref_images.append(image)
-                ref_annotation_count += image_annotation_count
-            else:
-                train_images.append(image)
-                ref_done = True
-        else:
-            train_images.append(image)
-
-    labels = TrainingTaskLabels(
-        train=th.make_dataset(train_images),
-        ref=th.make_dataset(ref_images),
-        val=th.make_dataset([image for image in images if image.valset]),
-    )
+    labels = th.make_training_labels(images, source.pk)
     try:
         labels = preprocess_labels(labels)
     except TrainingLabelsError:
@@ -536,22 +688,16 @@ def classify_image(image_id):
             "This image's features don't match the source's feature format."
             " Feature extraction will be redone to fix this.")
 
-    # Create task message
-    msg = ClassifyFeaturesMsg(
-        job_token=str(image_id),
-        feature_loc=img.features.data_loc,
-        classifier_loc=default_storage.spacer_data_loc(
-            settings.ROBOT_MODEL_FILE_PATTERN.format(pk=classifier.pk)
-        )
-    )
-
     # Process job right here since it is so fast.
-    # In spacer, this task is called classify_features since that
-    # is actually what we are doing (the features are already extracted).
-    res: ClassifyReturnMsg = spacer_classify_features(msg)
+    # This is equivalent to spacer's classify_features task, except that the
+    # classifier model comes from this process's model cache, instead of
+    # getting loaded from storage each time.
+    res: ClassifyReturnMsg = th.classify_features_in_bulk(
+        {img.pk: img.features.load()}, classifier)[img.pk]
 
     # Pre-fetch label objects
-    label_objs = [Label.objects.get(pk=pk) for pk in res.classes]
+    labels_by_id = Label.objects.in_bulk(res.classes)
+    label_objs = [labels_by_id[pk] for pk in res.classes]
 
     result_message = f"Used classifier {classifier.pk}"
     # Add annotations if image isn't already confirmed
@@ -606,6 +752,64 @@ def classify_image(image_id):
     return result_message
 
 
+@job_runner(
+    job_name='classify_features_batch', job_display_name="Classify batch",
+    after_finishing_job=after_classify_features,
+)
+def classify_images_batch(source_id, first_image_id, last_image_id):
+    """
+    Classify a chunk of a source's images: the images within the given
+    ID range which currently need classification.
+
+    Unlike classify_image(), this loads the classifier once, scores the
+    whole chunk's features as one matrix, and writes Annotations, Scores
+    and ClassifyImageEvents in bulk.
+    """
+    try:
+        source = Source.objects.get(pk=source_id)
+    except Source.DoesNotExist:
+        raise JobError(f"Can't find source {source_id}")
+
+    classifier = source.classifier_options.deployed_classifier
+    if not classifier:
+        raise JobError(
+            f"Images of source {source_id} can't be classified;"
+            f" the source doesn't have a classifier.")
+
+    images = get_images_to_classify(source).filter(
+        pk__gte=int(first_image_id), pk__lte=int(last_image_id))
+
+    in_wrong_feature_format = images.exclude(
+        features__extractor=source.feature_extractor)
+    wrong_format_count = in_wrong_feature_format.count()
+    if wrong_format_count > 0:
+        reset_features_bulk(in_wrong_feature_format)
+        images = images.filter(features__extractor=source.feature_extractor)
+
+    image_ids = list(images.order_by('pk').values_list('pk', flat=True))
+    if not image_ids and wrong_format_count == 0:
+        return "No images to classify in this batch"
+
+    try:
+        result_message = th.classify_images_in_bulk(image_ids, classifier)
+    except IntegrityError:
+        # Don't reset features. Just wait till next attempt to see what
+        # the situation is.
+        raise JobError(
+            f"Failed to save classification results for images"
+            f" {first_image_id}-{last_image_id}."
+            f" Maybe there was another change happening at the same time"
+            f" with the images' points/annotations."
+        )
+
+    if wrong_format_count > 0:
+        result_message += (
+            f". {wrong_format_count} image(s) had features not matching"
+            f" the source's feature format; feature extraction will be"
+            f" redone for those")
+    return result_message
+
+
 def after_collect(job_id):
     job = Job.objects.get(pk=job_id)
     if job.result_message == "Jobs checked/collected: 0":
@@ -621,6 +825,31 @@ def batch_generator(items: list, batch_size: int):
         index += batch_size
 
 
+def fetch_batches(queue, batches: list[list]):
+    """
+    Generate each batch along with the queue's fetched results for that
+    batch. In concurrent collection mode, the next batch's results are
+    fetched in a background thread while the caller handles the current
+    batch. That's safe because fetching doesn't change any state, so a
+    prefetched batch can be abandoned if the caller stops early.
+    """
+    if settings.SPACER_COLLECT_WORKERS <= 1:
+        for batch in batches:
+            yield batch, queue.fetch_results(batch)
+        return
+
+    if not batches:
+        return
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        next_fetch = prefetcher.submit(queue.fetch_results, batches[0])
+        for index, batch in enumerate(batches):
+            fetched = next_fetch.result()
+            if index + 1 < len(batches):
+                next_fetch = prefetcher.submit(
+                    queue.fetch_results, batches[index + 1])
+            yield batch, fetched
+
+
 @job_runner(interval=timedelta(minutes=1), after_finishing_job=after_collect)
 def collect_spacer_jobs():
     """
@@ -643,15 +872,18 @@ def collect_spacer_jobs():
     # boto's Batch.Client.describe_jobs() takes up to 100 job IDs.
     # So by sending at most 100 at a time from here, we don't have to worry
     # about splitting up at the describe_jobs() step.
-    for batch_of_jobs in batch_generator(collectable_jobs, batch_size=100):
+    batches = list(batch_generator(collectable_jobs, batch_size=100))
+    for batch_of_jobs, fetched in fetch_batches(queue, batches):
 
-        batch_results, batch_statuses = queue.collect_jobs(batch_of_jobs)
+        batch_results, batch_statuses = queue.process_fetched_results(
+            batch_of_jobs, fetched)
         job_statuses.extend(batch_statuses)
         th.handle_spacer_results(batch_results)
 
         if timezone.now() > wrap_up_time:
-            # As long as job results are collected in queue.collect_jobs(),
-            # rather than in queue.get_collectable_jobs(),
+            # As long as job results are collected in
+            # queue.process_fetched_results(), rather than in
+            # queue.get_collectable_jobs() or queue.fetch_results(),
             # this loop-break won't abandon any job results.
             timed_out = True
             break
@@ -689,6 +921,17 @@ def reset_features_for_source(source_id):
     reset_features_bulk(Image.objects.filter(source_id=source_id))
 
 
+@job_runner()
+def check_features_for_source(source_id):
+    """
+    Checks this source's extracted features against the DB's point
+    rows/columns, and resets the features that don't match.
+    """
+    reset_count = reset_invalid_features_bulk(
+        Image.objects.filter(source_id=source_id))
+    return f"Reset {reset_count} invalid feature vector(s)"
+
+
 def after_reset_classifiers(job_id):
     # Successful jobs related to classifier history should persist in the DB.
     job = Job.objects.get(pk=job_id)
@@ -720,4 +963,13 @@ def reset_classifiers_for_source(source_id):
     # There are SET_NULL FKs to Classifiers, so this fetches all classifiers to
     # implement setting null. But that's okay since there aren't many
     # classifiers per source.
-    Classifier.objects.filter(source_id=source_id).delete()
+    classifiers = Classifier.objects.filter(source_id=source_id)
+    classifier_ids = list(classifiers.values_list('pk', flat=True))
+    classifiers.delete()
+
+    # Free up any cached models of the deleted classifiers.
+    for classifier_id in classifier_ids:
+        classifier_model_cache.invalidate(classifier_id)
+
+    # Start the next training from a fresh read of the annotations.
+    TrainingLabelManifest.delete(source_id)
@@ -2,15 +2,16 @@ import datetime
 from datetime import timedelta
 from unittest import mock
 
-from django.core.cache import cache
 from django.db.utils import IntegrityError
 from django.test import override_settings
 from django.utils import timezone
 import numpy as np
 from reversion import revisions
 from reversion.models import Revision
+from spacer.data_classes import ImageFeatures
 
 from accounts.utils import get_robot_user, is_robot_user
+from annotations.managers import AnnotationQuerySet
 from annotations.models import Annotation, ImageAnnotationInfo
 from annotations.tests.utils import (
     AnnotationHistoryTestMixin, controlled_sort_hashes, EXPECTED_HASHES)
@@ -22,6 +23,7 @@ from jobs.tests.utils import do_job
 from ...common import ClassifierStatuses, Extractors
 from ...exceptions import RowColumnMismatchError
 from ...models import ClassifyImageEvent, Score
+from ...task_helpers import classify_features_in_bulk
 from ...utils import clear_features
 from .utils import BaseTaskTest, source_check_is_scheduled
 
@@ -178,16 +180,17 @@ class SourceCheckTest(BaseTaskTest):
         self.source_check_and_assert(
             "Scheduled 2 image classification(s)")
 
-    def test_time_out(self):
+    def test_schedules_all_in_one_run(self):
         for _ in range(12):
             self.upload_image_for_classification()
 
+        # Scheduling is done in bulk, so there's no partway time-out.
         with override_settings(JOB_MAX_MINUTES=-1):
             self.source_check_and_assert(
-                "Scheduled 10 image classification(s) (timed out)")
+                "Scheduled 12 image classification(s)")
 
         self.source_check_and_assert(
-            "Scheduled 2 image classification(s)")
+            "Waiting for image classification(s) to finish")
 
 
 class SourceCheckImageCasesTest(BaseTaskTest):
@@ -1017,55 +1020,39 @@ class AbortCasesTest(BaseTaskTest):
 
     def test_integrity_error_when_saving_annotations(self):
 
-        class UnexpectedPointOrderError(Exception):
-            pass
+        original_bulk_create = AnnotationQuerySet.bulk_create
 
-        def mock_update_annotation(
-                point, label, now_confirmed, user_or_robot_version):
+        def mock_bulk_create(queryset, objs, *args, **kwargs):
             """
-            When the save_annotations_ajax view tries to actually save the
-            annotations to the DB, this patched function should save the
-            annotation for point 1, then raise an IntegrityError for point 2.
-            This should make the view return an appropriate
-            error message, and should make point 1 get rolled back.
+            Right before classification bulk-saves its new annotations,
+            save another Annotation for point 2, simulating a race condition
+            of some kind.
+            Then the bulk save should get an IntegrityError.
             """
-            # This is a simple saving case (for brevity) which works for this
-            # particular test.
-            new_annotation = Annotation(
-                point=point, image=point.image,
-                source=point.image.source, label=label,
+            points = Point.objects.filter(
+                pk__in=[obj.point_id for obj in objs])
+            point_2 = points.get(point_number=2)
+            Annotation(
+                point=point_2, image=point_2.image,
+                source=point_2.image.source, label=objs[0].label,
                 user=get_robot_user(),
-                robot_version=user_or_robot_version)
-            new_annotation.save()
+                robot_version=objs[0].robot_version,
+            ).save()
 
-            if point.point_number == 1:
-                cache.set('point_1_processed', True)
-            if point.point_number == 2:
-                if not cache.get('point_1_processed'):
-                    # The point order, which the test depends on, isn't as
-                    # expected. Raise a non-IntegrityError to fail the test.
-                    raise UnexpectedPointOrderError
-                # Save another Annotation for this Point, simulating a
-                # race condition of some kind.
-                # Should get an IntegrityError.
-                new_annotation.pk = None
-                new_annotation.save()
+            return original_bulk_create(queryset, objs, *args, **kwargs)
 
         self.upload_data_and_train_classifier()
 
         img = self.upload_image_and_schedule_classification()
 
-        # Add an annotation of any kind so that classification will go to the
-        # update_point_annotation_if_applicable() case instead of the
-        # bulk-create case.
+        # Add an annotation of any kind so that classification has to
+        # account for existing annotations.
         self.add_annotations(self.user, img, {3: 'A'})
         self.assertEqual(img.annotation_set.count(), 1)
 
         # Try to classify
-        with mock.patch(
-            'annotations.models.Annotation.objects'
-            '.update_point_annotation_if_applicable',
-            mock_update_annotation
+        with mock.patch.object(
+            AnnotationQuerySet, 'bulk_create', mock_bulk_create
         ):
             do_job('classify_features', img.pk)
 
@@ -1079,7 +1066,8 @@ class AbortCasesTest(BaseTaskTest):
             f" with the image's points/annotations.")
 
         # Although the error occurred on point 2, nothing should have been
-        # saved, including point 1. That leaves just point 3.
+        # saved, including point 1 and the racing save of point 2. That
+        # leaves just point 3.
         self.assertEqual(
             img.annotation_set.count(), 1,
             "Point 1's annotation should have been rolled back"
@@ -1165,3 +1153,258 @@ class AbortCasesTest(BaseTaskTest):
             f" Maybe there was another change happening at the same time"
             f" with the image's points. Will redo feature"
             f" extraction to get back on track.")
+
+
+@override_settings(SOURCE_CLASSIFICATIONS_BATCH_SIZE=2)
+class ClassifyBatchTest(BaseTaskTest, AnnotationHistoryTestMixin):
+    """
+    Source checks scheduling classify_features_batch jobs, and those
+    jobs running.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.classifier = cls.upload_data_and_train_classifier()
+
+    def run_scheduled_batches(self):
+        for job in Job.objects.filter(
+            job_name='classify_features_batch', status=Job.Status.PENDING,
+        ):
+            do_job(
+                'classify_features_batch',
+                *Job.identifier_to_args(job.arg_identifier),
+                source_id=self.source.pk)
+
+    def test_source_check(self):
+        images = [self.upload_image_for_classification() for _ in range(3)]
+
+        self.source_check_and_assert(
+            "Scheduled 3 image classification(s) in 2 batch(es)")
+
+        self.assertListEqual(
+            sorted(Job.objects.filter(
+                job_name='classify_features_batch',
+            ).values_list('arg_identifier', flat=True)),
+            [
+                f'{self.source.pk},{images[0].pk},{images[1].pk}',
+                f'{self.source.pk},{images[2].pk},{images[2].pk}',
+            ],
+        )
+
+        self.source_check_and_assert(
+            "Waiting for image classification(s) to finish",
+            assert_msg="Should not schedule the same images again",
+        )
+
+    def test_skip_images_of_active_per_image_jobs(self):
+        images = [self.upload_image_for_classification() for _ in range(3)]
+        schedule_job(
+            'classify_features', images[1].pk, source_id=self.source.pk)
+
+        self.source_check_and_assert(
+            "Scheduled 2 image classification(s) in 2 batch(es)")
+
+        self.assertListEqual(
+            sorted(Job.objects.filter(
+                job_name='classify_features_batch',
+            ).values_list('arg_identifier', flat=True)),
+            [
+                f'{self.source.pk},{images[0].pk},{images[0].pk}',
+                f'{self.source.pk},{images[2].pk},{images[2].pk}',
+            ],
+        )
+
+    @override_settings(SOURCE_CLASSIFICATIONS_MAX_WORK=320)
+    def test_max_work(self):
+        for _ in range(4):
+            self.upload_image_for_classification()
+
+        # 5 points per image means each image contributes 100+5 'work score'.
+        self.source_check_and_assert(
+            "Scheduled 3 image classification(s) in 2 batch(es)")
+
+    def test_classify_unannotated_images(self):
+        images = [self.upload_image_for_classification() for _ in range(3)]
+        self.source_check_and_assert(
+            "Scheduled 3 image classification(s) in 2 batch(es)")
+        self.run_scheduled_batches()
+
+        self.assert_job_result_message(
+            'classify_features_batch',
+            f"Used classifier {self.classifier.pk}:"
+            f" 1 image(s) classified (5 annotations added)")
+
+        for image in images:
+            image.annoinfo.refresh_from_db()
+            self.assertEqual(
+                image.annoinfo.classifier_id, self.classifier.pk)
+            self.assertFalse(image.annoinfo.confirmed)
+            self.assertIsNotNone(image.annoinfo.last_annotation)
+
+            for point in image.point_set.all():
+                self.assertTrue(is_robot_user(point.annotation.user))
+                self.assertFalse(point.annotation.confirmed)
+                self.assertEqual(
+                    point.annotation.robot_version_id, self.classifier.pk)
+                self.assertNotEqual(point.annotation.scrambled_sort_key, 0)
+
+                scores = list(point.score_set.order_by('-score'))
+                self.assertEqual(
+                    len(scores), 2, "Each point should have scores")
+                self.assertEqual(
+                    scores[0].label_id, point.annotation.label_id,
+                    "Max score label should match the annotation label")
+
+            label_ids = [
+                point.annotation.label_id
+                for point in image.point_set.order_by('point_number')]
+            event = ClassifyImageEvent.objects.get(image_id=image.pk)
+            self.assertEqual(event.source_id, self.source.pk)
+            self.assertEqual(event.classifier_id, self.classifier.pk)
+            self.assertDictEqual(
+                event.details,
+                {
+                    str(number): dict(label=label_id, result='added')
+                    for number, label_id in enumerate(label_ids, 1)
+                },
+            )
+
+    def test_reclassify_and_partially_confirmed(self):
+        def mock_classify_msg_1(
+                self_, runtime, scores, classes, valid_rowcol):
+            self_.runtime = runtime
+            self_.classes = classes
+            self_.valid_rowcol = valid_rowcol
+            # This would classify as all A.
+            self_.scores = [
+                (row, col, [0.8, 0.2]) for row, col, _ in scores]
+
+        def mock_classify_msg_2(
+                self_, runtime, scores, classes, valid_rowcol):
+            self_.runtime = runtime
+            self_.classes = classes
+            self_.valid_rowcol = valid_rowcol
+            # This would classify as all B.
+            self_.scores = [
+                (row, col, [0.4, 0.6]) for row, col, _ in scores]
+
+        image = self.upload_image_for_classification()
+        self.source_check_and_assert(
+            "Scheduled 1 image classification(s) in 1 batch(es)")
+        with mock.patch(
+            'spacer.messages.ClassifyReturnMsg.__init__', mock_classify_msg_1
+        ):
+            self.run_scheduled_batches()
+
+        self.add_annotations(self.user, image, {1: 'A'})
+
+        # Accept another classifier.
+        with override_settings(
+            NEW_CLASSIFIER_TRAIN_TH=0.0001,
+            NEW_CLASSIFIER_IMPROVEMENT_TH=0.0001,
+        ):
+            classifier_2 = self.upload_data_and_train_classifier(
+                new_train_images_count=0)
+
+        self.source_check_and_assert(
+            "Scheduled 1 image classification(s) in 1 batch(es)")
+        with mock.patch(
+            'spacer.messages.ClassifyReturnMsg.__init__', mock_classify_msg_2
+        ):
+            self.run_scheduled_batches()
+
+        self.assert_job_result_message(
+            'classify_features_batch',
+            f"Used classifier {classifier_2.pk}:"
+            f" 1 image(s) classified (4 annotations changed)")
+
+        annotation_1 = image.point_set.get(point_number=1).annotation
+        self.assertTrue(
+            annotation_1.confirmed, "Confirmed annotation should be kept")
+        self.assertEqual(annotation_1.label.name, 'A')
+        for number in [2, 3, 4, 5]:
+            annotation = image.point_set.get(point_number=number).annotation
+            self.assertEqual(annotation.label.name, 'B')
+            self.assertEqual(annotation.robot_version_id, classifier_2.pk)
+
+        event = ClassifyImageEvent.objects.latest('pk')
+        label_b_id = self.labels.get(name='B').pk
+        self.assertDictEqual(
+            event.details,
+            {
+                str(number): dict(label=label_b_id, result='changed')
+                for number in [2, 3, 4, 5]
+            },
+        )
+        self.assertEqual(
+            image.score_set.count(), 10,
+            "Scores should be replaced, including for the confirmed point")
+
+    def test_row_col_mismatch(self):
+        image_1 = self.upload_image_for_classification()
+        image_2 = self.upload_image_for_classification()
+        self.source_check_and_assert(
+            "Scheduled 2 image classification(s) in 1 batch(es)")
+
+        # Change image 2's points after feature extraction.
+        point = image_2.point_set.get(point_number=1)
+        point.row += 1
+        point.save()
+
+        self.run_scheduled_batches()
+
+        self.assert_job_result_message(
+            'classify_features_batch',
+            f"Used classifier {self.classifier.pk}:"
+            f" 1 image(s) classified (5 annotations added)."
+            f" 1 image(s) had features not matching their points;"
+            f" feature extraction will be redone for those")
+
+        self.assertEqual(image_1.annotation_set.count(), 5)
+        self.assertEqual(image_2.annotation_set.count(), 0)
+        image_2.features.refresh_from_db()
+        self.assertFalse(image_2.features.extracted)
+
+    def test_feature_format_mismatch(self):
+        image_1 = self.upload_image_for_classification()
+        image_2 = self.upload_image_for_classification()
+        self.source_check_and_assert(
+            "Scheduled 2 image classification(s) in 1 batch(es)")
+
+        image_2.features.extractor = Extractors.VGG16.value
+        image_2.features.save()
+
+        self.run_scheduled_batches()
+
+        self.assert_job_result_message(
+            'classify_features_batch',
+            f"Used classifier {self.classifier.pk}:"
+            f" 1 image(s) classified (5 annotations added)."
+            f" 1 image(s) had features not matching the source's"
+            f" feature format; feature extraction will be redone for those")
+
+        self.assertEqual(image_1.annotation_set.count(), 5)
+        image_2.features.refresh_from_db()
+        self.assertFalse(image_2.features.extracted)
+
+    def test_images_without_point_features(self):
+        image = self.upload_image_for_classification()
+        features = image.features.load()
+        empty_features = ImageFeatures(
+            point_features=[],
+            valid_rowcol=features.valid_rowcol,
+            feature_dim=features.feature_dim,
+            npoints=0,
+        )
+
+        results = classify_features_in_bulk(
+            {image.pk: features, 0: empty_features}, self.classifier)
+        self.assertEqual(len(results[image.pk].scores), 5)
+        self.assertListEqual(results[0].scores, [])
+
+        results = classify_features_in_bulk(
+            {0: empty_features}, self.classifier)
+        self.assertListEqual(
+            results[0].scores, [],
+            "Should work when no image in the batch has point features")
@@ -9,6 +9,7 @@ from images.model_utils import PointGen
 from jobs.models import Job
 from jobs.tasks import run_scheduled_jobs, run_scheduled_jobs_until_empty
 from jobs.tests.utils import do_job
+from jobs.utils import claim_pending_job, JobStarterDecorator, schedule_job
 from lib.tests.utils import EmailAssertionsMixin
 from ...common import Extractors
 from .utils import BaseTaskTest, source_check_is_scheduled
@@ -40,15 +41,16 @@ class ExtractFeaturesTest(BaseTaskTest):
             expected_hidden=True)
 
     @override_settings(JOB_MAX_MINUTES=-1)
-    def test_source_check_time_out(self):
+    def test_source_check_schedules_all_in_one_run(self):
         for _ in range(12):
             self.upload_image(self.user, self.source)
 
+        # Scheduling is done in bulk, so there's no partway time-out.
         self.source_check_and_assert(
-            "Scheduled 10 feature extraction(s) (timed out)")
+            "Scheduled 12 feature extraction(s)")
 
         self.source_check_and_assert(
-            "Scheduled 2 feature extraction(s)")
+            "Waiting for feature extraction(s) to finish")
 
     def test_source_check_unprocessable_image(self):
         image1 = self.upload_image(self.user, self.source)
@@ -106,6 +108,115 @@ class ExtractFeaturesTest(BaseTaskTest):
         self.assertTrue(img2.features.extracted)
         self.assertTrue(img3.features.extracted)
 
+    @override_settings(FEATURE_EXTRACT_PACK_MAX_IMAGES=3)
+    def test_packed(self):
+        images = [self.upload_image(self.user, self.source) for _ in range(5)]
+
+        # Extract features + collect results.
+        run_scheduled_jobs_until_empty()
+        job = self.do_collect_spacer_jobs()
+        self.assertEqual(
+            job.result_message, "Jobs checked/collected: 2 SUCCEEDED",
+            msg="5 images should be packed into 2 spacer jobs")
+
+        for image in images:
+            image.features.refresh_from_db()
+            self.assertTrue(image.features.extracted)
+        for job in Job.objects.filter(job_name='extract_features'):
+            self.assertEqual(job.status, Job.Status.SUCCESS)
+
+    @override_settings(FEATURE_EXTRACT_PACK_MAX_IMAGES=3)
+    def test_packing_races_with_job_start(self):
+        """
+        Another image's extraction task starts its job after packing has
+        picked that job as a candidate, but before packing claims it.
+        """
+        images = [self.upload_image(self.user, self.source) for _ in range(3)]
+        jobs = [
+            schedule_job(
+                'extract_features', image.pk, source_id=self.source.pk)[0]
+            for image in images
+        ]
+        started_jobs = []
+
+        def claim_after_job_start(job_id):
+            if job_id == jobs[1].pk:
+                started_jobs.append(
+                    JobStarterDecorator.update_pending_job_to_in_progress(
+                        'extract_features', images[1].pk))
+            return claim_pending_job(job_id)
+
+        with mock.patch(
+            'vision_backend.tasks.claim_pending_job', claim_after_job_start
+        ):
+            do_job('extract_features', images[0].pk, source_id=self.source.pk)
+        self.assertIsNotNone(
+            started_jobs[0], "Job start should've claimed its job")
+
+        self.do_collect_spacer_jobs()
+        for image in images:
+            image.features.refresh_from_db()
+        self.assertTrue(images[0].features.extracted)
+        self.assertFalse(
+            images[1].features.extracted,
+            "Image 2's job should've been left to its own task")
+        self.assertTrue(images[2].features.extracted)
+
+    @override_settings(FEATURE_EXTRACT_PACK_MAX_IMAGES=3)
+    def test_job_start_after_packing(self):
+        images = [self.upload_image(self.user, self.source) for _ in range(2)]
+        for image in images:
+            schedule_job(
+                'extract_features', image.pk, source_id=self.source.pk)
+
+        do_job('extract_features', images[0].pk, source_id=self.source.pk)
+
+        self.assertIsNone(
+            JobStarterDecorator.update_pending_job_to_in_progress(
+                'extract_features', images[1].pk),
+            "Job start shouldn't claim a job that was already packed")
+
+    @override_settings(
+        FEATURE_EXTRACT_PACK_MAX_IMAGES=3,
+        FEATURE_EXTRACT_PACK_MAX_PIXELS=250,
+    )
+    def test_packed_pixel_budget(self):
+        for _ in range(3):
+            self.upload_image(
+                self.user, self.source,
+                image_options=dict(width=10, height=10))
+
+        run_scheduled_jobs_until_empty()
+        job = self.do_collect_spacer_jobs()
+        self.assertEqual(
+            job.result_message, "Jobs checked/collected: 2 SUCCEEDED",
+            msg="Only 2 images should fit in a spacer job")
+
+    @override_settings(FEATURE_EXTRACT_PACK_MAX_IMAGES=3)
+    def test_packed_spacer_error(self):
+        for _ in range(2):
+            self.upload_image(self.user, self.source)
+
+        def raise_error(*args):
+            raise ValueError("A spacer error")
+
+        with mock.patch('spacer.tasks.extract_features', raise_error):
+            run_scheduled_jobs_until_empty()
+        self.do_collect_spacer_jobs()
+
+        # The error applies to all of the spacer job's tasks.
+        for job in Job.objects.filter(job_name='extract_features'):
+            self.assertEqual(job.status, Job.Status.FAILURE)
+            self.assertEqual(
+                job.result_message, "ValueError: A spacer error")
+
+        # The retries aren't packed, so that an image which keeps failing
+        # doesn't hold back other images.
+        run_scheduled_jobs_until_empty()
+        job = self.do_collect_spacer_jobs()
+        self.assertEqual(
+            job.result_message, "Jobs checked/collected: 2 SUCCEEDED")
+
     def test_source_check_after_finishing(self):
         img1 = self.upload_image(self.user, self.source)
         img2 = self.upload_image(self.user, self.source)
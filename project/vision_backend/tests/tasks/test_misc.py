@@ -2,6 +2,8 @@ import datetime
 import json
 from unittest import mock
 
+from django.conf import settings
+from django.core.files.storage import default_storage
 from django.test.utils import override_settings
 from django.urls import reverse
 
@@ -13,7 +15,8 @@ from jobs.tests.utils import do_job, fabricate_job
 from jobs.utils import abort_job, schedule_job
 from lib.tests.utils import DecoratorMock, spy_decorator
 from vision_backend_api.tests.utils import DeployTestMixin
-from ...models import Score, Classifier
+from ... import utils
+from ...models import Classifier, Features, Score
 from ...task_helpers import SpacerResultHandler
 from .utils import BaseTaskTest, source_check_is_scheduled
 
@@ -39,6 +42,11 @@ class ResetClassifiersForSourceTest(BaseTaskTest):
         self.assertGreater(
             Annotation.objects.filter(image=img).count(), 0,
             "img should have annotations")
+        manifest_path = settings.TRAINING_LABELS_MANIFEST_PATTERN.format(
+            source_id=self.source.pk)
+        self.assertTrue(
+            default_storage.exists(manifest_path),
+            "Training should have saved a label manifest")
 
         # Classify probably scheduled a source check; run that so we don't have
         # any incomplete jobs remaining.
@@ -75,6 +83,9 @@ class ResetClassifiersForSourceTest(BaseTaskTest):
         self.assertEqual(
             Annotation.objects.filter(image=img).count(), 0,
             "img shouldn't have annotations")
+        self.assertFalse(
+            default_storage.exists(manifest_path),
+            "Label manifest should be deleted")
 
         # Train
         run_scheduled_jobs_until_empty()
@@ -278,6 +289,97 @@ class ResetFeaturesForSourceTest(BaseTaskTest):
             msg="Reset job should have been able to run this time")
 
 
+class CheckFeaturesForSourceTest(BaseTaskTest):
+
+    def setUp(self):
+        super().setUp()
+
+        self.image_1 = self.upload_image(self.user, self.source)
+        self.image_2 = self.upload_image(self.user, self.source)
+        run_scheduled_jobs_until_empty()
+        self.do_collect_spacer_jobs()
+
+    def do_check(self):
+        return do_job(
+            'check_features_for_source', self.source.pk,
+            source_id=self.source.pk)
+
+    def test_fingerprint_saved_on_extraction(self):
+        for image in [self.image_1, self.image_2]:
+            image.features.refresh_from_db()
+            self.assertEqual(
+                image.features.rowcols_hash,
+                utils.rowcols_fingerprint(
+                    image.point_set.values_list('row', 'column')),
+            )
+
+    def test_reset_mismatched(self):
+        point = self.image_1.point_set.get(point_number=1)
+        point.row += 1
+        point.save()
+
+        with mock.patch(
+            'vision_backend.utils.load_features_rowcols_info',
+        ) as mock_load:
+            job = self.do_check()
+        self.assertEqual(
+            mock_load.call_count, 0,
+            msg="Should compare fingerprints without loading any files")
+
+        self.assertEqual(
+            job.result_message, "Reset 1 invalid feature vector(s)")
+        self.image_1.features.refresh_from_db()
+        self.assertFalse(self.image_1.features.extracted)
+        self.assertEqual(self.image_1.features.rowcols_hash, '')
+        self.image_2.features.refresh_from_db()
+        self.assertTrue(self.image_2.features.extracted)
+
+    @override_settings(FEATURE_SCAN_WORKERS=2, FEATURE_SCAN_BATCH_SIZE=1)
+    def test_fingerprint_backfill(self):
+        Features.objects.filter(image__source=self.source).update(
+            rowcols_hash='')
+
+        with mock.patch(
+            'vision_backend.utils.load_features_rowcols_info',
+            wraps=utils.load_features_rowcols_info,
+        ) as mock_load:
+            job = self.do_check()
+        self.assertEqual(
+            mock_load.call_count, 2,
+            msg="Should load files without fingerprints")
+        self.assertEqual(
+            job.result_message, "Reset 0 invalid feature vector(s)")
+
+        for image in [self.image_1, self.image_2]:
+            image.features.refresh_from_db()
+            self.assertTrue(image.features.extracted)
+            self.assertNotEqual(
+                image.features.rowcols_hash, '',
+                msg="Fingerprint should be saved")
+
+        with mock.patch(
+            'vision_backend.utils.load_features_rowcols_info',
+            wraps=utils.load_features_rowcols_info,
+        ) as mock_load:
+            self.do_check()
+        self.assertEqual(
+            mock_load.call_count, 0,
+            msg="Later checks shouldn't load any files")
+
+    def test_missing_file(self):
+        Features.objects.filter(image=self.image_1).update(rowcols_hash='')
+        default_storage.delete(
+            settings.FEATURE_VECTOR_FILE_PATTERN.format(
+                full_image_path=self.image_1.original_file.name))
+
+        job = self.do_check()
+
+        self.assertEqual(
+            job.result_message, "Reset 1 invalid feature vector(s)")
+        self.image_1.features.refresh_from_db()
+        self.assertFalse(self.image_1.features.extracted)
+
+
 def schedule_collect_spacer_jobs():
     schedule_job('collect_spacer_jobs')
 
@@ -356,6 +458,60 @@ class CollectSpacerJobsTest(BaseTaskTest):
             self.do_collect_spacer_jobs().result_message,
             "Jobs checked/collected: 0")
 
+    @override_settings(SPACER_COLLECT_WORKERS=4)
+    def test_concurrent_collection(self):
+        images = [self.upload_image(self.user, self.source) for _ in range(5)]
+        run_scheduled_jobs_until_empty()
+
+        def mock_batcher(items, batch_size):
+            # Force a batch size of 2 so that collection has multiple
+            # batches to pipeline.
+            batch_size = 2
+            index = 0
+            while index < len(items):
+                yield items[index:index+batch_size]
+                index += batch_size
+
+        with mock.patch('vision_backend.tasks.batch_generator', mock_batcher):
+            self.assertEqual(
+                self.do_collect_spacer_jobs().result_message,
+                "Jobs checked/collected: 5 SUCCEEDED")
+
+        for image in images:
+            image.features.refresh_from_db()
+            self.assertTrue(image.features.extracted)
+
+        self.assertEqual(
+            self.do_collect_spacer_jobs().result_message,
+            "Jobs checked/collected: 0")
+
+    @override_settings(JOB_MAX_MINUTES=-1, SPACER_COLLECT_WORKERS=4)
+    def test_concurrent_collection_time_out(self):
+        for _ in range(6):
+            self.upload_image(self.user, self.source)
+        run_scheduled_jobs_until_empty()
+
+        def mock_batcher(items, batch_size):
+            batch_size = 3
+            index = 0
+            while index < len(items):
+                yield items[index:index+batch_size]
+                index += batch_size
+
+        # The 2nd batch gets prefetched before the time-out, but not
+        # collected. So it should still be collectable next time.
+        with mock.patch('vision_backend.tasks.batch_generator', mock_batcher):
+            self.assertEqual(
+                self.do_collect_spacer_jobs().result_message,
+                "Jobs checked/collected: 3 SUCCEEDED (timed out)")
+            self.assertEqual(
+                self.do_collect_spacer_jobs().result_message,
+                "Jobs checked/collected: 3 SUCCEEDED (timed out)")
+
+        self.assertEqual(
+            self.do_collect_spacer_jobs().result_message,
+            "Jobs checked/collected: 0")
+
     def test_no_multiple_runs(self):
         """
         Should block multiple existing runs of this task. That way, no spacer
@@ -14,9 +14,10 @@ from jobs.tasks import run_scheduled_jobs, run_scheduled_jobs_until_empty
 from jobs.tests.utils import do_job
 from lib.tests.utils import EmailAssertionsMixin
 from ...common import ClassifierStatuses, Extractors
+from ...evaluation import ClassifierEvaluation
 from ...models import Classifier
 from ...queues import get_queue_class
-from ...task_helpers import handle_spacer_results
+from ...task_helpers import handle_spacer_results, make_training_labels
 from .utils import (
     BaseTaskTest,
     ensure_source_check_not_scheduled,
@@ -123,6 +124,10 @@ class TrainClassifierTest(BaseTaskTest):
             len(val_res.gt),
             val_image_count * points_per_image)
 
+        # And that the backend page's evaluation is precomputed.
+        self.assertTrue(default_storage.exists(
+            settings.ROBOT_MODEL_EVALUATION_PATTERN.format(pk=classifier.pk)))
+
         self.assert_job_result_message(
             'train_classifier',
             f"New classifier accepted: {classifier.pk}")
@@ -136,6 +141,35 @@ class TrainClassifierTest(BaseTaskTest):
             msg="Should auto-populate deployed_classifier",
         )
 
+    def test_evaluation_error(self):
+        self.upload_images_for_training()
+        run_scheduled_jobs_until_empty()
+        self.do_collect_spacer_jobs()
+        run_scheduled_jobs_until_empty()
+
+        def raise_error(*args):
+            raise KeyError(1)
+
+        with (
+            mock.patch.object(ClassifierEvaluation, 'compute', raise_error),
+            self.assertLogs('vision_backend.task_helpers', 'ERROR'),
+        ):
+            self.do_collect_spacer_jobs()
+
+        classifier = self.source.classifier_set.latest('pk')
+        self.assertEqual(classifier.status, ACCEPTED)
+        self.assert_job_result_message(
+            'train_classifier',
+            f"New classifier accepted: {classifier.pk}")
+        self.source.classifier_options.refresh_from_db()
+        self.assertEqual(
+            self.source.classifier_options.deployed_classifier.pk,
+            classifier.pk,
+            msg="Evaluation errors shouldn't prevent deployment",
+        )
+        self.assertFalse(default_storage.exists(
+            settings.ROBOT_MODEL_EVALUATION_PATTERN.format(pk=classifier.pk)))
+
     @override_settings(
         TRAINING_MIN_IMAGES=3,
         NEW_CLASSIFIER_TRAIN_TH=1.1,
@@ -786,6 +820,17 @@ class AbortCasesTest(BaseTaskTest, EmailAssertionsMixin, ErrorReportTestMixin):
         self.assert_no_error_log_saved()
         self.assert_no_email()
 
+        self.assertTrue(
+            Job.objects.filter(
+                job_name='check_features_for_source',
+                arg_identifier=self.source.pk,
+                status=Job.Status.PENDING,
+            ).exists(),
+            msg="Should schedule a features check")
+        do_job(
+            'check_features_for_source', self.source.pk,
+            source_id=self.source.pk)
+
         changed_image.features.refresh_from_db()
         self.assertFalse(
             changed_image.features.extracted,
@@ -962,6 +1007,79 @@ class TrainRefValSetsTest(BaseTaskTest):
         )
         self.do_test(dict(train=10, ref=1, val=1))
 
+    def test_queries_dont_grow_with_image_count(self):
+        self.prep_images(
+            train_image_count=11,
+            val_image_count=1,
+        )
+        images = self.source.image_set.confirmed()
+
+        with self.assertNumQueries(2):
+            labels = make_training_labels(images, self.source.pk)
+
+        self.assertEqual(
+            (len(labels.train), len(labels.ref), len(labels.val)),
+            (9, 2, 1),
+        )
+        self.assertEqual(
+            labels.train.label_count + labels.ref.label_count
+            + labels.val.label_count,
+            12*2,
+            msg="Should include every annotation",
+        )
+
+    def test_manifest_rereads_only_changed_images(self):
+        self.prep_images(
+            train_image_count=11,
+            val_image_count=1,
+        )
+        images = self.source.image_set.confirmed()
+        val_image = [image for image in images if image.valset][0]
+        val_data_loc = default_storage.spacer_data_loc(
+            settings.FEATURE_VECTOR_FILE_PATTERN.format(
+                full_image_path=val_image.original_file.name))
+
+        make_training_labels(images, self.source.pk)
+
+        with self.assertNumQueries(1):
+            # No annotation query, since nothing changed.
+            labels = make_training_labels(images, self.source.pk)
+        self.assertEqual(
+            labels.train.label_count + labels.ref.label_count
+            + labels.val.label_count,
+            12*2,
+            msg="Should still include every annotation",
+        )
+
+        self.add_annotations(self.user, val_image, {1: 'C', 2: 'C'})
+
+        with self.assertNumQueries(2):
+            labels = make_training_labels(images, self.source.pk)
+        self.assertListEqual(
+            [label_id for _, _, label_id in labels.val[val_data_loc]],
+            [self.labels.get(name='C').pk]*2,
+            msg="Changed image's labels should be re-read",
+        )
+        self.assertEqual(
+            labels.train.label_count + labels.ref.label_count,
+            11*2,
+            msg="Unchanged images' labels should be kept",
+        )
+
+    def test_manifest_deleted_with_source(self):
+        self.prep_images(
+            train_image_count=11,
+            val_image_count=1,
+        )
+        make_training_labels(
+            self.source.image_set.confirmed(), self.source.pk)
+        manifest_path = settings.TRAINING_LABELS_MANIFEST_PATTERN.format(
+            source_id=self.source.pk)
+        self.assertTrue(default_storage.exists(manifest_path))
+
+        self.source.delete()
+        self.assertFalse(default_storage.exists(manifest_path))
+
 
 class LabelFilteringTest(BaseTaskTest):
 
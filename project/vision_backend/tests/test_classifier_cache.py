@@ -0,0 +1,135 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from jobs.tasks import run_scheduled_jobs
+from jobs.tests.utils import do_job
+from lib.instrumentation import get_histograms
+from lib.tests.utils import BaseTest
+from ..classifier_cache import ClassifierModelCache, classifier_model_cache
+from .tasks.utils import BaseTaskTest
+
+
+def mock_load(classifier_id):
+    # Model size is 100 bytes per classifier ID unit, for easy
+    # reasoning about the size limit.
+    return f'model {classifier_id}', classifier_id * 100
+
+
+@mock.patch.object(ClassifierModelCache, '_load', staticmethod(mock_load))
+class CacheBehaviorTest(BaseTest):
+
+    def setUp(self):
+        super().setUp()
+        self.cache = ClassifierModelCache()
+
+    def test_hits_and_misses(self):
+        self.assertEqual(self.cache.get(1), 'model 1')
+        self.assertEqual(self.cache.get(1), 'model 1')
+        self.assertEqual(self.cache.get(2), 'model 2')
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['hits'], 1)
+        self.assertEqual(stats['misses'], 2)
+        self.assertEqual(stats['entries'], 2)
+        self.assertEqual(stats['size_bytes'], 300)
+
+    @override_settings(CLASSIFIER_MODEL_CACHE_MAX_BYTES=600)
+    def test_evict_least_recently_used(self):
+        self.cache.get(1)
+        self.cache.get(2)
+        # 1 is now more recently used than 2.
+        self.cache.get(1)
+        # Total would be 700 bytes, so the LRU entry (2) should be evicted.
+        self.cache.get(4)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['evictions'], 1)
+        self.assertEqual(stats['size_bytes'], 500)
+
+        self.cache.get(1)
+        self.assertEqual(self.cache.stats()['hits'], 2, "1 should be kept")
+        self.cache.get(2)
+        self.assertEqual(
+            self.cache.stats()['misses'], 4, "2 should've been evicted")
+
+    @override_settings(CLASSIFIER_MODEL_CACHE_MAX_BYTES=250)
+    def test_too_large_to_cache(self):
+        self.cache.get(1)
+        self.cache.get(3)
+
+        stats = self.cache.stats()
+        self.assertEqual(stats['entries'], 1)
+        self.assertEqual(stats['evictions'], 0)
+        self.assertEqual(stats['size_bytes'], 100)
+
+    def test_invalidate(self):
+        self.cache.get(1)
+        self.cache.invalidate(1)
+        self.cache.get(1)
+        self.assertEqual(self.cache.stats()['misses'], 2)
+
+    def test_invalidate_from_other_process(self):
+        self.cache.get(1)
+        self.cache.get(2)
+
+        # Another process's cache. It shares the Django cache with this
+        # process, but not the in-memory entries.
+        other_cache = ClassifierModelCache()
+        other_cache.invalidate(1)
+
+        self.cache.get(1)
+        self.cache.get(2)
+        stats = self.cache.stats()
+        self.assertEqual(stats['misses'], 3, "1 should be reloaded")
+        self.assertEqual(stats['hits'], 1, "2 should still be cached")
+
+
+class ClassifyUsesCacheTest(BaseTaskTest):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.classifier = cls.upload_data_and_train_classifier()
+
+    def setUp(self):
+        super().setUp()
+        classifier_model_cache.clear()
+
+    def test_classify_jobs(self):
+        self.upload_image_and_machine_classify()
+        self.upload_image_and_machine_classify()
+
+        stats = classifier_model_cache.stats()
+        self.assertEqual(stats['misses'], 1)
+        self.assertEqual(stats['hits'], 1)
+
+    def test_instrumentation(self):
+        self.upload_image_and_machine_classify()
+        self.upload_image_and_machine_classify()
+
+        histograms = get_histograms('job')['classify_features']
+        self.assertEqual(histograms['classifier_cache_misses'].total, 1)
+        self.assertEqual(histograms['classifier_cache_hits'].total, 1)
+
+    def test_invalidate_on_deployed_classifier_change(self):
+        self.upload_image_and_machine_classify()
+        self.assertEqual(classifier_model_cache.stats()['entries'], 1)
+
+        self.source.classifier_options.trains_own_classifiers = False
+        self.source.classifier_options.deployed_classifier = None
+        self.source.classifier_options.save()
+        self.assertEqual(classifier_model_cache.stats()['entries'], 0)
+
+    def test_invalidate_on_reset_classifiers(self):
+        self.upload_image_and_machine_classify()
+        self.assertEqual(classifier_model_cache.stats()['entries'], 1)
+        # Run the source check that classify probably scheduled, since the
+        # reset job can't start while that's pending.
+        run_scheduled_jobs()
+
+        do_job(
+            'reset_classifiers_for_source', self.source.pk,
+            source_id=self.source.pk)
+        self.assertEqual(classifier_model_cache.stats()['entries'], 0)
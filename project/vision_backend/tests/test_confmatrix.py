@@ -2,8 +2,11 @@ import json
 import random
 import string
 
+import numpy as np
+
 from lib.tests.utils import BaseTest
 from vision_backend.confmatrix import ConfMatrix
+from vision_backend.evaluation import confusion_matrices_by_threshold
 
 
 class ConfMatrixBasics(BaseTest):
@@ -138,3 +141,27 @@ class ConfMatrixBasics(BaseTest):
         # pe = (((2+1)/9) * ((2+3)/9)) + (((3+3)/9) * ((1+3)/9)) = 0.48148148
         # cohens_kappa = (5/9 - 0.48148148) / (1 - 0.48148148)
         self.assertAlmostEqual(cohens_kappa, 0.1428571)
+
+
+class ConfusionMatricesByThresholdTest(BaseTest):
+
+    def test_matches_add_select(self):
+        k = 5
+        gt = [random.randrange(k) for _ in range(200)]
+        est = [random.randrange(k) for _ in range(200)]
+        # Include scores right on some thresholds.
+        scores = [random.choice([random.random(), 0.5, 0.75, 1.0])
+                  for _ in range(200)]
+        threshold_percents = np.arange(0, 100+1)
+
+        cms = confusion_matrices_by_threshold(
+            np.asarray(gt), np.asarray(est), np.asarray(scores),
+            k, threshold_percents / 100)
+
+        self.assertEqual(cms.shape, (101, k, k))
+        for threshold_percent in threshold_percents:
+            cm = ConfMatrix(k)
+            cm.add_select(gt, est, scores, threshold_percent / 100)
+            np.testing.assert_array_equal(
+                cms[threshold_percent], cm.cm,
+                err_msg=f"Threshold {threshold_percent} should match")
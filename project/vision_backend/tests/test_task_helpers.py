@@ -1,3 +1,6 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+import numpy as np
 from spacer.data_classes import DataLocation
 from spacer.messages import (
     ClassifyImageMsg,
@@ -6,13 +9,21 @@ from spacer.messages import (
     JobReturnMsg,
 )
 
-from annotations.models import Label
+from accounts.utils import get_robot_user
+from annotations.models import Annotation, Label
 from api_core.models import ApiJob, ApiJobUnit
+from images.models import Point
 from jobs.models import Job
 from jobs.tests.utils import fabricate_job
-from lib.tests.utils import ClientTest
+from lib.tests.utils import BaseTest, ClientTest
 from ..common import Extractors
-from ..task_helpers import SpacerClassifyResultHandler
+from ..models import Score
+from ..task_helpers import (
+    add_annotations,
+    add_scores,
+    SpacerClassifyResultHandler,
+    top_score_indices,
+)
 from ..utils import get_extractor
 
 
@@ -131,3 +142,141 @@ class TestDeployCollector(ClientTest):
         self.assertEqual(
             api_job_unit.result_message,
             'SomeError: File not found')
+
+
+class TopScoreIndicesTest(BaseTest):
+
+    def test_highest_first(self):
+        score_matrix = np.array([
+            [.1, .4, .2, .3],
+            [.5, .1, .3, .1],
+        ])
+        self.assertListEqual(
+            top_score_indices(score_matrix, 3).tolist(),
+            [[1, 3, 2], [0, 2, 1]],
+        )
+
+    def test_all_classes(self):
+        score_matrix = np.array([
+            [.1, .6, .3],
+        ])
+        self.assertListEqual(
+            top_score_indices(score_matrix, 3).tolist(),
+            [[1, 2, 0]],
+        )
+
+
+class AddScoresAndAnnotationsTest(ClientTest):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = cls.create_user()
+        labels = cls.create_labels(
+            cls.user, ['A', 'B', 'C', 'D', 'E', 'F', 'G'], "Group1")
+        cls.source = cls.create_source(
+            cls.user,
+            default_point_generation_method=dict(type='simple', points=5))
+        cls.create_labelset(cls.user, cls.source, labels)
+        cls.classifier = cls.create_robot(cls.source)
+        cls.label_objs = list(
+            cls.source.labelset.get_globals().order_by('name'))
+
+    def classify_return_msg(self, image, score_rows):
+        points = Point.objects.filter(image=image).order_by('id')
+        return ClassifyReturnMsg(
+            runtime=1.0,
+            scores=[
+                (point.row, point.column, scores)
+                for point, scores in zip(points, score_rows)
+            ],
+            classes=[label.pk for label in self.label_objs],
+            valid_rowcol=True,
+        )
+
+    def test_scores_diff(self):
+        image = self.upload_image(self.user, self.source)
+        score_rows = [[.3, .2, .15, .1, .1, .1, .05]] * 5
+        add_scores(
+            image.pk, self.classify_return_msg(image, score_rows),
+            self.label_objs)
+        old_score_pks = set(
+            Score.objects.filter(image=image).values_list('pk', flat=True))
+        self.assertEqual(len(old_score_pks), 5*5)
+
+        # Change only the first point's scores: A is now 0.25, and G
+        # overtakes E.
+        score_rows = (
+            [[.25, .2, .15, .1, .05, .1, .15]] + [score_rows[0]] * 4)
+        add_scores(
+            image.pk, self.classify_return_msg(image, score_rows),
+            self.label_objs)
+
+        new_scores = Score.objects.filter(image=image)
+        self.assertEqual(new_scores.count(), 5*5)
+        self.assertEqual(
+            len(old_score_pks - set(new_scores.values_list('pk', flat=True))),
+            1, "Only the score that dropped out should be replaced")
+
+        point_1_scores = {
+            score.label.name: score.score
+            for score in new_scores.filter(point__point_number=1)
+        }
+        self.assertDictEqual(
+            point_1_scores, dict(A=25, B=20, C=15, D=10, G=15))
+
+    def test_annotations_diff(self):
+        image = self.upload_image(self.user, self.source)
+        self.add_annotations(self.user, image, {1: 'A'})
+
+        score_rows = [[.3, .2, .15, .1, .1, .1, .05]] * 5
+        add_annotations(
+            image.pk, self.classify_return_msg(image, score_rows),
+            self.label_objs, self.classifier)
+        # Point 2 gets changed to B.
+        score_rows = (
+            [score_rows[0]] + [[.2, .3, .15, .1, .1, .1, .05]]
+            + [score_rows[0]] * 3)
+        summary = add_annotations(
+            image.pk, self.classify_return_msg(image, score_rows),
+            self.label_objs, self.classifier)
+
+        self.assertEqual(summary, "1 annotations changed, 3 not changed")
+        annotations = Annotation.objects.filter(image=image)
+        self.assertEqual(
+            annotations.get(point__point_number=1).user, self.user,
+            "Confirmed annotation shouldn't be overwritten")
+        annotation_2 = annotations.get(point__point_number=2)
+        self.assertEqual(annotation_2.label.name, 'B')
+        self.assertEqual(annotation_2.user, get_robot_user())
+
+    def test_num_queries_independent_of_points(self):
+        image_5_points = self.upload_image(self.user, self.source)
+        source_20_points = self.create_source(
+            self.user,
+            default_point_generation_method=dict(type='simple', points=20))
+        self.create_labelset(
+            self.user, source_20_points, self.source.labelset.get_globals())
+        classifier_20_points = self.create_robot(source_20_points)
+        image_20_points = self.upload_image(self.user, source_20_points)
+
+        query_counts = []
+        for image, classifier in [
+            (image_5_points, self.classifier),
+            (image_20_points, classifier_20_points),
+        ]:
+            # One update pass after the initial pass.
+            for score_row in [
+                [.3, .2, .15, .1, .1, .1, .05],
+                [.2, .3, .15, .1, .1, .1, .05],
+            ]:
+                res = self.classify_return_msg(image, [score_row] * 20)
+                with CaptureQueriesContext(connection) as context:
+                    add_annotations(
+                        image.pk, res, self.label_objs, classifier)
+                    add_scores(image.pk, res, self.label_objs)
+                query_counts.append(len(context.captured_queries))
+
+        self.assertEqual(query_counts[0], query_counts[2])
+        self.assertEqual(query_counts[1], query_counts[3])
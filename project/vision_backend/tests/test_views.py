@@ -1,6 +1,11 @@
 import datetime
+import json
+from unittest import mock
 
 from bs4 import BeautifulSoup
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
 from django.urls import reverse
 from django.utils import timezone
 from django.utils.html import escape
@@ -11,10 +16,17 @@ from jobs.tests.utils import do_job, fabricate_job, JobUtilsMixin
 from labels.models import Label
 from lib.tests.utils import (
     BasePermissionTest, ClientTest, HtmlAssertionsMixin, scrambled_run)
+from ..evaluation import ClassifierEvaluation
 from ..models import SourceCheckRequestEvent
 from .tasks.utils import source_check_is_scheduled, TaskTestMixin
 
 
+def store_valres(classifier, valres):
+    default_storage.save(
+        settings.ROBOT_MODEL_VALRESULT_PATTERN.format(pk=classifier.pk),
+        ContentFile(json.dumps(valres)))
+
+
 class PermissionTest(BasePermissionTest):
 
     def test_backend_main(self):
@@ -82,16 +94,7 @@ class BackendMainTest(ClientTest):
             gt=gt, est=est, scores=scores,
         )
 
-        # Add valres to the session so that we don't have to create it in S3.
-        #
-        # "Be careful: To modify the session and then save it,
-        # it must be stored in a variable first (because a new SessionStore
-        # is created every time this property is accessed)"
-        # http://stackoverflow.com/a/4454671/
-        session = self.client.session
-        session['valres'] = valres
-        session['classifier_id'] = robot.pk
-        session.save()
+        store_valres(robot, valres)
 
     def test_no_robot(self):
         self.client.force_login(self.user)
@@ -188,6 +191,34 @@ class BackendMainTest(ClientTest):
         self.assertEqual(context_cm['css_height'], 500)
         self.assertEqual(context_cm['css_width'], 600)
 
+    def test_evaluation_saved_and_reused(self):
+        self.set_valres(
+            gt=[0, 0, 0, 0, 0, 0, 1, 1, 1, 1],
+            est=[0, 0, 1, 1, 1, 1, 1, 1, 1, 0],
+            scores=[.9, .9, .9, .8, .8, .8, .8, .7, .7, .7],
+        )
+        robot = self.source.classifier_options.deployed_classifier
+
+        self.client.force_login(self.user)
+        self.client.get(self.url)
+        self.assertTrue(default_storage.exists(
+            settings.ROBOT_MODEL_EVALUATION_PATTERN.format(pk=robot.pk)))
+
+        with mock.patch.object(
+            ClassifierEvaluation, 'compute',
+        ) as mock_compute:
+            response = self.client.get(self.url, data=dict(
+                confidence_threshold='75',
+                label_mode='func',
+            ))
+        mock_compute.assert_not_called()
+
+        # 7 points above the threshold, all A or B, so all are Group1
+        # classed as Group1.
+        self.assertEqual(
+            response.context['cm']['title_'],
+            '"Confusion matrix for functional groups (acc:100.0, n: 7)"')
+
     def test_confusion_matrix_many_labels(self):
         source = self.create_source(self.user)
 
@@ -210,10 +241,7 @@ class BackendMainTest(ClientTest):
             scores=[.8]*102,
         )
 
-        session = self.client.session
-        session['valres'] = valres
-        session['classifier_id'] = robot.pk
-        session.save()
+        store_valres(robot, valres)
 
         self.client.force_login(self.user)
         response = self.client.get(reverse('backend_main', args=[source.pk]))
@@ -285,11 +313,7 @@ class BackendMainConfusionMatrixExportTest(BaseExportTest):
             scores=[.8]*10,
         )
 
-        # Add valres to the session so that we don't have to create it in S3.
-        session = self.client.session
-        session['valres'] = valres
-        session['classifier_id'] = robot.pk
-        session.save()
+        store_valres(robot, valres)
 
         self.client.force_login(self.user)
         response = self.client.post(
@@ -310,10 +334,7 @@ class BackendMainConfusionMatrixExportTest(BaseExportTest):
             est=[0, 0, 1, 1, 1, 1, 1, 1, 1, 0],
             scores=[.9, .9, .9, .8, .8, .8, .8, .7, .7, .7],
         )
-        session = self.client.session
-        session['valres'] = valres
-        session['classifier_id'] = robot.pk
-        session.save()
+        store_valres(robot, valres)
 
         self.client.force_login(self.user)
         response = self.client.post(
@@ -339,10 +360,7 @@ class BackendMainConfusionMatrixExportTest(BaseExportTest):
             est=[0, 1, 2, 0, 1, 2, 0, 1, 1, 2],
             scores=[.8]*10,
         )
-        session = self.client.session
-        session['valres'] = valres
-        session['classifier_id'] = robot.pk
-        session.save()
+        store_valres(robot, valres)
 
         self.client.force_login(self.user)
         response = self.client.post(
@@ -363,10 +381,7 @@ class BackendMainConfusionMatrixExportTest(BaseExportTest):
             est=[0, 0, 1, 1, 1, 1, 1, 1, 1, 0],
             scores=[.8]*10,
         )
-        session = self.client.session
-        session['valres'] = valres
-        session['classifier_id'] = robot.pk
-        session.save()
+        store_valres(robot, valres)
 
         local_label_a = self.source.labelset.get_labels().get(code='A')
         local_label_a.code = 'あ'
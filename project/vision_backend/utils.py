@@ -1,4 +1,6 @@
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 
 from django.conf import settings
 import numpy as np
@@ -10,7 +12,7 @@ from spacer.extractors import (
     VGG16CaffeExtractor,
 )
 
-from images.models import Image
+from images.models import Image, Point
 from jobs.models import Job
 from jobs.utils import schedule_job, schedule_job_on_commit
 from labels.models import Label, LocalLabel
@@ -89,18 +91,31 @@ def get_alleviate(estlabels, gtlabels, scores):
     if len(ths) > 250:
         ths = ths[np.linspace(0, len(ths) - 1, 250, dtype=int)]  # max 250!
     
-    # do the actual sweep.
-    accs, ratios = [], []
-    for th in ths:
-        keep_ind = scores > th
-
-        this_acc = acc(estlabels[keep_ind], gtlabels[keep_ind])
-        # Returned values should be basic floats, not numpy floats, so
-        # they can be read into Javascript once stringified.
-        accs.append(round(100 * float(this_acc), 1))
-
-        ratio = np.sum(keep_ind) / len(estlabels)
-        ratios.append(round(100 * float(ratio), 1))
+    # Do the sweep with cumulative sums over the points sorted by score,
+    # instead of re-filtering all the points for each threshold.
+    order = np.argsort(scores, kind='stable')
+    sorted_scores = scores[order]
+    sorted_correct = (estlabels == gtlabels)[order]
+    # correct_from[i] = number of correct points among sorted points i on.
+    correct_from = np.append(np.cumsum(sorted_correct[::-1])[::-1], 0)
+
+    # For each threshold, the sorted index of the first point above it.
+    first_kept = np.searchsorted(sorted_scores, ths, side='right')
+    kept_counts = len(scores) - first_kept
+    correct_counts = correct_from[first_kept]
+
+    # Returned values should be basic floats, not numpy floats, so
+    # they can be read into Javascript once stringified.
+    # As in acc(), accuracy of zero points is 1.
+    accs = [
+        round(100 * float(correct / kept), 1) if kept > 0 else 100.0
+        for correct, kept in zip(
+            correct_counts.tolist(), kept_counts.tolist())
+    ]
+    ratios = [
+        round(100 * float(kept / len(scores)), 1)
+        for kept in kept_counts.tolist()
+    ]
 
     ths = [round(100 * float(th), 1) for th in ths]
     
@@ -123,13 +138,16 @@ def labelset_mapper(labelmode, classids, source):
     Prepares mapping function and labelset names to inject in confusion matrix.
     """
     if labelmode == 'full':
-        
+
         # Label names are the abbreviated full names with code in parethesis.
-        classnames = [Label.objects.get(id=classid).name
-                      for classid in classids]
-        codes = [LocalLabel.objects.get(global_label__id=class_id,
-                                        labelset=source.labelset).code
-                 for class_id in classids]
+        names_by_id = dict(
+            Label.objects.filter(pk__in=classids).values_list('pk', 'name'))
+        codes_by_id = dict(
+            LocalLabel.objects.filter(
+                global_label_id__in=classids, labelset=source.labelset)
+            .values_list('global_label_id', 'code'))
+        classnames = [names_by_id[classid] for classid in classids]
+        codes = [codes_by_id[classid] for classid in classids]
         classmap = dict()
         for i in range(len(classnames)):
             if len(classnames[i]) > 30:
@@ -138,14 +156,17 @@ def labelset_mapper(labelmode, classids, source):
             classmap[i] = i
 
     elif labelmode == 'func':
+        group_names_by_id = dict(
+            Label.objects.filter(pk__in=classids)
+            .values_list('pk', 'group__name'))
         classmap = dict()
         classnames = []
-        for classid in classids:
-            fcnname = Label.objects.get(pk=classid).group.name
+        for class_index, classid in enumerate(classids):
+            fcnname = group_names_by_id[classid]
             if fcnname not in classnames:
                 classnames.append(fcnname)
-            classmap[classids.index(classid)] = classnames.index(fcnname)
-    
+            classmap[class_index] = classnames.index(fcnname)
+
     else:
         raise Exception('labelmode {} not recognized'.format(labelmode))
 
@@ -157,6 +178,7 @@ def clear_features(image):
 
     features = image.features
     features.extracted = False
+    features.rowcols_hash = ''
     features.save()
 
 
@@ -193,7 +215,7 @@ def reset_features_bulk(image_queryset):
     # have to get a Features QuerySet from the Image QuerySet.
     features_queryset = Features.objects.filter(image__in=image_queryset)
     # Then this resets features.
-    features_queryset.update(extracted=False)
+    features_queryset.update(extracted=False, rowcols_hash='')
 
     for source_id in source_ids:
         schedule_source_check_on_commit(source_id)
@@ -243,20 +265,119 @@ def image_features_valid(image) -> tuple[bool, str|None]:
                 " rowcols.")
 
 
-def reset_invalid_features_bulk(image_queryset):
+def rowcols_fingerprint(rowcols) -> str:
+    """
+    Order-independent fingerprint of a collection of (row, column) pairs.
+    Duplicates are ignored, matching the set comparison done in
+    image_features_valid().
+    """
+    rowcols_str = ';'.join(
+        f'{row},{column}' for row, column in sorted(set(rowcols)))
+    return hashlib.sha256(rowcols_str.encode()).hexdigest()
+
+
+def load_features_rowcols_info(
+    features: Features,
+) -> tuple[str|None, int|None, str|None]:
+    """
+    Load the feature vector file, and return:
+    1) Its rowcols fingerprint, or None if the features are legacy ones
+       without rowcols.
+    2) Its number of points.
+    3) An error description if the file couldn't be loaded, else None.
+    """
+    try:
+        image_features = features.load()
+    except (FileNotFoundError, AssertionError) as err:
+        return None, None, repr(err)
+
+    if not image_features.valid_rowcol:
+        return None, len(image_features.point_features), None
+    return (
+        rowcols_fingerprint(
+            (pf.row, pf.col) for pf in image_features.point_features),
+        len(image_features.point_features),
+        None,
+    )
+
+
+def reset_invalid_features_bulk(image_queryset) -> int:
     """
     Check if features match the actual point rows/columns in the CoralNet
     database and are otherwise valid.
-    Reset just the invalid features.
+    Reset just the invalid features, and return how many were reset.
+
+    Feature files are only loaded for features that don't have a rowcols
+    fingerprint saved yet. Those are loaded with up to
+    FEATURE_SCAN_WORKERS threads, and their fingerprints are saved, so
+    later checks are just DB comparisons. Images are processed in batches
+    which are each committed as they finish, so an interrupted check can
+    be re-run without redoing finished batches' file loads.
     """
-    image_ids_to_reset = []
-    image_queryset = image_queryset.with_features()
-    for image in image_queryset:
-        features_valid, reason = image_features_valid(image)
-        if not features_valid:
-            image_ids_to_reset.append(image.pk)
-
-    reset_features_bulk(Image.objects.filter(pk__in=image_ids_to_reset))
+    image_ids = list(
+        image_queryset.with_features().order_by('pk')
+        .values_list('pk', flat=True))
+    batch_size = settings.FEATURE_SCAN_BATCH_SIZE
+    reset_count = 0
+
+    for start in range(0, len(image_ids), batch_size):
+        batch_image_ids = image_ids[start:start+batch_size]
+
+        features_list = list(
+            Features.objects.filter(image_id__in=batch_image_ids)
+            .select_related('image'))
+
+        db_rowcols = defaultdict(list)
+        for image_id, row, column in (
+            Point.objects.filter(image_id__in=batch_image_ids)
+            .values_list('image_id', 'row', 'column')
+        ):
+            db_rowcols[image_id].append((row, column))
+
+        to_load = [
+            features for features in features_list
+            if not features.rowcols_hash]
+        if settings.FEATURE_SCAN_WORKERS > 1 and len(to_load) > 1:
+            with ThreadPoolExecutor(
+                max_workers=settings.FEATURE_SCAN_WORKERS
+            ) as executor:
+                load_results = list(
+                    executor.map(load_features_rowcols_info, to_load))
+        else:
+            load_results = [
+                load_features_rowcols_info(features)
+                for features in to_load]
+
+        invalid_image_ids = []
+        fingerprinted_features = []
+
+        for features, (fingerprint, point_count, error) in zip(
+            to_load, load_results
+        ):
+            if error:
+                invalid_image_ids.append(features.image_id)
+            elif fingerprint:
+                features.rowcols_hash = fingerprint
+                fingerprinted_features.append(features)
+            elif point_count != len(db_rowcols[features.image_id]):
+                # Legacy features without rowcols; the best we can do
+                # is compare point counts.
+                invalid_image_ids.append(features.image_id)
+
+        Features.objects.bulk_update(fingerprinted_features, ['rowcols_hash'])
+
+        for features in features_list:
+            if features.rowcols_hash and (
+                features.rowcols_hash
+                != rowcols_fingerprint(db_rowcols[features.image_id])
+            ):
+                invalid_image_ids.append(features.image_id)
+
+        if invalid_image_ids:
+            reset_features_bulk(Image.objects.filter(pk__in=invalid_image_ids))
+            reset_count += len(invalid_image_ids)
+
+    return reset_count
 
 
 def schedule_source_check(source_id, delay=None):
@@ -297,6 +418,7 @@ def source_is_finished_with_core_jobs(source_id: int) -> bool:
         'extract_features',
         'train_classifier',
         'classify_features',
+        'classify_features_batch',
         'check_source',
     ]
     incomplete_core_jobs = (
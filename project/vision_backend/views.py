@@ -11,7 +11,6 @@ from django.shortcuts import render
 from django.urls import reverse
 from django.utils import timezone
 from django.views.decorators.http import require_POST
-from spacer.data_classes import ValResults
 
 from images.models import Image
 from jobs.models import Job
@@ -21,10 +20,10 @@ from lib.utils import paginate
 from sources.models import Source
 from .common import ClassifierStatuses
 from .confmatrix import ConfMatrix
+from .evaluation import ClassifierEvaluation
 from .forms import BackendMainForm, CmTestForm
 from .models import Classifier, SourceCheckRequestEvent
-from .utils import (
-    labelset_mapper, map_labels, get_alleviate, schedule_source_check)
+from .utils import labelset_mapper, schedule_source_check
 
 
 @permission_required('is_superuser')
@@ -199,28 +198,21 @@ def backend_main(request, source_id):
         })
 
     classifier = source.classifier_options.deployed_classifier
-    if 'valres' in request.session.keys() and \
-            'classifier_id' in request.session.keys() and \
-            request.session['classifier_id'] == classifier.pk:
-        pass
-    else:
-        valres: ValResults = classifier.valres
-        request.session['valres'] = valres.serialize()
-        request.session['classifier_id'] = classifier.pk
-    
-    # Load stored variables to local namespace
-    valres: ValResults = ValResults.deserialize(request.session['valres'])
-    
-    # find classmap and class names for selected label-mode
-    classmap, classnames = labelset_mapper(label_mode, valres.classes, source)
+    evaluation = ClassifierEvaluation.get(classifier)
 
-    # Initialize confusion matrix
+    # find classmap and class names for selected label-mode
+    classmap, classnames = labelset_mapper(
+        label_mode, evaluation.classes, source)
+    if label_mode == 'func' and not evaluation.matches_func_classmap(
+            classmap):
+        # Labels' functional groups have changed since the evaluation
+        # was computed.
+        evaluation = ClassifierEvaluation.compute(classifier)
+        evaluation.save()
+
+    # Initialize confusion matrix, with the data-points above the threshold.
     cm = ConfMatrix(len(classnames), labelset=classnames)
-
-    # Add data-points above the threshold.
-    cm.add_select(map_labels(valres.gt, classmap),
-                  map_labels(valres.est, classmap), valres.scores,
-                  confidence_threshold / 100)
+    cm.cm = evaluation.confusion_matrix(label_mode, confidence_threshold)
 
     # Sort by descending order.
     cm.sort()
@@ -249,20 +241,6 @@ def backend_main(request, source_id):
     cm_render['css_height'] = max(500, cm.nclasses * 22 + 320)
     cm_render['css_width'] = max(600, cm.nclasses * 22 + 360)
 
-    # Prepare the alleviate plot if not allready in session
-    if 'alleviate_data' not in request.session.keys():
-        acc_full, ratios, confs = get_alleviate(valres.gt, valres.est,
-                                                valres.scores)
-        classmap, _ = labelset_mapper('func', valres.classes, source)
-        acc_func, _, _ = get_alleviate(map_labels(valres.gt, classmap),
-                                       map_labels(valres.est, classmap),
-                                       valres.scores)
-        request.session['alleviate'] = dict()
-        for member in ['acc_full', 'acc_func', 'ratios']:
-            request.session['alleviate'][member] = [[conf, val] for val, conf
-                                                    in
-                                                    zip(eval(member), confs)]
-
     # Handle the case where we are exporting the confusion matrix.
     if request.method == 'POST' and request.POST.get('export_cm', None):
         vecfmt = np.vectorize(myfmt)
@@ -287,7 +265,7 @@ def backend_main(request, source_id):
         'has_classifier': True,
         'source': source,
         'cm': cm_render,
-        'alleviate': request.session['alleviate'],
+        'alleviate': evaluation.alleviate_curves(),
     })
 
 
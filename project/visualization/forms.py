@@ -1,4 +1,6 @@
 import datetime
+import hashlib
+import json
 import re
 
 from django import forms
@@ -818,6 +820,37 @@ class BaseImageSearchForm(FieldsetsFormComponent, Form):
         else:
             return sorting_by_str
 
+    # Filters and sort methods whose results can change when images'
+    # annotations change.
+    annotation_dependent_fields = [
+        'annotation_status', 'last_annotated', 'last_annotator']
+    annotation_dependent_sort_methods = ['last_annotation_date']
+
+    def get_search_key(self) -> str:
+        """
+        Call this after cleaning the form to get a string which identifies
+        the image set specified by the fields, for use in cache keys.
+        """
+        sort_args, sortable_model = self._get_sort_details()
+        filters = {
+            key: value for key, value in self.cleaned_data.items()
+            if key not in ['search', 'sort_method', 'sort_direction']
+            and value not in ['', dict()]
+        }
+        search_repr = json.dumps(
+            [filters, [str(arg) for arg in sort_args], sortable_model],
+            sort_keys=True, default=str)
+        return hashlib.sha256(search_repr.encode()).hexdigest()
+
+    def results_depend_on_annotations(self) -> bool:
+        if (self.cleaned_data.get('sort_method')
+                in self.annotation_dependent_sort_methods):
+            return True
+        return any(
+            self.cleaned_data.get(field_name) not in [None, '', dict()]
+            for field_name in self.annotation_dependent_fields
+        )
+
     def get_hidden_version(self):
         """
         Copies the form's submitted data, and creates a copy of
@@ -1,5 +1,8 @@
 class BrowseActionHelper {
 
+    // Milliseconds between checks on a background export's progress.
+    exportPollInterval = 2*1000;
+
     constructor(pageImageIds) {
         this.pageImageIds = pageImageIds;
 
@@ -58,7 +61,7 @@ class BrowseActionHelper {
         else if (action === 'export_annotations') {
             formId = 'export-annotations-prep-form';
             this.isAjax = true;
-            this.actionAfterAjax = this.serveExport.bind(this);
+            this.actionAfterAjax = this.pollExport.bind(this);
         }
         else if (action === 'export_annotations_cpc') {
             formId = 'export-annotations-cpc-prep-form';
@@ -68,12 +71,12 @@ class BrowseActionHelper {
         else if (action === 'export_image_covers') {
             formId = 'export-image-covers-prep-form';
             this.isAjax = true;
-            this.actionAfterAjax = this.serveExport.bind(this);
+            this.actionAfterAjax = this.pollExport.bind(this);
         }
         else if (action === 'export_calcify_rates') {
             formId = 'export-calcify-rates-prep-form';
             this.isAjax = true;
-            this.actionAfterAjax = this.serveExport.bind(this);
+            this.actionAfterAjax = this.pollExport.bind(this);
         }
         else if (action === 'delete_images') {
             formId = 'delete-images-ajax-form';
@@ -208,6 +211,8 @@ class BrowseActionHelper {
     }
 
     ajaxActionCallback(response) {
+        let afterAjaxResult = null;
+
         if (response['error']) {
             // Response is OK, but there's an error message in the JSON.
             // TODO: Can we do better than an alert? Consider displaying the
@@ -215,12 +220,60 @@ class BrowseActionHelper {
             alert("Error: " + response['error']);
         }
         else if (this.actionAfterAjax) {
-            this.actionAfterAjax(response);
+            afterAjaxResult = this.actionAfterAjax(response);
         }
 
-        this.actionSubmitButton.disabled = false;
-        this.actionSubmitButton.textContent = "Go";
-        this.actionSelectField.disabled = false;
+        // If the after-ajax action is asynchronous, keep the action
+        // disabled until it's done.
+        return Promise.resolve(afterAjaxResult).then(() => {
+            this.actionSubmitButton.disabled = false;
+            this.actionSubmitButton.textContent = "Go";
+            this.actionSelectField.disabled = false;
+        });
+    }
+
+    async pollExport(prepResponse) {
+        // The export is being generated in the background. Check on it
+        // periodically, and serve it once it's done.
+        let pollUrl =
+            document.getElementById('export-serve-form').dataset.pollUrl;
+        let searchParams = new URLSearchParams({
+            'session_data_timestamp': prepResponse.session_data_timestamp,
+        });
+
+        while (true) {
+            await new Promise((resolve) => {
+                globalThis.setTimeout(resolve, this.exportPollInterval);
+            });
+
+            let pollResponse;
+            try {
+                pollResponse = await util.fetch(
+                    pollUrl + '?' + searchParams.toString(),
+                    {method: 'GET'});
+            }
+            catch (error) {
+                // util.fetch() has already alerted about the error.
+                return;
+            }
+
+            if (pollResponse['error']) {
+                alert("Error: " + pollResponse['error']);
+                return;
+            }
+            if (pollResponse['status'] === 'done') {
+                this.serveExport(prepResponse);
+                return;
+            }
+
+            let imagesTotal = pollResponse['images_total'];
+            if (imagesTotal) {
+                let percent = Math.floor(
+                    100 * pollResponse['images_done'] / imagesTotal);
+                this.actionSubmitButton.textContent =
+                    `Working... ${percent}%`;
+            }
+        }
     }
 
     serveExport(prepResponse) {
@@ -18,6 +18,7 @@ class Form {
             expectsSessionDataTimestamp = false,
             hasCsrf = true,
             imageFilters = 'depends on select type',
+            pollPath = null,
             promptString = null,
             returnsSessionDataTimestamp = false,
         } = {}) {
@@ -29,6 +30,7 @@ class Form {
         this.expectsSessionDataTimestamp = expectsSessionDataTimestamp;
         this.hasCsrf = hasCsrf;
         this.imageFilters = imageFilters;
+        this.pollPath = pollPath;
         this.promptString = promptString;
         this.returnsSessionDataTimestamp = returnsSessionDataTimestamp;
     }
@@ -148,6 +150,13 @@ class Form {
         fetchMock.post(
             window.location.origin + this.actionPath,
             returnObj);
+
+        if (this.pollPath) {
+            // The export is reported as done on the first poll.
+            fetchMock.get(
+                'begin:' + window.location.origin + this.pollPath,
+                {'status': 'done'});
+        }
     }
 
     /*
@@ -220,7 +229,9 @@ let formLookup = {
     ),
     export_annotations: new Form(
         'export-annotations-prep-form', '/source/1/annotation/export_prep/',
-        {actionFormParams: {field1: 'value1'}},
+        {returnsSessionDataTimestamp: true,
+         pollPath: '/source/1/export/poll_ajax/',
+         actionFormParams: {field1: 'value1'}},
     ),
     export_annotations_cpc: new Form(
         'export-annotations-cpc-prep-form',
@@ -231,12 +242,16 @@ let formLookup = {
     export_image_covers: new Form(
         'export-image-covers-prep-form',
         '/source/1/export/image_covers_prep/',
-        {actionFormParams: {field1: 'value1'}},
+        {returnsSessionDataTimestamp: true,
+         pollPath: '/source/1/export/poll_ajax/',
+         actionFormParams: {field1: 'value1'}},
     ),
     export_calcify_rates: new Form(
         'export-calcify-rates-prep-form',
         '/source/1/calcification/stats_export_prep/',
-        {actionFormParams: {field1: 'value1'}},
+        {returnsSessionDataTimestamp: true,
+         pollPath: '/source/1/export/poll_ajax/',
+         actionFormParams: {field1: 'value1'}},
     ),
     delete_images: new Form(
         'delete-images-ajax-form',
@@ -507,6 +522,8 @@ QUnit.module("Form submission", (hooks) => {
 
         useFixture(fixtureName);
         browseActionHelper = new BrowseActionHelper([1, 2, 3]);
+        // Don't wait between export progress polls.
+        browseActionHelper.exportPollInterval = 0;
 
         changeAction(actionValue);
         changeImageSelectType(imageSelectType);
@@ -541,6 +558,12 @@ QUnit.module("Form submission", (hooks) => {
     test.each(
             "Async actions with second step: success response",
             [
+                ['export_annotations', 'all', 'all_images'],
+                ['export_annotations', 'selected', 'with_search_filters'],
+                ['export_image_covers', 'all', 'all_images'],
+                ['export_image_covers', 'selected', 'with_search_filters'],
+                ['export_calcify_rates', 'all', 'all_images'],
+                ['export_calcify_rates', 'selected', 'with_search_filters'],
                 ['export_annotations_cpc', 'all', 'all_images'],
                 ['export_annotations_cpc', 'selected', 'all_images'],
                 ['export_annotations_cpc', 'all', 'with_search_filters'],
@@ -550,6 +573,8 @@ QUnit.module("Form submission", (hooks) => {
 
         useFixture(fixtureName);
         browseActionHelper = new BrowseActionHelper([1, 2, 3]);
+        // Don't wait between export progress polls.
+        browseActionHelper.exportPollInterval = 0;
 
         changeAction(actionValue);
         changeImageSelectType(imageSelectType);
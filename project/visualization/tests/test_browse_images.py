@@ -2,11 +2,15 @@ import datetime
 import re
 
 from bs4 import BeautifulSoup
+from django.db import connection
 from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from django.utils import timezone
 
 from accounts.utils import get_alleviate_user, get_imported_user
+from images.models import Image
+from images.utils import delete_images
 from lib.tests.utils import BasePermissionTest, IndexesMixin
 from sources.models import Source
 from ..forms import ImageSearchForm
@@ -1355,21 +1359,121 @@ class PagesTest(BaseBrowseImagesTest):
         self.assert_page_results(
             response, 10, "Showing 4-6 of 10", "Page 2 of 4")
 
+    def page_image_ids(self, response):
+        response_soup = BeautifulSoup(response.content, 'html.parser')
+        return [
+            self.thumb_wrapper_to_image_id(thumb_wrapper)
+            for thumb_wrapper
+            in response_soup.find_all('span', class_='thumb_wrapper')
+        ]
+
     def test_page_urls_no_params(self):
         response = self.get_browse(page=2)
-        self.assert_page_links(response, '?page=1', '?page=3')
+        # The next-page link has the last image on this page as a cursor.
+        # The previous-page link is to page 1, which doesn't need one.
+        last_pk = response.context['page_results'].object_list[2].pk
+        self.assert_page_links(
+            response, '?page=1', f'?page=3&after={last_pk}')
 
     def test_page_urls_with_search_params(self):
         response = self.get_browse(
             annotation_status='unclassified',
             page=2,
         )
+        last_pk = response.context['page_results'].object_list[2].pk
         self.assert_page_links(
             response,
             '?annotation_status=unclassified&page=1',
-            '?annotation_status=unclassified&page=3',
+            f'?annotation_status=unclassified&page=3&after={last_pk}',
+        )
+
+    def test_page_urls_with_cursor(self):
+        page_2 = self.get_browse(page=2)
+        cursor_pk = page_2.context['page_results'].object_list[2].pk
+
+        # The cursor in the request shouldn't carry over to the links.
+        response = self.get_browse(page=3, after=cursor_pk)
+        first_pk = response.context['page_results'].object_list[0].pk
+        last_pk = response.context['page_results'].object_list[2].pk
+        self.assert_page_links(
+            response,
+            f'?page=2&before={first_pk}',
+            f'?page=4&after={last_pk}',
         )
 
+    def test_after_cursor(self):
+        page_2 = self.get_browse(page=2)
+        last_pk = page_2.context['page_results'].object_list[2].pk
+
+        response = self.get_browse(page=3, after=last_pk)
+        self.assertListEqual(
+            self.page_image_ids(response),
+            self.page_image_ids(self.get_browse(page=3)),
+            msg="Should get the same page as without the cursor")
+        self.assert_page_results(
+            response, 10, "Showing 7-9 of 10", "Page 3 of 4")
+
+    def test_before_cursor(self):
+        page_3 = self.get_browse(page=3)
+        first_pk = page_3.context['page_results'].object_list[0].pk
+
+        response = self.get_browse(page=2, before=first_pk)
+        self.assertListEqual(
+            self.page_image_ids(response),
+            self.page_image_ids(self.get_browse(page=2)),
+            msg="Should get the same page as without the cursor")
+        self.assert_page_results(
+            response, 10, "Showing 4-6 of 10", "Page 2 of 4")
+
+    def test_cursor_with_search_params(self):
+        response = self.get_browse(
+            sort_method='photo_date', sort_direction='desc', page=1)
+        last_pk = response.context['page_results'].object_list[2].pk
+
+        response = self.get_browse(
+            sort_method='photo_date', sort_direction='desc',
+            page=2, after=last_pk)
+        self.assertListEqual(
+            self.page_image_ids(response),
+            self.page_image_ids(self.get_browse(
+                sort_method='photo_date', sort_direction='desc', page=2)),
+            msg="Should get the same page as without the cursor")
+
+    def test_cursor_doesnt_use_offset(self):
+        page_2 = self.get_browse(page=2)
+        last_pk = page_2.context['page_results'].object_list[2].pk
+
+        with CaptureQueriesContext(connection) as cm:
+            self.get_browse(page=3, after=last_pk)
+        for query in cm.captured_queries:
+            self.assertNotIn(
+                'OFFSET', query['sql'],
+                msg="Should seek instead of using OFFSET")
+
+    def test_deleted_cursor(self):
+        page_2 = self.get_browse(page=2)
+        last_pk = page_2.context['page_results'].object_list[2].pk
+        delete_images(Image.objects.filter(metadata__pk=last_pk))
+
+        # Falls back to the page number.
+        response = self.get_browse(page=3, after=last_pk)
+        self.assert_page_results(
+            response, 9, "Showing 7-9 of 9", "Page 3 of 3")
+
+    def test_invalid_cursor(self):
+        response = self.get_browse(page=2, after='abc', before='')
+        self.assert_page_results(
+            response, 10, "Showing 4-6 of 10", "Page 2 of 4")
+
+    def test_cursor_out_of_range(self):
+        page_2 = self.get_browse(page=2)
+        last_pk = page_2.context['page_results'].object_list[2].pk
+
+        # Falls back to the last page, like other out-of-range page numbers.
+        response = self.get_browse(page=9, after=last_pk)
+        self.assert_page_results(
+            response, 10, "Showing 10-10 of 10", "Page 4 of 4")
+
 
 class ImageStatusIndicatorTest(BaseBrowseImagesTest):
     """
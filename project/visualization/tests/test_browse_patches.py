@@ -582,10 +582,56 @@ class PagesTest(BaseBrowsePatchesTest):
             patch_label=label_a_pk,
             page=2,
         )
+        last_pk = response.context['page_results'].object_list[2].pk
         self.assert_page_links(
             response,
             f'?patch_label={label_a_pk}&page=1',
-            f'?patch_label={label_a_pk}&page=3',
+            f'?patch_label={label_a_pk}&page=3&after={last_pk}',
+        )
+
+    def page_patches(self, response):
+        response_soup = BeautifulSoup(response.content, 'html.parser')
+        return [
+            self.thumb_wrapper_to_annotation_result(thumb_wrapper)
+            for thumb_wrapper
+            in response_soup.find_all('span', class_='thumb_wrapper')
+        ]
+
+    def test_after_cursor(self):
+        label_a_pk = self.labels.get(default_code='A').pk
+        page_1 = self.get_browse(patch_label=label_a_pk)
+        last_pk = page_1.context['page_results'].object_list[2].pk
+
+        response = self.get_browse(
+            patch_label=label_a_pk, page=2, after=last_pk)
+        self.assertListEqual(
+            self.page_patches(response),
+            self.page_patches(
+                self.get_browse(patch_label=label_a_pk, page=2)),
+            msg="Should get the same page as without the cursor")
+        self.assert_page_results(
+            response, 7,
+            expected_summary="Showing 4-6 of 7",
+            expected_page_status="Page 2 of 3",
+        )
+
+    def test_before_cursor(self):
+        label_a_pk = self.labels.get(default_code='A').pk
+        page_3 = self.get_browse(patch_label=label_a_pk, page=3)
+        first_pk = page_3.context['page_results'].object_list[0].pk
+
+        response = self.get_browse(
+            patch_label=label_a_pk, page=2, before=first_pk)
+        self.assertListEqual(
+            self.page_patches(response),
+            self.page_patches(
+                self.get_browse(patch_label=label_a_pk, page=2)),
+            msg="Should get the same page as without the cursor")
+        self.assert_page_links(
+            response,
+            f'?patch_label={label_a_pk}&page=1',
+            f'?patch_label={label_a_pk}&page=3'
+            f'&after={response.context["page_results"].object_list[2].pk}',
         )
 
     # Only Browse Patches has a result-count limit.
@@ -614,6 +660,18 @@ class PagesTest(BaseBrowsePatchesTest):
         )
         self.assertContains(response, explanation)
 
+        # Seeking to the last page still stops at the limit.
+        page_2 = self.get_browse(page=2, **self.default_search_params)
+        last_pk = page_2.context['page_results'].object_list[2].pk
+        response = self.get_browse(
+            page=3, after=last_pk, **self.default_search_params)
+        self.assert_page_results(
+            response, 8,
+            expected_summary="Showing 7-8 of 8 or more",
+            expected_page_status="Page 3 of 3",
+        )
+        self.assertEqual(len(self.page_patches(response)), 2)
+
         response = self.get_browse(page=4, **self.default_search_params)
         self.assert_page_results(
             response, 8,
@@ -11,7 +11,12 @@ from django.test import override_settings
 
 from images.models import Point
 from lib.tests.utils import ClientTest
-from visualization.utils import generate_patch_if_doesnt_exist, get_patch_path
+from visualization.utils import (
+    generate_image_patches,
+    generate_patch_if_doesnt_exist,
+    generate_patches_if_dont_exist,
+    get_patch_path,
+)
 
 
 class LabelPatchGenerationTest(ClientTest):
@@ -72,6 +77,110 @@ class LabelPatchGenerationTest(ClientTest):
                       .format(repr(e)))
 
 
+@override_settings(
+    LABELPATCH_NCOLS=21,
+    LABELPATCH_NROWS=21,
+    LABELPATCH_SIZE_FRACTION=0.2,
+)
+class BatchedPatchGenerationTest(ClientTest):
+    """
+    Test generating patches of multiple points at once.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.user = cls.create_user()
+        cls.source = cls.create_source(
+            cls.user,
+            default_point_generation_method=dict(type='simple', points=3))
+        labels = cls.create_labels(cls.user, ['label1'], 'group1')
+        cls.labelset = cls.create_labelset(cls.user, cls.source, labels)
+
+    def test_one_decode_per_image(self):
+        img_1 = self.upload_image(self.user, self.source)
+        img_2 = self.upload_image(self.user, self.source)
+        points = list(
+            Point.objects.filter(image__in=[img_1, img_2])
+            .select_related('image'))
+
+        with mock.patch(
+            'visualization.utils.PILImage.open', wraps=PILImage.open,
+        ) as mock_open:
+            generate_patches_if_dont_exist(points)
+        self.assertEqual(mock_open.call_count, 2)
+
+        for point in points:
+            with default_storage.open(get_patch_path(point)) as fp:
+                patch = PILImage.open(fp)
+                self.assertEqual(patch.size, (21, 21))
+
+        with mock.patch(
+            'visualization.utils.PILImage.open', wraps=PILImage.open,
+        ) as mock_open:
+            generate_patches_if_dont_exist(points)
+        self.assertEqual(
+            mock_open.call_count, 0,
+            msg="Existing patches shouldn't be regenerated")
+
+    def test_patch_saved_during_generation(self):
+        img = self.upload_image(self.user, self.source)
+        point = img.point_set.first()
+        patch_path = get_patch_path(point)
+        patch_dir = os.path.dirname(patch_path)
+
+        # Another task saves the patch after this one decided to generate
+        # it, but before this one saves it.
+        default_storage.save(patch_path, ContentFile(b'existing patch'))
+        _, files_before = default_storage.listdir(patch_dir)
+        generate_image_patches(img, [point])
+
+        with default_storage.open(patch_path) as fp:
+            self.assertEqual(
+                fp.read(), b'existing patch',
+                msg="Existing patch should be kept")
+        _, files_after = default_storage.listdir(patch_dir)
+        self.assertListEqual(
+            sorted(files_after), sorted(files_before),
+            msg="Shouldn't save the patch under an alternate name")
+
+    def test_reduced_decode(self):
+        # Crop size is 88, which is over 4 times the patch size, so the
+        # image should get reduced by 4 before cropping.
+        blue_color = (0, 0, 255)
+        red_color = (255, 0, 0)
+        im = PILImage.new('RGB', (440, 300), color=blue_color)
+        # A red block around where the point will be, big enough that the
+        # patch's center isn't blended with any blue.
+        for x in range(170, 231):
+            for y in range(120, 181):
+                im.putpixel((x, y), red_color)
+        with BytesIO() as stream:
+            im.save(stream, 'PNG')
+            image_file = ContentFile(stream.getvalue(), name='1.png')
+        img = self.upload_image(self.user, self.source, image_file=image_file)
+
+        point = img.point_set.first()
+        point.column = 200
+        point.row = 150
+        point.save()
+
+        with (
+            mock.patch.object(PILImage.Image, 'save', always_save_png),
+            mock.patch.object(
+                PILImage.Image, 'reduce', autospec=True,
+                side_effect=PILImage.Image.reduce) as mock_reduce,
+        ):
+            generate_patch_if_doesnt_exist(point)
+        self.assertEqual(mock_reduce.call_args.args[1], 4)
+
+        with default_storage.open(get_patch_path(point)) as fp:
+            patch = PILImage.open(fp)
+            self.assertEqual(patch.size, (21, 21))
+            self.assertEqual(patch.getpixel((10, 10)), red_color)
+            self.assertEqual(patch.getpixel((0, 0)), blue_color)
+
+
 def always_save_png(self, fp, format=None, **params):
     """
     Mock version of PIL's Image.save().
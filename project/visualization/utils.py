@@ -49,20 +49,65 @@ def generate_patch_if_doesnt_exist(point):
     :param point: Point object to generate a patch for
     :return: None
     """
+    generate_patches_if_dont_exist([point])
 
-    # Check if patch exists for the point
-    patch_relative_path = get_patch_path(point)
-    if default_storage.exists(patch_relative_path):
-        return
+
+def generate_patches_if_dont_exist(points):
+    """
+    Generate image patch files for any of these points which don't have
+    one yet.
+
+    Points are grouped by image, so that each original image is only
+    opened and decoded once, however many of its points need patches.
+    :param points: Point objects to generate patches for
+    :return: None
+    """
+    points_by_image_id = dict()
+    images_by_id = dict()
+    for point in points:
+        # Check if patch exists for the point
+        if default_storage.exists(get_patch_path(point)):
+            continue
+        points_by_image_id.setdefault(point.image_id, []).append(point)
+        images_by_id[point.image_id] = point.image
+
+    for image_id, image_points in points_by_image_id.items():
+        generate_image_patches(images_by_id[image_id], image_points)
+
+
+def patch_decode_reduction(approx_region_size):
+    """
+    Factor by which the original image can be downscaled while still
+    leaving each patch's region at least as large as the final patch size.
+    Pillow can decode JPEGs directly at 1/2, 1/4, or 1/8 scale, which is
+    much faster than decoding at full size.
+    """
+    factor = 1
+    while (
+        factor < 8
+        and approx_region_size // (factor * 2) >= max(
+            settings.LABELPATCH_NCOLS, settings.LABELPATCH_NROWS)
+    ):
+        factor *= 2
+    return factor
+
+
+def generate_image_patches(image, points):
+    """
+    Generate patches for the given points, which must all be on this
+    image. A patch that exists by the time it's about to be saved (for
+    example, generated by a concurrent task) is left as is, since
+    saving over it would create a differently-named, orphaned file.
+    """
 
     # Locate the image.
-    image = point.image
     original_image_relative_path = image.original_file.name
 
     # Figure out the size to crop out of the original image. Base it on the
     # larger of the two image dimensions.
     approx_region_size = int(max(image.original_width, image.original_height)
                              * settings.LABELPATCH_SIZE_FRACTION)
+    reduction = patch_decode_reduction(approx_region_size)
 
     # Open the image file.
     with default_storage.open(
@@ -71,37 +116,59 @@ def generate_patch_if_doesnt_exist(point):
         # Load the image with Pillow.
         im = PILImage.open(original_image_file)
 
+        if reduction > 1:
+            # For JPEGs, this makes the decoder itself downscale by up to
+            # the requested factor. For other formats it does nothing.
+            im.draft('RGB', (
+                image.original_width // reduction,
+                image.original_height // reduction))
+
         # Convert to RGB, since the input may have an alpha (transparency)
         # channel, and we're saving the thumbnail as JPEG which doesn't
         # have alpha.
         im = im.convert('RGB')
 
-    # Crop.
-    # - Both CoralNet coordinates and Pillow coordinates start from 0 at the
-    # top left.
-    # https://pillow.readthedocs.io/en/stable/handbook/concepts.html#coordinate-system
-    # - crop() includes the low bounds and excludes the high bounds, so we
-    # add +1 to the high bounds so that the point ends up in the center of the
-    # region, rather than a half-pixel off.
-    # - The region is always odd-sized, and either equal to or 1 greater
-    # than the approx_region_size.
-    region = im.crop((
-        point.column - (approx_region_size // 2),
-        point.row - (approx_region_size // 2),
-        point.column + (approx_region_size // 2) + 1,
-        point.row + (approx_region_size // 2) + 1
-    ))
-
-    # Resize to the desired size for the final patch.
-    region = region.resize((settings.LABELPATCH_NCOLS,
-                            settings.LABELPATCH_NROWS))
-
-    # Save the patch image.
-    # First use Pillow's save() method on an IO stream
-    # (so we don't have to create a temporary file).
-    # Then save the image, using the path constructed earlier
-    # and the contents of the stream.
-    # This approach should work with both local and remote storage.
-    with BytesIO() as stream:
-        region.save(stream, 'JPEG')
-        default_storage.save(patch_relative_path, stream)
+    if reduction > 1:
+        # Finish downscaling if draft() didn't do it all (or anything).
+        remaining_reduction = reduction * im.width // image.original_width
+        if remaining_reduction > 1:
+            im = im.reduce(remaining_reduction)
+    # Original-image pixels per pixel of im.
+    scale = image.original_width / im.width
+
+    for point in points:
+        # Crop.
+        # - Both CoralNet coordinates and Pillow coordinates start from 0 at
+        # the top left.
+        # https://pillow.readthedocs.io/en/stable/handbook/concepts.html#coordinate-system
+        # - crop() includes the low bounds and excludes the high bounds, so
+        # we add +1 to the high bounds so that the point ends up in the
+        # center of the region, rather than a half-pixel off.
+        # - The region is always odd-sized, and either equal to or 1 greater
+        # than the approx_region_size.
+        box = (
+            point.column - (approx_region_size // 2),
+            point.row - (approx_region_size // 2),
+            point.column + (approx_region_size // 2) + 1,
+            point.row + (approx_region_size // 2) + 1
+        )
+        if scale != 1:
+            box = tuple(round(coordinate / scale) for coordinate in box)
+        region = im.crop(box)
+
+        # Resize to the desired size for the final patch.
+        region = region.resize((settings.LABELPATCH_NCOLS,
+                                settings.LABELPATCH_NROWS))
+
+        # Save the patch image.
+        # First use Pillow's save() method on an IO stream
+        # (so we don't have to create a temporary file).
+        # Then save the image, using the patch path and the contents of
+        # the stream.
+        # This approach should work with both local and remote storage.
+        patch_path = get_patch_path(point)
+        if default_storage.exists(patch_path):
+            continue
+        with BytesIO() as stream:
+            region.save(stream, 'JPEG')
+            default_storage.save(patch_path, stream)
@@ -2,6 +2,7 @@ from django.conf import settings
 from django.contrib import messages
 from django.core.exceptions import ValidationError
 from django.db import transaction
+from django.db.models import F
 from django.db.models.functions import Lower
 from django.forms import modelformset_factory
 from django.forms.formsets import formset_factory
@@ -24,11 +25,13 @@ from images.utils import (
     delete_images,
     image_level_instance_swap,
     image_level_queryset_iterator,
+    NON_NULL_ORDERING_EXPRS,
 )
 from labels.models import LabelGroup, Label
 from lib.decorators import source_visibility_required, source_permission_required
 from lib.forms import get_one_form_error
-from lib.utils import paginate
+from lib.utils import (
+    DEFAULT_NON_NULL_ORDERING_EXPRS, paginate_by_keyset)
 from sources.models import Source
 from .forms import (
     BatchImageDeleteCountForm,
@@ -67,16 +70,18 @@ def browse_images(request, source_id):
             hidden_image_form = image_search_form.get_hidden_version()
         else:
             empty_message = "Search parameters were invalid."
-            # If this isn't ordered, paginate() emits a warning.
+            # If this isn't ordered, the paginator emits a warning.
             search_results = Image.objects.none().order_by('pk')
     else:
         # Page landing without filter params
         search_results = source.metadata_set.order_by(Lower('name'))
 
-    page_results = paginate(
+    page_results = paginate_by_keyset(
         search_results,
         settings.BROWSE_DEFAULT_THUMBNAILS_PER_PAGE,
-        request.GET)
+        request.GET,
+        non_null_ordering_exprs=NON_NULL_ORDERING_EXPRS,
+    )
 
     # page_results can be Image, Metadata, or ImageAnnotationInfo. Earlier we
     # favored the one that most closely matches the way we're sorting, to
@@ -279,14 +284,19 @@ def browse_patches(request, source_id):
             " corresponding to annotated points."
         )
 
-    # Random order
-    annotation_results = annotation_results.order_by('scrambled_sort_key')
+    # Random order. pk breaks ties, so that pages can be found by seeking.
+    annotation_results = annotation_results.order_by(
+        'scrambled_sort_key', 'pk')
 
-    page_results = paginate(
+    page_results = paginate_by_keyset(
         annotation_results,
         settings.BROWSE_DEFAULT_THUMBNAILS_PER_PAGE,
         request.GET,
         count_limit=settings.BROWSE_PATCHES_RESULT_LIMIT,
+        non_null_ordering_exprs=[
+            *DEFAULT_NON_NULL_ORDERING_EXPRS,
+            (Annotation, F('scrambled_sort_key')),
+        ],
     )
 
     # Using select_related() on object_list greatly complicates the
@@ -301,7 +311,7 @@ def browse_patches(request, source_id):
     page_annotations = (
         Annotation.objects.filter(pk__in=page_annotation_ids)
         .select_related('point', 'point__image', 'point__image__metadata')
-        .order_by('scrambled_sort_key')
+        .order_by('scrambled_sort_key', 'pk')
     )
 
     return render(request, 'visualization/browse_patches.html', {